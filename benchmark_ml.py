@@ -0,0 +1,155 @@
+"""
+Sistema de Inventário Web - Benchmark da inferência dos modelos ML
+Compara a predição linha a linha (o código original de predict_maintenance_needs,
+detect_anomalies e da simulação de estoque dia a dia, mantido aqui como
+referência) com as APIs em lote do MachineLearningManager, sobre os mesmos
+dados, e confere que os resultados são iguais.
+
+Por padrão treina os modelos base em memória (nada é registrado); com
+--registro usa as versões ativas do registro de modelos.
+
+Uso:
+    python benchmark_ml.py                          # 1000 linhas, horizonte de 30 dias
+    python benchmark_ml.py --linhas 5000 --dias 90 --repeticoes 5 --registro
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from modules.machine_learning_avancado import MachineLearningManager
+
+
+def medir(funcao: Callable[[], Any], repeticoes: int) -> tuple[float, Any]:
+    """Melhor tempo (s) entre as repetições e o resultado da última"""
+    melhor, resultado = float('inf'), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def manutencao_por_linha(manager: MachineLearningManager, equipment_data: dict[str, Any]) -> float:
+    """predict_maintenance_needs original: um transform/predict por equipamento"""
+    model, scaler = manager._modelo_ativo('maintenance_prediction')
+    features = np.array([[
+        equipment_data.get('horas_uso', 500),
+        equipment_data.get('temperatura_media', 45),
+        equipment_data.get('vibracao_media', 3.5),
+        equipment_data.get('idade_equipamento', 2),
+        equipment_data.get('manutencoes_anteriores', 3)
+    ]])
+    return model.predict(scaler.transform(features))[0]
+
+
+def anomalia_por_linha(manager: MachineLearningManager, sensor_data: dict[str, Any]) -> float:
+    """detect_anomalies original: decision_function e predict por leitura"""
+    model, scaler = manager._modelo_ativo('anomaly_detection')
+    features = np.array([[
+        sensor_data.get('temperatura', 45),
+        sensor_data.get('vibracao', 3.5),
+        sensor_data.get('pressao', 2.1)
+    ]])
+    features_scaled = scaler.transform(features)
+    anomaly_score = model.decision_function(features_scaled)[0]
+    model.predict(features_scaled)
+    return anomaly_score
+
+
+def simular_dia_a_dia(manager: MachineLearningManager, estoque: float, dias: int) -> list[float]:
+    """Simulação de estoque original: uma predição por dia do horizonte"""
+    model, scaler = manager._modelo_ativo('inventory_optimization')
+    hoje = datetime.now()
+    previsoes = []
+    for dia in range(dias):
+        data = hoje + timedelta(days=dia)
+        features = np.array([[dia, data.weekday(), data.month - 1, estoque]])
+        demanda = model.predict(scaler.transform(features))[0]
+        previsoes.append(demanda)
+        estoque = max(0, estoque - demanda)
+    return previsoes
+
+
+def dados_sinteticos(linhas: int, semente: int = 7) -> tuple[pd.DataFrame, pd.DataFrame]:
+    gerador = np.random.default_rng(semente)
+    equipamentos = pd.DataFrame({
+        'horas_uso': gerador.normal(500, 150, linhas),
+        'temperatura_media': gerador.normal(45, 15, linhas),
+        'vibracao_media': gerador.normal(3.5, 1.2, linhas),
+        'idade_equipamento': gerador.exponential(2, linhas),
+        'manutencoes_anteriores': gerador.poisson(3, linhas),
+    })
+    leituras = pd.DataFrame({
+        'temperatura': gerador.normal(45, 12, linhas),
+        'vibracao': gerador.normal(3.5, 1.5, linhas),
+        'pressao': gerador.normal(2.1, 0.5, linhas),
+    })
+    return equipamentos, leituras
+
+
+def executar(manager: MachineLearningManager, linhas: int = 1000, dias: int = 30,
+             repeticoes: int = 3) -> list[dict[str, Any]]:
+    """Mede cada operação nos dois caminhos e devolve uma linha de resultado por operação"""
+    equipamentos, leituras = dados_sinteticos(linhas)
+    registros_equip = equipamentos.to_dict('records')
+    registros_leit = leituras.to_dict('records')
+
+    casos = [
+        ('Manutenção', linhas,
+         lambda: [manutencao_por_linha(manager, r) for r in registros_equip],
+         lambda: manager.predict_maintenance_batch(equipamentos)['dias_ate_manutencao'].tolist()),
+        ('Anomalias', linhas,
+         lambda: [anomalia_por_linha(manager, r) for r in registros_leit],
+         lambda: manager.detect_anomalies_batch(leituras)['score'].tolist()),
+        ('Estoque', dias,
+         lambda: simular_dia_a_dia(manager, 150, dias),
+         lambda: manager.predict_demand_batch(150, dias).tolist()),
+    ]
+
+    resultados = []
+    for operacao, quantidade, por_linha, em_lote in casos:
+        tempo_linha, esperado = medir(por_linha, repeticoes)
+        tempo_lote, obtido = medir(em_lote, repeticoes)
+        resultados.append({
+            'operacao': operacao,
+            'linhas': quantidade,
+            'por_linha_ms': tempo_linha * 1000,
+            'lote_ms': tempo_lote * 1000,
+            'linhas_s_por_linha': quantidade / tempo_linha,
+            'linhas_s_lote': quantidade / tempo_lote,
+            'ganho': tempo_linha / tempo_lote,
+            'iguais': bool(np.allclose(esperado, obtido)),
+        })
+    return resultados
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark da inferência linha a linha x em lote')
+    parser.add_argument('--linhas', type=int, default=1000, help='equipamentos e leituras por rodada')
+    parser.add_argument('--dias', type=int, default=30, help='horizonte da simulação de estoque')
+    parser.add_argument('--repeticoes', type=int, default=3, help='rodadas por medição (vale a melhor)')
+    parser.add_argument('--registro', action='store_true', help='usar as versões ativas do registro')
+    args = parser.parse_args(argv)
+
+    manager = MachineLearningManager()
+    if not args.registro:
+        manager.initialize_base_models()
+
+    resultados = executar(manager, args.linhas, args.dias, args.repeticoes)
+    print(f"\n{'Operação':<12}{'Linhas':>8}{'Por linha (ms)':>16}{'Lote (ms)':>12}"
+          f"{'Linhas/s (1x1)':>16}{'Linhas/s (lote)':>17}{'Ganho':>9}")
+    for r in resultados:
+        print(f"{r['operacao']:<12}{r['linhas']:>8}{r['por_linha_ms']:>16.1f}{r['lote_ms']:>12.1f}"
+              f"{r['linhas_s_por_linha']:>16.0f}{r['linhas_s_lote']:>17.0f}{r['ganho']:>8.1f}x"
+              f"{'' if r['iguais'] else '  RESULTADOS DIFERENTES'}")
+    return 0 if all(r['iguais'] for r in resultados) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+-- 0002 - Auditoria avançada (AuditoriaAvancada._criar_tabelas_auditoria)
+
+CREATE TABLE IF NOT EXISTS auditoria_logs (
+    id SERIAL PRIMARY KEY,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    usuario_id INTEGER,
+    usuario_nome VARCHAR(255),
+    usuario_email VARCHAR(255),
+    usuario_perfil VARCHAR(50),
+    sessao_id VARCHAR(255),
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    modulo VARCHAR(100) NOT NULL,
+    acao VARCHAR(100) NOT NULL,
+    entidade VARCHAR(100),
+    entidade_id INTEGER,
+    dados_antes JSONB,
+    dados_depois JSONB,
+    dados_contexto JSONB,
+    resultado VARCHAR(20) DEFAULT 'sucesso',
+    erro_detalhes TEXT,
+    tempo_execucao_ms INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS auditoria_sessoes (
+    id SERIAL PRIMARY KEY,
+    usuario_id INTEGER REFERENCES usuarios(id),
+    sessao_id VARCHAR(255) UNIQUE,
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    inicio_sessao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fim_sessao TIMESTAMP,
+    ativa BOOLEAN DEFAULT TRUE,
+    total_acoes INTEGER DEFAULT 0,
+    ultima_atividade TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS auditoria_acessos (
+    id SERIAL PRIMARY KEY,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    email VARCHAR(255),
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    resultado VARCHAR(20), -- 'sucesso', 'falha', 'bloqueado'
+    motivo_falha TEXT,
+    tentativas_consecutivas INTEGER DEFAULT 1
+);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_logs_timestamp ON auditoria_logs(timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_logs_usuario ON auditoria_logs(usuario_id);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_logs_modulo ON auditoria_logs(modulo);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_logs_acao ON auditoria_logs(acao);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_sessoes_usuario ON auditoria_sessoes(usuario_id);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_acessos_email ON auditoria_acessos(email);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_acessos_timestamp ON auditoria_acessos(timestamp);
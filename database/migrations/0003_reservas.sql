@@ -0,0 +1,13 @@
+-- 0003 - Reservas de equipamentos (ReservaManager)
+
+CREATE TABLE IF NOT EXISTS reservas (
+    id SERIAL PRIMARY KEY,
+    tipo_equipamento VARCHAR(20) NOT NULL,
+    equipamento_id INTEGER NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    data_inicio TIMESTAMP NOT NULL,
+    data_fim TIMESTAMP NOT NULL,
+    observacoes TEXT,
+    status VARCHAR(20) DEFAULT 'ativa',
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
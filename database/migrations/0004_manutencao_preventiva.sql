@@ -0,0 +1,28 @@
+-- 0004 - Manutenção preventiva (ManutencaoPreventivaManager)
+
+CREATE TABLE IF NOT EXISTS planos_manutencao (
+    id SERIAL PRIMARY KEY,
+    nome VARCHAR(100) NOT NULL,
+    descricao TEXT,
+    periodicidade_dias INTEGER NOT NULL,
+    tipo_equipamento VARCHAR(20),
+    checklist JSONB,
+    ativo BOOLEAN DEFAULT TRUE,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS manutencoes_programadas (
+    id SERIAL PRIMARY KEY,
+    equipamento_id INTEGER NOT NULL,
+    data_agendada DATE NOT NULL,
+    descricao TEXT,
+    realizada BOOLEAN DEFAULT FALSE,
+    data_realizacao DATE,
+    observacoes TEXT,
+    responsavel VARCHAR(100),
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_manutencoes_equipamento ON manutencoes_programadas(equipamento_id);
+
+CREATE INDEX IF NOT EXISTS idx_manutencoes_data ON manutencoes_programadas(data_agendada);
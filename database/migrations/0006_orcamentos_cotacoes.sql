@@ -0,0 +1,99 @@
+-- 0006 - Orçamentos e cotações (OrcamentosManager)
+
+CREATE TABLE IF NOT EXISTS fornecedores (
+    id SERIAL PRIMARY KEY,
+    nome VARCHAR(255) NOT NULL,
+    cnpj VARCHAR(18) UNIQUE,
+    razao_social VARCHAR(255),
+    email VARCHAR(255),
+    telefone VARCHAR(20),
+    endereco TEXT,
+    cidade VARCHAR(100),
+    estado VARCHAR(2),
+    cep VARCHAR(10),
+    contato_responsavel VARCHAR(255),
+    especialidades TEXT[],
+    avaliacao_qualidade INTEGER DEFAULT 5,
+    prazo_entrega_padrao INTEGER DEFAULT 7,
+    condicoes_pagamento VARCHAR(100),
+    observacoes TEXT,
+    ativo BOOLEAN DEFAULT TRUE,
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS solicitacoes_cotacao (
+    id SERIAL PRIMARY KEY,
+    titulo VARCHAR(255) NOT NULL,
+    descricao TEXT,
+    tipo_produto VARCHAR(100),
+    categoria VARCHAR(100),
+    especificacoes JSONB,
+    quantidade DECIMAL(10,3),
+    unidade_medida VARCHAR(20),
+    prazo_entrega_desejado DATE,
+    orcamento_maximo DECIMAL(15,2),
+    usuario_solicitante_id INTEGER,
+    obra_destino_id INTEGER,
+    urgencia VARCHAR(20) DEFAULT 'normal',
+    status VARCHAR(50) DEFAULT 'rascunho',
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_abertura TIMESTAMP,
+    data_fechamento TIMESTAMP,
+    cotacao_vencedora_id INTEGER,
+    observacoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS cotacoes_recebidas (
+    id SERIAL PRIMARY KEY,
+    solicitacao_id INTEGER REFERENCES solicitacoes_cotacao(id),
+    fornecedor_id INTEGER REFERENCES fornecedores(id),
+    preco_unitario DECIMAL(15,2),
+    preco_total DECIMAL(15,2),
+    prazo_entrega INTEGER,
+    condicoes_pagamento VARCHAR(100),
+    validade_cotacao INTEGER DEFAULT 30,
+    observacoes TEXT,
+    qualidade_estimada INTEGER DEFAULT 5,
+    confiabilidade_fornecedor INTEGER DEFAULT 5,
+    score_total DECIMAL(5,2),
+    data_cotacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_validade DATE,
+    status VARCHAR(50) DEFAULT 'ativa',
+    desconto_percentual DECIMAL(5,2) DEFAULT 0,
+    impostos_inclusos BOOLEAN DEFAULT TRUE,
+    frete_incluido BOOLEAN DEFAULT FALSE,
+    valor_frete DECIMAL(10,2) DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS historico_precos (
+    id SERIAL PRIMARY KEY,
+    tipo_produto VARCHAR(100),
+    categoria VARCHAR(100),
+    descricao_produto TEXT,
+    fornecedor_id INTEGER REFERENCES fornecedores(id),
+    preco_unitario DECIMAL(15,2),
+    unidade_medida VARCHAR(20),
+    data_cotacao DATE,
+    origem VARCHAR(50),
+    origem_id INTEGER,
+    qualidade INTEGER DEFAULT 5,
+    observacoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS contratos_fornecedores (
+    id SERIAL PRIMARY KEY,
+    fornecedor_id INTEGER REFERENCES fornecedores(id),
+    solicitacao_id INTEGER REFERENCES solicitacoes_cotacao(id),
+    cotacao_id INTEGER REFERENCES cotacoes_recebidas(id),
+    numero_contrato VARCHAR(100),
+    valor_total DECIMAL(15,2),
+    data_assinatura DATE,
+    data_inicio DATE,
+    data_fim_prevista DATE,
+    status VARCHAR(50) DEFAULT 'ativo',
+    tipo_contrato VARCHAR(50),
+    condicoes_especiais TEXT,
+    multas_atrasos DECIMAL(10,2),
+    bonificacoes DECIMAL(10,2),
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,189 @@
+-- 0007 - Faturamento (FaturamentoManager)
+
+CREATE TABLE IF NOT EXISTS clientes_faturamento (
+    id SERIAL PRIMARY KEY,
+    nome_fantasia VARCHAR(255) NOT NULL,
+    razao_social VARCHAR(255),
+    tipo_pessoa CHAR(2) CHECK (tipo_pessoa IN ('PF', 'PJ')),
+    cpf_cnpj VARCHAR(18) UNIQUE,
+    inscricao_estadual VARCHAR(50),
+    inscricao_municipal VARCHAR(50),
+    endereco_logradouro VARCHAR(255),
+    endereco_numero VARCHAR(20),
+    endereco_complemento VARCHAR(100),
+    endereco_bairro VARCHAR(100),
+    endereco_cidade VARCHAR(100),
+    endereco_estado VARCHAR(2),
+    endereco_cep VARCHAR(10),
+    telefone VARCHAR(20),
+    email VARCHAR(255),
+    contato_responsavel VARCHAR(255),
+    prazo_pagamento_padrao INTEGER DEFAULT 30,
+    limite_credito DECIMAL(15,2) DEFAULT 0,
+    regime_tributario VARCHAR(50),
+    observacoes TEXT,
+    ativo BOOLEAN DEFAULT TRUE,
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS produtos_servicos (
+    id SERIAL PRIMARY KEY,
+    codigo VARCHAR(50) UNIQUE NOT NULL,
+    descricao VARCHAR(255) NOT NULL,
+    tipo VARCHAR(20) CHECK (tipo IN ('produto', 'servico')),
+    unidade_medida VARCHAR(20),
+    preco_unitario DECIMAL(15,2),
+    codigo_ncm VARCHAR(20),
+    codigo_cest VARCHAR(20),
+    cfop_padrao VARCHAR(10),
+    cst_icms VARCHAR(10),
+    cst_ipi VARCHAR(10),
+    cst_pis VARCHAR(10),
+    cst_cofins VARCHAR(10),
+    aliquota_icms DECIMAL(5,2) DEFAULT 0,
+    aliquota_ipi DECIMAL(5,2) DEFAULT 0,
+    aliquota_pis DECIMAL(5,2) DEFAULT 0,
+    aliquota_cofins DECIMAL(5,2) DEFAULT 0,
+    conta_contabil VARCHAR(20),
+    observacoes TEXT,
+    ativo BOOLEAN DEFAULT TRUE,
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS notas_fiscais (
+    id SERIAL PRIMARY KEY,
+    numero_nf BIGINT NOT NULL,
+    serie VARCHAR(10) DEFAULT '001',
+    tipo_nf VARCHAR(20) CHECK (tipo_nf IN ('saida', 'entrada')),
+    modelo_nf VARCHAR(10) DEFAULT '55',
+    cliente_id INTEGER REFERENCES clientes_faturamento(id),
+    data_emissao DATE DEFAULT CURRENT_DATE,
+    data_saida TIMESTAMP,
+    natureza_operacao VARCHAR(100),
+    valor_produtos DECIMAL(15,2) DEFAULT 0,
+    valor_servicos DECIMAL(15,2) DEFAULT 0,
+    valor_desconto DECIMAL(15,2) DEFAULT 0,
+    valor_frete DECIMAL(15,2) DEFAULT 0,
+    valor_seguro DECIMAL(15,2) DEFAULT 0,
+    outras_despesas DECIMAL(15,2) DEFAULT 0,
+    base_calculo_icms DECIMAL(15,2) DEFAULT 0,
+    valor_icms DECIMAL(15,2) DEFAULT 0,
+    base_calculo_icms_st DECIMAL(15,2) DEFAULT 0,
+    valor_icms_st DECIMAL(15,2) DEFAULT 0,
+    valor_ipi DECIMAL(15,2) DEFAULT 0,
+    valor_pis DECIMAL(15,2) DEFAULT 0,
+    valor_cofins DECIMAL(15,2) DEFAULT 0,
+    valor_total DECIMAL(15,2) DEFAULT 0,
+    status_nf VARCHAR(50) DEFAULT 'rascunho',
+    chave_acesso VARCHAR(44),
+    numero_protocolo VARCHAR(50),
+    xml_nf TEXT,
+    observacoes TEXT,
+    usuario_emissao_id INTEGER,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_cancelamento TIMESTAMP,
+    motivo_cancelamento TEXT
+);
+
+CREATE TABLE IF NOT EXISTS itens_nota_fiscal (
+    id SERIAL PRIMARY KEY,
+    nota_fiscal_id INTEGER REFERENCES notas_fiscais(id),
+    produto_servico_id INTEGER REFERENCES produtos_servicos(id),
+    numero_item INTEGER NOT NULL,
+    codigo_produto VARCHAR(50),
+    descricao VARCHAR(255),
+    cfop VARCHAR(10),
+    unidade_comercial VARCHAR(20),
+    quantidade_comercial DECIMAL(15,3),
+    valor_unitario_comercial DECIMAL(15,2),
+    valor_total_bruto DECIMAL(15,2),
+    unidade_tributavel VARCHAR(20),
+    quantidade_tributavel DECIMAL(15,3),
+    valor_unitario_tributavel DECIMAL(15,2),
+    valor_desconto_item DECIMAL(15,2) DEFAULT 0,
+    valor_frete_item DECIMAL(15,2) DEFAULT 0,
+    valor_seguro_item DECIMAL(15,2) DEFAULT 0,
+    outras_despesas_item DECIMAL(15,2) DEFAULT 0,
+    compoe_valor_total BOOLEAN DEFAULT TRUE,
+    valor_total_item DECIMAL(15,2),
+    -- Impostos do item
+    cst_icms VARCHAR(10),
+    origem_mercadoria VARCHAR(2),
+    modalidade_bc_icms VARCHAR(2),
+    base_calculo_icms_item DECIMAL(15,2) DEFAULT 0,
+    aliquota_icms_item DECIMAL(5,2) DEFAULT 0,
+    valor_icms_item DECIMAL(15,2) DEFAULT 0,
+    cst_ipi VARCHAR(10),
+    classe_enquadramento_ipi VARCHAR(10),
+    codigo_produto_anp VARCHAR(20),
+    base_calculo_ipi DECIMAL(15,2) DEFAULT 0,
+    aliquota_ipi_item DECIMAL(5,2) DEFAULT 0,
+    valor_ipi_item DECIMAL(15,2) DEFAULT 0,
+    cst_pis VARCHAR(10),
+    base_calculo_pis DECIMAL(15,2) DEFAULT 0,
+    aliquota_pis_item DECIMAL(5,2) DEFAULT 0,
+    valor_pis_item DECIMAL(15,2) DEFAULT 0,
+    cst_cofins VARCHAR(10),
+    base_calculo_cofins DECIMAL(15,2) DEFAULT 0,
+    aliquota_cofins_item DECIMAL(5,2) DEFAULT 0,
+    valor_cofins_item DECIMAL(15,2) DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS contas_receber (
+    id SERIAL PRIMARY KEY,
+    nota_fiscal_id INTEGER REFERENCES notas_fiscais(id),
+    cliente_id INTEGER REFERENCES clientes_faturamento(id),
+    numero_titulo VARCHAR(50),
+    parcela INTEGER DEFAULT 1,
+    total_parcelas INTEGER DEFAULT 1,
+    valor_original DECIMAL(15,2),
+    valor_atual DECIMAL(15,2),
+    data_emissao DATE DEFAULT CURRENT_DATE,
+    data_vencimento DATE NOT NULL,
+    data_pagamento DATE,
+    forma_pagamento VARCHAR(50),
+    valor_pago DECIMAL(15,2) DEFAULT 0,
+    valor_desconto DECIMAL(15,2) DEFAULT 0,
+    valor_juros DECIMAL(15,2) DEFAULT 0,
+    valor_multa DECIMAL(15,2) DEFAULT 0,
+    observacoes TEXT,
+    status VARCHAR(50) DEFAULT 'pendente',
+    dias_atraso INTEGER DEFAULT 0,
+    usuario_baixa_id INTEGER,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS historico_cobranca (
+    id SERIAL PRIMARY KEY,
+    conta_receber_id INTEGER REFERENCES contas_receber(id),
+    data_acao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    tipo_acao VARCHAR(50),
+    descricao TEXT,
+    valor_acao DECIMAL(15,2),
+    usuario_id INTEGER,
+    observacoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS configuracoes_fiscais (
+    id SERIAL PRIMARY KEY,
+    chave VARCHAR(100) UNIQUE NOT NULL,
+    valor TEXT,
+    descricao TEXT,
+    tipo_dado VARCHAR(20) DEFAULT 'string',
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    usuario_atualizacao_id INTEGER
+);
+
+-- Configurações fiscais padrão (antes inseridas a cada FaturamentoManager())
+INSERT INTO configuracoes_fiscais (chave, valor, descricao) VALUES
+('numeracao_nf_inicio', '1', 'Número inicial para numeração de NF'),
+('serie_nf_padrao', '001', 'Série padrão para NF'),
+('natureza_operacao_padrao', 'Venda de mercadoria', 'Natureza de operação padrão'),
+('regime_tributario_empresa', 'Simples Nacional', 'Regime tributário da empresa'),
+('cfop_venda_estadual', '5102', 'CFOP para vendas dentro do estado'),
+('cfop_venda_interestadual', '6102', 'CFOP para vendas fora do estado'),
+('aliquota_icms_interna', '18.00', 'Alíquota ICMS interna padrão'),
+('prazo_pagamento_padrao', '30', 'Prazo de pagamento padrão em dias'),
+('taxa_juros_mensal', '1.00', 'Taxa de juros mensal para atraso'),
+('percentual_multa', '2.00', 'Percentual de multa por atraso')
+ON CONFLICT (chave) DO NOTHING;
@@ -0,0 +1,114 @@
+-- 0008 - Workflows de aprovação (WorkflowManager)
+
+CREATE TABLE IF NOT EXISTS tipos_workflow (
+    id SERIAL PRIMARY KEY,
+    nome VARCHAR(100) UNIQUE NOT NULL,
+    descricao TEXT,
+    tipo_entidade VARCHAR(50) NOT NULL,
+    ativo BOOLEAN DEFAULT TRUE,
+    requer_aprovacao BOOLEAN DEFAULT TRUE,
+    valor_minimo_aprovacao DECIMAL(15,2) DEFAULT 0,
+    dias_expiracao INTEGER DEFAULT 7,
+    aprovacao_automatica BOOLEAN DEFAULT FALSE,
+    configuracao_json JSONB,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    usuario_criacao_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS niveis_aprovacao (
+    id SERIAL PRIMARY KEY,
+    tipo_workflow_id INTEGER REFERENCES tipos_workflow(id),
+    nivel INTEGER NOT NULL,
+    nome_nivel VARCHAR(100) NOT NULL,
+    descricao TEXT,
+    obrigatorio BOOLEAN DEFAULT TRUE,
+    podem_aprovar INTEGER[], -- IDs dos usuários que podem aprovar
+    grupos_aprovacao TEXT[], -- Grupos que podem aprovar
+    valor_limite DECIMAL(15,2),
+    prazo_aprovacao_horas INTEGER DEFAULT 48,
+    aprovacao_automatica_apos_prazo BOOLEAN DEFAULT FALSE,
+    escalacao_usuario_id INTEGER,
+    condicoes_aprovacao JSONB,
+    ativo BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS solicitacoes_aprovacao (
+    id SERIAL PRIMARY KEY,
+    tipo_workflow_id INTEGER REFERENCES tipos_workflow(id),
+    codigo_solicitacao VARCHAR(50) UNIQUE NOT NULL,
+    titulo VARCHAR(255) NOT NULL,
+    descricao TEXT,
+    entidade_origem VARCHAR(50), -- 'movimentacao', 'compra', etc.
+    id_entidade_origem INTEGER,
+    valor_total DECIMAL(15,2) DEFAULT 0,
+    prioridade VARCHAR(20) DEFAULT 'normal',
+    dados_solicitacao JSONB,
+    anexos TEXT[],
+    usuario_solicitante_id INTEGER NOT NULL,
+    data_solicitacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_limite DATE,
+    status_geral VARCHAR(50) DEFAULT 'pendente',
+    nivel_atual INTEGER DEFAULT 1,
+    observacoes TEXT,
+    data_finalizacao TIMESTAMP,
+    usuario_finalizacao_id INTEGER,
+    motivo_finalizacao TEXT
+);
+
+CREATE TABLE IF NOT EXISTS aprovacoes_niveis (
+    id SERIAL PRIMARY KEY,
+    solicitacao_id INTEGER REFERENCES solicitacoes_aprovacao(id),
+    nivel_aprovacao_id INTEGER REFERENCES niveis_aprovacao(id),
+    nivel INTEGER NOT NULL,
+    usuario_aprovador_id INTEGER,
+    data_aprovacao TIMESTAMP,
+    status VARCHAR(50) DEFAULT 'pendente',
+    comentarios TEXT,
+    anexos_aprovacao TEXT[],
+    delegado_por_id INTEGER,
+    data_escalacao TIMESTAMP,
+    notificado BOOLEAN DEFAULT FALSE,
+    data_notificacao TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS historico_workflows (
+    id SERIAL PRIMARY KEY,
+    solicitacao_id INTEGER REFERENCES solicitacoes_aprovacao(id),
+    usuario_id INTEGER NOT NULL,
+    acao VARCHAR(100) NOT NULL,
+    nivel_anterior INTEGER,
+    nivel_novo INTEGER,
+    status_anterior VARCHAR(50),
+    status_novo VARCHAR(50),
+    comentarios TEXT,
+    dados_acao JSONB,
+    data_acao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ip_usuario INET
+);
+
+CREATE TABLE IF NOT EXISTS delegacoes_aprovacao (
+    id SERIAL PRIMARY KEY,
+    usuario_delegante_id INTEGER NOT NULL,
+    usuario_delegado_id INTEGER NOT NULL,
+    tipo_workflow_id INTEGER REFERENCES tipos_workflow(id),
+    nivel_aprovacao_id INTEGER REFERENCES niveis_aprovacao(id),
+    data_inicio DATE DEFAULT CURRENT_DATE,
+    data_fim DATE,
+    motivo TEXT,
+    ativo BOOLEAN DEFAULT TRUE,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS notificacoes_workflow (
+    id SERIAL PRIMARY KEY,
+    solicitacao_id INTEGER REFERENCES solicitacoes_aprovacao(id),
+    usuario_destinatario_id INTEGER NOT NULL,
+    tipo_notificacao VARCHAR(50) NOT NULL,
+    titulo VARCHAR(255),
+    mensagem TEXT,
+    data_envio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_leitura TIMESTAMP,
+    canal VARCHAR(50) DEFAULT 'sistema',
+    tentativas_envio INTEGER DEFAULT 1,
+    sucesso_envio BOOLEAN DEFAULT TRUE
+);
@@ -0,0 +1,88 @@
+-- 0009 - LGPD/GDPR (LGPDManager)
+
+CREATE TABLE IF NOT EXISTS consentimentos_lgpd (
+    id SERIAL PRIMARY KEY,
+    usuario_id INTEGER,
+    email VARCHAR(255),
+    nome VARCHAR(255),
+    tipo_consentimento VARCHAR(100) NOT NULL,
+    descricao_consentimento TEXT,
+    consentimento_dado BOOLEAN DEFAULT FALSE,
+    data_consentimento TIMESTAMP,
+    data_revogacao TIMESTAMP,
+    ip_origem INET,
+    user_agent TEXT,
+    versao_termos VARCHAR(50),
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ativo BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS mapeamento_dados_pessoais (
+    id SERIAL PRIMARY KEY,
+    tabela VARCHAR(100) NOT NULL,
+    campo VARCHAR(100) NOT NULL,
+    tipo_dado VARCHAR(50) NOT NULL,
+    categoria_titular VARCHAR(50),
+    finalidade_processamento TEXT,
+    base_legal VARCHAR(100),
+    tempo_retencao_dias INTEGER,
+    pode_anonimizar BOOLEAN DEFAULT TRUE,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS solicitacoes_titulares (
+    id SERIAL PRIMARY KEY,
+    tipo_solicitacao VARCHAR(50) NOT NULL,
+    email_titular VARCHAR(255) NOT NULL,
+    nome_titular VARCHAR(255),
+    descricao_solicitacao TEXT,
+    status VARCHAR(50) DEFAULT 'pendente',
+    data_solicitacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_resposta TIMESTAMP,
+    resposta_detalhada TEXT,
+    responsavel_id INTEGER,
+    prazo_legal DATE,
+    dados_afetados JSONB
+);
+
+CREATE TABLE IF NOT EXISTS incidentes_seguranca (
+    id SERIAL PRIMARY KEY,
+    titulo VARCHAR(255) NOT NULL,
+    descricao TEXT,
+    gravidade VARCHAR(20) DEFAULT 'baixa',
+    tipos_dados_afetados TEXT[],
+    numero_titulares_afetados INTEGER,
+    data_incidente TIMESTAMP,
+    data_descoberta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_notificacao_anpd TIMESTAMP,
+    data_comunicacao_titulares TIMESTAMP,
+    medidas_corretivas TEXT,
+    responsavel_id INTEGER,
+    status VARCHAR(50) DEFAULT 'investigando',
+    notificar_anpd BOOLEAN DEFAULT FALSE,
+    notificar_titulares BOOLEAN DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS historico_anonimizacao (
+    id SERIAL PRIMARY KEY,
+    tabela_origem VARCHAR(100) NOT NULL,
+    campo_origem VARCHAR(100) NOT NULL,
+    registro_id INTEGER NOT NULL,
+    valor_original_hash VARCHAR(255),
+    tecnica_anonimizacao VARCHAR(100),
+    data_anonimizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    responsavel_id INTEGER,
+    motivo TEXT
+);
+
+-- Mapeamentos padrão de dados pessoais (apenas em bases sem mapeamento)
+INSERT INTO mapeamento_dados_pessoais
+(tabela, campo, tipo_dado, categoria_titular, finalidade_processamento,
+ base_legal, tempo_retencao_dias, pode_anonimizar)
+SELECT * FROM (VALUES
+    ('usuarios', 'nome', 'identificacao_direta', 'funcionario', 'Autenticação e controle de acesso ao sistema', 'execucao_contrato', 2555, TRUE),
+    ('usuarios', 'email', 'identificacao_direta', 'funcionario', 'Autenticação e comunicação', 'execucao_contrato', 2555, TRUE),
+    ('responsaveis', 'nome', 'identificacao_direta', 'funcionario', 'Controle de responsabilidade por equipamentos', 'execucao_contrato', 1825, TRUE),
+    ('logs_auditoria', 'usuario_nome', 'identificacao_direta', 'funcionario', 'Auditoria e conformidade', 'obrigacao_legal', 1825, FALSE)
+) AS padrao
+WHERE NOT EXISTS (SELECT 1 FROM mapeamento_dados_pessoais);
@@ -0,0 +1,339 @@
+-- 0010 - Gestão de subcontratados (SubcontratadosManager)
+
+CREATE TABLE IF NOT EXISTS subcontratados (
+    id SERIAL PRIMARY KEY,
+    razao_social VARCHAR(255) NOT NULL,
+    nome_fantasia VARCHAR(255),
+    cnpj VARCHAR(18) UNIQUE NOT NULL,
+    inscricao_estadual VARCHAR(20),
+    inscricao_municipal VARCHAR(20),
+
+    -- Dados de contato
+    email_principal VARCHAR(255),
+    telefone_principal VARCHAR(20),
+    telefone_secundario VARCHAR(20),
+    site VARCHAR(255),
+
+    -- Endereço
+    endereco TEXT,
+    numero VARCHAR(10),
+    complemento VARCHAR(100),
+    bairro VARCHAR(100),
+    cidade VARCHAR(100),
+    estado VARCHAR(2),
+    cep VARCHAR(10),
+
+    -- Dados do responsável
+    responsavel_nome VARCHAR(255),
+    responsavel_cargo VARCHAR(100),
+    responsavel_email VARCHAR(255),
+    responsavel_telefone VARCHAR(20),
+
+    -- Especialidades e capacidades
+    especialidades TEXT[], -- Array de especialidades
+    area_atuacao TEXT[],
+    capacidade_funcionarios INTEGER,
+    equipamentos_proprios TEXT[],
+    certificacoes TEXT[],
+
+    -- Avaliações e scoring
+    avaliacao_geral DECIMAL(3,2) DEFAULT 0.00, -- 0.00 a 10.00
+    score_qualidade INTEGER DEFAULT 5, -- 1 a 10
+    score_pontualidade INTEGER DEFAULT 5,
+    score_comunicacao INTEGER DEFAULT 5,
+    score_seguranca INTEGER DEFAULT 5,
+    score_custo_beneficio INTEGER DEFAULT 5,
+
+    -- Status e configurações
+    status_aprovacao VARCHAR(50) DEFAULT 'pendente', -- pendente, aprovado, suspenso, inativo
+    nivel_confianca VARCHAR(50) DEFAULT 'medio', -- baixo, medio, alto, critico
+    limite_valor_projeto DECIMAL(15,2),
+    pode_trabalhar_sozinho BOOLEAN DEFAULT FALSE,
+    requer_supervisao BOOLEAN DEFAULT TRUE,
+
+    -- Datas e controle
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_ultima_atualizacao TIMESTAMP,
+    data_ultima_avaliacao TIMESTAMP,
+    cadastrado_por INTEGER,
+    ativo BOOLEAN DEFAULT TRUE,
+
+    -- Observações e notas
+    observacoes TEXT,
+    restricoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS contratos_subcontratados (
+    id SERIAL PRIMARY KEY,
+    numero_contrato VARCHAR(100) UNIQUE NOT NULL,
+    subcontratado_id INTEGER REFERENCES subcontratados(id),
+    obra_id INTEGER, -- Referência para obras
+
+    -- Dados do contrato
+    tipo_contrato VARCHAR(100), -- empreitada_global, administracao, locacao_equipamentos, servicos
+    descricao_servicos TEXT NOT NULL,
+    valor_total DECIMAL(15,2),
+    valor_inicial DECIMAL(15,2),
+    valor_atual DECIMAL(15,2),
+    moeda VARCHAR(10) DEFAULT 'BRL',
+
+    -- Prazos
+    data_inicio DATE NOT NULL,
+    data_fim_prevista DATE NOT NULL,
+    data_fim_real DATE,
+    prazo_execucao_dias INTEGER,
+
+    -- Status e controle
+    status_contrato VARCHAR(50) DEFAULT 'em_negociacao', -- em_negociacao, assinado, em_execucao, suspenso, finalizado, cancelado
+    percentual_execucao DECIMAL(5,2) DEFAULT 0.00,
+
+    -- Condições comerciais
+    forma_pagamento VARCHAR(100),
+    prazo_pagamento_dias INTEGER DEFAULT 30,
+    retencao_percentual DECIMAL(5,2) DEFAULT 0.00,
+    multa_atraso_diaria DECIMAL(10,2),
+    bonus_antecipacao DECIMAL(10,2),
+
+    -- Garantias e seguros
+    tipo_garantia VARCHAR(100), -- caucao, fianca, seguro
+    valor_garantia DECIMAL(15,2),
+    data_vencimento_garantia DATE,
+    seguro_responsabilidade_civil BOOLEAN DEFAULT FALSE,
+    valor_seguro DECIMAL(15,2),
+
+    -- Documentos e anexos
+    caminho_contrato VARCHAR(500),
+    documentos_anexos JSONB,
+
+    -- Auditoria
+    data_assinatura DATE,
+    assinado_por INTEGER,
+    aprovado_por INTEGER,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    criado_por INTEGER,
+    ultima_atualizacao TIMESTAMP,
+    observacoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS emprestimos_equipamentos (
+    id SERIAL PRIMARY KEY,
+    subcontratado_id INTEGER REFERENCES subcontratados(id),
+    contrato_id INTEGER REFERENCES contratos_subcontratados(id),
+
+    -- Dados do equipamento
+    equipamento_codigo VARCHAR(255),
+    equipamento_nome VARCHAR(255) NOT NULL,
+    tipo_equipamento VARCHAR(100),
+    marca VARCHAR(100),
+    modelo VARCHAR(100),
+    numero_serie VARCHAR(100),
+
+    -- Dados do empréstimo
+    data_emprestimo DATE NOT NULL,
+    data_devolucao_prevista DATE NOT NULL,
+    data_devolucao_real DATE,
+    responsavel_entrega VARCHAR(255),
+    responsavel_recebimento VARCHAR(255),
+
+    -- Estado do equipamento
+    estado_entrega VARCHAR(100), -- excelente, bom, regular, ruim
+    estado_devolucao VARCHAR(100),
+    observacoes_entrega TEXT,
+    observacoes_devolucao TEXT,
+    fotos_entrega TEXT[], -- URLs das fotos
+    fotos_devolucao TEXT[],
+
+    -- Valores e seguros
+    valor_equipamento DECIMAL(15,2),
+    valor_caucao DECIMAL(15,2),
+    seguro_contratado BOOLEAN DEFAULT FALSE,
+    numero_apolice VARCHAR(100),
+
+    -- Status e controle
+    status_emprestimo VARCHAR(50) DEFAULT 'ativo', -- ativo, devolvido, em_atraso, perdido, danificado
+    dias_atraso INTEGER DEFAULT 0,
+    multa_atraso DECIMAL(10,2) DEFAULT 0.00,
+
+    -- Manutenção durante empréstimo
+    manutencoes_realizadas JSONB,
+    custos_manutencao DECIMAL(10,2) DEFAULT 0.00,
+
+    -- Localização
+    localizacao_atual VARCHAR(255),
+    coordenadas_gps JSONB,
+
+    -- Auditoria
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    criado_por INTEGER,
+    ultima_atualizacao TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS avaliacoes_subcontratados (
+    id SERIAL PRIMARY KEY,
+    subcontratado_id INTEGER REFERENCES subcontratados(id),
+    contrato_id INTEGER REFERENCES contratos_subcontratados(id),
+    obra_id INTEGER,
+
+    -- Período da avaliação
+    data_inicio_periodo DATE NOT NULL,
+    data_fim_periodo DATE NOT NULL,
+    tipo_avaliacao VARCHAR(100), -- mensal, trimestral, pos_obra, extraordinaria
+
+    -- Critérios de avaliação (1 a 10)
+    qualidade_servico INTEGER,
+    cumprimento_prazo INTEGER,
+    organizacao_canteiro INTEGER,
+    comunicacao INTEGER,
+    seguranca_trabalho INTEGER,
+    relacionamento_equipe INTEGER,
+    resolucao_problemas INTEGER,
+    custo_beneficio INTEGER,
+    inovacao_melhorias INTEGER,
+
+    -- Pontuação geral
+    pontuacao_total DECIMAL(5,2),
+    classificacao VARCHAR(50), -- excelente, bom, regular, insatisfatorio
+
+    -- Comentários detalhados
+    pontos_fortes TEXT,
+    pontos_melhoria TEXT,
+    observacoes_gerais TEXT,
+    recomendacoes TEXT,
+
+    -- Ocorrências
+    ocorrencias_seguranca INTEGER DEFAULT 0,
+    ocorrencias_qualidade INTEGER DEFAULT 0,
+    reclamacoes_recebidas INTEGER DEFAULT 0,
+
+    -- Renovação de contrato
+    recomenda_renovacao BOOLEAN,
+    justificativa_renovacao TEXT,
+
+    -- Auditoria
+    avaliado_por INTEGER,
+    aprovado_por INTEGER,
+    data_avaliacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_aprovacao TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS medicoes_subcontratados (
+    id SERIAL PRIMARY KEY,
+    contrato_id INTEGER REFERENCES contratos_subcontratados(id),
+    numero_medicao INTEGER NOT NULL,
+
+    -- Período da medição
+    data_inicio_periodo DATE NOT NULL,
+    data_fim_periodo DATE NOT NULL,
+    data_medicao DATE NOT NULL,
+
+    -- Valores
+    valor_servicos_executados DECIMAL(15,2),
+    percentual_executado DECIMAL(5,2),
+    valor_acumulado_periodo DECIMAL(15,2),
+    valor_total_acumulado DECIMAL(15,2),
+
+    -- Descontos e acréscimos
+    valor_retencoes DECIMAL(15,2) DEFAULT 0.00,
+    valor_multas DECIMAL(15,2) DEFAULT 0.00,
+    valor_bonus DECIMAL(15,2) DEFAULT 0.00,
+    valor_reajustes DECIMAL(15,2) DEFAULT 0.00,
+
+    -- Valor final
+    valor_liquido_pagamento DECIMAL(15,2),
+
+    -- Status
+    status_medicao VARCHAR(50) DEFAULT 'em_analise', -- em_analise, aprovada, paga, contestada
+
+    -- Documentação
+    memorial_descritivo TEXT,
+    observacoes TEXT,
+    anexos_comprobatorios TEXT[],
+
+    -- Aprovação e pagamento
+    medido_por INTEGER,
+    aprovado_por INTEGER,
+    data_aprovacao TIMESTAMP,
+    data_pagamento TIMESTAMP,
+    numero_nota_fiscal VARCHAR(100),
+
+    -- Auditoria
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    criado_por INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS documentos_subcontratados (
+    id SERIAL PRIMARY KEY,
+    subcontratado_id INTEGER REFERENCES subcontratados(id),
+
+    -- Tipo e dados do documento
+    tipo_documento VARCHAR(100), -- alvara, certificado, licenca, seguro, etc
+    nome_documento VARCHAR(255) NOT NULL,
+    numero_documento VARCHAR(100),
+    orgao_emissor VARCHAR(255),
+
+    -- Validade
+    data_emissao DATE,
+    data_vencimento DATE,
+    dias_alerta_vencimento INTEGER DEFAULT 30,
+
+    -- Status
+    status_documento VARCHAR(50) DEFAULT 'valido', -- valido, vencido, em_renovacao, pendente
+    obrigatorio BOOLEAN DEFAULT FALSE,
+
+    -- Arquivo
+    caminho_arquivo VARCHAR(500),
+    tamanho_arquivo INTEGER,
+    tipo_arquivo VARCHAR(10),
+
+    -- Verificação
+    verificado BOOLEAN DEFAULT FALSE,
+    verificado_por INTEGER,
+    data_verificacao TIMESTAMP,
+    observacoes_verificacao TEXT,
+
+    -- Auditoria
+    data_upload TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    enviado_por INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS ocorrencias_subcontratados (
+    id SERIAL PRIMARY KEY,
+    subcontratado_id INTEGER REFERENCES subcontratados(id),
+    contrato_id INTEGER REFERENCES contratos_subcontratados(id),
+
+    -- Dados da ocorrência
+    tipo_ocorrencia VARCHAR(100), -- acidente, atraso, qualidade, reclamacao, elogio
+    severidade VARCHAR(50), -- baixa, media, alta, critica
+    titulo VARCHAR(255) NOT NULL,
+    descricao TEXT NOT NULL,
+
+    -- Local e pessoas envolvidas
+    local_ocorrencia VARCHAR(255),
+    pessoas_envolvidas TEXT[],
+    testemunhas TEXT[],
+
+    -- Ações tomadas
+    acao_imediata TEXT,
+    acao_corretiva TEXT,
+    acao_preventiva TEXT,
+    prazo_correcao DATE,
+
+    -- Status
+    status_ocorrencia VARCHAR(50) DEFAULT 'aberta', -- aberta, em_andamento, resolvida, fechada
+    responsavel_resolucao INTEGER,
+    data_resolucao TIMESTAMP,
+
+    -- Impactos
+    impacto_prazo INTEGER, -- dias de atraso
+    impacto_custo DECIMAL(15,2),
+    impacto_qualidade VARCHAR(100),
+
+    -- Documentação
+    evidencias TEXT[], -- fotos, documentos
+    numero_boletim VARCHAR(100), -- BO, CAT, etc
+
+    -- Auditoria
+    data_ocorrencia TIMESTAMP NOT NULL,
+    reportado_por INTEGER,
+    data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
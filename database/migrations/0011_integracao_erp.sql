@@ -0,0 +1,114 @@
+-- 0011 - Integração ERP (ERPIntegrationManager)
+
+CREATE TABLE IF NOT EXISTS configuracoes_erp (
+    id SERIAL PRIMARY KEY,
+    nome_conexao VARCHAR(100) UNIQUE NOT NULL,
+    tipo_sistema VARCHAR(50) NOT NULL,
+    endereco_servidor VARCHAR(255),
+    porta INTEGER,
+    database_sid VARCHAR(100),
+    usuario VARCHAR(100),
+    senha_criptografada TEXT,
+    parametros_conexao JSONB,
+    certificados_ssl TEXT,
+    timeout_conexao INTEGER DEFAULT 30,
+    max_tentativas INTEGER DEFAULT 3,
+    ativo BOOLEAN DEFAULT TRUE,
+    ultima_conexao TIMESTAMP,
+    status_conexao VARCHAR(50) DEFAULT 'nao_testado',
+    observacoes TEXT,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    usuario_criacao_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS mapeamento_campos_erp (
+    id SERIAL PRIMARY KEY,
+    configuracao_erp_id INTEGER REFERENCES configuracoes_erp(id),
+    tabela_origem VARCHAR(100) NOT NULL,
+    campo_origem VARCHAR(100) NOT NULL,
+    tabela_destino VARCHAR(100) NOT NULL,
+    campo_destino VARCHAR(100) NOT NULL,
+    tipo_sincronizacao VARCHAR(50) CHECK (tipo_sincronizacao IN ('bidirecional', 'erp_para_inventario', 'inventario_para_erp')),
+    funcao_transformacao TEXT,
+    condicao_sincronizacao TEXT,
+    prioridade INTEGER DEFAULT 1,
+    ativo BOOLEAN DEFAULT TRUE,
+    observacoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sincronizacoes_erp (
+    id SERIAL PRIMARY KEY,
+    configuracao_erp_id INTEGER REFERENCES configuracoes_erp(id),
+    tipo_operacao VARCHAR(50) NOT NULL,
+    tabela_origem VARCHAR(100),
+    registros_processados INTEGER DEFAULT 0,
+    registros_sucesso INTEGER DEFAULT 0,
+    registros_erro INTEGER DEFAULT 0,
+    data_inicio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_fim TIMESTAMP,
+    status VARCHAR(50) DEFAULT 'executando',
+    log_detalhado TEXT,
+    arquivo_log_caminho VARCHAR(500),
+    usuario_execucao_id INTEGER,
+    parametros_execucao JSONB
+);
+
+CREATE TABLE IF NOT EXISTS erros_integracao_erp (
+    id SERIAL PRIMARY KEY,
+    sincronizacao_id INTEGER REFERENCES sincronizacoes_erp(id),
+    configuracao_erp_id INTEGER REFERENCES configuracoes_erp(id),
+    tipo_erro VARCHAR(100),
+    mensagem_erro TEXT,
+    detalhes_erro JSONB,
+    tabela_afetada VARCHAR(100),
+    registro_id VARCHAR(100),
+    tentativas INTEGER DEFAULT 1,
+    resolvido BOOLEAN DEFAULT FALSE,
+    data_erro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_resolucao TIMESTAMP,
+    usuario_resolucao_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS fila_sincronizacao_erp (
+    id SERIAL PRIMARY KEY,
+    configuracao_erp_id INTEGER REFERENCES configuracoes_erp(id),
+    tipo_operacao VARCHAR(50) NOT NULL,
+    tabela_destino VARCHAR(100),
+    dados_registro JSONB,
+    prioridade INTEGER DEFAULT 5,
+    tentativas INTEGER DEFAULT 0,
+    max_tentativas INTEGER DEFAULT 3,
+    status VARCHAR(50) DEFAULT 'pendente',
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_processamento TIMESTAMP,
+    resultado_processamento TEXT,
+    usuario_criacao_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS webhooks_erp (
+    id SERIAL PRIMARY KEY,
+    configuracao_erp_id INTEGER REFERENCES configuracoes_erp(id),
+    nome_webhook VARCHAR(100) NOT NULL,
+    url_endpoint VARCHAR(500),
+    metodo_http VARCHAR(10) DEFAULT 'POST',
+    headers_personalizados JSONB,
+    eventos_trigger TEXT[],
+    ativo BOOLEAN DEFAULT TRUE,
+    secret_token VARCHAR(255),
+    ultima_execucao TIMESTAMP,
+    total_execucoes INTEGER DEFAULT 0,
+    total_sucessos INTEGER DEFAULT 0,
+    total_falhas INTEGER DEFAULT 0,
+    observacoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS cache_dados_erp (
+    id SERIAL PRIMARY KEY,
+    configuracao_erp_id INTEGER REFERENCES configuracoes_erp(id),
+    chave_cache VARCHAR(200) NOT NULL,
+    dados_cache JSONB,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_expiracao TIMESTAMP,
+    hits INTEGER DEFAULT 0,
+    UNIQUE(configuracao_erp_id, chave_cache)
+);
@@ -0,0 +1,107 @@
+-- 0012 - Machine Learning (MachineLearningManager)
+
+CREATE TABLE IF NOT EXISTS modelos_ml (
+    id SERIAL PRIMARY KEY,
+    nome_modelo VARCHAR(255) NOT NULL,
+    tipo_modelo VARCHAR(100) NOT NULL, -- predicao_manutencao, otimizacao_estoque, deteccao_anomalia
+    algoritmo VARCHAR(100) NOT NULL, -- random_forest, linear_regression, isolation_forest
+    parametros_modelo JSONB,
+    metricas_performance JSONB,
+    dados_treino_sql TEXT,
+    modelo_serializado BYTEA,
+    data_treino TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_ultima_predicao TIMESTAMP,
+    ativo BOOLEAN DEFAULT TRUE,
+    versao_modelo INTEGER DEFAULT 1,
+    criado_por INTEGER,
+    acuracia DECIMAL(5,4),
+    f1_score DECIMAL(5,4)
+);
+
+CREATE TABLE IF NOT EXISTS predicoes_ml (
+    id SERIAL PRIMARY KEY,
+    modelo_id INTEGER REFERENCES modelos_ml(id),
+    equipamento_codigo VARCHAR(255),
+    tipo_predicao VARCHAR(100), -- manutencao_necessaria, falha_iminente, otimizacao_estoque
+    valor_predicao DECIMAL(10,4),
+    probabilidade_predicao DECIMAL(5,4),
+    data_predicao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_evento_previsto TIMESTAMP,
+    dados_entrada JSONB,
+    resultado_real VARCHAR(100), -- confirmado, falso_positivo, pendente
+    confianca_predicao DECIMAL(5,4),
+    observacoes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS anomalias_detectadas (
+    id SERIAL PRIMARY KEY,
+    modelo_id INTEGER REFERENCES modelos_ml(id),
+    equipamento_codigo VARCHAR(255),
+    tipo_anomalia VARCHAR(100),
+    score_anomalia DECIMAL(8,6), -- Score de anomalia (-1 a 1, onde valores negativos são anomalias)
+    severidade VARCHAR(50) DEFAULT 'media', -- baixa, media, alta, critica
+    dados_anomalos JSONB,
+    timestamp_deteccao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status_anomalia VARCHAR(50) DEFAULT 'detectada', -- detectada, investigada, resolvida, falso_positivo
+    acao_tomada TEXT,
+    investigado_por INTEGER,
+    data_resolucao TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS otimizacoes_sugeridas (
+    id SERIAL PRIMARY KEY,
+    modelo_id INTEGER REFERENCES modelos_ml(id),
+    tipo_otimizacao VARCHAR(100), -- estoque, manutencao, alocacao_recursos
+    equipamento_codigo VARCHAR(255),
+    sugestao_titulo VARCHAR(255) NOT NULL,
+    sugestao_descricao TEXT,
+    impacto_estimado JSONB, -- {"economia": 1500, "tempo_economizado": 24}
+    prioridade VARCHAR(50) DEFAULT 'media',
+    implementacao_sugerida TEXT,
+    data_sugestao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    implementada BOOLEAN DEFAULT FALSE,
+    data_implementacao TIMESTAMP,
+    resultado_real JSONB,
+    aprovada_por INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS datasets_ml (
+    id SERIAL PRIMARY KEY,
+    nome_dataset VARCHAR(255) NOT NULL,
+    descricao TEXT,
+    query_sql TEXT NOT NULL,
+    tipo_dataset VARCHAR(100), -- manutencao, movimentacao, estoque
+    features_colunas TEXT[], -- Array com nomes das colunas features
+    target_coluna VARCHAR(255), -- Nome da coluna target
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ultima_atualizacao TIMESTAMP,
+    total_registros INTEGER,
+    qualidade_dados DECIMAL(5,2), -- Score de 0-100
+    ativo BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS features_engenharia (
+    id SERIAL PRIMARY KEY,
+    nome_feature VARCHAR(255) NOT NULL,
+    formula_sql TEXT NOT NULL,
+    descricao TEXT,
+    tipo_feature VARCHAR(100), -- numerica, categorica, temporal
+    importancia_score DECIMAL(5,4),
+    dataset_origem VARCHAR(255),
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ativa BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS experimentos_ml (
+    id SERIAL PRIMARY KEY,
+    nome_experimento VARCHAR(255) NOT NULL,
+    objetivo TEXT,
+    dataset_id INTEGER REFERENCES datasets_ml(id),
+    algoritmos_testados JSONB,
+    resultados_experimento JSONB,
+    melhor_modelo JSONB,
+    data_experimento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    executado_por INTEGER,
+    tempo_execucao_segundos INTEGER,
+    status_experimento VARCHAR(50) DEFAULT 'concluido' -- executando, concluido, erro
+);
@@ -0,0 +1,108 @@
+-- 0013 - IoT e sensores (IoTManager)
+
+CREATE TABLE IF NOT EXISTS dispositivos_iot (
+    id SERIAL PRIMARY KEY,
+    device_id VARCHAR(255) UNIQUE NOT NULL,
+    nome VARCHAR(255) NOT NULL,
+    tipo_dispositivo VARCHAR(100) NOT NULL, -- sensor_temp, sensor_umidade, beacon, rfid, etc
+    localizacao VARCHAR(255),
+    equipamento_associado_codigo VARCHAR(255),
+    configuracao_json JSONB,
+    status_conexao VARCHAR(50) DEFAULT 'offline',
+    ultima_comunicacao TIMESTAMP,
+    frequencia_leitura INTEGER DEFAULT 60, -- em segundos
+    limites_operacionais JSONB,
+    data_instalacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ativo BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS dados_sensores (
+    id SERIAL PRIMARY KEY,
+    device_id VARCHAR(255) NOT NULL,
+    timestamp_leitura TIMESTAMP NOT NULL,
+    tipo_sensor VARCHAR(100) NOT NULL,
+    valor_numerico DECIMAL(15,6),
+    valor_texto VARCHAR(255),
+    valor_json JSONB,
+    unidade_medida VARCHAR(50),
+    qualidade_sinal INTEGER, -- 0-100
+    bateria_nivel INTEGER,  -- 0-100
+    temperatura_dispositivo DECIMAL(8,2),
+    localizacao_gps JSONB,
+    processado BOOLEAN DEFAULT FALSE
+);
+
+-- Índices declarados antes inline (sintaxe MySQL, rejeitada pelo PostgreSQL)
+CREATE INDEX IF NOT EXISTS idx_dados_sensores_device_timestamp ON dados_sensores(device_id, timestamp_leitura);
+CREATE INDEX IF NOT EXISTS idx_dados_sensores_timestamp ON dados_sensores(timestamp_leitura);
+CREATE INDEX IF NOT EXISTS idx_dados_sensores_processado ON dados_sensores(processado);
+
+CREATE TABLE IF NOT EXISTS alertas_iot (
+    id SERIAL PRIMARY KEY,
+    device_id VARCHAR(255) NOT NULL,
+    tipo_alerta VARCHAR(100) NOT NULL, -- temperatura_alta, bateria_baixa, dispositivo_offline
+    severidade VARCHAR(50) DEFAULT 'medio', -- baixo, medio, alto, critico
+    titulo VARCHAR(255) NOT NULL,
+    descricao TEXT,
+    valor_detectado VARCHAR(255),
+    limite_configurado VARCHAR(255),
+    timestamp_alerta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    timestamp_reconhecimento TIMESTAMP,
+    reconhecido_por INTEGER,
+    status_alerta VARCHAR(50) DEFAULT 'ativo', -- ativo, reconhecido, resolvido
+    acoes_tomadas TEXT,
+    equipamento_afetado VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS regras_monitoramento (
+    id SERIAL PRIMARY KEY,
+    nome_regra VARCHAR(255) NOT NULL,
+    device_id VARCHAR(255),
+    tipo_sensor VARCHAR(100),
+    condicao_sql TEXT NOT NULL, -- Ex: valor_numerico > 50
+    tipo_alerta VARCHAR(100) NOT NULL,
+    severidade VARCHAR(50) DEFAULT 'medio',
+    acao_automatica VARCHAR(255), -- email, sms, webhook, etc
+    ativo BOOLEAN DEFAULT TRUE,
+    parametros_acao JSONB,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    criado_por INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS dashboards_iot (
+    id SERIAL PRIMARY KEY,
+    nome_dashboard VARCHAR(255) NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    configuracao_widgets JSONB NOT NULL,
+    layout_config JSONB,
+    dispositivos_inclusos TEXT[],
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    compartilhado BOOLEAN DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS comandos_remotos (
+    id SERIAL PRIMARY KEY,
+    device_id VARCHAR(255) NOT NULL,
+    comando VARCHAR(255) NOT NULL,
+    parametros JSONB,
+    enviado_por INTEGER NOT NULL,
+    timestamp_envio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    timestamp_execucao TIMESTAMP,
+    status_comando VARCHAR(50) DEFAULT 'pendente', -- pendente, executado, erro, timeout
+    resposta_dispositivo TEXT,
+    erro_execucao TEXT
+);
+
+CREATE TABLE IF NOT EXISTS manutencao_preditiva_iot (
+    id SERIAL PRIMARY KEY,
+    equipamento_codigo VARCHAR(255) NOT NULL,
+    device_id VARCHAR(255),
+    tipo_predicao VARCHAR(100) NOT NULL, -- falha_bateria, desgaste_sensor, etc
+    probabilidade_falha DECIMAL(5,2), -- 0-100%
+    tempo_estimado_falha INTEGER, -- em dias
+    indicadores_utilizados JSONB,
+    data_predicao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    acao_recomendada TEXT,
+    urgencia_manutencao VARCHAR(50), -- baixa, media, alta, critica
+    status_predicao VARCHAR(50) DEFAULT 'ativo' -- ativo, verificado, falso_positivo
+);
@@ -0,0 +1,11 @@
+-- 0014 - Permissões por módulo (antes criada em AuthenticationManager.update_user_module_permissions)
+
+CREATE TABLE IF NOT EXISTS permissoes_modulos (
+    id SERIAL PRIMARY KEY,
+    usuario_id INTEGER REFERENCES usuarios(id),
+    modulo VARCHAR(100) NOT NULL,
+    acesso BOOLEAN DEFAULT TRUE,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(usuario_id, modulo)
+);
@@ -0,0 +1,4 @@
+-- 0015 - Índices da lista paginada de insumos (keyset em codigo)
+
+CREATE INDEX IF NOT EXISTS idx_insumos_ativos_codigo ON insumos(codigo) WHERE ativo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_insumos_ativos_categoria_codigo ON insumos(categoria_id, codigo) WHERE ativo = TRUE;
@@ -0,0 +1,7 @@
+-- 0016 - Índices do histórico paginado de movimentações
+
+-- Keyset (data_movimentacao, id) em ordem decrescente e filtros por período
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_data_id ON movimentacoes(data_movimentacao DESC, id DESC);
+
+-- Resolução do item polimórfico (tipo_item, item_id)
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_tipo_item_item ON movimentacoes(tipo_item, item_id);
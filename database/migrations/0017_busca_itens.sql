@@ -0,0 +1,19 @@
+-- 0017 - Busca unificada de itens (pg_trgm + unaccent)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() é STABLE; o wrapper IMMUTABLE (dicionário fixo) permite indexar a expressão
+CREATE OR REPLACE FUNCTION f_busca_normalizada(texto TEXT) RETURNS TEXT AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, COALESCE(texto, '')))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- As expressões abaixo precisam ser idênticas às de modules/busca_itens.FONTES_BUSCA
+CREATE INDEX IF NOT EXISTS idx_insumos_busca_trgm ON insumos
+    USING gin (f_busca_normalizada(codigo || ' ' || descricao || ' ' || COALESCE(marca, '')) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_equipamentos_eletricos_busca_trgm ON equipamentos_eletricos
+    USING gin (f_busca_normalizada(codigo || ' ' || nome || ' ' || COALESCE(marca, '') || ' ' || COALESCE(modelo, '')) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_equipamentos_manuais_busca_trgm ON equipamentos_manuais
+    USING gin (f_busca_normalizada(codigo || ' ' || descricao || ' ' || COALESCE(marca, '')) gin_trgm_ops);
@@ -0,0 +1,134 @@
+-- Particionamento mensal (RANGE) das tabelas de histórico e políticas de retenção.
+-- As tabelas existentes são recriadas como particionadas e os dados copiados;
+-- a manutenção das partições fica em database/particionamento.py.
+
+CREATE TABLE IF NOT EXISTS politicas_retencao (
+    tabela TEXT PRIMARY KEY,
+    coluna_particao TEXT NOT NULL,
+    meses_retencao INTEGER, -- NULL = manter para sempre
+    acao TEXT NOT NULL DEFAULT 'manter', -- 'manter', 'desanexar', 'arquivar', 'excluir'
+    meses_antecedencia INTEGER NOT NULL DEFAULT 3, -- partições criadas à frente do mês atual
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CHECK (acao IN ('manter', 'desanexar', 'arquivar', 'excluir'))
+);
+
+INSERT INTO politicas_retencao (tabela, coluna_particao, meses_retencao, acao) VALUES
+    ('auditoria_logs', 'timestamp', 24, 'arquivar'),
+    ('logs_auditoria', 'data_acao', 24, 'arquivar'),
+    ('auditoria_acessos', 'timestamp', 12, 'excluir'),
+    ('movimentacoes', 'data_movimentacao', NULL, 'manter')
+ON CONFLICT (tabela) DO NOTHING;
+
+-- Partições arquivadas saem da tabela particionada e vão para este schema
+CREATE SCHEMA IF NOT EXISTS arquivo;
+
+-- Cria a partição <tabela>_AAAAMM do mês de p_mes. Linhas desse mês que já
+-- estejam na partição padrão são movidas para ela antes de anexar.
+CREATE OR REPLACE FUNCTION criar_particao_mensal(p_tabela TEXT, p_coluna TEXT, p_mes DATE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_inicio DATE := date_trunc('month', p_mes)::date;
+    v_fim DATE := (date_trunc('month', p_mes) + INTERVAL '1 month')::date;
+    v_particao TEXT := p_tabela || '_' || to_char(p_mes, 'YYYYMM');
+    v_padrao TEXT := p_tabela || '_padrao';
+    v_pendentes BOOLEAN;
+BEGIN
+    IF to_regclass(v_particao) IS NOT NULL OR to_regclass('arquivo.' || v_particao) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                   v_padrao, p_coluna, v_inicio, p_coluna, v_fim) INTO v_pendentes;
+
+    IF v_pendentes THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_particao, p_tabela);
+        EXECUTE format('WITH movidas AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+                       'INSERT INTO %I SELECT * FROM movidas',
+                       v_padrao, p_coluna, v_inicio, p_coluna, v_fim, v_particao);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       p_tabela, v_particao, v_inicio, v_fim);
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       v_particao, p_tabela, v_inicio, v_fim);
+    END IF;
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recria uma tabela comum como particionada por mês em p_coluna, mantendo
+-- colunas, defaults, sequência do id, índices secundários e chaves estrangeiras.
+-- A chave primária passa a ser (id, p_coluna), exigência do particionamento.
+CREATE OR REPLACE FUNCTION particionar_tabela_mensal(p_tabela TEXT, p_coluna TEXT, p_meses_antecedencia INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    v_legado TEXT := p_tabela || '_legado';
+    v_sequencia TEXT;
+    v_indices TEXT[];
+    v_fks TEXT[];
+    v_def TEXT;
+    v_mes DATE;
+    v_ultimo DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_meses_antecedencia))::date;
+BEGIN
+    IF to_regclass(p_tabela) IS NULL
+       OR (SELECT relkind FROM pg_class WHERE oid = to_regclass(p_tabela)) = 'p' THEN
+        RETURN;
+    END IF;
+
+    v_sequencia := pg_get_serial_sequence(p_tabela, 'id');
+
+    -- Definições capturadas antes do rename ainda apontam para o nome original
+    SELECT array_agg(pg_get_indexdef(i.indexrelid)) INTO v_indices
+    FROM pg_index i
+    WHERE i.indrelid = to_regclass(p_tabela) AND NOT i.indisprimary AND NOT i.indisunique;
+
+    SELECT array_agg(format('ALTER TABLE %I ADD CONSTRAINT %I %s', p_tabela, conname, pg_get_constraintdef(oid))) INTO v_fks
+    FROM pg_constraint
+    WHERE conrelid = to_regclass(p_tabela) AND contype = 'f';
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_tabela, v_legado);
+    EXECUTE format('UPDATE %I SET %I = CURRENT_TIMESTAMP WHERE %I IS NULL', v_legado, p_coluna, p_coluna);
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (%I)',
+                   p_tabela, v_legado, p_coluna);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', p_tabela, p_coluna);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', p_tabela || '_padrao', p_tabela);
+
+    EXECUTE format('SELECT MIN(%I)::date FROM %I', p_coluna, v_legado) INTO v_mes;
+    v_mes := date_trunc('month', LEAST(COALESCE(v_mes, CURRENT_DATE), CURRENT_DATE))::date;
+    WHILE v_mes <= v_ultimo LOOP
+        PERFORM criar_particao_mensal(p_tabela, p_coluna, v_mes);
+        v_mes := (v_mes + INTERVAL '1 month')::date;
+    END LOOP;
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', p_tabela, v_legado);
+
+    -- A sequência do SERIAL pertence à tabela antiga; transfere antes do DROP
+    IF v_sequencia IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', v_sequencia);
+    END IF;
+    EXECUTE format('DROP TABLE %I', v_legado);
+    IF v_sequencia IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', v_sequencia, p_tabela);
+    END IF;
+
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, %I)', p_tabela, p_coluna);
+    FOREACH v_def IN ARRAY COALESCE(v_indices, '{}') LOOP
+        EXECUTE v_def;
+    END LOOP;
+    FOREACH v_def IN ARRAY COALESCE(v_fks, '{}') LOOP
+        EXECUTE v_def;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- As views materializadas criadas pelo PerformanceOptimizer em instalações
+-- antigas acompanham o rename de movimentacoes e impediriam o DROP da tabela
+-- legada; a migração 0020 as recria sobre a tabela particionada
+DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_stats;
+DROP MATERIALIZED VIEW IF EXISTS mv_movimentacoes_resumo;
+
+SELECT particionar_tabela_mensal(tabela, coluna_particao, meses_antecedencia)
+FROM politicas_retencao
+ORDER BY tabela;
+
+-- Índices na chave de partição que ainda não existiam
+CREATE INDEX IF NOT EXISTS idx_logs_auditoria_data ON logs_auditoria (data_acao);
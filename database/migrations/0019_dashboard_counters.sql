@@ -0,0 +1,201 @@
+-- Contadores do dashboard mantidos por triggers: a leitura do dashboard passa a
+-- ler poucas linhas fixas em vez de agregar as tabelas de itens a cada render.
+
+CREATE TABLE IF NOT EXISTS dashboard_counters (
+    fonte TEXT PRIMARY KEY, -- 'insumos', 'equipamentos_eletricos', 'equipamentos_manuais', 'obras'
+    total BIGINT NOT NULL DEFAULT 0,
+    alertas BIGINT NOT NULL DEFAULT 0,
+    valor_total NUMERIC(16,2) NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS dashboard_movimentacoes_diarias (
+    dia DATE PRIMARY KEY,
+    total BIGINT NOT NULL DEFAULT 0
+);
+
+-- Soma um delta ao contador da fonte. Deltas nulos não tocam a linha, então
+-- edições que não mudam as métricas não disputam o lock do contador.
+CREATE OR REPLACE FUNCTION dashboard_aplicar_delta(p_fonte TEXT, p_total BIGINT, p_alertas BIGINT, p_valor NUMERIC)
+RETURNS VOID AS $$
+BEGIN
+    IF p_total = 0 AND p_alertas = 0 AND p_valor = 0 THEN
+        RETURN;
+    END IF;
+    UPDATE dashboard_counters
+    SET total = total + p_total,
+        alertas = alertas + p_alertas,
+        valor_total = valor_total + p_valor,
+        atualizado_em = CURRENT_TIMESTAMP
+    WHERE fonte = p_fonte;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_insumos() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+    v_alertas BIGINT := 0;
+    v_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF OLD.ativo THEN
+            v_total := v_total - 1;
+            v_alertas := v_alertas - COALESCE((OLD.quantidade_atual <= OLD.quantidade_minima)::int, 0);
+            v_valor := v_valor - COALESCE(OLD.quantidade_atual * OLD.preco_unitario, 0);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.ativo THEN
+            v_total := v_total + 1;
+            v_alertas := v_alertas + COALESCE((NEW.quantidade_atual <= NEW.quantidade_minima)::int, 0);
+            v_valor := v_valor + COALESCE(NEW.quantidade_atual * NEW.preco_unitario, 0);
+        END IF;
+    END IF;
+    PERFORM dashboard_aplicar_delta('insumos', v_total, v_alertas, v_valor);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_equipamentos_eletricos() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+    v_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF OLD.ativo THEN
+            v_total := v_total - 1;
+            v_valor := v_valor - COALESCE(OLD.valor_compra, 0);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.ativo THEN
+            v_total := v_total + 1;
+            v_valor := v_valor + COALESCE(NEW.valor_compra, 0);
+        END IF;
+    END IF;
+    PERFORM dashboard_aplicar_delta('equipamentos_eletricos', v_total, 0, v_valor);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_equipamentos_manuais() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+    v_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF OLD.ativo THEN
+            v_total := v_total - 1;
+            v_valor := v_valor - COALESCE(OLD.quantitativo * COALESCE(OLD.valor, 0), 0);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.ativo THEN
+            v_total := v_total + 1;
+            v_valor := v_valor + COALESCE(NEW.quantitativo * COALESCE(NEW.valor, 0), 0);
+        END IF;
+    END IF;
+    PERFORM dashboard_aplicar_delta('equipamentos_manuais', v_total, 0, v_valor);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_obras() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF OLD.status = 'ativo' THEN
+            v_total := v_total - 1;
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.status = 'ativo' THEN
+            v_total := v_total + 1;
+        END IF;
+    END IF;
+    PERFORM dashboard_aplicar_delta('obras', v_total, 0, 0);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_movimentacoes() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF OLD.data_movimentacao::date = NEW.data_movimentacao::date THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE dashboard_movimentacoes_diarias SET total = total - 1
+        WHERE dia = OLD.data_movimentacao::date;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO dashboard_movimentacoes_diarias (dia, total)
+        VALUES (NEW.data_movimentacao::date, 1)
+        ON CONFLICT (dia) DO UPDATE SET total = dashboard_movimentacoes_diarias.total + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS dashboard_counters_insumos ON insumos;
+CREATE TRIGGER dashboard_counters_insumos
+    AFTER INSERT OR UPDATE OR DELETE ON insumos
+    FOR EACH ROW EXECUTE FUNCTION trg_dashboard_insumos();
+
+DROP TRIGGER IF EXISTS dashboard_counters_equipamentos_eletricos ON equipamentos_eletricos;
+CREATE TRIGGER dashboard_counters_equipamentos_eletricos
+    AFTER INSERT OR UPDATE OR DELETE ON equipamentos_eletricos
+    FOR EACH ROW EXECUTE FUNCTION trg_dashboard_equipamentos_eletricos();
+
+DROP TRIGGER IF EXISTS dashboard_counters_equipamentos_manuais ON equipamentos_manuais;
+CREATE TRIGGER dashboard_counters_equipamentos_manuais
+    AFTER INSERT OR UPDATE OR DELETE ON equipamentos_manuais
+    FOR EACH ROW EXECUTE FUNCTION trg_dashboard_equipamentos_manuais();
+
+DROP TRIGGER IF EXISTS dashboard_counters_obras ON obras;
+CREATE TRIGGER dashboard_counters_obras
+    AFTER INSERT OR UPDATE OR DELETE ON obras
+    FOR EACH ROW EXECUTE FUNCTION trg_dashboard_obras();
+
+DROP TRIGGER IF EXISTS dashboard_counters_movimentacoes ON movimentacoes;
+CREATE TRIGGER dashboard_counters_movimentacoes
+    AFTER INSERT OR UPDATE OR DELETE ON movimentacoes
+    FOR EACH ROW EXECUTE FUNCTION trg_dashboard_movimentacoes();
+
+-- Recalcula tudo a partir das tabelas (carga inicial e correção de divergências).
+-- Os locks impedem escritas concorrentes entre a leitura e a gravação.
+CREATE OR REPLACE FUNCTION recalcular_dashboard_counters() RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE insumos, equipamentos_eletricos, equipamentos_manuais, obras, movimentacoes IN SHARE MODE;
+
+    INSERT INTO dashboard_counters (fonte, total, alertas, valor_total)
+    SELECT 'insumos', COUNT(*),
+           COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima),
+           COALESCE(SUM(quantidade_atual * preco_unitario), 0)
+    FROM insumos WHERE ativo = TRUE
+    UNION ALL
+    SELECT 'equipamentos_eletricos', COUNT(*), 0, COALESCE(SUM(COALESCE(valor_compra, 0)), 0)
+    FROM equipamentos_eletricos WHERE ativo = TRUE
+    UNION ALL
+    SELECT 'equipamentos_manuais', COUNT(*), 0, COALESCE(SUM(quantitativo * COALESCE(valor, 0)), 0)
+    FROM equipamentos_manuais WHERE ativo = TRUE
+    UNION ALL
+    SELECT 'obras', COUNT(*), 0, 0
+    FROM obras WHERE status = 'ativo'
+    ON CONFLICT (fonte) DO UPDATE SET
+        total = EXCLUDED.total,
+        alertas = EXCLUDED.alertas,
+        valor_total = EXCLUDED.valor_total,
+        atualizado_em = CURRENT_TIMESTAMP;
+
+    DELETE FROM dashboard_movimentacoes_diarias;
+    INSERT INTO dashboard_movimentacoes_diarias (dia, total)
+    SELECT data_movimentacao::date, COUNT(*)
+    FROM movimentacoes
+    GROUP BY data_movimentacao::date;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT recalcular_dashboard_counters();
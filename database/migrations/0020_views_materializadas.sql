@@ -0,0 +1,87 @@
+-- Views materializadas do PerformanceOptimizer passam a ser versionadas aqui,
+-- com os índices únicos exigidos por REFRESH ... CONCURRENTLY e uma tabela de
+-- controle com a política de atualização e os metadados de defasagem.
+
+DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_stats;
+CREATE MATERIALIZED VIEW mv_dashboard_stats AS
+SELECT
+    1 as id,
+    (SELECT COUNT(*) FROM insumos) as total_insumos,
+    (SELECT COUNT(*) FROM equipamentos_eletricos) as total_ee,
+    (SELECT COUNT(*) FROM equipamentos_manuais) as total_em,
+    (SELECT COUNT(*) FROM insumos WHERE quantidade_atual <= quantidade_minima) as itens_criticos,
+    (SELECT SUM(quantidade_atual * COALESCE(preco_unitario, 0)) FROM insumos) as valor_total_estoque,
+    (SELECT COUNT(*) FROM movimentacoes
+     WHERE data_movimentacao >= CURRENT_DATE AND data_movimentacao < CURRENT_DATE + 1) as movimentacoes_hoje,
+    CURRENT_TIMESTAMP as last_updated;
+CREATE UNIQUE INDEX idx_mv_dashboard_stats_id ON mv_dashboard_stats (id);
+
+DROP MATERIALIZED VIEW IF EXISTS mv_movimentacoes_resumo;
+CREATE MATERIALIZED VIEW mv_movimentacoes_resumo AS
+SELECT
+    data_movimentacao::date as data,
+    tipo,
+    tipo_item,
+    COUNT(*) as total_movimentacoes,
+    SUM(quantidade) as total_quantidade
+FROM movimentacoes
+WHERE data_movimentacao >= CURRENT_DATE - INTERVAL '30 days'
+GROUP BY data_movimentacao::date, tipo, tipo_item;
+CREATE UNIQUE INDEX idx_mv_movimentacoes_resumo_chave ON mv_movimentacoes_resumo (data, tipo, tipo_item);
+
+DROP MATERIALIZED VIEW IF EXISTS mv_estoque_critico;
+CREATE MATERIALIZED VIEW mv_estoque_critico AS
+SELECT
+    id,
+    descricao as nome,
+    codigo,
+    quantidade_atual as quantidade,
+    quantidade_minima as estoque_minimo,
+    localizacao,
+    CASE
+        WHEN quantidade_atual = 0 THEN 'CRÍTICO'
+        WHEN quantidade_atual <= quantidade_minima * 0.5 THEN 'URGENTE'
+        WHEN quantidade_atual <= quantidade_minima THEN 'BAIXO'
+        ELSE 'OK'
+    END as status_estoque
+FROM insumos
+WHERE quantidade_atual <= quantidade_minima;
+CREATE UNIQUE INDEX idx_mv_estoque_critico_id ON mv_estoque_critico (id);
+
+-- Escritas acumuladas (pg_stat) nas tabelas de origem, incluindo partições.
+-- A diferença em relação ao valor do último refresh dá as escritas pendentes
+-- sem nenhum custo no caminho de escrita.
+CREATE OR REPLACE FUNCTION escritas_fontes(p_fontes TEXT[]) RETURNS BIGINT AS $$
+    SELECT COALESCE(SUM(s.n_tup_ins + s.n_tup_upd + s.n_tup_del), 0)::bigint
+    FROM unnest(p_fontes) AS f(tabela)
+    CROSS JOIN LATERAL pg_partition_tree(f.tabela::regclass) AS p
+    JOIN pg_stat_user_tables s ON s.relid = p.relid;
+$$ LANGUAGE sql STABLE;
+
+CREATE TABLE IF NOT EXISTS views_materializadas (
+    nome TEXT PRIMARY KEY,
+    fontes TEXT[] NOT NULL, -- tabelas de origem
+    intervalo_segundos INTEGER NOT NULL DEFAULT 900, -- refresh agendado
+    limite_escritas INTEGER NOT NULL DEFAULT 500, -- refresh antecipado após N escritas nas fontes
+    sla_segundos INTEGER NOT NULL DEFAULT 1800, -- acima disso os leitores consultam ao vivo
+    ultimo_refresh TIMESTAMP,
+    escritas_no_refresh BIGINT NOT NULL DEFAULT 0,
+    duracao_ms INTEGER,
+    ultimo_erro TEXT,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO views_materializadas (nome, fontes, intervalo_segundos, limite_escritas, sla_segundos) VALUES
+    ('mv_dashboard_stats', ARRAY['insumos', 'equipamentos_eletricos', 'equipamentos_manuais', 'movimentacoes'], 300, 200, 900),
+    ('mv_movimentacoes_resumo', ARRAY['movimentacoes'], 900, 500, 3600),
+    ('mv_estoque_critico', ARRAY['insumos'], 300, 100, 900)
+ON CONFLICT (nome) DO NOTHING;
+
+-- As views acabaram de ser criadas com dados
+UPDATE views_materializadas
+SET ultimo_refresh = CURRENT_TIMESTAMP,
+    escritas_no_refresh = escritas_fontes(fontes),
+    ultimo_erro = NULL;
+
+-- Substituída pelo serviço de atualização (modules/views_materializadas.py)
+DROP FUNCTION IF EXISTS refresh_materialized_views();
@@ -0,0 +1,9 @@
+-- Saldo de insumo nunca negativo. A baixa é um UPDATE condicional na mesma
+-- transação da movimentação; a restrição garante o mesmo para qualquer outro
+-- caminho de escrita. NOT VALID: vale para as linhas novas e alteradas sem
+-- bloquear a migração por saldos negativos antigos (corrigir e depois rodar
+-- ALTER TABLE insumos VALIDATE CONSTRAINT ck_insumos_quantidade_nao_negativa).
+
+ALTER TABLE insumos DROP CONSTRAINT IF EXISTS ck_insumos_quantidade_nao_negativa;
+ALTER TABLE insumos
+    ADD CONSTRAINT ck_insumos_quantidade_nao_negativa CHECK (quantidade_atual >= 0) NOT VALID;
@@ -0,0 +1,128 @@
+-- Razão do estoque de insumos: cada mudança de saldo vira um lançamento
+-- imutável por item e localização, gravado por trigger em insumos (vale para
+-- movimentações, ajustes, importação e scripts). Fotografias periódicas dos
+-- saldos permitem consultar o estoque em qualquer data somando apenas os
+-- lançamentos posteriores à fotografia mais próxima.
+
+LOCK TABLE insumos IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS estoque_lancamentos (
+    id BIGSERIAL PRIMARY KEY,
+    insumo_id INTEGER NOT NULL, -- sem FK: o histórico sobrevive à exclusão do insumo
+    localizacao TEXT NOT NULL DEFAULT '',
+    delta NUMERIC(14,3) NOT NULL,
+    saldo_local NUMERIC(14,3) NOT NULL, -- saldo do insumo na localização após o lançamento
+    tipo TEXT NOT NULL, -- 'abertura', 'inclusao', 'lancamento', 'transferencia_local', 'exclusao', 'reconciliacao'
+    registrado_em TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+);
+CREATE INDEX IF NOT EXISTS idx_estoque_lancamentos_item_data ON estoque_lancamentos (insumo_id, registrado_em);
+CREATE INDEX IF NOT EXISTS idx_estoque_lancamentos_data ON estoque_lancamentos (registrado_em);
+
+-- Particionada por mês como as demais tabelas de histórico (migração 0018)
+INSERT INTO politicas_retencao (tabela, coluna_particao, meses_retencao, acao)
+VALUES ('estoque_lancamentos', 'registrado_em', NULL, 'manter')
+ON CONFLICT (tabela) DO NOTHING;
+SELECT particionar_tabela_mensal(tabela, coluna_particao, meses_antecedencia)
+FROM politicas_retencao
+WHERE tabela = 'estoque_lancamentos';
+
+-- Saldo de cada insumo ao fim do dia `data` (ausente = zero)
+CREATE TABLE IF NOT EXISTS estoque_snapshots (
+    data DATE NOT NULL,
+    insumo_id INTEGER NOT NULL,
+    localizacao TEXT NOT NULL DEFAULT '',
+    saldo NUMERIC(14,3) NOT NULL,
+    PRIMARY KEY (data, insumo_id, localizacao)
+);
+CREATE INDEX IF NOT EXISTS idx_estoque_snapshots_item ON estoque_snapshots (insumo_id, data);
+
+-- Saldos existentes entram como abertura
+INSERT INTO estoque_lancamentos (insumo_id, localizacao, delta, saldo_local, tipo)
+SELECT id, COALESCE(localizacao, ''), quantidade_atual, quantidade_atual, 'abertura'
+FROM insumos
+WHERE COALESCE(quantidade_atual, 0) <> 0
+  AND NOT EXISTS (SELECT 1 FROM estoque_lancamentos);
+
+CREATE OR REPLACE FUNCTION trg_estoque_lancamentos() RETURNS TRIGGER AS $$
+DECLARE
+    v_antigo NUMERIC := 0;
+    v_novo NUMERIC := 0;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        v_antigo := COALESCE(OLD.quantidade_atual, 0);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_novo := COALESCE(NEW.quantidade_atual, 0);
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        IF v_novo <> 0 THEN
+            INSERT INTO estoque_lancamentos (insumo_id, localizacao, delta, saldo_local, tipo)
+            VALUES (NEW.id, COALESCE(NEW.localizacao, ''), v_novo, v_novo, 'inclusao');
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF v_antigo <> 0 THEN
+            INSERT INTO estoque_lancamentos (insumo_id, localizacao, delta, saldo_local, tipo)
+            VALUES (OLD.id, COALESCE(OLD.localizacao, ''), -v_antigo, 0, 'exclusao');
+        END IF;
+    ELSIF COALESCE(NEW.localizacao, '') <> COALESCE(OLD.localizacao, '') THEN
+        -- Mudança de localização: o saldo sai de uma e entra na outra
+        IF v_antigo <> 0 THEN
+            INSERT INTO estoque_lancamentos (insumo_id, localizacao, delta, saldo_local, tipo)
+            VALUES (OLD.id, COALESCE(OLD.localizacao, ''), -v_antigo, 0, 'transferencia_local');
+        END IF;
+        IF v_novo <> 0 THEN
+            INSERT INTO estoque_lancamentos (insumo_id, localizacao, delta, saldo_local, tipo)
+            VALUES (NEW.id, COALESCE(NEW.localizacao, ''), v_novo, v_novo, 'transferencia_local');
+        END IF;
+    ELSIF v_novo <> v_antigo THEN
+        INSERT INTO estoque_lancamentos (insumo_id, localizacao, delta, saldo_local, tipo)
+        VALUES (NEW.id, COALESCE(NEW.localizacao, ''), v_novo - v_antigo, v_novo, 'lancamento');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS estoque_lancamentos_insumos ON insumos;
+CREATE TRIGGER estoque_lancamentos_insumos
+    AFTER INSERT OR DELETE OR UPDATE OF quantidade_atual, localizacao ON insumos
+    FOR EACH ROW EXECUTE FUNCTION trg_estoque_lancamentos();
+
+-- Somente inserção: correções entram como lançamentos de reconciliação
+CREATE OR REPLACE FUNCTION trg_estoque_lancamentos_imutavel() RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'estoque_lancamentos aceita somente inserções';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS estoque_lancamentos_imutavel ON estoque_lancamentos;
+CREATE TRIGGER estoque_lancamentos_imutavel
+    AFTER UPDATE OR DELETE ON estoque_lancamentos
+    FOR EACH ROW EXECUTE FUNCTION trg_estoque_lancamentos_imutavel();
+
+-- Fotografia ao fim de p_data: fotografia anterior mais próxima somada aos
+-- lançamentos do intervalo. Executar de novo para a mesma data a refaz.
+CREATE OR REPLACE FUNCTION estoque_gerar_snapshot(p_data DATE) RETURNS INTEGER AS $$
+DECLARE
+    v_base DATE;
+    v_total INTEGER;
+BEGIN
+    SELECT MAX(data) INTO v_base FROM estoque_snapshots WHERE data < p_data;
+    DELETE FROM estoque_snapshots WHERE data = p_data;
+
+    INSERT INTO estoque_snapshots (data, insumo_id, localizacao, saldo)
+    SELECT p_data, insumo_id, localizacao, SUM(saldo)
+    FROM (
+        SELECT insumo_id, localizacao, saldo FROM estoque_snapshots WHERE data = v_base
+        UNION ALL
+        SELECT insumo_id, localizacao, delta FROM estoque_lancamentos
+        WHERE registrado_em >= COALESCE((v_base + 1)::timestamp, '-infinity'::timestamp)
+          AND registrado_em < (p_data + 1)::timestamp
+    ) saldos
+    GROUP BY insumo_id, localizacao
+    HAVING SUM(saldo) <> 0;
+
+    GET DIAGNOSTICS v_total = ROW_COUNT;
+    RETURN v_total;
+END;
+$$ LANGUAGE plpgsql;
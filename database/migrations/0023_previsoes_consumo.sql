@@ -0,0 +1,16 @@
+-- Previsões de consumo dos insumos, recalculadas em lote (modules/previsao_consumo.py)
+-- para todo o catálogo de uma vez. A tela de análise preditiva só lê esta tabela.
+
+CREATE TABLE IF NOT EXISTS previsoes_consumo (
+    insumo_id INTEGER PRIMARY KEY REFERENCES insumos(id) ON DELETE CASCADE,
+    gerado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    inicio_previsao DATE NOT NULL, -- primeiro dia de previsao_diaria
+    previsao_diaria NUMERIC(14,3)[] NOT NULL, -- consumo previsto por dia, a partir de inicio_previsao
+    tendencia_diaria NUMERIC(14,6) NOT NULL DEFAULT 0, -- variação do consumo por dia
+    consumo_medio_historico NUMERIC(14,3) NOT NULL DEFAULT 0,
+    variacao NUMERIC(10,4), -- coeficiente de variação do consumo diário
+    erro_medio NUMERIC(14,3), -- RMSE do ajuste no histórico
+    dias_historico INTEGER NOT NULL,
+    dias_com_consumo INTEGER NOT NULL,
+    confianca TEXT NOT NULL -- 'alta', 'media', 'baixa', 'insuficiente'
+);
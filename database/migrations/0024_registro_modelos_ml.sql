@@ -0,0 +1,14 @@
+-- Registro de modelos ML: cada versão treinada é um artefato em disco
+-- (modules/registro_modelos.py) descrito por uma linha de modelos_ml. Só uma
+-- versão por tipo_modelo fica ativa; a promoção troca as duas numa transação.
+
+ALTER TABLE modelos_ml ADD COLUMN IF NOT EXISTS caminho_artefato TEXT;
+ALTER TABLE modelos_ml ADD COLUMN IF NOT EXISTS hash_artefato VARCHAR(64); -- sha256 do arquivo
+ALTER TABLE modelos_ml ALTER COLUMN ativo SET DEFAULT FALSE;
+
+-- Linhas antigas não têm artefato que possa ser carregado
+UPDATE modelos_ml SET ativo = FALSE WHERE ativo AND caminho_artefato IS NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_modelos_ml_ativo ON modelos_ml (tipo_modelo) WHERE ativo;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_modelos_ml_versao
+    ON modelos_ml (tipo_modelo, versao_modelo) WHERE caminho_artefato IS NOT NULL;
@@ -0,0 +1,18 @@
+-- Regras de monitoramento compiladas em cache (modules/regras_iot.py): o cache
+-- compara COUNT(*) e MAX(atualizado_em) para saber quando recompilar, então
+-- toda alteração de regra precisa atualizar atualizado_em.
+
+ALTER TABLE regras_monitoramento ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+UPDATE regras_monitoramento SET atualizado_em = COALESCE(data_criacao, CURRENT_TIMESTAMP) WHERE atualizado_em IS NULL;
+
+CREATE OR REPLACE FUNCTION trg_regras_monitoramento_atualizado() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.atualizado_em := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS regras_monitoramento_atualizado ON regras_monitoramento;
+CREATE TRIGGER regras_monitoramento_atualizado
+    BEFORE INSERT OR UPDATE ON regras_monitoramento
+    FOR EACH ROW EXECUTE FUNCTION trg_regras_monitoramento_atualizado();
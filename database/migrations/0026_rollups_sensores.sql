@@ -0,0 +1,18 @@
+-- Agregados de dados_sensores por minuto, hora e dia (modules/rollups_sensores.py).
+-- O ingestor soma cada lote gravado nos três níveis; a média é soma/quantidade
+-- para que lotes diferentes do mesmo intervalo possam ser combinados.
+
+CREATE TABLE IF NOT EXISTS sensores_rollup (
+    resolucao INTEGER NOT NULL, -- segundos: 60, 3600 ou 86400
+    device_id VARCHAR(255) NOT NULL,
+    tipo_sensor VARCHAR(100) NOT NULL,
+    inicio TIMESTAMP NOT NULL,
+    minimo DOUBLE PRECISION NOT NULL,
+    maximo DOUBLE PRECISION NOT NULL,
+    soma DOUBLE PRECISION NOT NULL,
+    quantidade BIGINT NOT NULL,
+    PRIMARY KEY (resolucao, device_id, tipo_sensor, inicio)
+);
+
+-- Séries de um tipo de sensor somando todos os dispositivos
+CREATE INDEX IF NOT EXISTS idx_sensores_rollup_tipo ON sensores_rollup (resolucao, tipo_sensor, inicio);
@@ -0,0 +1,119 @@
+-- particionar_tabela_mensal (migração 0018) descartava em silêncio os índices
+-- e restrições UNIQUE da tabela original. Numa tabela particionada toda
+-- unicidade precisa incluir a coluna de partição: as restrições e índices
+-- únicos simples são recriados com ela no fim (a unicidade passa a valer por
+-- valor + data, e um WARNING registra a mudança); os que não podem ser
+-- recriados assim (expressão, parcial, INCLUDE) interrompem a conversão, assim
+-- como views que dependem da tabela.
+
+CREATE OR REPLACE FUNCTION particionar_tabela_mensal(p_tabela TEXT, p_coluna TEXT, p_meses_antecedencia INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    v_legado TEXT := p_tabela || '_legado';
+    v_sequencia TEXT;
+    v_indices TEXT[];
+    v_fks TEXT[];
+    v_unicos TEXT[];
+    v_unico RECORD;
+    v_colunas TEXT;
+    v_views TEXT;
+    v_def TEXT;
+    v_mes DATE;
+    v_ultimo DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_meses_antecedencia))::date;
+BEGIN
+    IF to_regclass(p_tabela) IS NULL
+       OR (SELECT relkind FROM pg_class WHERE oid = to_regclass(p_tabela)) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- Views seguem o rename e travariam o DROP da tabela legada no fim
+    SELECT string_agg(DISTINCT v.oid::regclass::text, ', ') INTO v_views
+    FROM pg_depend d
+    JOIN pg_rewrite r ON r.oid = d.objid
+    JOIN pg_class v ON v.oid = r.ev_class
+    WHERE d.classid = 'pg_rewrite'::regclass AND d.refobjid = to_regclass(p_tabela)
+      AND v.oid <> to_regclass(p_tabela);
+    IF v_views IS NOT NULL THEN
+        RAISE EXCEPTION 'Views dependem de %: %', p_tabela, v_views
+            USING HINT = 'Remova as views antes de particionar e recrie-as depois sobre a tabela particionada';
+    END IF;
+
+    v_sequencia := pg_get_serial_sequence(p_tabela, 'id');
+
+    -- Definições capturadas antes do rename ainda apontam para o nome original
+    SELECT array_agg(pg_get_indexdef(i.indexrelid)) INTO v_indices
+    FROM pg_index i
+    WHERE i.indrelid = to_regclass(p_tabela) AND NOT i.indisprimary AND NOT i.indisunique;
+
+    SELECT array_agg(format('ALTER TABLE %I ADD CONSTRAINT %I %s', p_tabela, conname, pg_get_constraintdef(oid))) INTO v_fks
+    FROM pg_constraint
+    WHERE conrelid = to_regclass(p_tabela) AND contype = 'f';
+
+    -- Restrições e índices únicos além da chave primária
+    v_unicos := '{}';
+    FOR v_unico IN
+        SELECT ic.relname as indice, con.conname as restricao,
+               i.indexprs IS NOT NULL OR i.indpred IS NOT NULL OR i.indnatts <> i.indnkeyatts as complexo,
+               ARRAY(SELECT a.attname FROM unnest(i.indkey) WITH ORDINALITY k(attnum, ordem)
+                     JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                     ORDER BY k.ordem) as colunas
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid AND con.contype = 'u'
+        WHERE i.indrelid = to_regclass(p_tabela) AND i.indisunique AND NOT i.indisprimary
+    LOOP
+        IF v_unico.complexo THEN
+            RAISE EXCEPTION 'Índice único % de % não pode ser levado para a tabela particionada', v_unico.indice, p_tabela
+                USING HINT = 'Índices únicos com expressão, predicado ou INCLUDE precisam ser removidos ou recriados à mão antes de particionar';
+        END IF;
+        SELECT string_agg(format('%I', c), ', ') INTO v_colunas
+        FROM unnest(v_unico.colunas || CASE WHEN p_coluna::name = ANY(v_unico.colunas) THEN '{}'::name[] ELSE ARRAY[p_coluna::name] END) c;
+        IF v_unico.restricao IS NOT NULL THEN
+            v_unicos := v_unicos || format('ALTER TABLE %I ADD CONSTRAINT %I UNIQUE (%s)', p_tabela, v_unico.restricao, v_colunas);
+        ELSE
+            v_unicos := v_unicos || format('CREATE UNIQUE INDEX %I ON %I (%s)', v_unico.indice, p_tabela, v_colunas);
+        END IF;
+        IF NOT p_coluna::name = ANY(v_unico.colunas) THEN
+            RAISE WARNING 'Unicidade % de % passa a ser (%): valores repetidos em datas diferentes deixam de ser rejeitados',
+                COALESCE(v_unico.restricao, v_unico.indice), p_tabela, v_colunas;
+        END IF;
+    END LOOP;
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_tabela, v_legado);
+    EXECUTE format('UPDATE %I SET %I = CURRENT_TIMESTAMP WHERE %I IS NULL', v_legado, p_coluna, p_coluna);
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (%I)',
+                   p_tabela, v_legado, p_coluna);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', p_tabela, p_coluna);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', p_tabela || '_padrao', p_tabela);
+
+    EXECUTE format('SELECT MIN(%I)::date FROM %I', p_coluna, v_legado) INTO v_mes;
+    v_mes := date_trunc('month', LEAST(COALESCE(v_mes, CURRENT_DATE), CURRENT_DATE))::date;
+    WHILE v_mes <= v_ultimo LOOP
+        PERFORM criar_particao_mensal(p_tabela, p_coluna, v_mes);
+        v_mes := (v_mes + INTERVAL '1 month')::date;
+    END LOOP;
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', p_tabela, v_legado);
+
+    -- A sequência do SERIAL pertence à tabela antiga; transfere antes do DROP
+    IF v_sequencia IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', v_sequencia);
+    END IF;
+    EXECUTE format('DROP TABLE %I', v_legado);
+    IF v_sequencia IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', v_sequencia, p_tabela);
+    END IF;
+
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, %I)', p_tabela, p_coluna);
+    RAISE WARNING 'Chave primária de % passa a ser (id, %): a unicidade do id fica a cargo da sequência', p_tabela, p_coluna;
+    FOREACH v_def IN ARRAY v_unicos LOOP
+        EXECUTE v_def;
+    END LOOP;
+    FOREACH v_def IN ARRAY COALESCE(v_indices, '{}') LOOP
+        EXECUTE v_def;
+    END LOOP;
+    FOREACH v_def IN ARRAY COALESCE(v_fks, '{}') LOOP
+        EXECUTE v_def;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,266 @@
+-- Contadores do dashboard (migração 0019) sem linha disputada: os triggers de
+-- linha atualizavam a mesma linha de dashboard_counters (e a do dia em
+-- dashboard_movimentacoes_diarias) a cada lançamento de estoque, e toda
+-- transação concorrente esperava o commit da anterior. Agora são triggers por
+-- comando, com tabelas de transição, que só inserem o delta do comando em
+-- tabelas sem índice; dashboard_consolidar_deltas() soma os deltas nos
+-- contadores periodicamente e a leitura soma os que ainda estão pendentes.
+
+CREATE TABLE IF NOT EXISTS dashboard_counters_deltas (
+    fonte TEXT NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    alertas BIGINT NOT NULL DEFAULT 0,
+    valor_total NUMERIC NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS dashboard_movimentacoes_deltas (
+    dia DATE NOT NULL,
+    total BIGINT NOT NULL
+);
+
+-- Mesma assinatura da 0019, agora só acrescenta o delta
+CREATE OR REPLACE FUNCTION dashboard_aplicar_delta(p_fonte TEXT, p_total BIGINT, p_alertas BIGINT, p_valor NUMERIC)
+RETURNS VOID AS $$
+BEGIN
+    IF p_total = 0 AND p_alertas = 0 AND p_valor = 0 THEN
+        RETURN;
+    END IF;
+    INSERT INTO dashboard_counters_deltas (fonte, total, alertas, valor_total)
+    VALUES (p_fonte, p_total, p_alertas, p_valor);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cada função recebe as linhas do comando em `novas` (INSERT/UPDATE) e
+-- `antigas` (UPDATE/DELETE); só o ramo da operação corrente é executado.
+CREATE OR REPLACE FUNCTION trg_dashboard_insumos() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+    v_alertas BIGINT := 0;
+    v_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        SELECT COUNT(*), COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima),
+               COALESCE(SUM(quantidade_atual * preco_unitario), 0)
+        INTO v_total, v_alertas, v_valor
+        FROM novas WHERE ativo;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT v_total - COUNT(*), v_alertas - COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima),
+               v_valor - COALESCE(SUM(quantidade_atual * preco_unitario), 0)
+        INTO v_total, v_alertas, v_valor
+        FROM antigas WHERE ativo;
+    END IF;
+    PERFORM dashboard_aplicar_delta('insumos', v_total, v_alertas, v_valor);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_equipamentos_eletricos() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+    v_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        SELECT COUNT(*), COALESCE(SUM(COALESCE(valor_compra, 0)), 0)
+        INTO v_total, v_valor
+        FROM novas WHERE ativo;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT v_total - COUNT(*), v_valor - COALESCE(SUM(COALESCE(valor_compra, 0)), 0)
+        INTO v_total, v_valor
+        FROM antigas WHERE ativo;
+    END IF;
+    PERFORM dashboard_aplicar_delta('equipamentos_eletricos', v_total, 0, v_valor);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_equipamentos_manuais() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+    v_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        SELECT COUNT(*), COALESCE(SUM(quantitativo * COALESCE(valor, 0)), 0)
+        INTO v_total, v_valor
+        FROM novas WHERE ativo;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT v_total - COUNT(*), v_valor - COALESCE(SUM(quantitativo * COALESCE(valor, 0)), 0)
+        INTO v_total, v_valor
+        FROM antigas WHERE ativo;
+    END IF;
+    PERFORM dashboard_aplicar_delta('equipamentos_manuais', v_total, 0, v_valor);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_obras() RETURNS TRIGGER AS $$
+DECLARE
+    v_total BIGINT := 0;
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        SELECT COUNT(*) INTO v_total FROM novas WHERE status = 'ativo';
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT v_total - COUNT(*) INTO v_total FROM antigas WHERE status = 'ativo';
+    END IF;
+    PERFORM dashboard_aplicar_delta('obras', v_total, 0, 0);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_dashboard_movimentacoes() RETURNS TRIGGER AS $$
+BEGIN
+    -- Linhas levadas da partição padrão para a do mês não mudam a contagem
+    IF current_setting('inventario.movendo_particao', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO dashboard_movimentacoes_deltas (dia, total)
+        SELECT data_movimentacao::date, COUNT(*) FROM novas GROUP BY 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO dashboard_movimentacoes_deltas (dia, total)
+        SELECT data_movimentacao::date, -COUNT(*) FROM antigas GROUP BY 1;
+    ELSE
+        INSERT INTO dashboard_movimentacoes_deltas (dia, total)
+        SELECT dia, SUM(total) FROM (
+            SELECT data_movimentacao::date as dia, 1 as total FROM novas
+            UNION ALL
+            SELECT data_movimentacao::date, -1 FROM antigas
+        ) linhas
+        GROUP BY dia
+        HAVING SUM(total) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Tabelas de transição exigem um trigger por operação
+DO $$
+DECLARE
+    v_tabela TEXT;
+BEGIN
+    FOREACH v_tabela IN ARRAY ARRAY['insumos', 'equipamentos_eletricos', 'equipamentos_manuais', 'obras', 'movimentacoes'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'dashboard_counters_' || v_tabela, v_tabela);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'dashboard_counters_' || v_tabela || '_ins', v_tabela);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'dashboard_counters_' || v_tabela || '_upd', v_tabela);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'dashboard_counters_' || v_tabela || '_del', v_tabela);
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS novas '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+                       'dashboard_counters_' || v_tabela || '_ins', v_tabela, 'trg_dashboard_' || v_tabela);
+        EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS antigas NEW TABLE AS novas '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+                       'dashboard_counters_' || v_tabela || '_upd', v_tabela, 'trg_dashboard_' || v_tabela);
+        EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS antigas '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+                       'dashboard_counters_' || v_tabela || '_del', v_tabela, 'trg_dashboard_' || v_tabela);
+    END LOOP;
+END;
+$$;
+
+-- Soma os deltas gravados até aqui nos contadores e os remove. Deltas de
+-- transações ainda abertas ficam para a próxima consolidação; duas
+-- consolidações simultâneas não somam o mesmo delta (a segunda espera as
+-- linhas apagadas pela primeira e as ignora).
+CREATE OR REPLACE FUNCTION dashboard_consolidar_deltas() RETURNS INTEGER AS $$
+DECLARE
+    v_contadores INTEGER;
+    v_dias INTEGER;
+BEGIN
+    WITH removidos AS (
+        DELETE FROM dashboard_counters_deltas RETURNING *
+    )
+    INSERT INTO dashboard_counters (fonte, total, alertas, valor_total)
+    SELECT fonte, SUM(total), SUM(alertas), SUM(valor_total) FROM removidos GROUP BY fonte
+    ON CONFLICT (fonte) DO UPDATE SET
+        total = dashboard_counters.total + EXCLUDED.total,
+        alertas = dashboard_counters.alertas + EXCLUDED.alertas,
+        valor_total = dashboard_counters.valor_total + EXCLUDED.valor_total,
+        atualizado_em = CURRENT_TIMESTAMP;
+    GET DIAGNOSTICS v_contadores = ROW_COUNT;
+
+    WITH removidos AS (
+        DELETE FROM dashboard_movimentacoes_deltas RETURNING *
+    )
+    INSERT INTO dashboard_movimentacoes_diarias (dia, total)
+    SELECT dia, SUM(total) FROM removidos GROUP BY dia
+    ON CONFLICT (dia) DO UPDATE SET total = dashboard_movimentacoes_diarias.total + EXCLUDED.total;
+    GET DIAGNOSTICS v_dias = ROW_COUNT;
+
+    RETURN v_contadores + v_dias;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recalcular descarta os deltas: a contagem a partir das tabelas já os inclui
+CREATE OR REPLACE FUNCTION recalcular_dashboard_counters() RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE insumos, equipamentos_eletricos, equipamentos_manuais, obras, movimentacoes IN SHARE MODE;
+
+    DELETE FROM dashboard_counters_deltas;
+    INSERT INTO dashboard_counters (fonte, total, alertas, valor_total)
+    SELECT 'insumos', COUNT(*),
+           COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima),
+           COALESCE(SUM(quantidade_atual * preco_unitario), 0)
+    FROM insumos WHERE ativo = TRUE
+    UNION ALL
+    SELECT 'equipamentos_eletricos', COUNT(*), 0, COALESCE(SUM(COALESCE(valor_compra, 0)), 0)
+    FROM equipamentos_eletricos WHERE ativo = TRUE
+    UNION ALL
+    SELECT 'equipamentos_manuais', COUNT(*), 0, COALESCE(SUM(quantitativo * COALESCE(valor, 0)), 0)
+    FROM equipamentos_manuais WHERE ativo = TRUE
+    UNION ALL
+    SELECT 'obras', COUNT(*), 0, 0
+    FROM obras WHERE status = 'ativo'
+    ON CONFLICT (fonte) DO UPDATE SET
+        total = EXCLUDED.total,
+        alertas = EXCLUDED.alertas,
+        valor_total = EXCLUDED.valor_total,
+        atualizado_em = CURRENT_TIMESTAMP;
+
+    DELETE FROM dashboard_movimentacoes_deltas;
+    DELETE FROM dashboard_movimentacoes_diarias;
+    INSERT INTO dashboard_movimentacoes_diarias (dia, total)
+    SELECT data_movimentacao::date, COUNT(*)
+    FROM movimentacoes
+    GROUP BY data_movimentacao::date;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mesma função da 0018; a movimentação de linhas da partição padrão marca a
+-- transação com inventario.movendo_particao para os triggers a ignorarem
+CREATE OR REPLACE FUNCTION criar_particao_mensal(p_tabela TEXT, p_coluna TEXT, p_mes DATE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_inicio DATE := date_trunc('month', p_mes)::date;
+    v_fim DATE := (date_trunc('month', p_mes) + INTERVAL '1 month')::date;
+    v_particao TEXT := p_tabela || '_' || to_char(p_mes, 'YYYYMM');
+    v_padrao TEXT := p_tabela || '_padrao';
+    v_pendentes BOOLEAN;
+BEGIN
+    IF to_regclass(v_particao) IS NOT NULL OR to_regclass('arquivo.' || v_particao) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                   v_padrao, p_coluna, v_inicio, p_coluna, v_fim) INTO v_pendentes;
+
+    IF v_pendentes THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_particao, p_tabela);
+        PERFORM set_config('inventario.movendo_particao', 'on', true);
+        EXECUTE format('WITH movidas AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+                       'INSERT INTO %I SELECT * FROM movidas',
+                       v_padrao, p_coluna, v_inicio, p_coluna, v_fim, v_particao);
+        PERFORM set_config('inventario.movendo_particao', 'off', true);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       p_tabela, v_particao, v_inicio, v_fim);
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       v_particao, p_tabela, v_inicio, v_fim);
+    END IF;
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Corrige divergências acumuladas pelas movimentações de partição anteriores
+SELECT recalcular_dashboard_counters();
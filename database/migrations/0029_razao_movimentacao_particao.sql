@@ -0,0 +1,15 @@
+-- O trigger de imutabilidade de estoque_lancamentos (migração 0022) é
+-- clonado na partição padrão, e criar_particao_mensal move as linhas do mês
+-- com DELETE nela: a criação da partição falhava (para todas as tabelas, já
+-- que garantir_particoes usa uma transação só) assim que um lançamento caía
+-- na partição padrão. A movimentação marca a transação com
+-- inventario.movendo_particao (migração 0028) e o trigger a deixa passar.
+
+CREATE OR REPLACE FUNCTION trg_estoque_lancamentos_imutavel() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' AND current_setting('inventario.movendo_particao', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    RAISE EXCEPTION 'estoque_lancamentos aceita somente inserções';
+END;
+$$ LANGUAGE plpgsql;
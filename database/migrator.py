@@ -0,0 +1,150 @@
+"""
+Sistema de Inventário Web - Migrações versionadas do schema PostgreSQL
+Aplica uma única vez os arquivos numerados de database/migrations/ (NNNN_nome.sql)
+e registra cada versão aplicada na tabela schema_migrations.
+
+Uso:
+    python -m database.migrator            # aplica as migrações pendentes
+    python -m database.migrator status     # lista versões aplicadas e pendentes
+"""
+
+import hashlib
+import os
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+MIGRATIONS_DIR = Path(__file__).parent / 'migrations'
+
+# Chave do advisory lock que serializa deploys concorrentes
+MIGRATION_LOCK_ID = 7240311
+
+_NOME_ARQUIVO = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+
+@dataclass(frozen=True)
+class Migracao:
+    """Arquivo de migração numerado"""
+    versao: int
+    nome: str
+    caminho: Path
+
+    @property
+    def sql(self) -> str:
+        return self.caminho.read_text(encoding='utf-8')
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.caminho.read_bytes()).hexdigest()
+
+
+def listar_migracoes(diretorio: Path = MIGRATIONS_DIR) -> list[Migracao]:
+    """Lista as migrações do diretório em ordem de versão"""
+    migracoes: dict[int, Migracao] = {}
+    for caminho in sorted(diretorio.glob('*.sql')):
+        match = _NOME_ARQUIVO.match(caminho.name)
+        if not match:
+            raise ValueError(f"Nome de migração inválido: {caminho.name} (esperado NNNN_nome.sql)")
+        versao = int(match.group(1))
+        if versao in migracoes:
+            raise ValueError(f"Versão de migração duplicada: {versao:04d}")
+        migracoes[versao] = Migracao(versao, match.group(2), caminho)
+    return [migracoes[v] for v in sorted(migracoes)]
+
+
+def _criar_tabela_controle(cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            versao INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _versoes_aplicadas(cursor) -> dict[int, str]:
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL AS existe")
+    row = cursor.fetchone()
+    if not row or not row['existe']:
+        return {}
+    cursor.execute("SELECT versao, checksum FROM schema_migrations")
+    return {r['versao']: r['checksum'] for r in cursor.fetchall()}
+
+
+def migracoes_pendentes(database, diretorio: Path = MIGRATIONS_DIR) -> list[Migracao]:
+    """Migrações ainda não registradas em schema_migrations"""
+    with database.cursor() as cursor:
+        aplicadas = _versoes_aplicadas(cursor)
+    return [m for m in listar_migracoes(diretorio) if m.versao not in aplicadas]
+
+
+def aplicar_migracoes(database, diretorio: Path = MIGRATIONS_DIR) -> list[int]:
+    """Aplica as migrações pendentes em uma única transação.
+
+    Sem pendências custa uma consulta; com pendências, um advisory lock garante
+    que só um processo aplique cada versão. Retorna as versões aplicadas.
+    """
+    if not migracoes_pendentes(database, diretorio):
+        return []
+
+    aplicadas_agora: list[int] = []
+    with database.transaction() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        _criar_tabela_controle(cursor)
+        aplicadas = _versoes_aplicadas(cursor)
+        for migracao in listar_migracoes(diretorio):
+            if migracao.versao in aplicadas:
+                if aplicadas[migracao.versao] != migracao.checksum:
+                    print(f"AVISO - Migração {migracao.versao:04d}_{migracao.nome} foi alterada após ser aplicada")
+                continue
+            cursor.execute(migracao.sql)
+            cursor.execute("""
+                INSERT INTO schema_migrations (versao, nome, checksum)
+                VALUES (%s, %s, %s)
+            """, (migracao.versao, migracao.nome, migracao.checksum))
+            aplicadas_agora.append(migracao.versao)
+            print(f"OK - Migração {migracao.versao:04d}_{migracao.nome} aplicada")
+    return aplicadas_agora
+
+
+def status_migracoes(database, diretorio: Path = MIGRATIONS_DIR) -> list[dict[str, Any]]:
+    """Situação de cada migração conhecida (aplicada ou pendente)"""
+    with database.cursor() as cursor:
+        aplicadas = _versoes_aplicadas(cursor)
+    return [
+        {'versao': m.versao, 'nome': m.nome, 'aplicada': m.versao in aplicadas}
+        for m in listar_migracoes(diretorio)
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else 'aplicar'
+    if comando not in ('aplicar', 'status'):
+        print(__doc__)
+        return 2
+
+    # A CLI controla a aplicação; a conexão global não deve migrar sozinha
+    os.environ['DB_AUTO_MIGRATE'] = '0'
+    from database.connection import db
+
+    try:
+        if comando == 'status':
+            for item in status_migracoes(db):
+                situacao = 'aplicada' if item['aplicada'] else 'pendente'
+                print(f"{item['versao']:04d}_{item['nome']}: {situacao}")
+        else:
+            versoes = aplicar_migracoes(db)
+            db.create_default_user()
+            if not versoes:
+                print("OK - Schema atualizado, nenhuma migração pendente")
+    finally:
+        db.close_connection()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
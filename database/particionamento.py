@@ -0,0 +1,156 @@
+"""
+Sistema de Inventário Web - Manutenção das partições mensais
+Cria as partições dos próximos meses e aplica as políticas de retenção
+(tabela politicas_retencao, migração 0018) às tabelas de histórico.
+
+Uso:
+    python -m database.particionamento             # cria partições e aplica retenção
+    python -m database.particionamento particoes   # só cria as partições à frente
+    python -m database.particionamento status      # lista as partições por tabela
+"""
+
+import os
+import re
+import sys
+from datetime import date
+from typing import Any
+
+# Chave do advisory lock que serializa manutenções concorrentes
+PARTICIONAMENTO_LOCK_ID = 7240312
+
+ACOES_RETENCAO = ('manter', 'desanexar', 'arquivar', 'excluir')
+
+_SUFIXO_MES = re.compile(r'_(\d{4})(\d{2})$')
+
+
+def _somar_meses(mes: date, meses: int) -> date:
+    total = mes.year * 12 + mes.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def mes_da_particao(nome: str) -> date | None:
+    """Mês de uma partição pelo sufixo _AAAAMM (None para a partição padrão)"""
+    encontrado = _SUFIXO_MES.search(nome)
+    if not encontrado:
+        return None
+    return date(int(encontrado.group(1)), int(encontrado.group(2)), 1)
+
+
+def get_politicas(database) -> list[dict[str, Any]]:
+    """Políticas de retenção cadastradas"""
+    with database.cursor() as cursor:
+        cursor.execute("""
+            SELECT tabela, coluna_particao, meses_retencao, acao, meses_antecedencia
+            FROM politicas_retencao
+            ORDER BY tabela
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def listar_particoes(database, tabela: str) -> list[dict[str, Any]]:
+    """Partições anexadas a uma tabela, com o mês e o número estimado de linhas"""
+    with database.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname as nome, GREATEST(c.reltuples, 0)::bigint as linhas_estimadas
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            ORDER BY c.relname
+        """, [tabela])
+        return [{**dict(row), 'mes': mes_da_particao(row['nome'])} for row in cursor.fetchall()]
+
+
+def garantir_particoes(database, hoje: date | None = None) -> list[str]:
+    """Cria as partições do mês atual até meses_antecedencia à frente.
+
+    Retorna os nomes das partições criadas. Idempotente.
+    """
+    mes_atual = (hoje or date.today()).replace(day=1)
+    criadas: list[str] = []
+    with database.transaction() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [PARTICIONAMENTO_LOCK_ID])
+        for politica in get_politicas(database):
+            for meses in range(politica['meses_antecedencia'] + 1):
+                mes = _somar_meses(mes_atual, meses)
+                cursor.execute("SELECT criar_particao_mensal(%s, %s, %s) as criada",
+                               [politica['tabela'], politica['coluna_particao'], mes])
+                if cursor.fetchone()['criada']:
+                    criadas.append(f"{politica['tabela']}_{mes:%Y%m}")
+    return criadas
+
+
+def aplicar_retencao(database, hoje: date | None = None) -> list[tuple[str, str]]:
+    """Aplica as políticas de retenção às partições mais antigas que o limite.
+
+    Uma partição é afetada quando o mês inteiro é anterior a
+    (mês atual - meses_retencao). 'desanexar' a deixa como tabela avulsa,
+    'arquivar' a desanexa e move para o schema arquivo, 'excluir' a remove.
+    Retorna pares (partição, ação) do que foi feito.
+    """
+    mes_atual = (hoje or date.today()).replace(day=1)
+    aplicadas: list[tuple[str, str]] = []
+    with database.transaction() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [PARTICIONAMENTO_LOCK_ID])
+        for politica in get_politicas(database):
+            acao = politica['acao']
+            if acao == 'manter' or not politica['meses_retencao']:
+                continue
+            if acao not in ACOES_RETENCAO:
+                print(f"AVISO - Ação de retenção desconhecida para {politica['tabela']}: {acao}")
+                continue
+
+            limite = _somar_meses(mes_atual, -politica['meses_retencao'])
+            for particao in listar_particoes(database, politica['tabela']):
+                if particao['mes'] is None or particao['mes'] >= limite:
+                    continue
+                nome = particao['nome']
+                if acao == 'excluir':
+                    cursor.execute(f'DROP TABLE "{nome}"')
+                else:
+                    cursor.execute(f'ALTER TABLE "{politica["tabela"]}" DETACH PARTITION "{nome}"')
+                    if acao == 'arquivar':
+                        cursor.execute(f'ALTER TABLE "{nome}" SET SCHEMA arquivo')
+                aplicadas.append((nome, acao))
+    return aplicadas
+
+
+def manter_particoes(database, hoje: date | None = None) -> dict[str, list]:
+    """Rotina completa: partições à frente e retenção"""
+    return {
+        'criadas': garantir_particoes(database, hoje),
+        'retencao': aplicar_retencao(database, hoje),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else 'manter'
+    if comando not in ('manter', 'particoes', 'status'):
+        print(__doc__)
+        return 2
+
+    os.environ['DB_AUTO_MIGRATE'] = '0'
+    from database.connection import db
+
+    try:
+        if comando == 'status':
+            for politica in get_politicas(db):
+                print(f"{politica['tabela']} (retenção: {politica['meses_retencao'] or '-'} meses, {politica['acao']})")
+                for particao in listar_particoes(db, politica['tabela']):
+                    print(f"  {particao['nome']}: ~{particao['linhas_estimadas']} linhas")
+        elif comando == 'particoes':
+            for nome in garantir_particoes(db):
+                print(f"OK - Partição criada: {nome}")
+        else:
+            resultado = manter_particoes(db)
+            for nome in resultado['criadas']:
+                print(f"OK - Partição criada: {nome}")
+            for nome, acao in resultado['retencao']:
+                print(f"OK - Retenção ({acao}): {nome}")
+    finally:
+        db.close_connection()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,12 +3,12 @@ Sistema de Inventário Web - Aplicação Principal
 Dashboard completo com todas as funcionalidades avançadas
 """
 
+import time
+
+_INICIO_SCRIPT = time.perf_counter()
+
 import streamlit as st
-import plotly.express as px  # type: ignore
-import plotly.graph_objects as go  # type: ignore
-from streamlit_option_menu import option_menu  # type: ignore
 from typing import Dict, Union
-import time
 
 # Tipo para métricas do dashboard
 MetricsData = Dict[str, Dict[str, Union[int, float]]]
@@ -39,7 +39,6 @@ except ImportError:
 # Configurações de cache
 if 'cache_initialized' not in st.session_state:
     st.session_state.cache_initialized = True
-    st.session_state.last_cache_clear = time.time()
 
 # CSS personalizado para melhorar o visual das notificações
 st.markdown("""
@@ -95,16 +94,12 @@ st.markdown("""
 try:
     from database.connection import db
     from modules.auth import auth_manager
+    from modules.dashboard_counters import dashboard_counters
+    from modules.views_materializadas import servico_views
+    from modules.cache_compartilhado import cache_compartilhado
     from cache_optimizer import StreamlitCache, performance_monitor, lazy_load
-    from modules.equipamentos_eletricos import show_equipamentos_eletricos_page
-    from modules.equipamentos_manuais import show_equipamentos_manuais_page
-    from modules.movimentacoes import show_movimentacoes_page
-    from modules.obras import show_obras_page
-    from modules.responsaveis import show_responsaveis_page
-    from modules.logs_auditoria import show_logs_auditoria_page
-    from modules.relatorios import show_relatorios_page
-    from modules.configuracoes import show_configuracoes_page
-    from modules.notifications import notificar_estoque_baixo, notificar_vencimento, notificar_vida_util
+    # Páginas são importadas só quando abertas (ver modules/paginas.py)
+    from modules.paginas import paginas_permitidas, carregar_pagina
 except ImportError as e:
     st.error(f"Erro ao importar módulos: {e}")
     st.stop()
@@ -265,108 +260,12 @@ def show_login_page():
 
 # Removida função de registro público - apenas administradores podem criar usuários
 
-# Cache para métricas do dashboard
-@st.cache_data(ttl=60)  # Cache por 60 segundos
+# Métricas do dashboard: contadores mantidos por triggers, lidos sem cache
 def get_dashboard_metrics() -> MetricsData:
-    """Busca métricas do dashboard com cache"""
-    conn = db.get_connection()
-    # Garantir que a conexão esteja limpa
-    if hasattr(conn, 'rollback'):
-        conn.rollback()  # type: ignore
-    
-    cursor = conn.cursor()
-    
-    metrics: MetricsData = {}
-    
+    """Busca métricas do dashboard (leitura O(1) de dashboard_counters)"""
     try:
-        # Métricas principais em uma query otimizada
-        cursor.execute("""
-            SELECT 
-                'insumos' as tipo,
-                COUNT(*) as total,
-                SUM(CASE WHEN quantidade_atual <= quantidade_minima THEN 1 ELSE 0 END) as alertas,
-                SUM(quantidade_atual * preco_unitario) as valor_total
-            FROM insumos WHERE ativo = TRUE
-            UNION ALL
-            SELECT 
-                'equipamentos_eletricos' as tipo,
-                COUNT(*) as total,
-                0 as alertas,
-                SUM(COALESCE(valor_compra, 0)) as valor_total
-            FROM equipamentos_eletricos WHERE ativo = TRUE
-            UNION ALL
-            SELECT 
-                'equipamentos_manuais' as tipo,
-                COUNT(*) as total,
-                0 as alertas,
-                SUM(quantitativo * COALESCE(valor, 0)) as valor_total
-            FROM equipamentos_manuais WHERE ativo = TRUE
-            UNION ALL
-            SELECT 
-                'obras' as tipo,
-                COUNT(*) as total,
-                0 as alertas,
-                0 as valor_total
-            FROM obras WHERE status = 'ativo'
-        """)
-        
-        results = cursor.fetchall()
-        for row in results:
-            # Tratar resultados do PostgreSQL de forma robusta
-            if isinstance(row, dict):
-                tipo = row.get('tipo')
-                total = row.get('total', 0) 
-                alertas = row.get('alertas', 0)
-                valor = row.get('valor_total', 0)
-            else:
-                # Se for tuple, converter usando cursor.description
-                columns = [desc[0] for desc in cursor.description]
-                row_dict = dict(zip(columns, row))
-                tipo = row_dict.get('tipo')
-                total = row_dict.get('total', 0)
-                alertas = row_dict.get('alertas', 0)
-                valor = row_dict.get('valor_total', 0)
-                
-            if tipo:
-                metrics[tipo] = {
-                    'total': total or 0,
-                    'alertas': alertas or 0,
-                    'valor_total': valor or 0
-                }
-        
-        # Movimentações recentes
-        cursor.execute("""
-            SELECT 
-                COUNT(CASE WHEN data_movimentacao::date = CURRENT_DATE THEN 1 END) as hoje,
-                COUNT(CASE WHEN data_movimentacao >= CURRENT_DATE - INTERVAL '7 days' THEN 1 END) as semana
-            FROM movimentacoes
-        """)
-        mov_result = cursor.fetchone()
-        mov_hoje = mov_result['hoje'] if mov_result and isinstance(mov_result, dict) else 0
-        mov_semana = mov_result['semana'] if mov_result and isinstance(mov_result, dict) else 0
-        
-        # Converter para formato esperado pelo dashboard
-        dashboard_metrics = {
-            'total_insumos': metrics.get('insumos', {}).get('total', 0),
-            'total_ee': metrics.get('equipamentos_eletricos', {}).get('total', 0),
-            'total_em': metrics.get('equipamentos_manuais', {}).get('total', 0),
-            'total_obras': metrics.get('obras', {}).get('total', 0),
-            'itens_criticos': metrics.get('insumos', {}).get('alertas', 0),
-            'valor_total_estoque': float(
-                metrics.get('insumos', {}).get('valor_total', 0) +
-                metrics.get('equipamentos_eletricos', {}).get('valor_total', 0) +
-                metrics.get('equipamentos_manuais', {}).get('valor_total', 0)
-            ),
-            'movimentacoes_hoje': mov_hoje,
-            'movimentacoes_semana': mov_semana
-        }
-        
-        return dashboard_metrics
-        
+        return dashboard_counters.get_metricas()
     except Exception as e:
-        # Fazer rollback explícito para limpar o estado da transação
-        if hasattr(conn, 'rollback'):
-            conn.rollback()  # type: ignore
         st.error(f"Erro ao buscar métricas: {e}")
         return {}
 
@@ -374,15 +273,7 @@ def get_dashboard_metrics() -> MetricsData:
 @performance_monitor
 def show_dashboard():
     """Exibe dashboard principal com métricas e cache otimizado"""
-    
-    # Auto-limpeza de cache a cada hora
-    if 'last_cache_clear' not in st.session_state:
-        st.session_state.last_cache_clear = time.time()
-    
-    if time.time() - st.session_state.last_cache_clear > 3600:
-        st.cache_data.clear()
-        st.session_state.last_cache_clear = time.time()
-        st.success("🔄 Cache automaticamente atualizado!")
+    import plotly.express as px  # type: ignore
     
     st.markdown("""
     <div class="main-header">
@@ -394,17 +285,15 @@ def show_dashboard():
     # Botões de controle
     col_refresh, col_auto, col_cache = st.columns([1, 2, 2])
     with col_refresh:
+        # O cache compartilhado é invalidado pelas escritas; basta recarregar
         if st.button("🔄 Atualizar", help="Atualizar métricas"):
-            st.cache_data.clear()
-            st.session_state.last_cache_clear = time.time()
             st.rerun()
     
     with col_auto:
-        st.caption("📊 Métricas com cache inteligente ativo")
+        st.caption("📊 Métricas atualizadas a cada operação")
     
     with col_cache:
-        cache_age = (time.time() - st.session_state.last_cache_clear) / 60
-        st.caption(f"⏱️ Cache: {cache_age:.0f}min atrás")
+        st.caption(f"⚡ Cache compartilhado: {cache_compartilhado.acertos} acertos")
     
     # Buscar dados com cache otimizado
     with st.spinner("Carregando métricas otimizadas..."):
@@ -529,6 +418,7 @@ def show_dashboard():
         st.error(f"Erro ao carregar alertas: {e}")
         # Fallback para notificações básicas
         try:
+            from modules.notifications import notificar_estoque_baixo, notificar_vencimento, notificar_vida_util
             notificar_estoque_baixo()
             notificar_vencimento()
             notificar_vida_util()
@@ -594,56 +484,14 @@ def show_sidebar():
         if st.session_state.authenticated:
             user_permissions = auth_manager.get_user_module_permissions(user_data['id'])
         
-        # Definir todas as opções disponíveis com suas chaves de permissão
-        all_menu_options = [
-            ("Dashboard", "dashboard", "speedometer2"),
-            ("Insumos", "insumos", "box-seam"), 
-            ("Equipamentos Elétricos", "equipamentos_eletricos", "lightning-charge"),
-            ("Equipamentos Manuais", "equipamentos_manuais", "tools"),
-            ("Movimentações", "movimentacao", "arrow-left-right"),
-            ("Obras/Departamentos", "obras", "building"),
-            ("Responsáveis", "responsaveis", "people"),
-            ("Relatórios", "relatorios", "file-earmark-text"),
-            ("Auditoria Completa", "auditoria_avancada", "shield-check"),
-            ("Usuários", "usuarios", "person-plus"),
-            ("Configurações", "configuracoes", "gear"),
-            ("QR/Códigos de Barras", "qr_codes", "qr-code"),
-            ("Reservas", "reservas", "calendar-check"),
-            ("Manutenção Preventiva", "manutencao", "tools"),
-            ("Dashboard Executivo", "dashboard_exec", "graph-up"),
-            ("Localização", "localizacao", "geo-alt"),
-            ("Gestão Financeira", "financeiro", "currency-dollar"),
-            ("Análise Preditiva", "analise", "graph-up-arrow"),
-            ("Gestão de Subcontratados", "subcontratados", "building-gear"),
-            ("Relatórios Customizáveis", "relatorios_custom", "file-earmark-bar-graph"),
-            ("Métricas Performance", "metricas", "speedometer"),
-            ("Backup Automático", "backup_automatico", "cloud-arrow-up"),
-            ("LGPD/Compliance", "lgpd", "shield-check"),
-            ("Orçamentos e Cotações", "orcamentos", "calculator"),
-            ("Sistema de Faturamento", "faturamento", "receipt"),
-            ("Integração ERP/SAP", "integracao", "diagram-3")
-        ]
-        
-        # Filtrar opções baseadas nas permissões do usuário
-        if st.session_state.authenticated and user_data['perfil'] != 'admin':
-            # Para usuários não-admin, filtrar baseado nas permissões
-            filtered_options = []
-            filtered_icons = []
-            
-            for option_name, permission_key, icon in all_menu_options:
-                # Sempre permitir acesso ao dashboard
-                if permission_key == "dashboard" or user_permissions.get(permission_key, False):
-                    filtered_options.append(option_name)
-                    filtered_icons.append(icon)
-            
-            menu_options = filtered_options
-            menu_icons = filtered_icons
-        else:
-            # Para admins ou usuários não autenticados, mostrar todas as opções
-            menu_options = [option[0] for option in all_menu_options]
-            menu_icons = [option[2] for option in all_menu_options]
+        # Opções do registro de páginas, filtradas pelas permissões do usuário
+        admin = not st.session_state.authenticated or user_data['perfil'] == 'admin'
+        paginas = paginas_permitidas(user_permissions, admin=admin)
+        menu_options = [pagina.nome for pagina in paginas]
+        menu_icons = [pagina.icone for pagina in paginas]
         
         # Menu principal
+        from streamlit_option_menu import option_menu  # type: ignore
         selected = option_menu(
             menu_title="📦 Inventário Web",
             options=menu_options,
@@ -679,6 +527,15 @@ def show_sidebar():
         
         return selected
 
+# Tempo até a primeira renderização
+def _registrar_tempo_renderizacao(pagina: str) -> None:
+    """Tempo do início do script até a página desenhada, contra o orçamento configurado"""
+    tempo_ms = (time.perf_counter() - _INICIO_SCRIPT) * 1000
+    st.session_state.ultimo_tempo_renderizacao_ms = tempo_ms
+    orcamento_ms = float(db.get_setting('FIRST_PAINT_BUDGET_MS', 1500))
+    if tempo_ms > orcamento_ms:
+        print(f"AVISO - Página {pagina} desenhada em {tempo_ms:.0f} ms (orçamento: {orcamento_ms:.0f} ms)")
+
 # Função principal
 def main():
     """Função principal da aplicação"""
@@ -694,9 +551,11 @@ def main():
         # Sistema funcionará sem cache otimizado
         pass
     
-    # Inicializar controle de limpeza de cache
-    if 'last_cache_clear' not in st.session_state:
-        st.session_state.last_cache_clear = time.time()
+    # Refresh das views materializadas em segundo plano (uma thread por processo)
+    if str(db.get_setting('VIEWS_AUTO_REFRESH', '1')).lower() not in ('0', 'false', 'nao', 'no'):
+        servico_views.iniciar()
+    # Consolidação dos deltas dos contadores do dashboard (uma thread por processo)
+    dashboard_counters.iniciar()
     
     # Carregar CSS
     load_css()
@@ -704,82 +563,28 @@ def main():
     # Verificar autenticação - apenas página de login
     if not check_authentication():
         show_login_page()
+        _registrar_tempo_renderizacao("Login")
         return
     
     # Usuário autenticado - mostrar aplicação
     selected_page = show_sidebar()
     
-    # Roteamento de páginas com monitoramento de performance
+    # Roteamento pelo registro de páginas (import na primeira abertura)
     if selected_page == "Dashboard":
         show_dashboard()
-    elif selected_page == "Insumos":
-        from modules.insumos import show_insumos_page
-        show_insumos_page()
-    elif selected_page == "Equipamentos Elétricos":
-        show_equipamentos_eletricos_page()
-    elif selected_page == "Equipamentos Manuais":
-        show_equipamentos_manuais_page()
-    elif selected_page == "Movimentações":
-        show_movimentacoes_page()
-    elif selected_page == "Obras/Departamentos":
-        show_obras_page()
-    elif selected_page == "Responsáveis":
-        show_responsaveis_page()
-    elif selected_page == "Relatórios":
-        show_relatorios_page()
-    elif selected_page == "Auditoria Completa":
-        from modules.auditoria_avancada import show_auditoria_interface
-        show_auditoria_interface()
-    elif selected_page == "Usuários":
-        from modules.usuarios import show_usuarios_page
-        show_usuarios_page()
-    elif selected_page == "Configurações":
-        show_configuracoes_page()
-    elif selected_page == "QR/Códigos de Barras":
-        from modules.barcode_utils import show_barcode_page
-        show_barcode_page()
-    elif selected_page == "Reservas":
-        from modules.reservas import show_reservas_page
-        show_reservas_page()
-    elif selected_page == "Manutenção Preventiva":
-        from modules.manutencao_preventiva import show_manutencao_page
-        show_manutencao_page()
-    elif selected_page == "Dashboard Executivo":
-        from modules.dashboard_executivo import show_dashboard_executivo_page
-        show_dashboard_executivo_page()
-    elif selected_page == "Localização":
-        from modules.controle_localizacao import show_localizacao_page
-        show_localizacao_page()
-    elif selected_page == "Gestão Financeira":
-        from modules.gestao_financeira import show_gestao_financeira_page
-        show_gestao_financeira_page()
-    elif selected_page == "Análise Preditiva":
-        from modules.analise_preditiva import show_analise_preditiva_page
-        show_analise_preditiva_page()
-    elif selected_page == "Gestão de Subcontratados":
-        from modules.gestao_subcontratados import show_subcontratados_page
-        show_subcontratados_page()
-    elif selected_page == "Relatórios Customizáveis":
-        from modules.relatorios_customizaveis import show_relatorios_customizaveis_page
-        show_relatorios_customizaveis_page()
-    elif selected_page == "Métricas Performance":
-        from modules.metricas_performance import show_metricas_performance_page
-        show_metricas_performance_page()
-    elif selected_page == "Backup Automático":
-        from modules.backup_automatico import show_backup_interface
-        show_backup_interface()
-    elif selected_page == "LGPD/Compliance":
-        from modules.lgpd_compliance import show_lgpd_compliance_page
-        show_lgpd_compliance_page()
-    elif selected_page == "Orçamentos e Cotações":
-        from modules.orcamentos_cotacoes import show_orcamentos_cotacoes_page
-        show_orcamentos_cotacoes_page()
-    elif selected_page == "Sistema de Faturamento":
-        from modules.sistema_faturamento import show_faturamento_page
-        show_faturamento_page()
-    elif selected_page == "Integração ERP/SAP":
-        from modules.integracao_erp import show_erp_integration_page
-        show_erp_integration_page()
+    else:
+        try:
+            pagina = carregar_pagina(selected_page)
+        except (KeyError, ImportError) as e:
+            st.error(f"Erro ao carregar a página {selected_page}: {e}")
+            return
+        pagina()
+
+    _registrar_tempo_renderizacao(selected_page)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        # Devolve ao pool a conexão emprestada por esta execução do script
+        db.release_connection()
\ No newline at end of file
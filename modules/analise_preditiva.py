@@ -1,7 +1,5 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple
 from database.connection import db
@@ -10,10 +8,6 @@ import streamlit as st
 class AnalisePreditivaManager:
     """Sistema de análise preditiva para otimização de estoque e compras"""
     
-    def __init__(self):
-        self.modelo_consumo = None
-        self.modelo_demanda = None
-    
     def carregar_dados_historicos(self, item_id: int, dias: int = 90) -> pd.DataFrame:
         """Carrega dados históricos de movimentação"""
         try:
@@ -48,73 +42,103 @@ class AnalisePreditivaManager:
             st.error(f"Erro ao carregar dados históricos: {e}")
             return pd.DataFrame()
     
+    def carregar_previsao(self, item_id: int) -> Dict[str, Any] | None:
+        """Previsão pré-calculada do insumo (tabela previsoes_consumo)"""
+        with db.cursor() as cursor:
+            cursor.execute("""
+                SELECT gerado_em, inicio_previsao, previsao_diaria, tendencia_diaria,
+                       consumo_medio_historico, variacao, dias_historico, dias_com_consumo, confianca
+                FROM previsoes_consumo
+                WHERE insumo_id = %s
+            """, (item_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
     def prever_consumo(self, item_id: int, dias_previsao: int = 30) -> Dict[str, Any]:
-        """Prevê consumo futuro baseado em dados históricos"""
+        """Consumo previsto para os próximos dias a partir da previsão em lote.
+
+        As previsões são recalculadas para todo o catálogo por
+        modules/previsao_consumo.py; aqui só se soma o trecho pedido.
+        """
         try:
-            df = self.carregar_dados_historicos(item_id)
-            
-            if df.empty or len(df) < 7:  # Mínimo 7 dias de dados
+            previsao = self.carregar_previsao(item_id)
+            if not previsao or previsao['confianca'] == 'insuficiente':
                 return {
-                    'previsao_media': 0,
-                    'confianca': 'baixa',
-                    'recomendacao': 'Dados insuficientes para previsão'
+                    'previsao_total': 0,
+                    'previsao_media_diaria': 0,
+                    'confianca': 'insuficiente',
+                    'recomendacao': 'Dados insuficientes para previsão' if previsao
+                    else 'Previsão ainda não gerada para este insumo'
                 }
-            
-            # Preparar dados para ML
-            df['dias_desde_inicio'] = (df['data'] - df['data'].min()).dt.days
-            X = df[['dias_desde_inicio']].values
-            y = df['quantidade_consumida'].values
-            
-            # Treinar modelo simples de regressão linear
-            modelo = LinearRegression()
-            modelo.fit(X, y)
-            
-            # Fazer previsão para os próximos dias
-            dias_futuros = np.array([[df['dias_desde_inicio'].max() + i + 1] for i in range(dias_previsao)])
-            previsao = modelo.predict(dias_futuros)
-            
-            consumo_total_previsto = max(0, np.sum(previsao))
-            consumo_medio_diario = consumo_total_previsto / dias_previsao
-            
-            # Calcular confiança baseada na variação dos dados
-            variacao = np.std(y) / np.mean(y) if np.mean(y) > 0 else 1
-            confianca = 'alta' if variacao < 0.3 else 'media' if variacao < 0.6 else 'baixa'
-            
+
+            # Previsão de dias anteriores: descarta os dias que já passaram e
+            # repete o último valor se o horizonte gravado não cobrir o pedido
+            diaria = [float(v) for v in previsao['previsao_diaria']]
+            desloc = max(0, (datetime.now().date() - previsao['inicio_previsao']).days)
+            trecho = diaria[desloc:desloc + dias_previsao]
+            ultimo = trecho[-1] if trecho else (diaria[-1] if diaria else 0.0)
+            trecho += [ultimo] * (dias_previsao - len(trecho))
+
+            consumo_total_previsto = sum(trecho)
             return {
                 'previsao_total': round(consumo_total_previsto, 2),
-                'previsao_media_diaria': round(consumo_medio_diario, 2),
-                'confianca': confianca,
-                'variacao': round(variacao, 2),
-                'dias_analisados': len(df)
+                'previsao_media_diaria': round(consumo_total_previsto / dias_previsao, 2),
+                'confianca': previsao['confianca'],
+                'variacao': round(float(previsao['variacao'] or 0), 2),
+                'tendencia_diaria': round(float(previsao['tendencia_diaria']), 4),
+                'dias_analisados': previsao['dias_com_consumo'],
+                'gerado_em': previsao['gerado_em']
             }
-            
+
         except Exception as e:
             return {
                 'erro': str(e),
                 'previsao_total': 0,
                 'confianca': 'erro'
             }
-    
+
+    def listar_previsoes(self, limite: int = 200) -> pd.DataFrame:
+        """Previsões de todo o catálogo, dos insumos que mais vão consumir (30 dias)"""
+        try:
+            with db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT i.codigo, i.descricao, i.quantidade_atual, i.quantidade_minima,
+                           (SELECT COALESCE(SUM(v), 0) FROM unnest(p.previsao_diaria[1:30]) v) as previsto_30d,
+                           p.tendencia_diaria, p.confianca, p.gerado_em
+                    FROM previsoes_consumo p
+                    JOIN insumos i ON i.id = p.insumo_id
+                    WHERE p.confianca <> 'insuficiente'
+                    ORDER BY previsto_30d DESC
+                    LIMIT %s
+                """, (limite,))
+                return pd.DataFrame([dict(row) for row in cursor.fetchall()])
+        except Exception as e:
+            st.error(f"Erro ao carregar previsões: {e}")
+            return pd.DataFrame()
+
+    def recalcular_previsoes(self) -> int:
+        """Recalcula as previsões de todos os insumos (normalmente feito à noite)"""
+        from modules.previsao_consumo import gerar_previsoes
+        return gerar_previsoes(db)
+
     def otimizar_compras(self, item_id: int) -> Dict[str, Any]:
         """Otimiza quantidade de compra baseada em previsão"""
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            # Buscar dados atuais do item
-            cursor.execute("""
-                SELECT quantidade_atual, quantidade_minima, preco_unitario, nome
-                FROM insumos 
-                WHERE id = %s AND ativo = TRUE
-            """, (item_id,))
-            
-            item = cursor.fetchone()
+            with db.cursor() as cursor:
+                # Buscar dados atuais do item
+                cursor.execute("""
+                    SELECT quantidade_atual, quantidade_minima, preco_unitario, descricao as nome
+                    FROM insumos 
+                    WHERE id = %s AND ativo = TRUE
+                """, (item_id,))
+                item = cursor.fetchone()
+
             if not item:
                 return {'erro': 'Item não encontrado'}
             
-            estoque_atual = item['quantidade_atual']
-            estoque_minimo = item['quantidade_minima']
-            preco_unitario = item['preco_unitario']
+            estoque_atual = float(item['quantidade_atual'] or 0)
+            estoque_minimo = float(item['quantidade_minima'] or 0)
+            preco_unitario = float(item['preco_unitario'] or 0)
             nome = item['nome']
             
             # Previsão de consumo para 30 dias
@@ -201,6 +225,8 @@ def show_analise_preditiva_page():
         
         if 'erro' in previsao:
             st.error(f"Erro: {previsao['erro']}")
+        elif previsao['confianca'] == 'insuficiente':
+            st.warning(f"⚠️ {previsao['recomendacao']}")
         else:
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -214,6 +240,21 @@ def show_analise_preditiva_page():
                     'baixa': '🔴'
                 }
                 st.metric("Confiança", f"{confianca_color.get(previsao['confianca'], '⚪')} {previsao['confianca'].title()}")
+            st.caption(f"Previsão gerada em {previsao['gerado_em']:%d/%m/%Y %H:%M}")
+
+    with st.expander("📋 Previsões de todo o catálogo (próximos 30 dias)"):
+        df_previsoes = manager.listar_previsoes()
+        if df_previsoes.empty:
+            st.info("Nenhuma previsão gerada ainda")
+        else:
+            st.dataframe(df_previsoes, use_container_width=True)
+        if st.button("🔄 Recalcular previsões agora"):
+            with st.spinner("Recalculando previsões de todos os insumos..."):
+                try:
+                    total = manager.recalcular_previsoes()
+                    st.success(f"✅ Previsões recalculadas para {total} insumos")
+                except Exception as e:
+                    st.error(f"Erro ao recalcular previsões: {e}")
     
     # Seção de otimização de compras
     st.header("🛒 Otimização de Compras")
@@ -0,0 +1,191 @@
+"""
+Sistema de Inventário Web - Gravação assíncrona de auditoria
+Fila limitada com uma thread que grava os registros em lote (execute_values),
+tirando os INSERTs/commits de auditoria do caminho de cada requisição
+"""
+
+import atexit
+import queue
+import threading
+import time
+from psycopg2.extras import execute_values
+from database.connection import db
+
+# Colunas gravadas por tabela; os registros enfileirados seguem esta ordem
+COLUNAS_AUDITORIA: dict[str, tuple[str, ...]] = {
+    'auditoria_logs': (
+        'timestamp', 'usuario_id', 'usuario_nome', 'usuario_email', 'usuario_perfil',
+        'sessao_id', 'ip_address', 'user_agent',
+        'modulo', 'acao', 'entidade', 'entidade_id',
+        'dados_antes', 'dados_depois', 'dados_contexto',
+        'resultado', 'erro_detalhes', 'tempo_execucao_ms'
+    ),
+    'logs_auditoria': (
+        'data_acao', 'usuario_id', 'usuario_nome', 'modulo', 'acao', 'observacoes'
+    ),
+}
+
+
+class GravadorAuditoria:
+    """Fila limitada de registros de auditoria com gravação em lote em segundo plano.
+
+    Um lote é gravado quando atinge `tamanho_lote` registros ou quando
+    `intervalo_ms` se passa desde o primeiro registro pendente. Com a fila
+    cheia o chamador espera até `espera_fila_cheia` segundos antes de descartar.
+    """
+
+    def __init__(self, database, tamanho_fila: int = 10000, tamanho_lote: int = 500,
+                 intervalo_ms: int = 200, espera_fila_cheia: float = 1.0):
+        self.db = database
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo_ms / 1000
+        self.espera_fila_cheia = espera_fila_cheia
+        self._fila: queue.Queue = queue.Queue(maxsize=tamanho_fila)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self.gravados = 0
+        self.descartados = 0
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._parar.clear()
+                self._thread = threading.Thread(target=self._executar, name='gravador-auditoria', daemon=True)
+                self._thread.start()
+
+    def registrar(self, tabela: str, registro: tuple) -> bool:
+        """Enfileira um registro (na ordem de COLUNAS_AUDITORIA[tabela])"""
+        if tabela not in COLUNAS_AUDITORIA:
+            raise ValueError(f"Tabela de auditoria desconhecida: {tabela}")
+        self._iniciar()
+        try:
+            self._fila.put((tabela, registro), timeout=self.espera_fila_cheia)
+            return True
+        except queue.Full:
+            self.descartados += 1
+            print(f"AVISO - Fila de auditoria cheia, registro descartado ({self.descartados} no total)")
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Aguarda a gravação de tudo que foi enfileirado até agora"""
+        if self._thread is None or not self._thread.is_alive():
+            return self._fila.empty()
+        gravado = threading.Event()
+        try:
+            self._fila.put(gravado, timeout=timeout)
+        except queue.Full:
+            return False
+        return gravado.wait(timeout)
+
+    def fechar(self, timeout: float = 5.0) -> None:
+        """Grava os pendentes e encerra a thread (chamado no encerramento do processo)"""
+        self.flush(timeout)
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _executar(self) -> None:
+        lote: list[tuple[str, tuple]] = []
+        avisos: list[threading.Event] = []
+        prazo = None
+        while not (self._parar.is_set() and self._fila.empty() and not lote):
+            espera = self.intervalo if prazo is None else max(prazo - time.monotonic(), 0)
+            try:
+                item = self._fila.get(timeout=espera)
+                if isinstance(item, threading.Event):
+                    avisos.append(item)
+                else:
+                    lote.append(item)
+                    if prazo is None:
+                        prazo = time.monotonic() + self.intervalo
+            except queue.Empty:
+                pass
+
+            vencido = prazo is not None and time.monotonic() >= prazo
+            if avisos or len(lote) >= self.tamanho_lote or vencido:
+                if lote:
+                    self._gravar_lote(lote)
+                lote, prazo = [], None
+                for aviso in avisos:
+                    aviso.set()
+                avisos = []
+
+    def _gravar_lote(self, lote: list[tuple[str, tuple]]) -> None:
+        """Grava o lote com um INSERT multi-linha por tabela em uma transação"""
+        por_tabela: dict[str, list[tuple]] = {}
+        for tabela, registro in lote:
+            por_tabela.setdefault(tabela, []).append(registro)
+        try:
+            with self.db.transaction() as cursor:
+                for tabela, registros in por_tabela.items():
+                    colunas = ', '.join(COLUNAS_AUDITORIA[tabela])
+                    execute_values(cursor, f"INSERT INTO {tabela} ({colunas}) VALUES %s",
+                                   registros, page_size=len(registros))
+            self.gravados += len(lote)
+        except Exception as e:
+            print(f"Erro ao gravar lote de auditoria ({len(lote)} registros): {e}")
+            self._gravar_individualmente(por_tabela)
+
+    def _gravar_individualmente(self, por_tabela: dict[str, list[tuple]]) -> None:
+        """Fallback: um registro inválido não derruba o lote inteiro"""
+        for tabela, registros in por_tabela.items():
+            colunas = COLUNAS_AUDITORIA[tabela]
+            sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})"
+            for registro in registros:
+                try:
+                    with self.db.transaction() as cursor:
+                        cursor.execute(sql, registro)
+                    self.gravados += 1
+                except Exception as e:
+                    self.descartados += 1
+                    print(f"Erro ao gravar registro de auditoria em {tabela}: {e}")
+
+
+class CacheNomesUsuarios:
+    """Cache de nomes de usuário para os logs (evita um SELECT por ação)"""
+
+    def __init__(self, database, ttl_segundos: float = 300):
+        self.db = database
+        self.ttl = ttl_segundos
+        self._nomes: dict[int, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def nome(self, usuario_id: int | None) -> str:
+        if not usuario_id:
+            return "Sistema"
+        with self._lock:
+            cache = self._nomes.get(usuario_id)
+        if cache and time.monotonic() - cache[1] < self.ttl:
+            return cache[0]
+        nome = "Sistema"
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("SELECT nome FROM usuarios WHERE id = %s", [usuario_id])
+                result = cursor.fetchone()
+                if result:
+                    nome = result['nome']
+        except Exception:
+            return nome
+        with self._lock:
+            self._nomes[usuario_id] = (nome, time.monotonic())
+        return nome
+
+    def invalidar(self, usuario_id: int | None = None) -> None:
+        """Descarta o nome em cache (ex.: após editar o usuário)"""
+        with self._lock:
+            if usuario_id is None:
+                self._nomes.clear()
+            else:
+                self._nomes.pop(usuario_id, None)
+
+
+# Instâncias globais
+gravador_auditoria = GravadorAuditoria(
+    db,
+    tamanho_fila=int(db.get_setting('AUDIT_QUEUE_SIZE', 10000)),
+    tamanho_lote=int(db.get_setting('AUDIT_BATCH_SIZE', 500)),
+    intervalo_ms=int(db.get_setting('AUDIT_FLUSH_MS', 200)),
+)
+nomes_usuarios = CacheNomesUsuarios(db)
+atexit.register(gravador_auditoria.fechar)
@@ -10,139 +10,54 @@ from typing import Any, Dict, List, Optional
 import json
 import traceback
 from database.connection import db
+from database.migrator import aplicar_migracoes
 from modules.auth import auth_manager
+from modules.auditoria_assincrona import gravador_auditoria
 
 class AuditoriaAvancada:
     def __init__(self):
         self.db = db
-        self._criar_tabelas_auditoria()
     
     def _criar_tabelas_auditoria(self):
-        """Cria tabelas de auditoria se não existirem"""
+        """Aplica as migrações pendentes (schema em database/migrations/0002_auditoria.sql)"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                print("Erro: Sem conexão com o banco de dados")
-                return False
-            
-            cursor = conn.cursor()
-            
-            # Tabela principal de auditoria
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS auditoria_logs (
-                    id SERIAL PRIMARY KEY,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    usuario_id INTEGER,
-                    usuario_nome VARCHAR(255),
-                    usuario_email VARCHAR(255),
-                    usuario_perfil VARCHAR(50),
-                    sessao_id VARCHAR(255),
-                    ip_address VARCHAR(45),
-                    user_agent TEXT,
-                    modulo VARCHAR(100) NOT NULL,
-                    acao VARCHAR(100) NOT NULL,
-                    entidade VARCHAR(100),
-                    entidade_id INTEGER,
-                    dados_antes JSONB,
-                    dados_depois JSONB,
-                    dados_contexto JSONB,
-                    resultado VARCHAR(20) DEFAULT 'sucesso',
-                    erro_detalhes TEXT,
-                    tempo_execucao_ms INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabela de sessões de auditoria
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS auditoria_sessoes (
-                    id SERIAL PRIMARY KEY,
-                    usuario_id INTEGER REFERENCES usuarios(id),
-                    sessao_id VARCHAR(255) UNIQUE,
-                    ip_address VARCHAR(45),
-                    user_agent TEXT,
-                    inicio_sessao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    fim_sessao TIMESTAMP,
-                    ativa BOOLEAN DEFAULT TRUE,
-                    total_acoes INTEGER DEFAULT 0,
-                    ultima_atividade TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabela de tentativas de acesso
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS auditoria_acessos (
-                    id SERIAL PRIMARY KEY,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    email VARCHAR(255),
-                    ip_address VARCHAR(45),
-                    user_agent TEXT,
-                    resultado VARCHAR(20), -- 'sucesso', 'falha', 'bloqueado'
-                    motivo_falha TEXT,
-                    tentativas_consecutivas INTEGER DEFAULT 1
-                )
-            """)
-            
-            # Índices para performance
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_auditoria_logs_timestamp ON auditoria_logs(timestamp)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_auditoria_logs_usuario ON auditoria_logs(usuario_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_auditoria_logs_modulo ON auditoria_logs(modulo)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_auditoria_logs_acao ON auditoria_logs(acao)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_auditoria_sessoes_usuario ON auditoria_sessoes(usuario_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_auditoria_acessos_email ON auditoria_acessos(email)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_auditoria_acessos_timestamp ON auditoria_acessos(timestamp)")
-            
-            conn.commit()
-            print("✅ Tabelas de auditoria criadas/verificadas com sucesso")
+            aplicar_migracoes(self.db)
             return True
-            
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Erro ao criar tabelas de auditoria: {e}")
-            import traceback
-            traceback.print_exc()
             return False
     
     def _criar_logs_exemplo(self):
         """Cria logs de exemplo para testar o sistema"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return False
-                
-            cursor = conn.cursor()
-            
-            # Inserir alguns logs de exemplo
-            logs_exemplo = [
-                ("sistema", "inicializacao", "auditoria", None, "Sistema de auditoria iniciado"),
-                ("usuarios", "login", "usuario", 1, "Usuário realizou login"),
-                ("movimentacoes", "criar", "movimentacao", 1, "Nova movimentação criada"),
-                ("insumos", "consultar", "insumo", 5, "Consulta de insumo realizada"),
-                ("dashboard", "visualizar", None, None, "Dashboard acessado"),
-                ("relatorios", "gerar", "relatorio", 2, "Relatório gerado"),
-            ]
-            
-            for modulo, acao, entidade, entidade_id, descricao in logs_exemplo:
-                cursor.execute("""
-                    INSERT INTO auditoria_logs (
-                        modulo, acao, entidade, entidade_id, usuario_id, 
-                        usuario_nome, resultado, dados_contexto
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    modulo, acao, entidade, entidade_id, 1,
-                    'Admin (Exemplo)', 'sucesso', 
-                    json.dumps({'descricao': descricao})
-                ))
+            with self.db.transaction() as cursor:
+                # Inserir alguns logs de exemplo
+                logs_exemplo = [
+                    ("sistema", "inicializacao", "auditoria", None, "Sistema de auditoria iniciado"),
+                    ("usuarios", "login", "usuario", 1, "Usuário realizou login"),
+                    ("movimentacoes", "criar", "movimentacao", 1, "Nova movimentação criada"),
+                    ("insumos", "consultar", "insumo", 5, "Consulta de insumo realizada"),
+                    ("dashboard", "visualizar", None, None, "Dashboard acessado"),
+                    ("relatorios", "gerar", "relatorio", 2, "Relatório gerado"),
+                ]
+            
+                for modulo, acao, entidade, entidade_id, descricao in logs_exemplo:
+                    cursor.execute("""
+                        INSERT INTO auditoria_logs (
+                            modulo, acao, entidade, entidade_id, usuario_id, 
+                            usuario_nome, resultado, dados_contexto
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (
+                        modulo, acao, entidade, entidade_id, 1,
+                        'Admin (Exemplo)', 'sucesso', 
+                        json.dumps({'descricao': descricao})
+                    ))
             
-            conn.commit()
             print("✅ Logs de exemplo criados")
             return True
             
         except Exception as e:
             print(f"Erro ao criar logs de exemplo: {e}")
-            if conn:
-                conn.rollback()
             return False
     
     def registrar_acao(self, 
@@ -157,7 +72,8 @@ class AuditoriaAvancada:
                       erro_detalhes: Optional[str] = None,
                       tempo_execucao_ms: Optional[int] = None):
         """
-        Registra uma ação no log de auditoria
+        Registra uma ação no log de auditoria (enfileirada e gravada em lote
+        por modules.auditoria_assincrona)
         
         Args:
             modulo: Módulo do sistema (ex: 'movimentacoes', 'usuarios')
@@ -172,14 +88,8 @@ class AuditoriaAvancada:
             tempo_execucao_ms: Tempo de execução em millisegundos
         """
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return
-            
-            cursor = conn.cursor()
-            
-            # Obter dados do usuário atual
-            user_data = auth_manager.get_user_data()
+            # Obter dados do usuário atual (na thread da requisição, antes de enfileirar)
+            user_data = auth_manager.get_session_user()
             
             # Obter dados da sessão (simulado - em produção viria do request)
             import uuid
@@ -187,15 +97,9 @@ class AuditoriaAvancada:
             ip_address = "127.0.0.1"  # Em produção, pegar do request
             user_agent = "Streamlit App"  # Em produção, pegar do request
             
-            cursor.execute("""
-                INSERT INTO auditoria_logs (
-                    usuario_id, usuario_nome, usuario_email, usuario_perfil,
-                    sessao_id, ip_address, user_agent,
-                    modulo, acao, entidade, entidade_id,
-                    dados_antes, dados_depois, dados_contexto,
-                    resultado, erro_detalhes, tempo_execucao_ms
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
+            # Gravação em lote pela thread do gravador; o horário é o da ação
+            gravador_auditoria.registrar('auditoria_logs', (
+                datetime.now(),
                 user_data.get('id') if user_data else None,
                 user_data.get('nome') if user_data else 'Sistema',
                 user_data.get('email') if user_data else None,
@@ -215,61 +119,42 @@ class AuditoriaAvancada:
                 tempo_execucao_ms
             ))
             
-            conn.commit()
-            
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Erro ao registrar auditoria: {e}")
     
     def registrar_tentativa_acesso(self, email: str, resultado: str, motivo_falha: str = None):
         """Registra tentativas de login"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return
-            
-            cursor = conn.cursor()
-            
-            # Contar tentativas consecutivas
-            cursor.execute("""
-                SELECT COUNT(*) FROM auditoria_acessos 
-                WHERE email = %s AND resultado = 'falha' 
-                AND timestamp > NOW() - INTERVAL '15 minutes'
-            """, (email,))
-            
-            tentativas = cursor.fetchone()[0] if cursor.rowcount > 0 else 0
-            
-            cursor.execute("""
-                INSERT INTO auditoria_acessos (
-                    email, ip_address, user_agent, resultado, 
-                    motivo_falha, tentativas_consecutivas
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                email,
-                "127.0.0.1",  # Em produção, pegar do request
-                "Streamlit App",  # Em produção, pegar do request
-                resultado,
-                motivo_falha,
-                tentativas + 1 if resultado == 'falha' else 0
-            ))
+            with self.db.transaction() as cursor:
+                # Contar tentativas consecutivas
+                cursor.execute("""
+                    SELECT COUNT(*) FROM auditoria_acessos 
+                    WHERE email = %s AND resultado = 'falha' 
+                    AND timestamp > NOW() - INTERVAL '15 minutes'
+                """, (email,))
             
-            conn.commit()
+                tentativas = cursor.fetchone()[0] if cursor.rowcount > 0 else 0
+            
+                cursor.execute("""
+                    INSERT INTO auditoria_acessos (
+                        email, ip_address, user_agent, resultado, 
+                        motivo_falha, tentativas_consecutivas
+                    ) VALUES (%s, %s, %s, %s, %s, %s)
+                """, (
+                    email,
+                    "127.0.0.1",  # Em produção, pegar do request
+                    "Streamlit App",  # Em produção, pegar do request
+                    resultado,
+                    motivo_falha,
+                    tentativas + 1 if resultado == 'falha' else 0
+                ))
             
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Erro ao registrar tentativa de acesso: {e}")
     
     def get_logs_auditoria(self, filtros: Dict = None) -> pd.DataFrame:
         """Busca logs de auditoria com filtros"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return pd.DataFrame()
-            
-            cursor = conn.cursor()
-            
             query = """
                 SELECT 
                     id, timestamp, usuario_nome, usuario_email, usuario_perfil,
@@ -286,8 +171,9 @@ class AuditoriaAvancada:
                     query += " AND timestamp >= %s"
                     params.append(filtros['data_inicio'])
                 
+                # Intervalo na coluna de partição: só os meses pedidos são lidos
                 if filtros.get('data_fim'):
-                    query += " AND timestamp <= %s"
+                    query += " AND timestamp < %s::date + INTERVAL '1 day'"
                     params.append(filtros['data_fim'])
                 
                 if filtros.get('usuario'):
@@ -308,12 +194,13 @@ class AuditoriaAvancada:
             
             query += " ORDER BY timestamp DESC LIMIT 1000"
             
-            cursor.execute(query, params)
-            results = cursor.fetchall()
+            with self.db.cursor() as cursor:
+                cursor.execute(query, params)
+                results = cursor.fetchall()
             
-            if results:
-                columns = [desc[0] for desc in cursor.description]
-                return pd.DataFrame([dict(zip(columns, row)) for row in results])
+                if results:
+                    columns = [desc[0] for desc in cursor.description]
+                    return pd.DataFrame([dict(zip(columns, row)) for row in results])
             
             return pd.DataFrame()
             
@@ -321,83 +208,70 @@ class AuditoriaAvancada:
             st.error(f"Erro ao buscar logs de auditoria: {e}")
             return pd.DataFrame()
     
-    def get_estatisticas_auditoria(self) -> Dict:
-        """Retorna estatísticas de auditoria"""
+    def get_estatisticas_auditoria(self, dias: int = 30) -> Dict:
+        """Retorna estatísticas de auditoria.
+
+        O total vem da estimativa de linhas das partições (sem COUNT(*) na
+        tabela inteira); sucessos, erros e usuários ativos cobrem os últimos
+        `dias`, lendo só as partições desse período.
+        """
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return {}
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint as total_logs
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'auditoria_logs'::regclass
+                """)
+                total = cursor.fetchone()
+            
+                # Estatísticas do período
+                cursor.execute("""
+                    SELECT 
+                        COUNT(*) FILTER (WHERE resultado = 'sucesso') as sucessos,
+                        COUNT(*) FILTER (WHERE resultado = 'erro') as erros,
+                        COUNT(DISTINCT usuario_id) as usuarios_ativos,
+                        COUNT(*) FILTER (WHERE timestamp > NOW() - INTERVAL '24 hours') as logs_24h
+                    FROM auditoria_logs
+                    WHERE timestamp > NOW() - make_interval(days => %s)
+                """, [dias])
+            
+                stats = cursor.fetchone()
+            
+                # Top módulos
+                cursor.execute("""
+                    SELECT modulo, COUNT(*) as count
+                    FROM auditoria_logs
+                    WHERE timestamp > NOW() - INTERVAL '7 days'
+                    GROUP BY modulo
+                    ORDER BY count DESC
+                    LIMIT 10
+                """)
             
-            cursor = conn.cursor()
+                top_modulos = cursor.fetchall()
             
-            # Verificar se a tabela existe
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = 'auditoria_logs'
-                )
-            """)
+                # Top ações
+                cursor.execute("""
+                    SELECT acao, COUNT(*) as count
+                    FROM auditoria_logs
+                    WHERE timestamp > NOW() - INTERVAL '7 days'
+                    GROUP BY acao
+                    ORDER BY count DESC
+                    LIMIT 10
+                """)
+            
+                top_acoes = cursor.fetchall()
             
-            if not cursor.fetchone()[0]:
-                # Criar tabela se não existir
-                self._criar_tabelas_auditoria()
                 return {
-                    'total_logs': 0,
-                    'sucessos': 0,
-                    'erros': 0,
-                    'usuarios_ativos': 0,
-                    'logs_24h': 0,
-                    'top_modulos': [],
-                    'top_acoes': []
+                    'total_logs': total['total_logs'] if total else 0,
+                    'sucessos': stats['sucessos'] if stats else 0,
+                    'erros': stats['erros'] if stats else 0,
+                    'usuarios_ativos': stats['usuarios_ativos'] if stats else 0,
+                    'logs_24h': stats['logs_24h'] if stats else 0,
+                    'top_modulos': [{'modulo': row['modulo'], 'count': row['count']} for row in top_modulos],
+                    'top_acoes': [{'acao': row['acao'], 'count': row['count']} for row in top_acoes]
                 }
             
-            # Estatísticas gerais
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_logs,
-                    COUNT(CASE WHEN resultado = 'sucesso' THEN 1 END) as sucessos,
-                    COUNT(CASE WHEN resultado = 'erro' THEN 1 END) as erros,
-                    COUNT(DISTINCT usuario_id) as usuarios_ativos,
-                    COUNT(CASE WHEN timestamp > NOW() - INTERVAL '24 hours' THEN 1 END) as logs_24h
-                FROM auditoria_logs
-            """)
-            
-            stats = cursor.fetchone()
-            
-            # Top módulos
-            cursor.execute("""
-                SELECT modulo, COUNT(*) as count
-                FROM auditoria_logs
-                WHERE timestamp > NOW() - INTERVAL '7 days'
-                GROUP BY modulo
-                ORDER BY count DESC
-                LIMIT 10
-            """)
-            
-            top_modulos = cursor.fetchall()
-            
-            # Top ações
-            cursor.execute("""
-                SELECT acao, COUNT(*) as count
-                FROM auditoria_logs
-                WHERE timestamp > NOW() - INTERVAL '7 days'
-                GROUP BY acao
-                ORDER BY count DESC
-                LIMIT 10
-            """)
-            
-            top_acoes = cursor.fetchall()
-            
-            return {
-                'total_logs': stats[0] if stats else 0,
-                'sucessos': stats[1] if stats else 0,
-                'erros': stats[2] if stats else 0,
-                'usuarios_ativos': stats[3] if stats else 0,
-                'logs_24h': stats[4] if stats else 0,
-                'top_modulos': [{'modulo': row[0], 'count': row[1]} for row in top_modulos],
-                'top_acoes': [{'acao': row[0], 'count': row[1]} for row in top_acoes]
-            }
-            
         except Exception as e:
             print(f"Erro ao obter estatísticas: {e}")
             import traceback
@@ -512,11 +386,11 @@ def show_auditoria_interface():
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("📊 Total de Logs", stats.get('total_logs', 0))
+                st.metric("📊 Total de Logs (estimado)", stats.get('total_logs', 0))
             with col2:
-                st.metric("✅ Sucessos", stats.get('sucessos', 0))
+                st.metric("✅ Sucessos (30 dias)", stats.get('sucessos', 0))
             with col3:
-                st.metric("❌ Erros", stats.get('erros', 0))
+                st.metric("❌ Erros (30 dias)", stats.get('erros', 0))
             with col4:
                 st.metric("🕐 Logs 24h", stats.get('logs_24h', 0))
             
@@ -10,6 +10,7 @@ import secrets
 from datetime import datetime, timedelta
 import re
 from database.connection import db
+from modules.cache_compartilhado import cache_compartilhado
 import psycopg2
 
 class AuthenticationManager:
@@ -227,57 +228,49 @@ class AuthenticationManager:
         except Exception as e:
             print(f"Erro ao registrar log: {e}")
     
+    def _tag_permissoes(self, user_id: int) -> str:
+        """Tag do cache cuja versão muda a cada alteração de permissões do usuário"""
+        return f"permissoes:{int(user_id)}"
+
+    def invalidar_permissoes(self, user_id: int) -> None:
+        """Incrementa a versão das permissões do usuário em todas as sessões"""
+        cache_compartilhado.invalidar(self._tag_permissoes(user_id))
+
     def get_user_module_permissions(self, user_id: int) -> dict[str, bool]:
-        """Obtém permissões de módulos do usuário"""
+        """Obtém permissões de módulos do usuário.
+
+        O resultado fica no cache compartilhado, chaveado pelo id e pela
+        versão das permissões do usuário: reruns resolvem o menu sem ir ao
+        banco, e update_user_module_permissions propaga a mudança na hora.
+        """
         try:
             # Converter para int nativo do Python para evitar problemas com numpy
             user_id = int(user_id)
-            
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Verificar se a tabela de permissões existe
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = 'permissoes_modulos'
-                )
-            """)
-            
-            if not cursor.fetchone()[0]:
-                print(f"Tabela permissoes_modulos não existe, usando permissões padrão para usuário {user_id}")
-                return self._get_default_permissions_by_profile(user_id)
-            
+            return cache_compartilhado.obter_ou_calcular(
+                'auth.permissoes_modulos', user_id, (self._tag_permissoes(user_id),),
+                lambda: self._consultar_permissoes_modulos(user_id)
+            )
+        except Exception as e:
+            print(f"Erro ao buscar permissões de módulo: {e}")
+            # Fallback: retornar permissões baseadas no perfil
+            return self._get_default_permissions_by_profile(user_id)
+
+    def _consultar_permissoes_modulos(self, user_id: int) -> dict[str, bool]:
+        # Tabela permissoes_modulos criada pela migração 0014
+        with self.db.cursor() as cursor:
             cursor.execute("""
                 SELECT modulo, acesso 
                 FROM permissoes_modulos 
                 WHERE usuario_id = %s
             """, (user_id,))
-            
-            results = cursor.fetchall()
-            permissions = {}
-            
-            for result in results:
-                if isinstance(result, dict):
-                    permissions[result['modulo']] = result['acesso']
-                else:
-                    permissions[result[0]] = result[1]
-            
-            # Se não tem permissões cadastradas, usar padrões baseados no perfil
-            if not permissions:
-                print(f"Nenhuma permissão encontrada para usuário {user_id}, usando padrões")
-                default_perms = self._get_default_permissions_by_profile(user_id)
-                # Salvar as permissões padrão
-                self.update_user_module_permissions(user_id, default_perms)
-                return default_perms
-            
-            print(f"Permissões carregadas para usuário {user_id}: {len(permissions)} módulos")
-            return permissions
-            
-        except Exception as e:
-            print(f"Erro ao buscar permissões de módulo: {e}")
-            # Fallback: retornar permissões baseadas no perfil
-            return self._get_default_permissions_by_profile(user_id)
+            permissions = {row['modulo']: row['acesso'] for row in cursor.fetchall()}
+
+        # Se não tem permissões cadastradas, usar padrões baseados no perfil
+        if not permissions:
+            permissions = self._get_default_permissions_by_profile(user_id)
+            # Salvar as permissões padrão
+            self.update_user_module_permissions(user_id, permissions)
+        return permissions
     
     def _get_default_permissions_by_profile(self, user_id: int) -> dict[str, bool]:
         """Obtém permissões padrão baseadas no perfil do usuário"""
@@ -373,19 +366,7 @@ class AuthenticationManager:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Criar tabela de permissões se não existir
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS permissoes_modulos (
-                    id SERIAL PRIMARY KEY,
-                    usuario_id INTEGER REFERENCES usuarios(id),
-                    modulo VARCHAR(100) NOT NULL,
-                    acesso BOOLEAN DEFAULT TRUE,
-                    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(usuario_id, modulo)
-                )
-            """)
-            
+            # Tabela permissoes_modulos criada pela migração 0014
             # Verificar se o usuário existe primeiro
             cursor.execute("SELECT id FROM usuarios WHERE id = %s", (user_id,))
             if not cursor.fetchone():
@@ -403,6 +384,7 @@ class AuthenticationManager:
                 """, (user_id, modulo, bool(acesso)))
             
             conn.commit()
+            self.invalidar_permissoes(user_id)
             print(f"Permissões atualizadas para usuário {user_id}: {len(permissions)} módulos")
             return True
             
@@ -18,6 +18,7 @@ import json
 import psycopg2
 from pathlib import Path
 from database.connection import db
+from database.migrator import aplicar_migracoes
 
 class BackupAutomatico:
     def __init__(self):
@@ -31,69 +32,13 @@ class BackupAutomatico:
         (self.backup_dir / "logs").mkdir(exist_ok=True)
         (self.backup_dir / "full").mkdir(exist_ok=True)
         
-        self._criar_tabela_controle()
         self._inicializar_scheduler()
     
     def _criar_tabela_controle(self):
-        """Cria tabela de controle de backups"""
+        """Aplica as migrações pendentes (schema em database/migrations/0005_backup.sql)"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return
-            
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS backup_controle (
-                    id SERIAL PRIMARY KEY,
-                    tipo VARCHAR(50) NOT NULL, -- 'database', 'files', 'full'
-                    status VARCHAR(20) NOT NULL, -- 'iniciado', 'concluido', 'erro'
-                    data_inicio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    data_fim TIMESTAMP,
-                    tamanho_mb DECIMAL(10,2),
-                    arquivo_backup VARCHAR(500),
-                    detalhes_backup JSONB,
-                    erro_detalhes TEXT,
-                    usuario_id INTEGER REFERENCES usuarios(id),
-                    automatico BOOLEAN DEFAULT FALSE
-                )
-            """)
-            
-            # Tabela de configurações de backup
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS backup_configuracoes (
-                    id SERIAL PRIMARY KEY,
-                    nome VARCHAR(100) UNIQUE NOT NULL,
-                    tipo VARCHAR(50) NOT NULL,
-                    ativo BOOLEAN DEFAULT TRUE,
-                    frequencia VARCHAR(50), -- 'diario', 'semanal', 'mensal'
-                    hora_execucao TIME DEFAULT '02:00:00',
-                    dia_semana INTEGER, -- 0=Segunda, 6=Domingo
-                    dia_mes INTEGER, -- 1-31
-                    manter_backups INTEGER DEFAULT 30, -- Quantos backups manter
-                    incluir_logs BOOLEAN DEFAULT TRUE,
-                    compactar BOOLEAN DEFAULT TRUE,
-                    configuracoes JSONB,
-                    criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Inserir configurações padrão se não existirem
-            cursor.execute("""
-                INSERT INTO backup_configuracoes (
-                    nome, tipo, frequencia, hora_execucao, manter_backups
-                ) VALUES 
-                ('Backup Diário Completo', 'full', 'diario', '02:00:00', 7),
-                ('Backup Semanal Database', 'database', 'semanal', '03:00:00', 4)
-                ON CONFLICT (nome) DO NOTHING
-            """)
-            
-            conn.commit()
-            
+            aplicar_migracoes(self.db)
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Erro ao criar tabelas de backup: {e}")
     
     def _inicializar_scheduler(self):
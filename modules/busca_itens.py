@@ -0,0 +1,108 @@
+"""
+Sistema de Inventário Web - Busca unificada de itens
+Busca por código, descrição/nome e marca em insumos, equipamentos elétricos e manuais
+usando índices trigram (pg_trgm) sobre o texto sem acentos (migração 0017)
+"""
+
+import streamlit as st
+from typing import Any
+from database.connection import db
+
+# Fontes da busca por tipo_item. O texto pesquisado é o mesmo das expressões
+# indexadas em database/migrations/0017_busca_itens.sql; {a} recebe o alias da tabela.
+FONTES_BUSCA: dict[str, dict[str, str]] = {
+    'insumo': {
+        'tabela': 'insumos',
+        'nome': '{a}descricao',
+        'modelo': "''",
+        'status': "CASE WHEN {a}quantidade_atual > 0 THEN 'Disponível' ELSE 'Sem estoque' END",
+        'disponivel': '{a}quantidade_atual > 0',
+        'texto': "{a}codigo || ' ' || {a}descricao || ' ' || COALESCE({a}marca, '')",
+    },
+    'equipamento_eletrico': {
+        'tabela': 'equipamentos_eletricos',
+        'nome': '{a}nome',
+        'modelo': "COALESCE({a}modelo, '')",
+        'status': '{a}status',
+        'disponivel': "{a}status = 'Disponível'",
+        'texto': "{a}codigo || ' ' || {a}nome || ' ' || COALESCE({a}marca, '') || ' ' || COALESCE({a}modelo, '')",
+    },
+    'equipamento_manual': {
+        'tabela': 'equipamentos_manuais',
+        'nome': '{a}descricao',
+        'modelo': "''",
+        'status': '{a}status',
+        'disponivel': "{a}status = 'Disponível'",
+        'texto': "{a}codigo || ' ' || {a}descricao || ' ' || COALESCE({a}marca, '')",
+    },
+}
+
+
+def _padrao_like(termo: str) -> str:
+    """Padrão %termo% com os curingas do próprio termo escapados"""
+    escapado = termo.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escapado}%"
+
+
+def condicao_busca(tipo_item: str, termo: str, alias: str = '') -> tuple[str, list[Any]]:
+    """Condição SQL indexável (trigram, sem acentos) para filtrar uma tabela pelo termo.
+
+    Usada pelas listagens que já têm filtros e ordenação próprios. O alias,
+    quando informado, deve vir sem o ponto (ex.: 'i').
+    """
+    fonte = FONTES_BUSCA[tipo_item]
+    texto = fonte['texto'].format(a=f"{alias}." if alias else '')
+    return f"f_busca_normalizada({texto}) LIKE f_busca_normalizada(%s)", [_padrao_like(termo)]
+
+
+def buscar_itens(termo: str, tipos: list[str] | None = None, limite: int = 50,
+                 apenas_disponiveis: bool = False) -> list[dict[str, Any]]:
+    """Busca itens por relevância nas tabelas de insumos e equipamentos.
+
+    Aceita trechos do texto (LIKE sobre o índice trigram) e pequenos erros de
+    digitação (word_similarity). Código idêntico ao termo vem primeiro.
+    Retorna no máximo `limite` itens com tipo_item, tabela, id, codigo, nome,
+    marca, modelo, status e relevancia.
+    """
+    termo = (termo or '').strip()
+    if not termo:
+        return []
+
+    partes: list[str] = []
+    params: list[Any] = []
+    for tipo_item in tipos or list(FONTES_BUSCA):
+        fonte = FONTES_BUSCA[tipo_item]
+        campo = {chave: valor.format(a='') for chave, valor in fonte.items()}
+        where = f"""ativo = TRUE AND (
+                f_busca_normalizada({campo['texto']}) LIKE f_busca_normalizada(%s)
+                OR f_busca_normalizada(%s) <%% f_busca_normalizada({campo['texto']})
+            )"""
+        if apenas_disponiveis:
+            where += f" AND {campo['disponivel']}"
+        partes.append(f"""
+            SELECT '{tipo_item}' as tipo_item, '{fonte['tabela']}' as tabela,
+                   id, codigo, {campo['nome']} as nome, COALESCE(marca, '') as marca,
+                   {campo['modelo']} as modelo, {campo['status']} as status,
+                   word_similarity(f_busca_normalizada(%s), f_busca_normalizada({campo['texto']})) as relevancia,
+                   lower(codigo) = lower(%s) as codigo_exato
+            FROM {fonte['tabela']}
+            WHERE {where}
+        """)
+        # Ordem dos placeholders: SELECT (relevância, código exato) e WHERE (LIKE, similaridade)
+        params.extend([termo, termo, _padrao_like(termo), termo])
+
+    query = f"""
+        SELECT tipo_item, tabela, id, codigo, nome, marca, modelo, status, relevancia
+        FROM ({' UNION ALL '.join(partes)}) resultados
+        ORDER BY codigo_exato DESC, relevancia DESC, codigo
+        LIMIT %s
+    """
+    params.append(limite)
+
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    except Exception as e:
+        st.error(f"Erro na busca de itens: {e}")
+        return []
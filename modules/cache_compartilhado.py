@@ -0,0 +1,207 @@
+"""
+Sistema de Inventário Web - Cache compartilhado de resultados
+Cache do processo (ou Redis, com CACHE_BACKEND=redis) chaveado por consulta e
+parâmetros, com tags por entidade que os métodos de escrita invalidam
+"""
+
+import hashlib
+import pickle
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Iterable
+from database.connection import db
+
+# Tag implícita em todas as entradas; incrementá-la esvazia o cache inteiro
+TAG_GLOBAL = '__todas__'
+
+# Tag de cada tipo_item das movimentações
+TAGS_POR_TIPO_ITEM = {
+    'insumo': 'insumos',
+    'equipamento_eletrico': 'equipamentos_eletricos',
+    'equipamento_manual': 'equipamentos_manuais',
+}
+
+
+class BackendMemoria:
+    """Armazenamento no próprio processo (padrão e usado nos testes)"""
+
+    def __init__(self, max_itens: int = 2000):
+        self.max_itens = max_itens
+        self._dados: dict[str, tuple[bytes, float]] = {}
+        self._versoes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave: str) -> bytes | None:
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            if item[1] < time.monotonic():
+                del self._dados[chave]
+                return None
+            return item[0]
+
+    def set(self, chave: str, valor: bytes, ttl: int) -> None:
+        with self._lock:
+            if len(self._dados) >= self.max_itens:
+                agora = time.monotonic()
+                for expirada in [c for c, (_, expira) in self._dados.items() if expira < agora]:
+                    del self._dados[expirada]
+                while len(self._dados) >= self.max_itens:
+                    # Descarta a entrada mais antiga
+                    del self._dados[next(iter(self._dados))]
+            self._dados[chave] = (valor, time.monotonic() + ttl)
+
+    def versoes(self, tags: list[str]) -> list[int]:
+        with self._lock:
+            return [self._versoes.get(tag, 0) for tag in tags]
+
+    def incrementar(self, tag: str) -> None:
+        with self._lock:
+            self._versoes[tag] = self._versoes.get(tag, 0) + 1
+            if tag == TAG_GLOBAL:
+                self._dados.clear()
+
+
+class BackendRedis:
+    """Armazenamento compartilhado entre processos (requer o pacote redis)"""
+
+    def __init__(self, url: str, prefixo: str = 'inventario:cache:'):
+        import redis  # dependência opcional
+        self.cliente = redis.Redis.from_url(url)
+        self.prefixo = prefixo
+
+    def get(self, chave: str) -> bytes | None:
+        return self.cliente.get(self.prefixo + chave)
+
+    def set(self, chave: str, valor: bytes, ttl: int) -> None:
+        self.cliente.set(self.prefixo + chave, valor, ex=ttl)
+
+    def versoes(self, tags: list[str]) -> list[int]:
+        valores = self.cliente.mget([f"{self.prefixo}tag:{tag}" for tag in tags])
+        return [int(valor or 0) for valor in valores]
+
+    def incrementar(self, tag: str) -> None:
+        self.cliente.incr(f"{self.prefixo}tag:{tag}")
+
+
+class BackendNenhum:
+    """Cache desligado (CACHE_BACKEND=nenhum): toda leitura vai ao banco"""
+
+    def get(self, chave: str) -> bytes | None:
+        return None
+
+    def set(self, chave: str, valor: bytes, ttl: int) -> None:
+        pass
+
+    def versoes(self, tags: list[str]) -> list[int]:
+        return [0] * len(tags)
+
+    def incrementar(self, tag: str) -> None:
+        pass
+
+
+def _normalizar(valor: Any) -> Any:
+    """Forma estável dos parâmetros para a chave (dicionários em ordem de chave)"""
+    if isinstance(valor, dict):
+        return tuple(sorted((str(k), _normalizar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple, set)):
+        itens = [_normalizar(v) for v in valor]
+        return tuple(sorted(itens, key=repr)) if isinstance(valor, set) else tuple(itens)
+    return valor
+
+
+class CacheCompartilhado:
+    """Cache de resultados compartilhado entre as sessões.
+
+    A chave combina o nome da consulta, os parâmetros e a versão atual de
+    cada tag. Invalidar uma tag incrementa sua versão: as entradas antigas
+    deixam de ser encontradas e expiram pelo TTL, sem varrer o cache.
+    Os valores são serializados, então quem lê recebe sempre uma cópia.
+    """
+
+    def __init__(self, backend, ttl_padrao: int = 300):
+        self.backend = backend
+        self.ttl_padrao = ttl_padrao
+        self.acertos = 0
+        self.falhas = 0
+
+    def _chave(self, nome: str, params: Any, tags: tuple[str, ...]) -> str:
+        versoes = self.backend.versoes([TAG_GLOBAL, *tags])
+        bruto = repr((_normalizar(params), tags, versoes)).encode('utf-8')
+        return f"{nome}:{hashlib.sha256(bruto).hexdigest()}"
+
+    def obter_ou_calcular(self, nome: str, params: Any, tags: Iterable[str],
+                          calcular: Callable[[], Any], ttl: int | None = None) -> Any:
+        """Devolve o valor em cache ou executa `calcular` e guarda o resultado.
+
+        Exceções de `calcular` não são guardadas; falhas do backend fazem a
+        consulta ir direto ao banco.
+        """
+        tags = tuple(sorted(set(tags)))
+        try:
+            chave = self._chave(nome, params, tags)
+            bruto = self.backend.get(chave)
+        except Exception as e:
+            print(f"AVISO - Cache indisponível, consultando o banco: {e}")
+            return calcular()
+
+        if bruto is not None:
+            self.acertos += 1
+            return pickle.loads(bruto)
+
+        self.falhas += 1
+        valor = calcular()
+        try:
+            self.backend.set(chave, pickle.dumps(valor), ttl or self.ttl_padrao)
+        except Exception as e:
+            print(f"AVISO - Não foi possível gravar no cache: {e}")
+        return valor
+
+    def em_cache(self, tags: Iterable[str], ttl: int | None = None) -> Callable:
+        """Decorator para funções (não métodos) cujo resultado depende só dos argumentos"""
+        tags = tuple(tags)
+
+        def decorator(func: Callable) -> Callable:
+            nome = f"{func.__module__}.{func.__qualname__}"
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.obter_ou_calcular(nome, (args, kwargs), tags,
+                                              lambda: func(*args, **kwargs), ttl)
+            return wrapper
+        return decorator
+
+    def invalidar(self, *tags: str) -> None:
+        """Invalida as entradas marcadas com qualquer uma das tags"""
+        for tag in set(tags):
+            try:
+                self.backend.incrementar(tag)
+            except Exception as e:
+                print(f"AVISO - Não foi possível invalidar o cache ({tag}): {e}")
+
+    def limpar(self) -> None:
+        """Invalida todo o cache"""
+        self.invalidar(TAG_GLOBAL)
+
+
+def criar_cache() -> CacheCompartilhado:
+    """Cria o cache conforme CACHE_BACKEND (memoria, redis ou nenhum)"""
+    nome_backend = str(db.get_setting('CACHE_BACKEND', 'memoria')).lower()
+    ttl = int(db.get_setting('CACHE_TTL', 300))
+    if nome_backend == 'redis':
+        try:
+            backend = BackendRedis(db.get_setting('REDIS_URL', 'redis://localhost:6379/0'))
+        except ImportError:
+            print("AVISO - Pacote redis não instalado; usando cache em memória")
+            backend = BackendMemoria()
+    elif nome_backend in ('nenhum', 'none', '0'):
+        backend = BackendNenhum()
+    else:
+        backend = BackendMemoria(int(db.get_setting('CACHE_MAX_ITENS', 2000)))
+    return CacheCompartilhado(backend, ttl_padrao=ttl)
+
+
+# Instância global
+cache_compartilhado = criar_cache()
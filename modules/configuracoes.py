@@ -467,5 +467,38 @@ def show_configuracoes_page():
                 except Exception as e:
                     st.error(f"❌ Erro ao importar configurações: {str(e)}")
 
+        st.markdown("#### Importação em Massa de Itens")
+        from modules.importacao_massa import importador_massa, ESPECIFICACOES
+        col_arquivo, col_tabela = st.columns([2, 1])
+        with col_arquivo:
+            arquivo_itens = st.file_uploader(
+                "Arquivo JSON, CSV ou XLSX",
+                type=["json", "csv", "xlsx"],
+                key="importacao_massa_arquivo",
+                help="Colunas com os nomes dos campos; categoria, obra e responsável pelo nome ou código"
+            )
+        with col_tabela:
+            tabela_destino = st.selectbox("Tabela de destino", sorted(ESPECIFICACOES))
+
+        if arquivo_itens and st.button("📥 Importar Itens"):
+            with st.spinner("Importando..."):
+                try:
+                    resultado = importador_massa.importar(arquivo_itens, tabela_destino,
+                                                          usuario_id=user_data.get('id', 1))
+                except Exception as e:
+                    st.error(f"❌ Erro na importação: {str(e)}")
+                    resultado = None
+            if resultado:
+                st.success(f"✅ {resultado.inseridos} inseridos, {resultado.atualizados} atualizados "
+                           f"em {resultado.duracao_segundos:.1f}s")
+                if resultado.erros:
+                    st.warning(f"⚠️ {len(resultado.erros)} linhas com erro")
+                    st.download_button(
+                        label="💾 Relatório de erros (CSV)",
+                        data=resultado.relatorio_erros_csv(),
+                        file_name=f"erros_importacao_{tabela_destino}.csv",
+                        mime="text/csv"
+                    )
+
 # Manager global
 configuracoes_manager = ConfiguracoesManager()
\ No newline at end of file
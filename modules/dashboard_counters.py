@@ -0,0 +1,110 @@
+"""
+Sistema de Inventário Web - Contadores do dashboard
+Leitura das métricas mantidas por triggers em dashboard_counters e
+dashboard_movimentacoes_diarias (migração 0019). Os triggers só acrescentam
+deltas (migração 0028); uma thread os consolida periodicamente nos contadores.
+"""
+
+import threading
+from typing import Any
+from database.connection import db
+
+METRICAS_VAZIAS: dict[str, Any] = {
+    'total_insumos': 0,
+    'total_ee': 0,
+    'total_em': 0,
+    'total_obras': 0,
+    'itens_criticos': 0,
+    'valor_total_estoque': 0.0,
+    'movimentacoes_hoje': 0,
+    'movimentacoes_semana': 0,
+}
+
+
+class DashboardCountersManager:
+    """Métricas do dashboard em tempo constante, independentes do tamanho do estoque"""
+
+    def __init__(self, database=None, intervalo_consolidacao: float = 30):
+        self.db = database or db
+        self.intervalo_consolidacao = intervalo_consolidacao
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def get_metricas(self) -> dict[str, Any]:
+        """Lê os contadores em uma única consulta (uma linha por fonte + no máximo 8 dias),
+        somando os deltas ainda não consolidados"""
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                WITH contadores AS (
+                    SELECT fonte, total, alertas, valor_total FROM dashboard_counters
+                    UNION ALL
+                    SELECT fonte, total, alertas, valor_total FROM dashboard_counters_deltas
+                ), dias AS (
+                    SELECT dia, total FROM dashboard_movimentacoes_diarias WHERE dia >= CURRENT_DATE - 7
+                    UNION ALL
+                    SELECT dia, total FROM dashboard_movimentacoes_deltas WHERE dia >= CURRENT_DATE - 7
+                )
+                SELECT
+                    COALESCE(SUM(total) FILTER (WHERE fonte = 'insumos'), 0) as total_insumos,
+                    COALESCE(SUM(total) FILTER (WHERE fonte = 'equipamentos_eletricos'), 0) as total_ee,
+                    COALESCE(SUM(total) FILTER (WHERE fonte = 'equipamentos_manuais'), 0) as total_em,
+                    COALESCE(SUM(total) FILTER (WHERE fonte = 'obras'), 0) as total_obras,
+                    COALESCE(SUM(alertas) FILTER (WHERE fonte = 'insumos'), 0) as itens_criticos,
+                    COALESCE(SUM(valor_total), 0) as valor_total_estoque,
+                    (SELECT COALESCE(SUM(total), 0) FROM dias WHERE dia = CURRENT_DATE) as movimentacoes_hoje,
+                    (SELECT COALESCE(SUM(total), 0) FROM dias) as movimentacoes_semana
+                FROM contadores
+            """)
+            row = cursor.fetchone()
+
+        if not row:
+            return dict(METRICAS_VAZIAS)
+        metricas = {chave: int(row[chave] or 0) for chave in METRICAS_VAZIAS}
+        metricas['valor_total_estoque'] = float(row['valor_total_estoque'] or 0)
+        return metricas
+
+    def recalcular(self) -> bool:
+        """Recalcula os contadores a partir das tabelas (correção de divergências)"""
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute("SELECT recalcular_dashboard_counters()")
+            return True
+        except Exception as e:
+            print(f"Erro ao recalcular contadores do dashboard: {e}")
+            return False
+
+    def consolidar(self) -> int:
+        """Soma os deltas pendentes nos contadores; devolve as linhas de contador atualizadas"""
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute("SELECT dashboard_consolidar_deltas() as atualizadas")
+                return cursor.fetchone()['atualizadas']
+        except Exception as e:
+            print(f"Erro ao consolidar contadores do dashboard: {e}")
+            return 0
+
+    def iniciar(self) -> None:
+        """Inicia a consolidação periódica em segundo plano (idempotente)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='dashboard-counters', daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._parar.wait(self.intervalo_consolidacao):
+            self.consolidar()
+            self.db.release_connection()
+
+
+# Instância global
+dashboard_counters = DashboardCountersManager(
+    db, intervalo_consolidacao=float(db.get_setting('DASHBOARD_CONSOLIDAR_S', 30))
+)
@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime  # type: ignore
 from database.connection import db
 from modules.auth import auth_manager
+from modules.cache_compartilhado import cache_compartilhado
 from typing import Any
 
 class EquipamentosEletricosManager:
@@ -42,6 +43,7 @@ class EquipamentosEletricosManager:
             result = cursor.fetchone()
             equipamento_id = result['id'] if result else None
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('equipamentos_eletricos')
             
             # Log da ação
             auth_manager.log_action(
@@ -135,6 +137,7 @@ class EquipamentosEletricosManager:
             ))
             
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('equipamentos_eletricos')
             
             # Log da ação
             auth_manager.log_action(
@@ -163,6 +166,7 @@ class EquipamentosEletricosManager:
             
             cursor.execute("DELETE FROM equipamentos_eletricos WHERE id = %s", (equipamento_id,))
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('equipamentos_eletricos')
             
             # Log da ação
             auth_manager.log_action(
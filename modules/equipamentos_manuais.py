@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime  # type: ignore
 from database.connection import db
 from modules.auth import auth_manager
+from modules.cache_compartilhado import cache_compartilhado
 from typing import Any
 
 def safe_float_convert(value: Any, default: float = 0.0) -> float:
@@ -49,6 +50,7 @@ class EquipamentosManuaisManager:
             result = cursor.fetchone()
             equipamento_id = result['id'] if result else None
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('equipamentos_manuais')
             
             # Log da ação
             auth_manager.log_action(
@@ -140,6 +142,7 @@ class EquipamentosManuaisManager:
             ))
             
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('equipamentos_manuais')
             
             # Log da ação
             auth_manager.log_action(
@@ -167,6 +170,7 @@ class EquipamentosManuaisManager:
             
             cursor.execute("DELETE FROM equipamentos_manuais WHERE id = %s", (equipamento_id,))
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('equipamentos_manuais')
             
             # Log da ação
             auth_manager.log_action(
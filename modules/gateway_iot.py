@@ -0,0 +1,354 @@
+"""
+Sistema de Inventário Web - Gateway IoT (processo separado, asyncio)
+Assina os tópicos dos dispositivos, decodifica os payloads e entrega as
+leituras ao ingestor em lote (modules/ingestao_iot.py); status vai ao
+monitor de heartbeat (modules/heartbeat_iot.py) e alertas ao banco em um
+pool de threads do tamanho da concorrência. Roda fora do
+Streamlit, então a ingestão não depende de alguém estar com a tela aberta.
+
+Com --local o broker é uma implementação em processo (sem rede) e o
+simulador (modules/simulador_iot.py) publica as leituras: teste de carga
+numa máquina só. As leituras são gravadas de verdade: use um banco de teste.
+As regras de monitoramento são avaliadas a cada lote gravado; --sem-regras
+desliga a avaliação (só em testes de carga: os alertas de regra param).
+
+Uso:
+    python -m modules.gateway_iot --host broker.exemplo.com --porta 1883
+    python -m modules.gateway_iot --local --simular 10000 --duracao 60 --dispositivos 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+TOPICOS = ('inventario/+/sensores/+', 'inventario/+/alertas/+', 'inventario/+/status')
+
+
+def topico_corresponde(filtro: str, topico: str) -> bool:
+    """Casamento de tópico MQTT com os curingas + (um nível) e # (o resto)"""
+    niveis_filtro, niveis_topico = filtro.split('/'), topico.split('/')
+    for i, nivel in enumerate(niveis_filtro):
+        if nivel == '#':
+            return True
+        if i >= len(niveis_topico) or (nivel != '+' and nivel != niveis_topico[i]):
+            return False
+    return len(niveis_filtro) == len(niveis_topico)
+
+
+def decodificar(topico: str, payload: bytes) -> tuple[str, str, dict[str, Any]]:
+    """(device_id, tipo da mensagem, dados) de inventario/<device>/<tipo>[/<subtipo>].
+
+    O subtipo do tópico preenche tipo_sensor (sensores) ou tipo_alerta
+    (alertas) quando o payload não traz. ValueError se a mensagem for inválida.
+    """
+    partes = topico.split('/')
+    if len(partes) < 3 or partes[0] != 'inventario' or not partes[1]:
+        raise ValueError(f"tópico fora do padrão: {topico}")
+    dados = json.loads(payload)
+    if not isinstance(dados, dict):
+        raise ValueError("payload não é um objeto JSON")
+    tipo = partes[2]
+    if len(partes) > 3:
+        if tipo == 'sensores':
+            dados.setdefault('tipo_sensor', partes[3])
+        elif tipo == 'alertas':
+            dados.setdefault('tipo_alerta', partes[3])
+    return partes[1], tipo, dados
+
+
+def gravar_status(database, device_id: str, dados: dict[str, Any]) -> None:
+    with database.transaction() as cursor:
+        cursor.execute("""
+            UPDATE dispositivos_iot SET status_conexao = %s, ultima_comunicacao = %s
+            WHERE device_id = %s
+        """, (dados.get('status', 'online'), datetime.now(), device_id))
+
+
+def gravar_alerta(database, device_id: str, dados: dict[str, Any]) -> None:
+    with database.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO alertas_iot (device_id, tipo_alerta, severidade, titulo, descricao, valor_detectado)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            device_id,
+            dados.get('tipo_alerta', 'dispositivo'),
+            dados.get('severidade', 'medio'),
+            dados.get('titulo') or f"Alerta do dispositivo {device_id}",
+            dados.get('descricao'),
+            None if dados.get('valor') is None else str(dados['valor']),
+        ))
+
+
+class BrokerLocal:
+    """Broker MQTT em processo: entrega cada publicação às filas assinadas.
+
+    A publicação espera a fila do assinante ter espaço, como o TCP faria com
+    um broker de verdade, então o publicador nunca passa à frente do gateway.
+    """
+
+    def __init__(self):
+        self._assinaturas: list[tuple[str, asyncio.Queue]] = []
+
+    async def conectar(self) -> None:
+        pass
+
+    async def desconectar(self) -> None:
+        pass
+
+    def assinar(self, filtro: str, fila: asyncio.Queue) -> None:
+        self._assinaturas.append((filtro, fila))
+
+    async def publicar(self, topico: str, payload: bytes) -> None:
+        for filtro, fila in self._assinaturas:
+            if topico_corresponde(filtro, topico):
+                await fila.put((topico, payload))
+
+
+class ClienteMQTT:
+    """Cliente paho-mqtt (rede na thread do paho) com a mesma interface do BrokerLocal.
+
+    A thread do paho espera a fila do gateway ter espaço antes de ler a
+    próxima mensagem, o que segura o broker quando o gateway atrasa.
+    """
+
+    def __init__(self, host: str, porta: int = 1883, usuario: str | None = None,
+                 senha: str | None = None, keepalive: int = 60):
+        import paho.mqtt.client as mqtt
+        self.host, self.porta, self.keepalive = host, porta, keepalive
+        self._cliente = mqtt.Client()
+        if usuario:
+            self._cliente.username_pw_set(usuario, senha)
+        self._cliente.on_connect = self._ao_conectar
+        self._cliente.on_message = self._ao_receber
+        self._cliente.on_disconnect = lambda client, userdata, rc: print(f"🔌 Desconectado do broker MQTT: {rc}")
+        self._assinaturas: list[tuple[str, asyncio.Queue]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def conectar(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self._loop.run_in_executor(None, self._cliente.connect, self.host, self.porta, self.keepalive)
+        self._cliente.loop_start()
+
+    async def desconectar(self) -> None:
+        self._cliente.disconnect()
+        # A thread do paho pode estar esperando a fila: o loop precisa seguir livre
+        await asyncio.get_running_loop().run_in_executor(None, self._cliente.loop_stop)
+
+    def assinar(self, filtro: str, fila: asyncio.Queue) -> None:
+        self._assinaturas.append((filtro, fila))
+
+    async def publicar(self, topico: str, payload: bytes) -> None:
+        self._cliente.publish(topico, payload)
+
+    def _ao_conectar(self, client, userdata, flags, rc):
+        if rc == 0:
+            print("✅ Conectado ao broker MQTT")
+            # Também na reconexão: a sessão nova não guarda as assinaturas
+            for filtro, _ in self._assinaturas:
+                client.subscribe(filtro)
+        else:
+            print(f"❌ Falha na conexão MQTT: {rc}")
+
+    def _ao_receber(self, client, userdata, msg):
+        for filtro, fila in self._assinaturas:
+            if topico_corresponde(filtro, msg.topic):
+                asyncio.run_coroutine_threadsafe(fila.put((msg.topic, msg.payload)), self._loop).result()
+
+
+class GatewayIoT:
+    """Consome as mensagens do broker com `concorrencia` tarefas.
+
+    Leituras vão direto ao buffer do ingestor; com o buffer cheio, e para
+    status e alertas, a chamada ao banco roda no pool de threads e a tarefa
+    espera, então no máximo `concorrencia` chamadas ficam em andamento e a
+    fila de `tamanho_fila` mensagens segura o broker.
+    """
+
+    def __init__(self, cliente, ingestor, database, concorrencia: int = 8, tamanho_fila: int = 10000,
+                 heartbeat=None):
+        self.cliente = cliente
+        self.ingestor = ingestor
+        # Com o monitor, status só muda o estado em memória (gravado em lote por ele)
+        self.heartbeat = heartbeat
+        self.db = database
+        self.concorrencia = concorrencia
+        self.tamanho_fila = tamanho_fila
+        self.fila: asyncio.Queue | None = None
+        self._executor = ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='gateway-iot')
+        self._contadores = {'recebidas': 0, 'leituras': 0, 'status': 0, 'alertas': 0,
+                            'invalidas': 0, 'erros': 0, 'esperas_ingestor': 0}
+        self._inicio = time.monotonic()
+
+    def metricas(self) -> dict[str, Any]:
+        decorrido = time.monotonic() - self._inicio
+        return {
+            **self._contadores,
+            'pendentes': self.fila.qsize() if self.fila else 0,
+            'recebidas_por_s': self._contadores['recebidas'] / decorrido if decorrido else 0.0,
+        }
+
+    async def executar(self, parar: asyncio.Event) -> None:
+        """Processa mensagens até `parar`; depois desconecta e esvazia a fila"""
+        self.fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        self._inicio = time.monotonic()
+        for filtro in TOPICOS:
+            self.cliente.assinar(filtro, self.fila)
+        await self.cliente.conectar()
+        tarefas = [asyncio.create_task(self._consumir()) for _ in range(self.concorrencia)]
+        try:
+            await parar.wait()
+        finally:
+            await self.cliente.desconectar()
+            await self.fila.join()
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+
+    async def _consumir(self) -> None:
+        while True:
+            topico, payload = await self.fila.get()
+            try:
+                await self.processar(topico, payload)
+            except Exception as e:
+                self._contadores['erros'] += 1
+                print(f"❌ Erro ao processar mensagem de {topico}: {e}")
+            finally:
+                self.fila.task_done()
+
+    async def processar(self, topico: str, payload: bytes) -> None:
+        self._contadores['recebidas'] += 1
+        try:
+            device_id, tipo, dados = decodificar(topico, payload)
+        except (ValueError, UnicodeDecodeError):
+            self._contadores['invalidas'] += 1
+            return
+
+        if tipo == 'sensores':
+            self._contadores['leituras'] += 1
+            # Só esta thread enfileira; com espaço no buffer a chamada não bloqueia
+            if not self.ingestor.cheio():
+                self.ingestor.enfileirar(device_id, dados)
+            else:
+                self._contadores['esperas_ingestor'] += 1
+                await self._no_executor(self.ingestor.enfileirar, device_id, dados)
+        elif tipo == 'status':
+            self._contadores['status'] += 1
+            if self.heartbeat is not None:
+                self.heartbeat.registrar(device_id, online=dados.get('status', 'online') != 'offline')
+            else:
+                await self._no_executor(gravar_status, self.db, device_id, dados)
+        elif tipo == 'alertas':
+            self._contadores['alertas'] += 1
+            await self._no_executor(gravar_alerta, self.db, device_id, dados)
+        else:
+            self._contadores['invalidas'] += 1
+
+    async def _no_executor(self, funcao, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+
+
+async def _relatar(gateway: GatewayIoT, ingestor, intervalo: float) -> None:
+    while True:
+        await asyncio.sleep(intervalo)
+        g, i = gateway.metricas(), ingestor.metricas()
+        print(f"recebidas={g['recebidas']} ({g['recebidas_por_s']:.0f}/s) pendentes={g['pendentes']} "
+              f"invalidas={g['invalidas']} gravadas={i['gravadas']} descartadas={i['descartadas']} "
+              f"buffer={i['pendentes']}/{i['capacidade']}")
+
+
+async def _executar(args, database, ingestor, heartbeat) -> int:
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sinal, parar.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    if args.local:
+        cliente = BrokerLocal()
+    else:
+        cliente = ClienteMQTT(args.host, args.porta, args.usuario, args.senha)
+    gateway = GatewayIoT(cliente, ingestor, database, args.concorrencia, args.fila, heartbeat)
+    relatorio = asyncio.create_task(_relatar(gateway, ingestor, args.metricas_s))
+    execucao = asyncio.create_task(gateway.executar(parar))
+    await asyncio.sleep(0)  # o gateway assina os tópicos antes da primeira publicação
+
+    simulacao = None
+    if args.simular:
+        from modules.simulador_iot import dispositivos_simulados, simular
+        simulacao = await simular(cliente, args.simular, args.duracao, dispositivos_simulados(args.dispositivos))
+        parar.set()
+    elif args.duracao:
+        loop.call_later(args.duracao, parar.set)
+
+    await execucao
+    relatorio.cancel()
+    while not ingestor.flush(timeout=30):
+        pass
+
+    g, i = gateway.metricas(), ingestor.metricas()
+    if simulacao:
+        print(f"Publicadas:             {simulacao['publicadas']} ({simulacao['taxa_real']:.0f}/s, pedido {args.simular:.0f}/s)")
+    print(f"Recebidas pelo gateway: {g['recebidas']} (inválidas {g['invalidas']}, erros {g['erros']})")
+    print(f"Leituras gravadas:      {i['gravadas']} em {i['lotes']} lotes (descartadas {i['descartadas']})")
+    print(f"Esperas buffer cheio:   {g['esperas_ingestor']} (ocupação máxima {i['ocupacao_maxima']}/{i['capacidade']})")
+    h = heartbeat.resumo()
+    print(f"Dispositivos:           {h['online']} online, {h['offline']} offline")
+    return 0 if not (i['descartadas'] or g['erros']) else 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Gateway IoT: MQTT -> ingestão em lote')
+    parser.add_argument('--host', help='broker MQTT (padrão: configuração MQTT_HOST)')
+    parser.add_argument('--porta', type=int, help='porta do broker (padrão: MQTT_PORT ou 1883)')
+    parser.add_argument('--usuario', help='usuário do broker (padrão: MQTT_USER)')
+    parser.add_argument('--senha', help='senha do broker (padrão: MQTT_PASSWORD)')
+    parser.add_argument('--local', action='store_true', help='broker em processo, sem rede')
+    parser.add_argument('--simular', type=float, default=0, help='publica N leituras/s pelo simulador')
+    parser.add_argument('--dispositivos', type=int, default=1, help='cópias dos perfis simulados')
+    parser.add_argument('--duracao', type=float, default=0, help='segundos de execução (0 = até SIGINT/SIGTERM)')
+    parser.add_argument('--concorrencia', type=int, default=8, help='tarefas e threads de banco')
+    parser.add_argument('--fila', type=int, default=10000, help='mensagens recebidas aguardando processamento')
+    parser.add_argument('--metricas-s', type=float, default=10, help='intervalo do relatório de métricas')
+    parser.add_argument('--sem-regras', action='store_true',
+                        help='não avaliar as regras de monitoramento (nenhum alerta de regra é gerado)')
+    args = parser.parse_args(argv)
+    if args.simular and not (args.local and args.duracao):
+        parser.error('--simular exige --local e --duracao')
+
+    os.environ['DB_AUTO_MIGRATE'] = '0'
+    from database.connection import db
+    from modules.heartbeat_iot import monitor_heartbeat
+    from modules.ingestao_iot import ingestor_sensores
+
+    args.host = args.host or db.get_setting('MQTT_HOST', None)
+    args.porta = args.porta or int(db.get_setting('MQTT_PORT', 1883))
+    args.usuario = args.usuario or db.get_setting('MQTT_USER', None)
+    args.senha = args.senha or db.get_setting('MQTT_PASSWORD', None)
+    if not (args.local or args.host):
+        parser.error('informe --host (ou MQTT_HOST) ou use --local')
+
+    try:
+        if not args.sem_regras:
+            from modules.iot_sensores import IoTManager
+            ingestor_sensores.ao_gravar = IoTManager().verificar_regras_lote
+        # Dispositivos online no banco que não voltarem a comunicar ficam offline
+        monitor_heartbeat.carregar(incluir_estado=True)
+        return asyncio.run(_executar(args, db, ingestor_sensores, monitor_heartbeat))
+    finally:
+        ingestor_sensores.fechar()
+        monitor_heartbeat.fechar()
+        db.close_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Sistema de Inventário Web - Monitor de heartbeat dos dispositivos IoT
+Guarda em memória o último contato de cada dispositivo e um heap com o
+prazo de cada um (último contato + frequencia_leitura x tolerância). Uma
+thread tira do heap os prazos vencidos, gera as transições online/offline
+e grava em lote, a cada `intervalo_gravacao` segundos, ultima_comunicacao e
+status_conexao dos dispositivos que mudaram e um alerta por transição.
+"""
+
+import atexit
+import heapq
+import threading
+import time
+from datetime import datetime
+from typing import Any
+from psycopg2.extras import execute_values
+from database.connection import db
+
+ONLINE, OFFLINE = 'online', 'offline'
+
+
+class MonitorHeartbeat:
+    """Estado de comunicação dos dispositivos em memória.
+
+    Cada dispositivo online tem uma única entrada no heap. Quando o prazo
+    vence, o último contato é conferido: se houve leitura depois, a entrada
+    volta com o prazo novo; se não, o dispositivo fica offline e sai do heap
+    até o próximo contato. Status e contagens da frota são O(1).
+    """
+
+    def __init__(self, database, tolerancia: float = 3.0, intervalo_padrao: int = 60,
+                 intervalo_gravacao: float = 30, intervalo_verificacao: float = 1.0):
+        self.db = database
+        self.tolerancia = tolerancia
+        self.intervalo_padrao = intervalo_padrao
+        self.intervalo_gravacao = intervalo_gravacao
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._parar = threading.Event()
+        self._carregado = False
+        self._intervalos: dict[str, int] = {}
+        self._ultimo_contato: dict[str, float] = {}
+        self._estado: dict[str, str] = {}
+        self._contagem = {ONLINE: 0, OFFLINE: 0}
+        self._prazos: list[tuple[float, str]] = []
+        self._agendados: set[str] = set()
+        # Pendentes de gravação: dispositivos alterados e transições (device_id, estado, último contato, limite)
+        self._alterados: set[str] = set()
+        self._transicoes: list[tuple[str, str, float, float]] = []
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._parar.clear()
+                self._thread = threading.Thread(target=self._executar, name='monitor-heartbeat', daemon=True)
+                self._thread.start()
+
+    def carregar(self, incluir_estado: bool = False) -> int:
+        """Lê a frequência esperada de cada dispositivo ativo.
+
+        Com `incluir_estado` (o processo que recebe as mensagens, ao iniciar)
+        os dispositivos online no banco passam a ser acompanhados a partir do
+        último contato gravado, para que os que não voltarem fiquem offline.
+        """
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT device_id, frequencia_leitura, ultima_comunicacao, status_conexao
+                FROM dispositivos_iot WHERE ativo = TRUE
+            """)
+            dispositivos = cursor.fetchall()
+
+        with self._lock:
+            for d in dispositivos:
+                self._intervalos[d['device_id']] = d['frequencia_leitura'] or self.intervalo_padrao
+                if incluir_estado and d['device_id'] not in self._estado:
+                    estado = ONLINE if d['status_conexao'] == ONLINE and d['ultima_comunicacao'] else OFFLINE
+                    self._definir_estado(d['device_id'], estado)
+                    if estado == ONLINE:
+                        self._ultimo_contato[d['device_id']] = d['ultima_comunicacao'].timestamp()
+                        self._agendar(d['device_id'])
+            self._carregado = True
+        self._iniciar()
+        return len(dispositivos)
+
+    def _limite(self, device_id: str) -> float:
+        return self._intervalos.get(device_id, self.intervalo_padrao) * self.tolerancia
+
+    def _agendar(self, device_id: str) -> None:
+        heapq.heappush(self._prazos, (self._ultimo_contato[device_id] + self._limite(device_id), device_id))
+        self._agendados.add(device_id)
+
+    def _definir_estado(self, device_id: str, estado: str, transicao: bool = False) -> None:
+        anterior = self._estado.get(device_id)
+        if anterior:
+            self._contagem[anterior] -= 1
+        self._estado[device_id] = estado
+        self._contagem[estado] += 1
+        self._alterados.add(device_id)
+        if transicao:
+            self._transicoes.append((device_id, estado, self._ultimo_contato.get(device_id, time.time()),
+                                     self._limite(device_id)))
+
+    def registrar(self, device_id: str, momento: datetime | None = None, online: bool = True) -> None:
+        """Contato do dispositivo; `online=False` quando ele mesmo avisa que vai desligar"""
+        self.registrar_lote({device_id: momento or datetime.now()}, online)
+
+    def registrar_lote(self, ultimo_por_dispositivo: dict[str, datetime], online: bool = True) -> None:
+        """Último contato de vários dispositivos (um lote do ingestor)"""
+        with self._lock:
+            for device_id, momento in ultimo_por_dispositivo.items():
+                contato = momento.timestamp()
+                # Leitura atrasada (mais antiga que a última) não muda o estado
+                if contato <= self._ultimo_contato.get(device_id, float('-inf')):
+                    continue
+                self._ultimo_contato[device_id] = contato
+                self._alterados.add(device_id)
+                anterior = self._estado.get(device_id)
+                if not online:
+                    if anterior != OFFLINE:
+                        self._definir_estado(device_id, OFFLINE, transicao=anterior is not None)
+                    continue
+                if anterior != ONLINE:
+                    self._definir_estado(device_id, ONLINE, transicao=anterior is not None)
+                if device_id not in self._agendados:
+                    self._agendar(device_id)
+        self._iniciar()
+
+    def verificar(self, agora: datetime | None = None) -> list[str]:
+        """Marca offline os dispositivos com prazo vencido; devolve os device_id"""
+        limite = (agora or datetime.now()).timestamp()
+        offline = []
+        with self._lock:
+            while self._prazos and self._prazos[0][0] <= limite:
+                _, device_id = heapq.heappop(self._prazos)
+                self._agendados.discard(device_id)
+                if self._estado.get(device_id) != ONLINE:
+                    continue
+                if self._ultimo_contato[device_id] + self._limite(device_id) > limite:
+                    self._agendar(device_id)
+                else:
+                    self._definir_estado(device_id, OFFLINE, transicao=True)
+                    offline.append(device_id)
+        return offline
+
+    def status(self, device_id: str) -> str | None:
+        with self._lock:
+            return self._estado.get(device_id)
+
+    def resumo(self) -> dict[str, Any]:
+        """Contagem da frota e o que falta gravar"""
+        with self._lock:
+            return {**self._contagem, 'alteracoes_pendentes': len(self._alterados),
+                    'transicoes_pendentes': len(self._transicoes)}
+
+    def resumo_gravado(self) -> dict[str, Any]:
+        """Contagem da frota pelo estado gravado em dispositivos_iot.
+
+        É o que outros processos (a tela do Streamlit) enxergam do monitor que
+        roda no gateway. Online no banco sem contato gravado dentro do prazo
+        mais um intervalo de gravação conta como atrasado: o gateway parou de
+        gravar ou o dispositivo ainda não foi marcado offline.
+        """
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT
+                        COUNT(*) FILTER (WHERE status_conexao = 'online' AND ultima_comunicacao >= v.limite) as online,
+                        COUNT(*) FILTER (WHERE status_conexao = 'online' AND (ultima_comunicacao IS NULL
+                                         OR ultima_comunicacao < v.limite)) as atrasados,
+                        COUNT(*) FILTER (WHERE status_conexao IS DISTINCT FROM 'online') as offline,
+                        MAX(ultima_comunicacao) as ultimo_contato
+                    FROM dispositivos_iot,
+                         LATERAL (SELECT LOCALTIMESTAMP - make_interval(
+                             secs => COALESCE(frequencia_leitura, %s) * %s + %s) as limite) v
+                    WHERE ativo = TRUE
+                """, (self.intervalo_padrao, self.tolerancia, self.intervalo_gravacao))
+                return dict(cursor.fetchone())
+        except Exception as e:
+            print(f"❌ Erro ao consultar estado gravado dos dispositivos: {e}")
+            return {'online': 0, 'atrasados': 0, 'offline': 0, 'ultimo_contato': None}
+
+    def gravar(self) -> bool:
+        """Grava os dispositivos alterados e os alertas de transição numa transação"""
+        with self._lock:
+            alterados = sorted((d, datetime.fromtimestamp(self._ultimo_contato[d]), self._estado[d])
+                               for d in self._alterados if d in self._ultimo_contato)
+            transicoes = self._transicoes
+            self._alterados, self._transicoes = set(), []
+        if not alterados and not transicoes:
+            return True
+
+        try:
+            with self.db.transaction() as cursor:
+                if alterados:
+                    execute_values(cursor, """
+                        UPDATE dispositivos_iot d
+                        SET ultima_comunicacao = GREATEST(d.ultima_comunicacao, v.ultima), status_conexao = v.status
+                        FROM (VALUES %s) as v(device_id, ultima, status)
+                        WHERE d.device_id = v.device_id
+                    """, alterados, template="(%s, %s::timestamp, %s)", page_size=len(alterados))
+                if transicoes:
+                    execute_values(cursor, """
+                        INSERT INTO alertas_iot
+                        (device_id, tipo_alerta, severidade, titulo, descricao, valor_detectado, limite_configurado)
+                        VALUES %s
+                    """, [self._linha_alerta(*t) for t in transicoes], page_size=len(transicoes))
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao gravar heartbeat dos dispositivos: {e}")
+            with self._lock:
+                self._alterados.update(d for d, _, _ in alterados)
+                self._transicoes[:0] = transicoes
+            return False
+
+    @staticmethod
+    def _linha_alerta(device_id: str, estado: str, contato: float, limite: float) -> tuple:
+        ultimo = datetime.fromtimestamp(contato)
+        if estado == OFFLINE:
+            return (device_id, 'dispositivo_offline', 'alto', f"Dispositivo {device_id} offline",
+                    f"Sem comunicação desde {ultimo:%d/%m/%Y %H:%M:%S}", ultimo.isoformat(), f"{limite:.0f}s")
+        return (device_id, 'dispositivo_online', 'baixo', f"Dispositivo {device_id} online",
+                f"Comunicação retomada em {ultimo:%d/%m/%Y %H:%M:%S}", ultimo.isoformat(), f"{limite:.0f}s")
+
+    def fechar(self, timeout: float = 5.0) -> None:
+        """Encerra a thread gravando o que estiver pendente"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _executar(self) -> None:
+        if not self._carregado:
+            try:
+                self.carregar()
+            except Exception as e:
+                print(f"❌ Erro ao carregar frequência dos dispositivos: {e}")
+        proxima_gravacao = time.monotonic() + self.intervalo_gravacao
+        while not self._parar.wait(self.intervalo_verificacao):
+            self.verificar()
+            if time.monotonic() >= proxima_gravacao:
+                self.gravar()
+                proxima_gravacao = time.monotonic() + self.intervalo_gravacao
+        self.gravar()
+
+
+# Instância global
+monitor_heartbeat = MonitorHeartbeat(
+    db,
+    tolerancia=float(db.get_setting('IOT_HEARTBEAT_TOLERANCIA', 3)),
+    intervalo_gravacao=float(db.get_setting('IOT_HEARTBEAT_FLUSH_S', 30)),
+)
+atexit.register(monitor_heartbeat.fechar)
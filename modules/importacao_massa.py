@@ -0,0 +1,447 @@
+"""
+Sistema de Inventário Web - Importação em massa
+Lê JSON, CSV ou XLSX em lotes, valida cada lote de uma vez, resolve categoria,
+obra e responsável por mapas carregados no início e grava com COPY em uma
+tabela temporária seguida de um upsert por código
+
+Uso:
+    python -m modules.importacao_massa insumos.json insumos
+    python -m modules.importacao_massa planilha.xlsx equipamentos_manuais --erros erros.csv
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+import pandas as pd
+from database.connection import db
+from modules.cache_compartilhado import cache_compartilhado
+
+# Colunas aceitas por tabela e seu tipo; categoria, obra e responsável também
+# podem vir pelo nome/código nas colunas 'categoria', 'obra' e 'responsavel'.
+ESPECIFICACOES: dict[str, dict[str, Any]] = {
+    'insumos': {
+        'tipo_categoria': 'insumo',
+        'categoria_padrao': 'Outros',
+        'obrigatorias': ('codigo', 'descricao', 'unidade'),
+        'padroes': {'unidade': 'UND'},
+        'colunas': {
+            'codigo': 'texto', 'descricao': 'texto', 'categoria_id': 'inteiro', 'unidade': 'texto',
+            'quantidade_atual': 'numero', 'quantidade_minima': 'numero', 'preco_unitario': 'numero',
+            'fornecedor': 'texto', 'marca': 'texto', 'localizacao': 'texto', 'observacoes': 'texto',
+            'data_validade': 'data',
+        },
+        # Campos extraídos do JSON de observacoes das planilhas antigas
+        'observacoes': {'marca': ('MARCA',), 'data_validade': ('STATUS/VALIDADE',)},
+    },
+    'equipamentos_eletricos': {
+        'tipo_categoria': 'equipamento_eletrico',
+        'categoria_padrao': 'Ferramentas Elétricas',
+        'obrigatorias': ('codigo', 'nome'),
+        'padroes': {},
+        'colunas': {
+            'codigo': 'texto', 'nome': 'texto', 'categoria_id': 'inteiro', 'marca': 'texto',
+            'modelo': 'texto', 'numero_serie': 'texto', 'voltagem': 'texto', 'potencia': 'texto',
+            'status': 'texto', 'localizacao': 'texto', 'obra_atual_id': 'inteiro',
+            'responsavel_atual_id': 'inteiro', 'valor_compra': 'numero', 'data_compra': 'data',
+            'fornecedor': 'texto', 'observacoes': 'texto',
+        },
+        'observacoes': {'voltagem': ('VOLTAGEM',), 'potencia': ('POTENCIA',),
+                        'data_compra': ('DATA COMPRA',), 'fornecedor': ('LOJA',)},
+    },
+    'equipamentos_manuais': {
+        'tipo_categoria': 'equipamento_manual',
+        'categoria_padrao': 'Ferramentas Manuais',
+        'obrigatorias': ('codigo', 'descricao'),
+        'padroes': {},
+        'colunas': {
+            'codigo': 'texto', 'descricao': 'texto', 'tipo': 'texto', 'categoria_id': 'inteiro',
+            'quantitativo': 'inteiro', 'status': 'texto', 'estado': 'texto', 'marca': 'texto',
+            'localizacao': 'texto', 'obra_atual_id': 'inteiro', 'responsavel_atual_id': 'inteiro',
+            'valor': 'numero', 'data_compra': 'data', 'loja': 'texto', 'observacoes': 'texto',
+        },
+        'observacoes': {'data_compra': ('DATA DE COMPRA',), 'loja': ('LOJA',)},
+    },
+}
+
+FORMATOS = ('json', 'csv', 'xlsx')
+
+
+@dataclass
+class ResultadoImportacao:
+    """Totais da importação e erros por linha do arquivo"""
+    tabela: str
+    lidos: int = 0
+    inseridos: int = 0
+    atualizados: int = 0
+    erros: list[dict[str, Any]] = field(default_factory=list)
+    duracao_segundos: float = 0.0
+
+    def relatorio_erros_csv(self) -> str:
+        """Relatório de erros (linha, codigo, erro) em CSV"""
+        saida = io.StringIO()
+        escritor = csv.DictWriter(saida, fieldnames=['linha', 'codigo', 'erro'])
+        escritor.writeheader()
+        escritor.writerows(sorted(self.erros, key=lambda e: e['linha']))
+        return saida.getvalue()
+
+
+def _normalizar_cabecalho(nome: Any) -> str:
+    """'Descrição ' -> 'descricao', 'Valor Compra' -> 'valor_compra'"""
+    texto = unicodedata.normalize('NFKD', str(nome or '')).encode('ascii', 'ignore').decode()
+    return texto.strip().lower().replace(' ', '_')
+
+
+def _ler_json(arquivo: io.TextIOBase, tamanho_bloco: int = 1 << 16) -> Iterator[dict[str, Any]]:
+    """Percorre um array JSON de objetos sem carregar o arquivo inteiro"""
+    decodificador = json.JSONDecoder()
+    buffer = arquivo.read(tamanho_bloco).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("O JSON deve ser um array de objetos")
+    posicao = 1
+    fim_arquivo = False
+    while True:
+        while posicao < len(buffer) and buffer[posicao] in ' \t\r\n,':
+            posicao += 1
+        if posicao < len(buffer) and buffer[posicao] == ']':
+            return
+        try:
+            objeto, posicao = decodificador.raw_decode(buffer, posicao)
+        except json.JSONDecodeError:
+            if fim_arquivo:
+                raise
+            bloco = arquivo.read(tamanho_bloco)
+            fim_arquivo = not bloco
+            buffer = buffer[posicao:] + bloco
+            posicao = 0
+            continue
+        yield objeto
+
+
+def _abrir_texto(origem: Any) -> io.TextIOBase:
+    if isinstance(origem, (str, Path)):
+        return open(origem, 'r', encoding='utf-8-sig', newline='')
+    return io.TextIOWrapper(origem, encoding='utf-8-sig', newline='')
+
+
+def ler_registros(origem: Any, formato: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Registros do arquivo com o número da linha (CSV/XLSX) ou do item (JSON)"""
+    if formato == 'json':
+        with _abrir_texto(origem) as arquivo:
+            for numero, registro in enumerate(_ler_json(arquivo), start=1):
+                yield numero, registro
+    elif formato == 'csv':
+        with _abrir_texto(origem) as arquivo:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+            except csv.Error:
+                dialeto = csv.excel
+            leitor = csv.reader(arquivo, dialeto)
+            cabecalho = [_normalizar_cabecalho(c) for c in next(leitor, [])]
+            for numero, linha in enumerate(leitor, start=2):
+                if any(valor.strip() for valor in linha):
+                    yield numero, dict(zip(cabecalho, linha))
+    elif formato == 'xlsx':
+        from openpyxl import load_workbook
+        planilha = load_workbook(origem, read_only=True, data_only=True)
+        try:
+            linhas = planilha.active.iter_rows(values_only=True)
+            cabecalho = [_normalizar_cabecalho(c) for c in next(linhas, ())]
+            for numero, linha in enumerate(linhas, start=2):
+                if any(valor not in (None, '') for valor in linha):
+                    yield numero, dict(zip(cabecalho, linha))
+        finally:
+            planilha.close()
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+
+
+def em_lotes(registros: Iterable[Any], tamanho: int) -> Iterator[list[Any]]:
+    iterador = iter(registros)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+def _vazio(valor: Any) -> bool:
+    """None, NaN, texto em branco ou '-' (célula vazia nas planilhas)"""
+    return valor is None or (isinstance(valor, float) and pd.isna(valor)) or \
+        (isinstance(valor, str) and valor.strip() in ('', '-'))
+
+
+def _data_de_epoch_ms(valor: Any) -> date | None:
+    """Datas das planilhas antigas vêm como epoch em milissegundos"""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        try:
+            return datetime.fromtimestamp(valor / 1000).date()
+        except (ValueError, OverflowError, OSError):
+            return None
+    return None
+
+
+def _completar_de_observacoes(especificacao: dict[str, Any], registro: dict[str, Any]) -> None:
+    """Preenche colunas vazias com os campos do JSON guardado em observacoes"""
+    observacoes = registro.get('observacoes')
+    if not isinstance(observacoes, str) or not observacoes.lstrip().startswith('{'):
+        return
+    try:
+        dados = {str(k).strip().upper(): v for k, v in json.loads(observacoes).items()}
+    except (ValueError, AttributeError):
+        return
+    for coluna, chaves in especificacao['observacoes'].items():
+        if not _vazio(registro.get(coluna)):
+            continue
+        valor = next((dados[c] for c in chaves if not _vazio(dados.get(c))), None)
+        if especificacao['colunas'][coluna] == 'data':
+            # Texto livre (ex.: "OK") não é data: ignorado em vez de virar erro
+            valor = _data_de_epoch_ms(valor)
+        if valor is not None:
+            registro[coluna] = valor
+
+
+def _mapear(serie: pd.Series, funcao) -> pd.Series:
+    """Series.map sem a conversão de None em NaN (inteiros não viram float)"""
+    return pd.Series([funcao(v) for v in serie], index=serie.index, dtype=object)
+
+
+def _texto(valor: Any) -> str | None:
+    if _vazio(valor):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _numeros(serie: pd.Series) -> pd.Series:
+    """Converte a coluna de uma vez; aceita vírgula decimal"""
+    texto = serie.map(lambda v: str(v).strip().replace(',', '.') if isinstance(v, str) else v)
+    return pd.to_numeric(texto, errors='coerce')
+
+
+def _datas(serie: pd.Series) -> pd.Series:
+    def converter(valor: Any) -> Any:
+        if isinstance(valor, (datetime, date)):
+            return valor
+        epoch = _data_de_epoch_ms(valor)
+        return epoch if epoch is not None else valor
+    convertidos = serie.map(converter)
+    return pd.to_datetime(convertidos, errors='coerce', dayfirst=True, format='mixed')
+
+
+class ImportadorMassa:
+    """Pipeline de importação em massa para insumos e equipamentos"""
+
+    def __init__(self, database):
+        self.db = database
+
+    def _carregar_referencias(self, tabela: str) -> dict[str, dict[str, int]]:
+        """Mapas nome/código -> id para categorias, obras e responsáveis"""
+        tipo = ESPECIFICACOES[tabela]['tipo_categoria']
+        referencias: dict[str, dict[str, int]] = {'categoria': {}, 'obra': {}, 'responsavel': {}}
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT id, nome FROM categorias WHERE tipo = %s", (tipo,))
+            referencias['categoria'] = {row['nome'].strip().lower(): row['id'] for row in cursor.fetchall()}
+            if tabela != 'insumos':
+                for chave, fonte in (('obra', 'obras'), ('responsavel', 'responsaveis')):
+                    cursor.execute(f"SELECT id, codigo, nome FROM {fonte}")
+                    mapa = referencias[chave]
+                    for row in cursor.fetchall():
+                        mapa.setdefault(str(row['nome']).strip().lower(), row['id'])
+                        mapa[str(row['codigo']).strip().lower()] = row['id']
+        return referencias
+
+    def validar_lote(self, tabela: str, lote: list[tuple[int, dict[str, Any]]],
+                     referencias: dict[str, dict[str, int]],
+                     vistos: dict[str, int]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """Valida e converte o lote inteiro; devolve (registros válidos, erros por linha).
+
+        `vistos` acumula os códigos já aceitos no arquivo para rejeitar duplicados
+        entre lotes.
+        """
+        especificacao = ESPECIFICACOES[tabela]
+        colunas = especificacao['colunas']
+        registros = []
+        for _, registro in lote:
+            registro = {_normalizar_cabecalho(k) if k not in colunas else k: v for k, v in registro.items()}
+            _completar_de_observacoes(especificacao, registro)
+            registros.append(registro)
+        df = pd.DataFrame(registros, index=[numero for numero, _ in lote], dtype=object)
+        erros: dict[int, list[str]] = {}
+
+        def marcar(mascara: pd.Series, mensagem: str) -> None:
+            for numero in mascara[mascara].index:
+                erros.setdefault(numero, []).append(mensagem)
+
+        for coluna, padrao in especificacao['padroes'].items():
+            atual = df[coluna] if coluna in df else pd.Series(None, index=df.index, dtype=object)
+            df[coluna] = _mapear(atual, lambda v: padrao if _vazio(v) else v)
+
+        # Referências por nome/código
+        nomes_categoria = df['categoria'] if 'categoria' in df else pd.Series(None, index=df.index, dtype=object)
+        padrao_categoria = referencias['categoria'].get(especificacao['categoria_padrao'].lower())
+        por_nome = _mapear(nomes_categoria, lambda v: padrao_categoria if _vazio(v) else
+                           referencias['categoria'].get(str(v).strip().lower(), padrao_categoria))
+        if 'categoria_id' in df:
+            df['categoria_id'] = _mapear(pd.Series(zip(df['categoria_id'], por_nome), index=df.index),
+                                        lambda par: par[1] if _vazio(par[0]) else par[0])
+        else:
+            df['categoria_id'] = por_nome
+        for origem, destino in (('obra', 'obra_atual_id'), ('responsavel', 'responsavel_atual_id')):
+            if origem not in df or destino not in colunas:
+                continue
+            informado = ~_mapear(df[origem], _vazio).astype(bool)
+            ids = _mapear(df[origem], lambda v: None if _vazio(v) else referencias[origem].get(str(v).strip().lower()))
+            marcar(informado & ids.isna(), f"{origem} não encontrado(a)")
+            df[destino] = ids
+
+        presentes = [c for c in colunas if c in df]
+        for coluna in presentes:
+            tipo = colunas[coluna]
+            informado = ~_mapear(df[coluna], _vazio).astype(bool)
+            if tipo in ('numero', 'inteiro'):
+                convertidos = _numeros(df[coluna])
+                marcar(informado & convertidos.isna(), f"{coluna}: número inválido")
+                if tipo == 'inteiro':
+                    fracionario = convertidos.notna() & (convertidos % 1 != 0)
+                    marcar(fracionario, f"{coluna}: deve ser inteiro")
+                    convertidos = _mapear(convertidos, lambda v: None if pd.isna(v) else int(v))
+                else:
+                    marcar(convertidos < 0, f"{coluna}: não pode ser negativo")
+                    convertidos = _mapear(convertidos, lambda v: None if pd.isna(v) else repr(float(v)))
+                df[coluna] = convertidos
+            elif tipo == 'data':
+                convertidos = _datas(df[coluna])
+                marcar(informado & convertidos.isna(), f"{coluna}: data inválida")
+                df[coluna] = _mapear(convertidos, lambda v: None if pd.isna(v) else v.date().isoformat())
+            else:
+                df[coluna] = _mapear(df[coluna], _texto)
+
+        for coluna in especificacao['obrigatorias']:
+            faltando = df[coluna].isna() if coluna in df else pd.Series(True, index=df.index)
+            marcar(faltando, f"{coluna}: obrigatório")
+
+        validos = []
+        for numero, linha in zip(df.index, df[presentes].to_dict('records')):
+            codigo = linha.get('codigo')
+            if numero not in erros and codigo:
+                anterior = vistos.get(codigo)
+                if anterior is not None:
+                    erros.setdefault(numero, []).append(f"código duplicado no arquivo (linha {anterior})")
+                else:
+                    vistos[codigo] = numero
+            if numero not in erros:
+                validos.append({'linha': numero, **linha})
+
+        lista_erros = [{'linha': numero, 'codigo': df.at[numero, 'codigo'] if 'codigo' in df else None,
+                        'erro': '; '.join(mensagens)} for numero, mensagens in erros.items()]
+        return validos, lista_erros
+
+    def gravar_lote(self, tabela: str, registros: list[dict[str, Any]], usuario_id: int) -> tuple[int, int]:
+        """COPY para a tabela temporária e upsert por código; devolve (inseridos, atualizados)"""
+        colunas = [c for c in ESPECIFICACOES[tabela]['colunas'] if any(c in r for r in registros)]
+        lista = ', '.join(colunas)
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for registro in registros:
+            escritor.writerow([registro['linha']] + [registro.get(c) for c in colunas])
+        buffer.seek(0)
+
+        atualizacoes = ', '.join(f"{c} = EXCLUDED.{c}" for c in colunas if c != 'codigo')
+        with self.db.transaction() as cursor:
+            cursor.execute(f"""
+                CREATE TEMP TABLE importacao_{tabela} ON COMMIT DROP AS
+                SELECT 0::integer as linha, {lista} FROM {tabela} WITH NO DATA
+            """)
+            cursor.copy_expert(
+                f"COPY importacao_{tabela} (linha, {lista}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer
+            )
+            cursor.execute(f"""
+                WITH gravados AS (
+                    INSERT INTO {tabela} ({lista}, criado_por)
+                    SELECT {lista}, %s FROM importacao_{tabela} ORDER BY linha
+                    ON CONFLICT (codigo) DO UPDATE SET {atualizacoes}
+                    RETURNING (xmax = 0) as inserido
+                )
+                SELECT COUNT(*) FILTER (WHERE inserido) as inseridos,
+                       COUNT(*) FILTER (WHERE NOT inserido) as atualizados
+                FROM gravados
+            """, (usuario_id,))
+            totais = cursor.fetchone()
+        return totais['inseridos'], totais['atualizados']
+
+    def importar(self, origem: Any, tabela: str, formato: str | None = None,
+                 tamanho_lote: int = 5000, usuario_id: int = 1) -> ResultadoImportacao:
+        """Importa o arquivo (caminho ou arquivo binário aberto) para a tabela.
+
+        Cada lote é gravado em sua própria transação; um lote recusado pelo
+        banco vira erro nas suas linhas e a importação continua.
+        """
+        if tabela not in ESPECIFICACOES:
+            raise ValueError(f"Tabela não suportada: {tabela}")
+        formato = (formato or Path(getattr(origem, 'name', str(origem))).suffix.lstrip('.')).lower()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato não suportado: {formato}")
+
+        inicio = time.perf_counter()
+        resultado = ResultadoImportacao(tabela)
+        referencias = self._carregar_referencias(tabela)
+        vistos: dict[str, int] = {}
+        for lote in em_lotes(ler_registros(origem, formato), tamanho_lote):
+            resultado.lidos += len(lote)
+            validos, erros = self.validar_lote(tabela, lote, referencias, vistos)
+            resultado.erros.extend(erros)
+            if not validos:
+                continue
+            try:
+                inseridos, atualizados = self.gravar_lote(tabela, validos, usuario_id)
+                resultado.inseridos += inseridos
+                resultado.atualizados += atualizados
+            except Exception as e:
+                print(f"Erro ao gravar lote de {tabela}: {e}")
+                resultado.erros.extend({'linha': r['linha'], 'codigo': r.get('codigo'),
+                                        'erro': f"lote recusado pelo banco: {e}"} for r in validos)
+
+        if resultado.inseridos or resultado.atualizados:
+            cache_compartilhado.invalidar(tabela)
+        resultado.duracao_segundos = time.perf_counter() - inicio
+        return resultado
+
+
+# Instância global
+importador_massa = ImportadorMassa(db)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description='Importação em massa de insumos e equipamentos')
+    parser.add_argument('arquivo')
+    parser.add_argument('tabela', choices=sorted(ESPECIFICACOES))
+    parser.add_argument('--formato', choices=FORMATOS)
+    parser.add_argument('--lote', type=int, default=5000)
+    parser.add_argument('--erros', help='arquivo CSV para o relatório de erros')
+    args = parser.parse_args(argv)
+
+    resultado = importador_massa.importar(args.arquivo, args.tabela, args.formato, args.lote)
+    print(f"OK - {args.tabela}: {resultado.lidos} lidos, {resultado.inseridos} inseridos, "
+          f"{resultado.atualizados} atualizados, {len(resultado.erros)} com erro "
+          f"em {resultado.duracao_segundos:.1f}s")
+    if resultado.erros:
+        if args.erros:
+            Path(args.erros).write_text(resultado.relatorio_erros_csv(), encoding='utf-8')
+            print(f"Relatório de erros: {args.erros}")
+        else:
+            for erro in resultado.erros[:20]:
+                print(f"  linha {erro['linha']} ({erro['codigo']}): {erro['erro']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
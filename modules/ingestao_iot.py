@@ -0,0 +1,265 @@
+"""
+Sistema de Inventário Web - Ingestão em lote das leituras de sensores IoT
+Buffer limitado em memória com uma thread que grava as leituras em
+micro-lotes: COPY em dados_sensores, o último contato de cada dispositivo
+(no monitor de heartbeat ou num UPDATE por lote), a soma do lote nos
+agregados de sensores_rollup e a avaliação das regras do lote inteiro
+depois da gravação
+"""
+
+import atexit
+import csv
+import io
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable
+from psycopg2.extras import execute_values
+from database.connection import db
+from modules.heartbeat_iot import monitor_heartbeat
+from modules.rollups_sensores import SQL_GRAVAR_ROLLUPS, agregar_leituras
+
+# Colunas gravadas em dados_sensores, na ordem das linhas do COPY
+COLUNAS_DADOS_SENSORES = (
+    'device_id', 'timestamp_leitura', 'tipo_sensor', 'valor_numerico', 'valor_texto',
+    'valor_json', 'unidade_medida', 'qualidade_sinal', 'bateria_nivel',
+    'temperatura_dispositivo', 'localizacao_gps'
+)
+
+
+def linha_dados_sensor(device_id: str, dados: dict[str, Any], recebido_em: datetime) -> tuple:
+    """Valores de uma leitura na ordem de COLUNAS_DADOS_SENSORES"""
+    return (
+        device_id,
+        dados.get('timestamp', recebido_em),
+        dados.get('tipo_sensor'),
+        dados.get('valor_numerico'),
+        dados.get('valor_texto'),
+        json.dumps(dados.get('valor_json')) if dados.get('valor_json') else None,
+        dados.get('unidade'),
+        dados.get('qualidade_sinal', 100),
+        dados.get('bateria', 100),
+        dados.get('temperatura_dispositivo'),
+        json.dumps(dados.get('gps')) if dados.get('gps') else None,
+    )
+
+
+class IngestorSensores:
+    """Buffer limitado de leituras com gravação em micro-lotes em segundo plano.
+
+    Um lote é gravado quando atinge `tamanho_lote` leituras ou quando
+    `intervalo_ms` se passa desde a primeira pendente. Com o buffer cheio o
+    chamador (thread do MQTT) espera até `espera_buffer_cheio` segundos, o que
+    segura o consumo do broker, e depois descarta a leitura.
+    """
+
+    def __init__(self, database, tamanho_buffer: int = 20000, tamanho_lote: int = 2000,
+                 intervalo_ms: int = 500, espera_buffer_cheio: float = 0.05, heartbeat=None):
+        self.db = database
+        # Com o monitor de heartbeat o último contato fica em memória e ele
+        # grava ultima_comunicacao/status_conexao; sem, um UPDATE por lote
+        self.heartbeat = heartbeat
+        self.tamanho_buffer = tamanho_buffer
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo_ms / 1000
+        self.espera_buffer_cheio = espera_buffer_cheio
+        # Chamado com as leituras gravadas (device_id, dados) após cada lote
+        self.ao_gravar: Callable[[list[tuple[str, dict[str, Any]]]], None] | None = None
+        self._fila: queue.Queue = queue.Queue(maxsize=tamanho_buffer)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._contadores = {
+            'recebidas': 0, 'gravadas': 0, 'descartadas': 0, 'rejeitadas': 0,
+            'esperas_buffer_cheio': 0, 'lotes': 0, 'lotes_com_erro': 0,
+        }
+        self._ocupacao_maxima = 0
+        self._ultimo_lote: dict[str, Any] = {}
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._parar.clear()
+                self._thread = threading.Thread(target=self._executar, name='ingestor-sensores', daemon=True)
+                self._thread.start()
+
+    def _contar(self, chave: str, quantidade: int = 1) -> None:
+        with self._lock:
+            self._contadores[chave] += quantidade
+
+    def enfileirar(self, device_id: str, dados: dict[str, Any]) -> bool:
+        """Coloca uma leitura no buffer; False se foi rejeitada ou descartada"""
+        if not device_id or not dados.get('tipo_sensor'):
+            self._contar('rejeitadas')
+            return False
+        self._iniciar()
+        item = (device_id, dados, datetime.now())
+        try:
+            self._fila.put_nowait(item)
+        except queue.Full:
+            self._contar('esperas_buffer_cheio')
+            try:
+                self._fila.put(item, timeout=self.espera_buffer_cheio)
+            except queue.Full:
+                self._contar('descartadas')
+                return False
+        with self._lock:
+            self._contadores['recebidas'] += 1
+            self._ocupacao_maxima = max(self._ocupacao_maxima, self._fila.qsize())
+        return True
+
+    def cheio(self) -> bool:
+        """Buffer sem espaço: enfileirar vai esperar (e pode descartar)"""
+        return self._fila.full()
+
+    def metricas(self) -> dict[str, Any]:
+        """Contadores de entrada, gravação, espera e descarte e a ocupação do buffer"""
+        with self._lock:
+            return {
+                **self._contadores,
+                'pendentes': self._fila.qsize(),
+                'capacidade': self.tamanho_buffer,
+                'ocupacao_maxima': self._ocupacao_maxima,
+                'ultimo_lote': dict(self._ultimo_lote),
+            }
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Aguarda a gravação de tudo que foi enfileirado até agora"""
+        if self._thread is None or not self._thread.is_alive():
+            return self._fila.empty()
+        gravado = threading.Event()
+        try:
+            self._fila.put(gravado, timeout=timeout)
+        except queue.Full:
+            return False
+        return gravado.wait(timeout)
+
+    def fechar(self, timeout: float = 5.0) -> None:
+        """Grava os pendentes e encerra a thread (chamado no encerramento do processo)"""
+        self.flush(timeout)
+        self._parar.set()
+        if self._thread is not None:
+            try:
+                # Acorda a thread, que pode estar esperando o prazo de um lote
+                self._fila.put_nowait(threading.Event())
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+
+    def _executar(self) -> None:
+        lote: list[tuple[str, dict[str, Any], datetime]] = []
+        avisos: list[threading.Event] = []
+        prazo = None
+        while not (self._parar.is_set() and self._fila.empty() and not lote):
+            espera = self.intervalo if prazo is None else max(prazo - time.monotonic(), 0)
+            try:
+                item = self._fila.get(timeout=espera)
+                if isinstance(item, threading.Event):
+                    avisos.append(item)
+                else:
+                    lote.append(item)
+                    if prazo is None:
+                        prazo = time.monotonic() + self.intervalo
+            except queue.Empty:
+                pass
+
+            vencido = prazo is not None and time.monotonic() >= prazo
+            if avisos or len(lote) >= self.tamanho_lote or vencido:
+                if lote:
+                    self._processar_lote(lote)
+                lote, prazo = [], None
+                for aviso in avisos:
+                    aviso.set()
+                avisos = []
+
+    def _processar_lote(self, lote: list[tuple[str, dict[str, Any], datetime]]) -> None:
+        inicio = time.perf_counter()
+        gravadas = self._gravar_lote(lote)
+        with self._lock:
+            self._contadores['lotes'] += 1
+            self._ultimo_lote = {'leituras': len(lote), 'gravadas': len(gravadas),
+                                 'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+                                 'gravado_em': datetime.now()}
+        if gravadas and self.ao_gravar:
+            try:
+                self.ao_gravar(gravadas)
+            except Exception as e:
+                print(f"❌ Erro ao verificar regras do lote de sensores: {e}")
+
+    def _gravar_lote(self, lote: list[tuple[str, dict[str, Any], datetime]]) -> list[tuple[str, dict[str, Any]]]:
+        """COPY das leituras, o último contato por dispositivo (sem monitor) e os agregados, em uma transação"""
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        ultima_por_dispositivo: dict[str, datetime] = {}
+        for device_id, dados, recebido_em in lote:
+            escritor.writerow(linha_dados_sensor(device_id, dados, recebido_em))
+            ultima_por_dispositivo[device_id] = max(recebido_em, ultima_por_dispositivo.get(device_id, recebido_em))
+        buffer.seek(0)
+        # A leitura chegou: o dispositivo está vivo mesmo que a gravação falhe
+        if self.heartbeat is not None:
+            self.heartbeat.registrar_lote(ultima_por_dispositivo)
+
+        try:
+            with self.db.transaction() as cursor:
+                cursor.copy_expert(
+                    f"COPY dados_sensores ({', '.join(COLUNAS_DADOS_SENSORES)}) FROM STDIN WITH (FORMAT csv, NULL '')",
+                    buffer
+                )
+                if self.heartbeat is None:
+                    self._atualizar_dispositivos(cursor, ultima_por_dispositivo)
+                self._atualizar_rollups(cursor, lote)
+            self._contar('gravadas', len(lote))
+            return [(device_id, dados) for device_id, dados, _ in lote]
+        except Exception as e:
+            print(f"Erro ao gravar lote de sensores ({len(lote)} leituras): {e}")
+            self._contar('lotes_com_erro')
+            return self._gravar_individualmente(lote)
+
+    @staticmethod
+    def _atualizar_dispositivos(cursor, ultima_por_dispositivo: dict[str, datetime]) -> None:
+        execute_values(cursor, """
+            UPDATE dispositivos_iot d
+            SET ultima_comunicacao = GREATEST(d.ultima_comunicacao, v.ultima), status_conexao = 'online'
+            FROM (VALUES %s) as v(device_id, ultima)
+            WHERE d.device_id = v.device_id
+        """, sorted(ultima_por_dispositivo.items()), template="(%s, %s::timestamp)",
+            page_size=len(ultima_por_dispositivo))
+
+    @staticmethod
+    def _atualizar_rollups(cursor, lote: list[tuple[str, dict[str, Any], datetime]]) -> None:
+        linhas = agregar_leituras(lote)
+        if linhas:
+            execute_values(cursor, SQL_GRAVAR_ROLLUPS, linhas, page_size=len(linhas))
+
+    def _gravar_individualmente(self, lote: list[tuple[str, dict[str, Any], datetime]]) -> list[tuple[str, dict[str, Any]]]:
+        """Fallback: uma leitura inválida não derruba o lote inteiro"""
+        sql = (f"INSERT INTO dados_sensores ({', '.join(COLUNAS_DADOS_SENSORES)}) "
+               f"VALUES ({', '.join(['%s'] * len(COLUNAS_DADOS_SENSORES))})")
+        gravadas = []
+        for device_id, dados, recebido_em in lote:
+            try:
+                with self.db.transaction() as cursor:
+                    cursor.execute(sql, linha_dados_sensor(device_id, dados, recebido_em))
+                    if self.heartbeat is None:
+                        self._atualizar_dispositivos(cursor, {device_id: recebido_em})
+                    self._atualizar_rollups(cursor, [(device_id, dados, recebido_em)])
+                gravadas.append((device_id, dados))
+                self._contar('gravadas')
+            except Exception as e:
+                self._contar('descartadas')
+                print(f"Erro ao gravar leitura do sensor {device_id}: {e}")
+        return gravadas
+
+
+# Instância global
+ingestor_sensores = IngestorSensores(
+    db,
+    tamanho_buffer=int(db.get_setting('IOT_BUFFER_SIZE', 20000)),
+    tamanho_lote=int(db.get_setting('IOT_BATCH_SIZE', 2000)),
+    intervalo_ms=int(db.get_setting('IOT_FLUSH_MS', 500)),
+    espera_buffer_cheio=int(db.get_setting('IOT_BUFFER_WAIT_MS', 50)) / 1000,
+    heartbeat=monitor_heartbeat,
+)
+atexit.register(ingestor_sensores.fechar)
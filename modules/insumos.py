@@ -9,259 +9,296 @@ from datetime import datetime, date  # type: ignore
 import json  # type: ignore
 from database.connection import db
 from modules.auth import auth_manager
+from modules.busca_itens import condicao_busca
+from modules.cache_compartilhado import cache_compartilhado
 from typing import Any, List, Dict, Optional
 
 class InsumosManager:
     def __init__(self):
-        try:
-            self.db = db
-            # Garantir que a conexão esteja limpa
-            conn = self.db.get_connection()
-            if conn and hasattr(conn, 'rollback'):
-                conn.rollback()
-        except Exception as e:
-            st.error(f"Erro ao conectar com o banco: {e}")
-            raise
+        self.db = db
 
     def get_categorias(self, tipo: str = 'insumo') -> List[Dict[str, Any]]:
         """Busca categorias disponíveis"""
-        try:
-            # Garantir que a conexão esteja limpa
-            conn = self.db.get_connection()
-            if conn and hasattr(conn, 'rollback'):
-                conn.rollback()
-            
-            if not conn:
-                return []
-
-            cursor = conn.cursor()
-            cursor.execute("""
-            SELECT id, nome FROM categorias 
-            WHERE tipo = %s AND ativo = TRUE 
-            ORDER BY nome
-            """, (tipo,))
-            
-            # Como o PostgreSQL retorna RealDictRow (já é dicionário), 
-            # não precisamos fazer dict(zip())
-            rows = cursor.fetchall()
+        def consultar() -> List[Dict[str, Any]]:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                SELECT id, nome FROM categorias 
+                WHERE tipo = %s AND ativo = TRUE 
+                ORDER BY nome
+                """, (tipo,))
+                
+                # Como o PostgreSQL retorna RealDictRow (já é dicionário), 
+                # não precisamos fazer dict(zip())
+                rows = cursor.fetchall()
             return [dict(row) for row in rows] if rows else []
+
+        try:
+            return cache_compartilhado.obter_ou_calcular('insumos.categorias', tipo, ('categorias',), consultar)
         except Exception as e:
-            # Fazer rollback explícito para limpar o estado da transação
-            try:
-                conn = self.db.get_connection()
-                if conn and hasattr(conn, 'rollback'):
-                    conn.rollback()
-            except:
-                pass
             st.error(f"Erro ao buscar categorias: {e}")
             return []
     
     def create_insumo(self, dados: dict[str, Any], user_id: int) -> tuple[bool, str]:
         """Cria novo insumo"""
         try:
-            # Garantir que a conexão esteja limpa
-            conn = self.db.get_connection()
-            if conn and hasattr(conn, 'rollback'):
-                conn.rollback()
-                
-            if not conn:
-                return False, "Erro de conexão com o banco"
-                
-            cursor = conn.cursor()
-            # Verifica se código já existe
-            cursor.execute("SELECT id FROM insumos WHERE codigo = %s", (dados['codigo'],))
-            if cursor.fetchone():
-                return False, "Código já existe"
-            cursor.execute("""
-            INSERT INTO insumos (
-                codigo, descricao, categoria_id, unidade, quantidade_atual,
-                quantidade_minima, fornecedor, marca, 
-                localizacao, observacoes, data_validade, criado_por
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                dados['codigo'], dados['descricao'], dados['categoria_id'],
-                dados['unidade'], dados['quantidade_atual'], dados['quantidade_minima'],
-                dados['fornecedor'], dados['marca'],
-                dados['localizacao'], dados['observacoes'], dados['data_validade'], user_id
-            ))
-            cursor.execute("SELECT id FROM insumos WHERE codigo = %s", (dados['codigo'],))
-            result = cursor.fetchone()
-            insumo_id: Optional[int] = None
-            if result:
-                if isinstance(result, dict):
-                    insumo_id = result.get('id')
-                elif isinstance(result, (list, tuple)) and len(result) > 0:
-                    insumo_id = result[0]
-                
-            if conn:
-                conn.commit()
+            with self.db.transaction() as cursor:
+                # Verifica se código já existe
+                cursor.execute("SELECT id FROM insumos WHERE codigo = %s", (dados['codigo'],))
+                if cursor.fetchone():
+                    return False, "Código já existe"
+                cursor.execute("""
+                INSERT INTO insumos (
+                    codigo, descricao, categoria_id, unidade, quantidade_atual,
+                    quantidade_minima, fornecedor, marca, 
+                    localizacao, observacoes, data_validade, criado_por
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+                """, (
+                    dados['codigo'], dados['descricao'], dados['categoria_id'],
+                    dados['unidade'], dados['quantidade_atual'], dados['quantidade_minima'],
+                    dados['fornecedor'], dados['marca'],
+                    dados['localizacao'], dados['observacoes'], dados['data_validade'], user_id
+                ))
+                result = cursor.fetchone()
+                insumo_id: Optional[int] = None
+                if result:
+                    if isinstance(result, dict):
+                        insumo_id = result.get('id')
+                    elif isinstance(result, (list, tuple)) and len(result) > 0:
+                        insumo_id = result[0]
             # Log da ação
             if insumo_id:
                 auth_manager.log_action(
                     user_id, 'criar', 'insumos', insumo_id,
                     f"Insumo criado: {dados['codigo']} - {dados['descricao']}"
                 )
+            cache_compartilhado.invalidar('insumos')
             return True, "Insumo criado com sucesso"
         except Exception as e:
-            # Fazer rollback explícito para limpar o estado da transação
-            try:
-                conn = self.db.get_connection()
-                if conn and hasattr(conn, 'rollback'):
-                    conn.rollback()
-            except:
-                pass
             return False, f"Erro ao criar insumo: {str(e)}"
     
     def update_insumo(self, insumo_id: int, dados: dict[str, Any], user_id: int) -> tuple[bool, str]:
         """Atualiza insumo existente"""
         try:
-            # Garantir que a conexão esteja limpa
-            conn = self.db.get_connection()
-            if hasattr(conn, 'rollback'):
-                conn.rollback()
-                
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            # Busca dados atuais
-            cursor.execute("SELECT * FROM insumos WHERE id = %s", (insumo_id,))
-            result = cursor.fetchone()
-            if result:
-                if isinstance(result, dict):
-                    old_data = dict(result)
+            with self.db.transaction() as cursor:
+                # Busca dados atuais
+                cursor.execute("SELECT * FROM insumos WHERE id = %s", (insumo_id,))
+                result = cursor.fetchone()
+                if result:
+                    if isinstance(result, dict):
+                        old_data = dict(result)
+                    else:
+                        columns = [desc[0] for desc in cursor.description]
+                        old_data = dict(zip(columns, result))
                 else:
-                    columns = [desc[0] for desc in cursor.description]
-                    old_data = dict(zip(columns, result))
-            else:
-                return False, "Insumo não encontrado"
-            # Verifica se código já existe em outro insumo
-            cursor.execute("SELECT id FROM insumos WHERE codigo = %s AND id != %s", (dados['codigo'], insumo_id))
-            if cursor.fetchone():
-                return False, "Código já existe em outro insumo"
-            cursor.execute("""
-            UPDATE insumos SET 
-                codigo = %s, descricao = %s, categoria_id = %s, unidade = %s,
-                quantidade_atual = %s, quantidade_minima = %s,
-                fornecedor = %s, marca = %s, localizacao = %s, observacoes = %s,
-                data_validade = %s
-            WHERE id = %s
-            """, (
-                dados['codigo'], dados['descricao'], dados['categoria_id'],
-                dados['unidade'], dados['quantidade_atual'], dados['quantidade_minima'],
-                dados['fornecedor'], dados['marca'],
-                dados['localizacao'], dados['observacoes'], dados['data_validade'], insumo_id
-            ))
-            conn.commit()
+                    return False, "Insumo não encontrado"
+                # Verifica se código já existe em outro insumo
+                cursor.execute("SELECT id FROM insumos WHERE codigo = %s AND id != %s", (dados['codigo'], insumo_id))
+                if cursor.fetchone():
+                    return False, "Código já existe em outro insumo"
+                cursor.execute("""
+                UPDATE insumos SET 
+                    codigo = %s, descricao = %s, categoria_id = %s, unidade = %s,
+                    quantidade_atual = %s, quantidade_minima = %s,
+                    fornecedor = %s, marca = %s, localizacao = %s, observacoes = %s,
+                    data_validade = %s
+                WHERE id = %s
+                """, (
+                    dados['codigo'], dados['descricao'], dados['categoria_id'],
+                    dados['unidade'], dados['quantidade_atual'], dados['quantidade_minima'],
+                    dados['fornecedor'], dados['marca'],
+                    dados['localizacao'], dados['observacoes'], dados['data_validade'], insumo_id
+                ))
             # Log da ação
             auth_manager.log_action(
                 user_id, 'editar', 'insumos', insumo_id,
                 f"Insumo atualizado: {dados['codigo']} - {dados['descricao']}",
                 str(old_data), str(dados)
             )
+            cache_compartilhado.invalidar('insumos')
             return True, "Insumo atualizado com sucesso"
         except Exception as e:
-            # Fazer rollback explícito para limpar o estado da transação
-            conn = self.db.get_connection()
-            if hasattr(conn, 'rollback'):
-                conn.rollback()
             return False, f"Erro ao atualizar insumo: {str(e)}"
     
     def delete_insumo(self, insumo_id: int, user_id: int) -> tuple[bool, str]:
         """Remove insumo (soft delete)"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            # Busca dados do insumo
-            cursor.execute("SELECT * FROM insumos WHERE id = %s", (insumo_id,))
-            row = cursor.fetchone()
-            if not row:
-                return False, "Insumo não encontrado"
-                
-            if isinstance(row, dict):
-                insumo_data = dict(row)
-            else:
-                columns = [desc[0] for desc in cursor.description]
-                insumo_data = dict(zip(columns, row))
-            cursor.execute("UPDATE insumos SET ativo = FALSE WHERE id = %s", (insumo_id,))
-            conn.commit()
+            with self.db.transaction() as cursor:
+                # Busca dados do insumo
+                cursor.execute("SELECT * FROM insumos WHERE id = %s", (insumo_id,))
+                row = cursor.fetchone()
+                if not row:
+                    return False, "Insumo não encontrado"
+                    
+                if isinstance(row, dict):
+                    insumo_data = dict(row)
+                else:
+                    columns = [desc[0] for desc in cursor.description]
+                    insumo_data = dict(zip(columns, row))
+                cursor.execute("UPDATE insumos SET ativo = FALSE WHERE id = %s", (insumo_id,))
             # Log da ação
             auth_manager.log_action(
                 user_id, 'excluir', 'insumos', insumo_id,
                 f"Insumo removido: {insumo_data['codigo']} - {insumo_data['descricao']}"
             )
+            cache_compartilhado.invalidar('insumos')
             return True, f"Insumo {insumo_data['codigo']} removido com sucesso"
         except Exception as e:
             return False, f"Erro ao remover insumo: {str(e)}"
     
+    # Colunas exibidas/editadas na lista paginada de insumos
+    COLUNAS_LISTA = """
+        i.id, i.codigo, i.descricao, i.categoria_id, c.nome as categoria_nome,
+        i.unidade, i.quantidade_atual, i.quantidade_minima, i.fornecedor, i.marca,
+        i.localizacao, i.observacoes, i.data_validade
+    """
+
+    def _filtros_sql(self, filtros: dict[str, Any] | None) -> tuple[str, list[Any]]:
+        """Monta as condições WHERE (sobre o alias i) para os filtros da lista"""
+        where = "i.ativo = TRUE"
+        params: list[Any] = []
+        if filtros:
+            if filtros.get('categoria_id'):
+                where += " AND i.categoria_id = %s"
+                params.append(filtros['categoria_id'])
+            if filtros.get('estoque_baixo'):
+                where += " AND i.quantidade_atual <= i.quantidade_minima"
+            if filtros.get('busca'):
+                condicao, params_busca = condicao_busca('insumo', filtros['busca'], 'i')
+                where += f" AND {condicao}"
+                params.extend(params_busca)
+        return where, params
+
     def get_insumos(self, filtros: dict[str, Any] | None = None) -> list[dict[str, Any]]:
         """Busca insumos com filtros"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return []
-                
-            cursor = conn.cursor()
-            
-            query = """
+            where, params = self._filtros_sql(filtros)
+            query = f"""
                 SELECT i.*, c.nome as categoria_nome
                 FROM insumos i
                 LEFT JOIN categorias c ON i.categoria_id = c.id
-                WHERE i.ativo = TRUE
+                WHERE {where}
             """
-            params: list[Any] = []
-            
-            if filtros:
-                if filtros.get('categoria_id'):
-                    query += " AND i.categoria_id = %s"
-                    params.append(filtros['categoria_id'])
-                if filtros.get('estoque_baixo'):
-                    query += " AND i.quantidade_atual <= i.quantidade_minima"
-                if filtros.get('busca'):
-                    query += " AND (i.codigo ILIKE %s OR i.descricao ILIKE %s OR i.marca ILIKE %s)"
-                    busca = f"%{filtros['busca']}%"
-                    params.extend([busca, busca, busca])
                     
             query += " ORDER BY i.codigo"
-            cursor.execute(query, params)
-            
-            rows = cursor.fetchall()
-            if not rows:
-                return []
+            with self.db.cursor() as cursor:
+                cursor.execute(query, params)
                 
-            # Converter resultados de forma robusta
-            insumos = []
-            for row in rows:
-                if isinstance(row, dict):
-                    # Se já é um dict (RealDictRow), usar diretamente
-                    insumos.append(dict(row))
-                else:
-                    # Se é tuple, converter para dict usando description
-                    columns = [desc[0] for desc in cursor.description]
-                    insumo_dict = dict(zip(columns, row))
-                    insumos.append(insumo_dict)
+                rows = cursor.fetchall()
+                if not rows:
+                    return []
+                    
+                # Converter resultados de forma robusta
+                insumos = []
+                for row in rows:
+                    if isinstance(row, dict):
+                        # Se já é um dict (RealDictRow), usar diretamente
+                        insumos.append(dict(row))
+                    else:
+                        # Se é tuple, converter para dict usando description
+                        columns = [desc[0] for desc in cursor.description]
+                        insumo_dict = dict(zip(columns, row))
+                        insumos.append(insumo_dict)
                 
             return insumos
             
         except Exception as e:
             return []
+
+    def get_insumos_pagina(self, filtros: dict[str, Any] | None = None, limite: int = 30,
+                           apos_codigo: str | None = None, antes_codigo: str | None = None,
+                           ultima: bool = False) -> dict[str, Any]:
+        """Busca uma página de insumos por keyset em codigo.
+
+        Sem cursor retorna a primeira página; apos_codigo avança, antes_codigo
+        volta e ultima=True retorna a última página. Lê no máximo limite + 1 linhas.
+        """
+        vazio: dict[str, Any] = {'itens': [], 'tem_anterior': False, 'tem_proxima': False}
+        try:
+            where, params = self._filtros_sql(filtros)
+            para_tras = ultima or antes_codigo is not None
+            if antes_codigo is not None:
+                where += " AND i.codigo < %s"
+                params.append(antes_codigo)
+            elif apos_codigo is not None and not ultima:
+                where += " AND i.codigo > %s"
+                params.append(apos_codigo)
+            ordem = "DESC" if para_tras else "ASC"
+
+            with self.db.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {self.COLUNAS_LISTA}
+                    FROM insumos i
+                    LEFT JOIN categorias c ON i.categoria_id = c.id
+                    WHERE {where}
+                    ORDER BY i.codigo {ordem}
+                    LIMIT %s
+                """, params + [limite + 1])
+                rows = [dict(row) for row in cursor.fetchall()]
+
+            mais = len(rows) > limite
+            itens = rows[:limite]
+            if para_tras:
+                itens.reverse()
+                return {'itens': itens, 'tem_anterior': mais, 'tem_proxima': antes_codigo is not None}
+            return {'itens': itens, 'tem_anterior': apos_codigo is not None, 'tem_proxima': mais}
+        except Exception as e:
+            st.error(f"Erro ao buscar insumos: {e}")
+            return vazio
+
+    def get_insumos_resumo(self, filtros: dict[str, Any] | None = None) -> dict[str, int]:
+        """Contadores da lista filtrada (total, estoque baixo, sem estoque) em uma consulta"""
+        try:
+            where, params = self._filtros_sql(filtros)
+            with self.db.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT COUNT(*) as total,
+                           COUNT(*) FILTER (WHERE i.quantidade_atual <= i.quantidade_minima) as estoque_baixo,
+                           COUNT(*) FILTER (WHERE i.quantidade_atual = 0) as sem_estoque
+                    FROM insumos i
+                    WHERE {where}
+                """, params)
+                result = cursor.fetchone()
+            return {
+                'total': int(result['total'] or 0),
+                'estoque_baixo': int(result['estoque_baixo'] or 0),
+                'sem_estoque': int(result['sem_estoque'] or 0)
+            }
+        except Exception as e:
+            return {'total': 0, 'estoque_baixo': 0, 'sem_estoque': 0}
+
+    def get_proximo_codigo(self, prefixo: str = "INS-") -> str:
+        """Próximo código sequencial (ex.: INS-0042) calculado no banco"""
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT MAX(CAST(SUBSTRING(codigo FROM %s) AS INTEGER)) as ultimo
+                    FROM insumos
+                    WHERE codigo ~ %s
+                """, (len(prefixo) + 1, f"^{prefixo}[0-9]+$"))
+                result = cursor.fetchone()
+            ultimo = result['ultimo'] if result and result['ultimo'] is not None else 0
+            return f"{prefixo}{ultimo + 1:04d}"
+        except Exception as e:
+            return f"{prefixo}0001"
     
     def get_insumo_by_id(self, insumo_id: int) -> dict[str, Any] | None:
         """Busca insumo por ID"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-            SELECT i.*, c.nome as categoria_nome
-            FROM insumos i
-            LEFT JOIN categorias c ON i.categoria_id = c.id
-            WHERE i.id = %s
-            """, (insumo_id,))
-            result = cursor.fetchone()
-            if result:
-                if isinstance(result, dict):
-                    return dict(result)
-                else:
-                    columns = [desc[0] for desc in cursor.description]
-                    return dict(zip(columns, result))
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                SELECT i.*, c.nome as categoria_nome
+                FROM insumos i
+                LEFT JOIN categorias c ON i.categoria_id = c.id
+                WHERE i.id = %s
+                """, (insumo_id,))
+                result = cursor.fetchone()
+                if result:
+                    if isinstance(result, dict):
+                        return dict(result)
+                    else:
+                        columns = [desc[0] for desc in cursor.description]
+                        return dict(zip(columns, result))
             return None
         except Exception as e:
             st.error(f"Erro ao buscar insumo: {e}")
@@ -270,57 +307,53 @@ class InsumosManager:
     def ajustar_estoque(self, insumo_id: int, quantidade: float, tipo_movimento: str, motivo: str, user_id: int) -> tuple[bool, str]:
         """Ajusta estoque de insumo"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return False, "Erro de conexão com o banco"
-                
-            cursor = conn.cursor()
-            
-            # Busca insumo atual
-            cursor.execute("SELECT * FROM insumos WHERE id = %s", (insumo_id,))
-            row = cursor.fetchone()
-            if not row:
-                return False, "Insumo não encontrado"
-                
-            if isinstance(row, dict):
-                insumo = dict(row)
-            else:
-                columns = [desc[0] for desc in cursor.description]
-                insumo = dict(zip(columns, row))
-            quantidade_atual = float(insumo.get('quantidade_atual', 0))
-            
-            if tipo_movimento == 'entrada':
-                nova_quantidade = quantidade_atual + quantidade
-            else:  # saida
-                if quantidade_atual < quantidade:
-                    return False, "Quantidade insuficiente em estoque"
-                nova_quantidade = quantidade_atual - quantidade
+            with self.db.transaction() as cursor:
+                # Busca insumo atual, travando a linha até o commit do novo saldo
+                cursor.execute("SELECT * FROM insumos WHERE id = %s FOR UPDATE", (insumo_id,))
+                row = cursor.fetchone()
+                if not row:
+                    return False, "Insumo não encontrado"
+                    
+                if isinstance(row, dict):
+                    insumo = dict(row)
+                else:
+                    columns = [desc[0] for desc in cursor.description]
+                    insumo = dict(zip(columns, row))
+                quantidade_atual = float(insumo.get('quantidade_atual', 0))
                 
-            # Atualiza estoque
-            cursor.execute("""
-                UPDATE insumos SET 
-                    quantidade_atual = %s,
-                    data_ultima_entrada = CASE WHEN %s = 'entrada' THEN CURRENT_TIMESTAMP ELSE data_ultima_entrada END,
-                    data_ultima_saida = CASE WHEN %s = 'saida' THEN CURRENT_TIMESTAMP ELSE data_ultima_saida END
-                WHERE id = %s
-            """, (nova_quantidade, tipo_movimento, tipo_movimento, insumo_id))
-            
-            # Registra movimentação se a tabela existe
-            try:
+                if tipo_movimento == 'entrada':
+                    nova_quantidade = quantidade_atual + quantidade
+                else:  # saida
+                    if quantidade_atual < quantidade:
+                        return False, "Quantidade insuficiente em estoque"
+                    nova_quantidade = quantidade_atual - quantidade
+                    
+                # Atualiza estoque
                 cursor.execute("""
-                    INSERT INTO movimentacoes (
-                        tipo, tipo_item, item_id, codigo_item, descricao_item,
-                        quantidade, unidade, motivo, observacoes, usuario_id
-                    ) VALUES (%s, 'insumo', %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    tipo_movimento, insumo_id, insumo['codigo'], insumo['descricao'],
-                    quantidade, insumo.get('unidade', 'UN'), motivo, f"Ajuste de estoque: {motivo}", user_id
-                ))
-            except:
-                # Se movimentacoes não existe, continua sem registrar movimentação
-                pass
+                    UPDATE insumos SET 
+                        quantidade_atual = %s,
+                        data_ultima_entrada = CASE WHEN %s = 'entrada' THEN CURRENT_TIMESTAMP ELSE data_ultima_entrada END,
+                        data_ultima_saida = CASE WHEN %s = 'saida' THEN CURRENT_TIMESTAMP ELSE data_ultima_saida END
+                    WHERE id = %s
+                """, (nova_quantidade, tipo_movimento, tipo_movimento, insumo_id))
                 
-            conn.commit()
+                # Registra movimentação se a tabela existe
+                cursor.execute("SAVEPOINT registrar_movimentacao")
+                try:
+                    cursor.execute("""
+                        INSERT INTO movimentacoes (
+                            tipo, tipo_item, item_id, codigo_item, descricao_item,
+                            quantidade, unidade, motivo, observacoes, usuario_id
+                        ) VALUES (%s, 'insumo', %s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (
+                        tipo_movimento, insumo_id, insumo['codigo'], insumo['descricao'],
+                        quantidade, insumo.get('unidade', 'UN'), motivo, f"Ajuste de estoque: {motivo}", user_id
+                    ))
+                    cursor.execute("RELEASE SAVEPOINT registrar_movimentacao")
+                except Exception:
+                    # Se movimentacoes não existe, continua sem registrar movimentação
+                    cursor.execute("ROLLBACK TO SAVEPOINT registrar_movimentacao")
+            cache_compartilhado.invalidar('insumos', 'movimentacoes')
             
             # Log da ação
             try:
@@ -335,46 +368,40 @@ class InsumosManager:
             return True, f"Estoque ajustado: {nova_quantidade} {insumo.get('unidade', 'UN')}"
             
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return False, f"Erro ao ajustar estoque: {str(e)}"
     
     def get_dashboard_stats(self) -> dict[str, Any]:
         """Estatísticas para dashboard"""
         try:
-            cursor = self.db.get_connection().cursor()  # type: ignore
-            
-            # Total de insumos ativos
-            cursor.execute("SELECT COUNT(*) as count FROM insumos WHERE ativo = TRUE")
-            result = cursor.fetchone()
-            total = result[0] if result else 0
+            with self.db.cursor() as cursor:
+                # Total de insumos ativos
+                cursor.execute("SELECT COUNT(*) as count FROM insumos WHERE ativo = TRUE")
+                result = cursor.fetchone()
+                total = result[0] if result else 0
             
-            # Insumos com estoque baixo
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM insumos 
-                WHERE ativo = TRUE AND quantidade_atual <= quantidade_minima
-            """)
-            result = cursor.fetchone()
-            estoque_baixo = result[0] if result else 0
+                # Insumos com estoque baixo
+                cursor.execute("""
+                    SELECT COUNT(*) as count FROM insumos 
+                    WHERE ativo = TRUE AND quantidade_atual <= quantidade_minima
+                """)
+                result = cursor.fetchone()
+                estoque_baixo = result[0] if result else 0
             
-            # Valor total do estoque
-            cursor.execute("""
-                SELECT COALESCE(SUM(quantidade_atual * preco_unitario), 0) as total FROM insumos 
-                WHERE ativo = TRUE
-            """)
-            result = cursor.fetchone()
-            valor_total = float(result[0]) if result else 0.0
+                # Valor total do estoque
+                cursor.execute("""
+                    SELECT COALESCE(SUM(quantidade_atual * preco_unitario), 0) as total FROM insumos 
+                    WHERE ativo = TRUE
+                """)
+                result = cursor.fetchone()
+                valor_total = float(result[0]) if result else 0.0
             
-            # Tipos de insumos
-            cursor.execute("""
-                SELECT COUNT(DISTINCT tipo) as count FROM insumos 
-                WHERE ativo = TRUE
-            """)
-            result = cursor.fetchone()
-            tipos = result[0] if result else 0
+                # Tipos de insumos
+                cursor.execute("""
+                    SELECT COUNT(DISTINCT tipo) as count FROM insumos 
+                    WHERE ativo = TRUE
+                """)
+                result = cursor.fetchone()
+                tipos = result[0] if result else 0
             
             return {
                 'total': total,
@@ -410,34 +437,29 @@ class InsumosManager:
     def get_insumos_baixo_estoque(self) -> list[dict[str, Any]]:
         """Busca insumos com estoque abaixo do mínimo"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return []
-                
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT id, codigo, descricao, categoria_id, unidade, 
-                       quantidade_atual, quantidade_minima, fornecedor, 
-                       marca, localizacao, observacoes, data_validade
-                FROM insumos 
-                WHERE quantidade_atual <= quantidade_minima
-                ORDER BY descricao
-            """)
-            
-            rows = cursor.fetchall()
-            if not rows:
-                return []
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, codigo, descricao, categoria_id, unidade, 
+                           quantidade_atual, quantidade_minima, fornecedor, 
+                           marca, localizacao, observacoes, data_validade
+                    FROM insumos 
+                    WHERE quantidade_atual <= quantidade_minima
+                    ORDER BY descricao
+                """)
+            
+                rows = cursor.fetchall()
+                if not rows:
+                    return []
                 
-            # Converter resultados de forma robusta
-            insumos = []
-            for row in rows:
-                if isinstance(row, dict):
-                    insumos.append(dict(row))
-                else:
-                    columns = [desc[0] for desc in cursor.description]
-                    insumo_dict = dict(zip(columns, row))
-                    insumos.append(insumo_dict)
+                # Converter resultados de forma robusta
+                insumos = []
+                for row in rows:
+                    if isinstance(row, dict):
+                        insumos.append(dict(row))
+                    else:
+                        columns = [desc[0] for desc in cursor.description]
+                        insumo_dict = dict(zip(columns, row))
+                        insumos.append(insumo_dict)
             
             return insumos
             
@@ -447,38 +469,33 @@ class InsumosManager:
     def get_insumos_vencendo(self, dias: int = 30) -> list[dict[str, Any]]:
         """Busca insumos próximos ao vencimento"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return []
-                
-            cursor = conn.cursor()
-            
-            from datetime import timedelta, datetime
-            data_limite = datetime.now() + timedelta(days=dias)
-            
-            cursor.execute("""
-                SELECT id, codigo, descricao, categoria_id, quantidade_atual, data_validade,
-                       unidade, fornecedor, marca, localizacao
-                FROM insumos 
-                WHERE data_validade IS NOT NULL 
-                AND data_validade <= %s
-                AND quantidade_atual > 0
-                ORDER BY data_validade ASC
-            """, (data_limite,))
+            with self.db.cursor() as cursor:
+                from datetime import timedelta, datetime
+                data_limite = datetime.now() + timedelta(days=dias)
             
-            rows = cursor.fetchall()
-            if not rows:
-                return []
+                cursor.execute("""
+                    SELECT id, codigo, descricao, categoria_id, quantidade_atual, data_validade,
+                           unidade, fornecedor, marca, localizacao
+                    FROM insumos 
+                    WHERE data_validade IS NOT NULL 
+                    AND data_validade <= %s
+                    AND quantidade_atual > 0
+                    ORDER BY data_validade ASC
+                """, (data_limite,))
+            
+                rows = cursor.fetchall()
+                if not rows:
+                    return []
                 
-            # Converter resultados de forma robusta  
-            insumos = []
-            for row in rows:
-                if isinstance(row, dict):
-                    insumos.append(dict(row))
-                else:
-                    columns = [desc[0] for desc in cursor.description]
-                    insumo_dict = dict(zip(columns, row))
-                    insumos.append(insumo_dict)
+                # Converter resultados de forma robusta  
+                insumos = []
+                for row in rows:
+                    if isinstance(row, dict):
+                        insumos.append(dict(row))
+                    else:
+                        columns = [desc[0] for desc in cursor.description]
+                        insumo_dict = dict(zip(columns, row))
+                        insumos.append(insumo_dict)
             
             return insumos
             
@@ -535,37 +552,20 @@ def show_insumos_page():
     if busca:
         filtros['busca'] = busca
 
-    # Buscar insumos
-    insumos = manager.get_insumos(filtros)  # type: ignore
+    # Contadores da lista filtrada calculados no banco
+    resumo = manager.get_insumos_resumo(filtros)
+    insumos: list[dict[str, Any]] = []
 
-    if insumos:
+    if resumo['total'] > 0:
             # Estatísticas rápidas
             col_stat1, col_stat2, col_stat3 = st.columns(3)
-            total_itens = len(insumos)
-            estoque_baixo_count = sum(1 for i in insumos if i['quantidade_atual'] <= i['quantidade_minima'])
-            sem_estoque = sum(1 for i in insumos if i['quantidade_atual'] == 0)
+            total_itens = resumo['total']
+            estoque_baixo_count = resumo['estoque_baixo']
+            sem_estoque = resumo['sem_estoque']
             col_stat1.metric("Total de Itens", total_itens)
             col_stat2.metric("Estoque Baixo", estoque_baixo_count, delta_color="inverse")
             col_stat3.metric("Sem Estoque", sem_estoque, delta_color="inverse")
 
-            # Tabela de insumos
-            if isinstance(insumos, list) and len(insumos) > 0 and isinstance(insumos[0], dict):
-                df = pd.DataFrame(insumos)
-                df_display = df.copy()
-                df_display['Código'] = df['codigo']
-                df_display['Descrição'] = df['descricao']
-                df_display['Categoria'] = df.get('categoria_nome', 'N/A')
-                df_display['Atual'] = df['quantidade_atual'].astype(str) + ' ' + df['unidade']
-                df_display['Mínimo'] = df['quantidade_minima'].astype(str) + ' ' + df['unidade']
-            def get_status_estoque_completo(row: pd.Series) -> str:
-                if row['quantidade_atual'] == 0:
-                    return "🔴 Sem estoque"
-                elif row['quantidade_atual'] <= row['quantidade_minima']:
-                    return "🟡 Estoque baixo"
-                else:
-                    return "🟢 Normal"
-            df_display['Status'] = df.apply(get_status_estoque_completo, axis=1)  # type: ignore
-
             st.write("### Lista de Insumos")
             num_rows = st.selectbox(
                 "Linhas por página:",
@@ -574,7 +574,14 @@ def show_insumos_page():
             )
             
             # Exibir a tabela de insumos
-            total_pages = (len(insumos) - 1) // num_rows + 1
+            total_pages = (total_itens - 1) // num_rows + 1
+            
+            # Paginação por keyset em codigo: volta à primeira página quando filtros mudam
+            assinatura_lista = json.dumps([filtros, num_rows], sort_keys=True, default=str)
+            if st.session_state.get('insumos_lista_assinatura') != assinatura_lista:
+                st.session_state.insumos_lista_assinatura = assinatura_lista
+                st.session_state.insumos_cursor = {}
+                st.session_state.page = 1
             
             # Inicializar página no session_state se não existir
             if 'page' not in st.session_state:
@@ -588,9 +595,14 @@ def show_insumos_page():
                 
             page = st.session_state.page
             
-            start_idx = (page - 1) * num_rows
-            end_idx = start_idx + num_rows
-            insumos_paginado = insumos[start_idx:end_idx]  # Usar lista original
+            cursor_pagina: dict[str, Any] = st.session_state.get('insumos_cursor', {})
+            limite = num_rows
+            if cursor_pagina.get('ultima'):
+                # Última página com o mesmo corte da numeração (total % linhas)
+                limite = total_itens - (total_pages - 1) * num_rows
+            pagina = manager.get_insumos_pagina(filtros, limite=limite, **cursor_pagina)
+            insumos_paginado = pagina['itens']
+            insumos = insumos_paginado
             
             # Cabeçalho da tabela
             col_header1, col_header2, col_header3, col_header4, col_header5, col_header6, col_header7, col_header8, col_header9 = st.columns([0.8, 1.5, 2, 1.2, 1, 1, 0.8, 0.8, 0.8])
@@ -783,16 +795,18 @@ def show_insumos_page():
                     st.divider()
             
             # Navegação com botões
-            if total_pages > 1:
+            if total_pages > 1 and insumos_paginado:
                 col_nav1, col_nav2, col_nav3, col_nav4, col_nav5 = st.columns([1, 1, 2, 1, 1])
                 
                 with col_nav1:
-                    if st.button("⏮️ Primeira") and page > 1:
+                    if st.button("⏮️ Primeira") and pagina['tem_anterior']:
+                        st.session_state.insumos_cursor = {}
                         st.session_state.page = 1
                         st.rerun()
                 
                 with col_nav2:
-                    if st.button("⬅️ Anterior") and page > 1:
+                    if st.button("⬅️ Anterior") and pagina['tem_anterior']:
+                        st.session_state.insumos_cursor = {'antes_codigo': insumos_paginado[0]['codigo']}
                         st.session_state.page = page - 1
                         st.rerun()
                 
@@ -800,12 +814,14 @@ def show_insumos_page():
                     st.write(f"Página {page} de {total_pages}")
                 
                 with col_nav4:
-                    if st.button("➡️ Próxima") and page < total_pages:
+                    if st.button("➡️ Próxima") and pagina['tem_proxima']:
+                        st.session_state.insumos_cursor = {'apos_codigo': insumos_paginado[-1]['codigo']}
                         st.session_state.page = page + 1
                         st.rerun()
                 
                 with col_nav5:
-                    if st.button("⏭️ Última") and page < total_pages:
+                    if st.button("⏭️ Última") and pagina['tem_proxima']:
+                        st.session_state.insumos_cursor = {'ultima': True}
                         st.session_state.page = total_pages
                         st.rerun()
             
@@ -842,19 +858,7 @@ def show_insumos_page():
             st.subheader("➕ Cadastrar Novo Insumo")
             
             with st.form("form_novo_insumo", clear_on_submit=True):
-                insumos_existentes = manager.get_insumos()
-                ultimo_codigo = "INS-0001"
-                if insumos_existentes:
-                    codigos = [i['codigo'] for i in insumos_existentes if i['codigo'].startswith("INS-")]
-                    numeros = []
-                    for cod in codigos:
-                        try:
-                            numeros.append(int(cod.replace("INS-", "")))  # type: ignore
-                        except:
-                            pass
-                    if numeros:
-                        proximo_num: int = max(numeros) + 1  # type: ignore
-                        ultimo_codigo = f"INS-{proximo_num:04d}"
+                ultimo_codigo = manager.get_proximo_codigo("INS-")
                 col1, col2 = st.columns(2)
                 with col1:
                     codigo = st.text_input("* Código", value=ultimo_codigo, key="form_insumo_codigo")
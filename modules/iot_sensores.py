@@ -16,7 +16,13 @@ import threading
 import asyncio
 from typing import Dict, List, Any, Optional
 from database.connection import db
+from database.migrator import aplicar_migracoes
 from modules.logs_auditoria import log_acao
+from modules.heartbeat_iot import monitor_heartbeat
+from modules.ingestao_iot import ingestor_sensores
+from modules.regras_iot import compilar_condicao, motor_regras
+from modules.rollups_sensores import RESOLUCOES, consultar_serie
+from modules.simulador_iot import PERFIS_DISPOSITIVOS, simular_leitura
 import random
 import paho.mqtt.client as mqtt
 
@@ -27,142 +33,14 @@ class IoTManager:
         self.mqtt_client = None
         self.dispositivos_conectados = {}
         self.alertas_ativos = []
-        self.criar_tabelas_iot()
+        # Regras avaliadas pelo ingestor depois de gravar cada lote de leituras
+        ingestor_sensores.ao_gravar = self.verificar_regras_lote
         self.inicializar_mqtt()
     
     def criar_tabelas_iot(self):
-        """Cria estrutura de tabelas para IoT"""
+        """Aplica as migrações pendentes (schema em database/migrations/0013_iot.sql)"""
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            # Tabela de dispositivos IoT
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS dispositivos_iot (
-                id SERIAL PRIMARY KEY,
-                device_id VARCHAR(255) UNIQUE NOT NULL,
-                nome VARCHAR(255) NOT NULL,
-                tipo_dispositivo VARCHAR(100) NOT NULL, -- sensor_temp, sensor_umidade, beacon, rfid, etc
-                localizacao VARCHAR(255),
-                equipamento_associado_codigo VARCHAR(255),
-                configuracao_json JSONB,
-                status_conexao VARCHAR(50) DEFAULT 'offline',
-                ultima_comunicacao TIMESTAMP,
-                frequencia_leitura INTEGER DEFAULT 60, -- em segundos
-                limites_operacionais JSONB,
-                data_instalacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ativo BOOLEAN DEFAULT TRUE
-            )
-            """)
-            
-            # Tabela de dados de sensores
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS dados_sensores (
-                id SERIAL PRIMARY KEY,
-                device_id VARCHAR(255) NOT NULL,
-                timestamp_leitura TIMESTAMP NOT NULL,
-                tipo_sensor VARCHAR(100) NOT NULL,
-                valor_numerico DECIMAL(15,6),
-                valor_texto VARCHAR(255),
-                valor_json JSONB,
-                unidade_medida VARCHAR(50),
-                qualidade_sinal INTEGER, -- 0-100
-                bateria_nivel INTEGER,  -- 0-100
-                temperatura_dispositivo DECIMAL(8,2),
-                localizacao_gps JSONB,
-                processado BOOLEAN DEFAULT FALSE,
-                INDEX idx_device_timestamp (device_id, timestamp_leitura),
-                INDEX idx_timestamp (timestamp_leitura),
-                INDEX idx_processado (processado)
-            )
-            """)
-            
-            # Tabela de alertas IoT
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS alertas_iot (
-                id SERIAL PRIMARY KEY,
-                device_id VARCHAR(255) NOT NULL,
-                tipo_alerta VARCHAR(100) NOT NULL, -- temperatura_alta, bateria_baixa, dispositivo_offline
-                severidade VARCHAR(50) DEFAULT 'medio', -- baixo, medio, alto, critico
-                titulo VARCHAR(255) NOT NULL,
-                descricao TEXT,
-                valor_detectado VARCHAR(255),
-                limite_configurado VARCHAR(255),
-                timestamp_alerta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                timestamp_reconhecimento TIMESTAMP,
-                reconhecido_por INTEGER,
-                status_alerta VARCHAR(50) DEFAULT 'ativo', -- ativo, reconhecido, resolvido
-                acoes_tomadas TEXT,
-                equipamento_afetado VARCHAR(255)
-            )
-            """)
-            
-            # Tabela de regras de monitoramento
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS regras_monitoramento (
-                id SERIAL PRIMARY KEY,
-                nome_regra VARCHAR(255) NOT NULL,
-                device_id VARCHAR(255),
-                tipo_sensor VARCHAR(100),
-                condicao_sql TEXT NOT NULL, -- Ex: valor_numerico > 50
-                tipo_alerta VARCHAR(100) NOT NULL,
-                severidade VARCHAR(50) DEFAULT 'medio',
-                acao_automatica VARCHAR(255), -- email, sms, webhook, etc
-                ativo BOOLEAN DEFAULT TRUE,
-                parametros_acao JSONB,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                criado_por INTEGER
-            )
-            """)
-            
-            # Tabela de dashboards personalizados
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS dashboards_iot (
-                id SERIAL PRIMARY KEY,
-                nome_dashboard VARCHAR(255) NOT NULL,
-                usuario_id INTEGER NOT NULL,
-                configuracao_widgets JSONB NOT NULL,
-                layout_config JSONB,
-                dispositivos_inclusos TEXT[],
-                atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                compartilhado BOOLEAN DEFAULT FALSE
-            )
-            """)
-            
-            # Tabela de comandos remotos
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS comandos_remotos (
-                id SERIAL PRIMARY KEY,
-                device_id VARCHAR(255) NOT NULL,
-                comando VARCHAR(255) NOT NULL,
-                parametros JSONB,
-                enviado_por INTEGER NOT NULL,
-                timestamp_envio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                timestamp_execucao TIMESTAMP,
-                status_comando VARCHAR(50) DEFAULT 'pendente', -- pendente, executado, erro, timeout
-                resposta_dispositivo TEXT,
-                erro_execucao TEXT
-            )
-            """)
-            
-            # Tabela de manutenção preditiva IoT
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS manutencao_preditiva_iot (
-                id SERIAL PRIMARY KEY,
-                equipamento_codigo VARCHAR(255) NOT NULL,
-                device_id VARCHAR(255),
-                tipo_predicao VARCHAR(100) NOT NULL, -- falha_bateria, desgaste_sensor, etc
-                probabilidade_falha DECIMAL(5,2), -- 0-100%
-                tempo_estimado_falha INTEGER, -- em dias
-                indicadores_utilizados JSONB,
-                data_predicao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                acao_recomendada TEXT,
-                urgencia_manutencao VARCHAR(50), -- baixa, media, alta, critica
-                status_predicao VARCHAR(50) DEFAULT 'ativo' -- ativo, verificado, falso_positivo
-            )
-            """)
-            
-            conn.commit()
+            aplicar_migracoes(db)
             print("✅ Tabelas IoT criadas com sucesso")
             
         except Exception as e:
@@ -178,9 +56,8 @@ class IoTManager:
             self.mqtt_client.on_message = self.on_mqtt_message
             self.mqtt_client.on_disconnect = self.on_mqtt_disconnect
             
-            # Em ambiente de produção, conectar ao broker MQTT real
-            # self.mqtt_client.connect("broker.hivemq.com", 1883, 60)
-            # self.mqtt_client.loop_start()
+            # Em produção a ingestão roda no gateway, fora do Streamlit:
+            # python -m modules.gateway_iot --host <broker>
             
             print("✅ Cliente MQTT inicializado")
             
@@ -221,67 +98,26 @@ class IoTManager:
         """Callback de desconexão MQTT"""
         print(f"🔌 Desconectado do broker MQTT: {rc}")
     
-    def processar_dados_sensor(self, device_id: str, dados: Dict):
-        """Processa dados recebidos de sensores"""
-        try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            # Inserir dados do sensor
-            cursor.execute("""
-            INSERT INTO dados_sensores 
-            (device_id, timestamp_leitura, tipo_sensor, valor_numerico, valor_texto, 
-             valor_json, unidade_medida, qualidade_sinal, bateria_nivel, temperatura_dispositivo, localizacao_gps)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, [
-                device_id,
-                dados.get('timestamp', datetime.now()),
-                dados.get('tipo_sensor'),
-                dados.get('valor_numerico'),
-                dados.get('valor_texto'),
-                json.dumps(dados.get('valor_json')) if dados.get('valor_json') else None,
-                dados.get('unidade'),
-                dados.get('qualidade_sinal', 100),
-                dados.get('bateria', 100),
-                dados.get('temperatura_dispositivo'),
-                json.dumps(dados.get('gps')) if dados.get('gps') else None
-            ])
-            
-            # Atualizar última comunicação do dispositivo
-            cursor.execute("""
-            UPDATE dispositivos_iot 
-            SET ultima_comunicacao = %s, status_conexao = 'online'
-            WHERE device_id = %s
-            """, [datetime.now(), device_id])
-            
-            conn.commit()
-            
-            # Verificar regras de monitoramento
-            self.verificar_regras_monitoramento(device_id, dados)
-            
-        except Exception as e:
-            print(f"❌ Erro ao processar dados do sensor {device_id}: {e}")
+    def processar_dados_sensor(self, device_id: str, dados: Dict) -> bool:
+        """Coloca a leitura no buffer de ingestão (gravação e regras em lote)"""
+        aceita = ingestor_sensores.enfileirar(device_id, dados)
+        if not aceita:
+            print(f"❌ Leitura do sensor {device_id} não aceita pela ingestão")
+        return aceita
     
     def verificar_regras_monitoramento(self, device_id: str, dados: Dict):
         """Verifica regras de monitoramento e gera alertas se necessário"""
+        self.verificar_regras_lote([(device_id, dados)])
+    
+    def verificar_regras_lote(self, leituras: List[tuple]):
+        """Avalia as regras ativas contra um lote de leituras (device_id, dados).
+
+        As regras vêm compiladas do cache do motor de regras e cada uma é
+        avaliada de uma vez sobre as leituras a que se aplica.
+        """
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            # Buscar regras ativas para o dispositivo
-            cursor.execute("""
-            SELECT * FROM regras_monitoramento 
-            WHERE (device_id = %s OR device_id IS NULL) 
-            AND (tipo_sensor = %s OR tipo_sensor IS NULL)
-            AND ativo = TRUE
-            """, [device_id, dados.get('tipo_sensor')])
-            
-            regras = cursor.fetchall()
-            
-            for regra in regras:
-                # Avaliar condição da regra
-                if self.avaliar_condicao_regra(regra['condicao_sql'], dados):
-                    self.gerar_alerta_automatico(device_id, regra, dados)
+            for device_id, regra, dados in motor_regras.avaliar_lote(leituras):
+                self.gerar_alerta_automatico(device_id, regra, dados)
                     
         except Exception as e:
             print(f"❌ Erro ao verificar regras: {e}")
@@ -289,28 +125,9 @@ class IoTManager:
     def avaliar_condicao_regra(self, condicao_sql: str, dados: Dict) -> bool:
         """Avalia condição SQL da regra contra os dados recebidos"""
         try:
-            # Substituir variáveis na condição
-            valor_numerico = dados.get('valor_numerico', 0)
-            valor_texto = dados.get('valor_texto', '')
-            bateria = dados.get('bateria', 100)
-            qualidade_sinal = dados.get('qualidade_sinal', 100)
-            
-            # Evaluar condição de forma segura
-            condicao_formatada = condicao_sql.replace('valor_numerico', str(valor_numerico))
-            condicao_formatada = condicao_formatada.replace('bateria', str(bateria))
-            condicao_formatada = condicao_formatada.replace('qualidade_sinal', str(qualidade_sinal))
-            
-            # Lista de operadores permitidos (segurança)
-            operadores_permitidos = ['>', '<', '>=', '<=', '==', '!=', 'and', 'or']
+            return compilar_condicao(condicao_sql).avaliar(dados)
             
-            # Verificação básica de segurança
-            for char in ['import', 'exec', 'eval', '__']:
-                if char in condicao_formatada.lower():
-                    return False
-            
-            return eval(condicao_formatada)
-            
-        except Exception as e:
+        except ValueError as e:
             print(f"❌ Erro ao avaliar condição: {e}")
             return False
     
@@ -372,68 +189,7 @@ class IoTManager:
     
     def simular_dispositivos_iot(self) -> List[Dict]:
         """Simula dados de dispositivos IoT para demonstração"""
-        dispositivos_simulados = [
-            {
-                'device_id': 'TEMP_001',
-                'nome': 'Sensor Temperatura - Gerador Principal',
-                'tipo_dispositivo': 'sensor_temperatura',
-                'localizacao': 'Obra Centro - Gerador',
-                'valor_numerico': random.uniform(20.0, 85.0),
-                'unidade': '°C',
-                'bateria': random.randint(70, 100),
-                'qualidade_sinal': random.randint(80, 100)
-            },
-            {
-                'device_id': 'HUM_002', 
-                'nome': 'Sensor Umidade - Depósito Ferramentas',
-                'tipo_dispositivo': 'sensor_umidade',
-                'localizacao': 'Depósito Central',
-                'valor_numerico': random.uniform(30.0, 90.0),
-                'unidade': '%',
-                'bateria': random.randint(60, 100),
-                'qualidade_sinal': random.randint(75, 100)
-            },
-            {
-                'device_id': 'VIB_003',
-                'nome': 'Sensor Vibração - Compressor',
-                'tipo_dispositivo': 'sensor_vibracao',
-                'localizacao': 'Obra Norte - Área Técnica',
-                'valor_numerico': random.uniform(0.0, 15.0),
-                'unidade': 'm/s²',
-                'bateria': random.randint(80, 100),
-                'qualidade_sinal': random.randint(85, 100)
-            },
-            {
-                'device_id': 'RFID_004',
-                'nome': 'Leitor RFID - Entrada Principal',
-                'tipo_dispositivo': 'rfid_reader',
-                'localizacao': 'Portão Principal',
-                'valor_texto': f'TAG_{random.randint(1000, 9999)}',
-                'bateria': random.randint(85, 100),
-                'qualidade_sinal': random.randint(90, 100)
-            },
-            {
-                'device_id': 'GPS_005',
-                'nome': 'Rastreador GPS - Caminhão 01',
-                'tipo_dispositivo': 'gps_tracker',
-                'localizacao': 'Veículo Móvel',
-                'gps': {'lat': -23.5505 + random.uniform(-0.1, 0.1), 'lng': -46.6333 + random.uniform(-0.1, 0.1)},
-                'bateria': random.randint(50, 100),
-                'qualidade_sinal': random.randint(70, 100)
-            },
-            {
-                'device_id': 'ENERGY_006',
-                'nome': 'Medidor Energia - Painel Principal',
-                'tipo_dispositivo': 'medidor_energia',
-                'localizacao': 'Quadro Elétrico Principal',
-                'valor_numerico': random.uniform(100.0, 500.0),
-                'unidade': 'kWh',
-                'bateria': 100,  # Alimentado pela rede
-                'qualidade_sinal': random.randint(95, 100)
-            }
-        ]
-        
-        return dispositivos_simulados
+        return [simular_leitura(perfil) for perfil in PERFIS_DISPOSITIVOS]
     
     def show_iot_dashboard(self):
         """Exibe dashboard principal de IoT"""
@@ -464,6 +220,42 @@ class IoTManager:
         
         # Gráficos de monitoramento
         self.show_monitoring_charts(dispositivos_simulados)
+        
+        self.show_ingestion_metrics()
+    
+    def show_ingestion_metrics(self):
+        """Métricas do buffer de ingestão das leituras (neste processo) e a frota gravada no banco"""
+        metricas = ingestor_sensores.metricas()
+        with st.expander("📥 Ingestão de Leituras"):
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Recebidas", metricas['recebidas'])
+                st.metric("Gravadas", metricas['gravadas'])
+            with col2:
+                st.metric("Buffer", f"{metricas['pendentes']}/{metricas['capacidade']}")
+                st.metric("Ocupação Máxima", metricas['ocupacao_maxima'])
+            with col3:
+                st.metric("Esperas (buffer cheio)", metricas['esperas_buffer_cheio'])
+                st.metric("Descartadas", metricas['descartadas'])
+            with col4:
+                st.metric("Lotes", metricas['lotes'])
+                st.metric("Lotes com Erro", metricas['lotes_com_erro'])
+            
+            ultimo = metricas['ultimo_lote']
+            if ultimo:
+                st.caption(f"Último lote: {ultimo['leituras']} leituras em {ultimo['duracao_ms']} ms "
+                           f"({ultimo['gravado_em']:%H:%M:%S}) · Rejeitadas sem tipo_sensor: {metricas['rejeitadas']}")
+            if metricas['descartadas']:
+                st.warning("⚠️ Leituras descartadas por buffer cheio ou erro de gravação")
+            
+            # O monitor roda no processo do gateway: a frota vem do que ele grava no banco
+            frota = monitor_heartbeat.resumo_gravado()
+            contato = f"{frota['ultimo_contato']:%d/%m %H:%M:%S}" if frota['ultimo_contato'] else "nunca"
+            st.caption(f"Heartbeat: {frota['online']} online · {frota['offline']} offline · "
+                       f"último contato gravado {contato}")
+            if frota['atrasados']:
+                st.warning(f"⚠️ {frota['atrasados']} dispositivo(s) online sem contato gravado no prazo: "
+                           "verifique se o gateway IoT está rodando")
     
     def show_device_map(self, dispositivos: List[Dict]):
         """Exibe mapa com localização dos dispositivos"""
@@ -591,40 +383,53 @@ class IoTManager:
         st.subheader("📈 Histórico de Dados (24h)")
         self.show_historical_data()
     
-    def show_historical_data(self):
-        """Exibe gráfico de dados históricos simulados"""
-        # Gerar dados históricos simulados
-        time_points = pd.date_range(start=datetime.now() - timedelta(hours=24), end=datetime.now(), freq='H')
+    def show_historical_data(self, horas: int = 24):
+        """Exibe gráfico histórico a partir dos agregados (mín/méd/máx) dos sensores"""
+        fim = datetime.now()
+        inicio = fim - timedelta(hours=horas)
+        series = [('temperatura', 'Temperatura (°C)', 'red'),
+                  ('umidade', 'Umidade (%)', 'blue'),
+                  ('vibracao', 'Vibração (m/s²)', 'orange')]
         
-        temp_data = [25 + 10 * np.sin(i * 2 * np.pi / 24) + random.uniform(-2, 2) for i in range(len(time_points))]
-        hum_data = [60 + 15 * np.sin(i * 2 * np.pi / 24 + np.pi) + random.uniform(-5, 5) for i in range(len(time_points))]
-        vib_data = [5 + 3 * abs(np.sin(i * 2 * np.pi / 12)) + random.uniform(-1, 1) for i in range(len(time_points))]
+        try:
+            consultas = [consultar_serie(db, tipo, inicio, fim, max_pontos=300) for tipo, _, _ in series]
+        except Exception as e:
+            st.error(f"❌ Erro ao carregar histórico dos sensores: {e}")
+            return
+        
+        if all(dados.empty for _, dados in consultas):
+            st.info(f"Nenhuma leitura de sensor nas últimas {horas} horas")
+            return
         
         fig_historical = make_subplots(
-            rows=3, cols=1,
-            subplot_titles=('Temperatura (°C)', 'Umidade (%)', 'Vibração (m/s²)'),
+            rows=len(series), cols=1,
+            subplot_titles=[titulo for _, titulo, _ in series],
             vertical_spacing=0.08
         )
         
-        fig_historical.add_trace(
-            go.Scatter(x=time_points, y=temp_data, name='Temperatura', line=dict(color='red')),
-            row=1, col=1
-        )
-        
-        fig_historical.add_trace(
-            go.Scatter(x=time_points, y=hum_data, name='Umidade', line=dict(color='blue')),
-            row=2, col=1
-        )
-        
-        fig_historical.add_trace(
-            go.Scatter(x=time_points, y=vib_data, name='Vibração', line=dict(color='orange')),
-            row=3, col=1
-        )
+        for linha, ((tipo, titulo, cor), (_, dados)) in enumerate(zip(series, consultas), start=1):
+            if dados.empty:
+                continue
+            # Faixa mínimo-máximo do intervalo e a média por cima
+            fig_historical.add_trace(
+                go.Scatter(x=dados['inicio'], y=dados['maximo'], line=dict(width=0), hoverinfo='skip'),
+                row=linha, col=1
+            )
+            fig_historical.add_trace(
+                go.Scatter(x=dados['inicio'], y=dados['minimo'], line=dict(width=0), fill='tonexty',
+                           fillcolor='rgba(128, 128, 128, 0.2)', hoverinfo='skip'),
+                row=linha, col=1
+            )
+            fig_historical.add_trace(
+                go.Scatter(x=dados['inicio'], y=dados['media'], name=titulo, line=dict(color=cor)),
+                row=linha, col=1
+            )
         
+        resolucao = next(nome for nome, segundos in RESOLUCOES.items() if segundos == consultas[0][0])
         fig_historical.update_layout(
             height=600,
             showlegend=False,
-            title_text="Tendências dos Sensores nas Últimas 24 Horas"
+            title_text=f"Tendências dos Sensores nas Últimas {horas} Horas (intervalos de {resolucao})"
         )
         
         st.plotly_chart(fig_historical, use_container_width=True)
@@ -1060,8 +865,26 @@ class IoTManager:
                 
                 if submitted and nome_regra:
                     condicao_sql = tipo_condicao.replace("X", str(valor_limite))
-                    st.success(f"✅ Regra '{nome_regra}' criada com sucesso!")
-                    log_acao("iot", "rule_create", f"Regra {nome_regra} criada")
+                    try:
+                        compilar_condicao(condicao_sql)
+                        with db.transaction() as cursor:
+                            cursor.execute("""
+                            INSERT INTO regras_monitoramento
+                            (nome_regra, device_id, condicao_sql, tipo_alerta, severidade, acao_automatica)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                            """, [
+                                nome_regra,
+                                None if dispositivo_target == "Todos" else dispositivo_target,
+                                condicao_sql,
+                                nome_regra.lower().replace(' ', '_'),
+                                severidade,
+                                None if acao_auto == "Nenhuma" else acao_auto
+                            ])
+                        motor_regras.invalidar()
+                        st.success(f"✅ Regra '{nome_regra}' criada com sucesso!")
+                        log_acao("iot", "rule_create", f"Regra {nome_regra} criada")
+                    except Exception as e:
+                        st.error(f"❌ Erro ao criar regra: {e}")
 
 def show_iot_page():
     """Página principal do sistema IoT"""
@@ -3,32 +3,29 @@ import pandas as pd
 from datetime import datetime, date, timedelta  # type: ignore # noqa: F401
 from database.connection import db
 from modules.auth import auth_manager
+from modules.auditoria_assincrona import gravador_auditoria, nomes_usuarios
 from typing import Any
 
 def log_acao(modulo: str, acao: str, observacoes: str = "", usuario_id: int = None):
-    """Registra ação no log de auditoria"""
+    """Registra ação no log de auditoria (enfileirada e gravada em lote)"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        # Buscar nome do usuário se ID fornecido
         usuario_nome = "Sistema"
         if usuario_id:
-            try:
-                cursor.execute("SELECT nome FROM usuarios WHERE id = %s", [usuario_id])
-                result = cursor.fetchone()
-                if result:
-                    usuario_nome = result['nome']
-            except Exception:
-                pass
+            usuario_nome = nomes_usuarios.nome(usuario_id)
+        else:
+            # Sem ID explícito, usa o usuário logado na sessão atual
+            usuario = auth_manager.get_session_user()
+            if usuario:
+                usuario_id = usuario.get('id')
+                usuario_nome = usuario.get('nome') or usuario_nome
         
-        # Inserir log
-        cursor.execute("""
-        INSERT INTO logs_auditoria (modulo, acao, observacoes, usuario_nome, data_acao)
-        VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-        """, [modulo, acao, observacoes, usuario_nome])
+        # logs_auditoria exige usuario_id; ações sem usuário não são gravadas
+        if not usuario_id:
+            return
         
-        conn.commit()
+        gravador_auditoria.registrar('logs_auditoria', (
+            datetime.now(), usuario_id, usuario_nome, modulo, acao, observacoes
+        ))
     except Exception as e:
         # Silenciosamente falha para não interromper operações principais
         pass
@@ -67,10 +64,10 @@ class LogsAuditoriaManager:
                     query += " AND l.acao = %s"
                     params.append(filters['acao'])  # type: ignore
                 if filters.get('data_inicio'):  # type: ignore
-                    query += " AND l.data_acao::date >= %s"
+                    query += " AND l.data_acao >= %s::date"
                     params.append(filters['data_inicio'])  # type: ignore
                 if filters.get('data_fim'):  # type: ignore
-                    query += " AND l.data_acao::date <= %s"
+                    query += " AND l.data_acao < %s::date + INTERVAL '1 day'"
                     params.append(filters['data_fim'])  # type: ignore
             
             query += " ORDER BY l.data_acao DESC LIMIT 1000"
@@ -13,7 +13,9 @@ from plotly.subplots import make_subplots
 import json
 from typing import Dict, List, Any, Optional, Tuple
 from database.connection import db
+from database.migrator import aplicar_migracoes
 from modules.logs_auditoria import log_acao
+from modules.registro_modelos import RegistroModelos
 from sklearn.ensemble import RandomForestRegressor, IsolationForest
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
@@ -24,157 +26,102 @@ import pickle
 import warnings
 warnings.filterwarnings('ignore')
 
+# Modelos base: chave usada no gerenciador -> (tipo_modelo no registro, nome, algoritmo)
+MODELOS_BASE = {
+    'maintenance_prediction': ('predicao_manutencao', 'Predição de Manutenção', 'random_forest'),
+    'anomaly_detection': ('deteccao_anomalia', 'Detecção de Anomalias', 'isolation_forest'),
+    'inventory_optimization': ('otimizacao_estoque', 'Otimização de Estoque', 'random_forest'),
+}
+
+
+# Colunas de entrada e valor padrão de cada modelo, na ordem do treino
+FEATURES_MANUTENCAO = {
+    'horas_uso': 500,
+    'temperatura_media': 45,
+    'vibracao_media': 3.5,
+    'idade_equipamento': 2,
+    'manutencoes_anteriores': 3,
+}
+FEATURES_ANOMALIA = {
+    'temperatura': 45,
+    'vibracao': 3.5,
+    'pressao': 2.1,
+}
+
+
+def _matriz_features(dados, features: Dict[str, float]) -> np.ndarray:
+    """Matriz (linhas x features) a partir de DataFrame, lista de dicts ou array"""
+    if isinstance(dados, np.ndarray):
+        return np.atleast_2d(dados).astype(float)
+    df = dados if isinstance(dados, pd.DataFrame) else pd.DataFrame(list(dados))
+    return np.column_stack([
+        df[coluna].fillna(padrao).to_numpy(dtype=float) if coluna in df else np.full(len(df), float(padrao))
+        for coluna, padrao in features.items()
+    ]) if len(df) else np.empty((0, len(features)))
+
+
 class MachineLearningManager:
-    """Gerenciador avançado de Machine Learning"""
+    """Gerenciador avançado de Machine Learning.
+
+    Os modelos vêm do registro (modules/registro_modelos.py), carregados na
+    primeira predição. O treino não acontece mais ao abrir a página: é feito
+    offline com `python -m modules.registro_modelos treinar`.
+    """
     
-    def __init__(self):
-        self.models_trained = {}
-        self.scalers = {}
+    def __init__(self, registro: RegistroModelos | None = None):
+        self.registro = registro or RegistroModelos(db)
         self.label_encoders = {}
-        self.criar_tabelas_ml()
-        self.initialize_base_models()
+        # Modelos treinados neste objeto e ainda não publicados
+        self._treinados: Dict[str, Dict[str, Any]] = {}
+
+    def _modelo(self, chave: str) -> Optional[Dict[str, Any]]:
+        """Modelo treinado aqui ou a versão ativa no registro"""
+        if chave in self._treinados:
+            return self._treinados[chave]
+        try:
+            return self.registro.carregar(MODELOS_BASE[chave][0])
+        except Exception as e:
+            print(f"❌ Erro ao carregar modelo {chave}: {e}")
+            return None
+
+    @property
+    def models_trained(self) -> Dict[str, Any]:
+        return {chave: m['modelo'] for chave in MODELOS_BASE if (m := self._modelo(chave))}
+
+    @property
+    def scalers(self) -> Dict[str, Any]:
+        return {chave: m['scaler'] for chave in MODELOS_BASE if (m := self._modelo(chave))}
+
+    def _metricas(self, chave: str) -> Dict[str, Any]:
+        modelo = self._modelo(chave)
+        if not modelo:
+            # AttributeError mantém hasattr(self, 'maintenance_metrics') funcionando na interface
+            raise AttributeError(f"{chave}_metrics")
+        return modelo['metricas']
+
+    @property
+    def maintenance_metrics(self) -> Dict[str, Any]:
+        return self._metricas('maintenance_prediction')
+
+    @property
+    def anomaly_metrics(self) -> Dict[str, Any]:
+        return self._metricas('anomaly_detection')
+
+    @property
+    def inventory_metrics(self) -> Dict[str, Any]:
+        return self._metricas('inventory_optimization')
     
     def criar_tabelas_ml(self):
-        """Cria estrutura de tabelas para ML"""
+        """Aplica as migrações pendentes (schema em database/migrations/0012_machine_learning.sql)"""
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            # Tabela de modelos ML
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS modelos_ml (
-                id SERIAL PRIMARY KEY,
-                nome_modelo VARCHAR(255) NOT NULL,
-                tipo_modelo VARCHAR(100) NOT NULL, -- predicao_manutencao, otimizacao_estoque, deteccao_anomalia
-                algoritmo VARCHAR(100) NOT NULL, -- random_forest, linear_regression, isolation_forest
-                parametros_modelo JSONB,
-                metricas_performance JSONB,
-                dados_treino_sql TEXT,
-                modelo_serializado BYTEA,
-                data_treino TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                data_ultima_predicao TIMESTAMP,
-                ativo BOOLEAN DEFAULT TRUE,
-                versao_modelo INTEGER DEFAULT 1,
-                criado_por INTEGER,
-                acuracia DECIMAL(5,4),
-                f1_score DECIMAL(5,4)
-            )
-            """)
-            
-            # Tabela de predições geradas
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS predicoes_ml (
-                id SERIAL PRIMARY KEY,
-                modelo_id INTEGER REFERENCES modelos_ml(id),
-                equipamento_codigo VARCHAR(255),
-                tipo_predicao VARCHAR(100), -- manutencao_necessaria, falha_iminente, otimizacao_estoque
-                valor_predicao DECIMAL(10,4),
-                probabilidade_predicao DECIMAL(5,4),
-                data_predicao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                data_evento_previsto TIMESTAMP,
-                dados_entrada JSONB,
-                resultado_real VARCHAR(100), -- confirmado, falso_positivo, pendente
-                confianca_predicao DECIMAL(5,4),
-                observacoes TEXT
-            )
-            """)
-            
-            # Tabela de anomalias detectadas
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS anomalias_detectadas (
-                id SERIAL PRIMARY KEY,
-                modelo_id INTEGER REFERENCES modelos_ml(id),
-                equipamento_codigo VARCHAR(255),
-                tipo_anomalia VARCHAR(100),
-                score_anomalia DECIMAL(8,6), -- Score de anomalia (-1 a 1, onde valores negativos são anomalias)
-                severidade VARCHAR(50) DEFAULT 'media', -- baixa, media, alta, critica
-                dados_anomalos JSONB,
-                timestamp_deteccao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status_anomalia VARCHAR(50) DEFAULT 'detectada', -- detectada, investigada, resolvida, falso_positivo
-                acao_tomada TEXT,
-                investigado_por INTEGER,
-                data_resolucao TIMESTAMP
-            )
-            """)
-            
-            # Tabela de otimizações sugeridas
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS otimizacoes_sugeridas (
-                id SERIAL PRIMARY KEY,
-                modelo_id INTEGER REFERENCES modelos_ml(id),
-                tipo_otimizacao VARCHAR(100), -- estoque, manutencao, alocacao_recursos
-                equipamento_codigo VARCHAR(255),
-                sugestao_titulo VARCHAR(255) NOT NULL,
-                sugestao_descricao TEXT,
-                impacto_estimado JSONB, -- {"economia": 1500, "tempo_economizado": 24}
-                prioridade VARCHAR(50) DEFAULT 'media',
-                implementacao_sugerida TEXT,
-                data_sugestao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                implementada BOOLEAN DEFAULT FALSE,
-                data_implementacao TIMESTAMP,
-                resultado_real JSONB,
-                aprovada_por INTEGER
-            )
-            """)
-            
-            # Tabela de datasets para treinamento
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS datasets_ml (
-                id SERIAL PRIMARY KEY,
-                nome_dataset VARCHAR(255) NOT NULL,
-                descricao TEXT,
-                query_sql TEXT NOT NULL,
-                tipo_dataset VARCHAR(100), -- manutencao, movimentacao, estoque
-                features_colunas TEXT[], -- Array com nomes das colunas features
-                target_coluna VARCHAR(255), -- Nome da coluna target
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ultima_atualizacao TIMESTAMP,
-                total_registros INTEGER,
-                qualidade_dados DECIMAL(5,2), -- Score de 0-100
-                ativo BOOLEAN DEFAULT TRUE
-            )
-            """)
-            
-            # Tabela de features engineering
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS features_engenharia (
-                id SERIAL PRIMARY KEY,
-                nome_feature VARCHAR(255) NOT NULL,
-                formula_sql TEXT NOT NULL,
-                descricao TEXT,
-                tipo_feature VARCHAR(100), -- numerica, categorica, temporal
-                importancia_score DECIMAL(5,4),
-                dataset_origem VARCHAR(255),
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ativa BOOLEAN DEFAULT TRUE
-            )
-            """)
-            
-            # Tabela de experimentos ML
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS experimentos_ml (
-                id SERIAL PRIMARY KEY,
-                nome_experimento VARCHAR(255) NOT NULL,
-                objetivo TEXT,
-                dataset_id INTEGER REFERENCES datasets_ml(id),
-                algoritmos_testados JSONB,
-                resultados_experimento JSONB,
-                melhor_modelo JSONB,
-                data_experimento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                executado_por INTEGER,
-                tempo_execucao_segundos INTEGER,
-                status_experimento VARCHAR(50) DEFAULT 'concluido' -- executando, concluido, erro
-            )
-            """)
-            
-            conn.commit()
+            aplicar_migracoes(db)
             print("✅ Tabelas ML criadas com sucesso")
             
         except Exception as e:
             print(f"❌ Erro ao criar tabelas ML: {e}")
     
     def initialize_base_models(self):
-        """Inicializa modelos base e dados sintéticos para demonstração"""
+        """Treina os modelos base com dados sintéticos de demonstração (etapa offline)"""
         # Gerar dados sintéticos para demonstração
         self.generate_synthetic_data()
         
@@ -182,6 +129,24 @@ class MachineLearningManager:
         self.train_maintenance_prediction_model()
         self.train_anomaly_detection_model()
         self.train_inventory_optimization_model()
+
+    def publicar_modelos_base(self, promover: bool = False, criado_por: Optional[int] = None) -> Dict[str, int]:
+        """Treina os modelos base e registra uma nova versão de cada um.
+
+        Devolve tipo_modelo -> versão registrada. Sem `promover`, as versões
+        ficam disponíveis para `python -m modules.registro_modelos promover`.
+        """
+        self.initialize_base_models()
+        publicados = {}
+        for chave, treinado in self._treinados.items():
+            tipo_modelo, nome, algoritmo = MODELOS_BASE[chave]
+            publicados[tipo_modelo] = self.registro.registrar(
+                tipo_modelo, nome, algoritmo,
+                {'modelo': treinado['modelo'], 'scaler': treinado['scaler']},
+                treinado['metricas'], treinado['modelo'].get_params(),
+                criado_por=criado_por, promover=promover
+            )
+        return publicados
     
     def generate_synthetic_data(self):
         """Gera dados sintéticos para demonstração dos modelos ML"""
@@ -288,17 +253,13 @@ class MachineLearningManager:
             mse = mean_squared_error(y_test, y_pred)
             r2 = r2_score(y_test, y_pred)
             
-            # Salvar modelo
-            self.models_trained['maintenance_prediction'] = model
-            self.scalers['maintenance_prediction'] = scaler
-            
-            # Salvar métricas
-            self.maintenance_metrics = {
+            # Salvar modelo e métricas
+            self._treinados['maintenance_prediction'] = {'modelo': model, 'scaler': scaler, 'metricas': {
                 'mae': mae,
                 'mse': mse,
                 'r2': r2,
                 'feature_importance': dict(zip(X.columns, model.feature_importances_))
-            }
+            }}
             
             print(f"✅ Modelo de manutenção treinado - R²: {r2:.3f}, MAE: {mae:.2f} dias")
             
@@ -338,17 +299,13 @@ class MachineLearningManager:
             f1 = f1_score(y_all, predictions)
             accuracy = accuracy_score(y_all, predictions)
             
-            # Salvar modelo
-            self.models_trained['anomaly_detection'] = model
-            self.scalers['anomaly_detection'] = scaler
-            
-            # Salvar métricas
-            self.anomaly_metrics = {
+            # Salvar modelo e métricas
+            self._treinados['anomaly_detection'] = {'modelo': model, 'scaler': scaler, 'metricas': {
                 'precision': precision,
                 'recall': recall,
                 'f1_score': f1,
                 'accuracy': accuracy
-            }
+            }}
             
             print(f"✅ Modelo de anomalias treinado - F1: {f1:.3f}, Precisão: {precision:.3f}")
             
@@ -381,104 +338,115 @@ class MachineLearningManager:
             mse = mean_squared_error(y_test, y_pred)
             r2 = r2_score(y_test, y_pred)
             
-            # Salvar modelo
-            self.models_trained['inventory_optimization'] = model
-            self.scalers['inventory_optimization'] = scaler
-            
-            # Salvar métricas
-            self.inventory_metrics = {
+            # Salvar modelo e métricas
+            self._treinados['inventory_optimization'] = {'modelo': model, 'scaler': scaler, 'metricas': {
                 'mae': mae,
                 'mse': mse,
                 'r2': r2,
                 'feature_importance': dict(zip(X.columns, model.feature_importances_))
-            }
+            }}
             
             print(f"✅ Modelo de estoque treinado - R²: {r2:.3f}, MAE: {mae:.2f}")
             
         except Exception as e:
             print(f"❌ Erro ao treinar modelo de estoque: {e}")
     
+    def _modelo_ativo(self, chave: str) -> Tuple[Any, Any]:
+        modelo = self._modelo(chave)
+        if not modelo:
+            raise LookupError("nenhuma versão ativa no registro de modelos")
+        return modelo['modelo'], modelo['scaler']
+
+    def predict_maintenance_batch(self, equipamentos) -> pd.DataFrame:
+        """Prediz a manutenção de vários equipamentos em uma chamada ao modelo.
+
+        Aceita DataFrame, lista de dicts ou array com as colunas de
+        FEATURES_MANUTENCAO; colunas ausentes recebem os valores padrão.
+        Devolve 'dias_ate_manutencao' e 'probabilidade_falha' por linha.
+        """
+        model, scaler = self._modelo_ativo('maintenance_prediction')
+        features = _matriz_features(equipamentos, FEATURES_MANUTENCAO)
+        dias = model.predict(scaler.transform(features))
+        
+        # Probabilidade de falha inversamente proporcional aos dias
+        return pd.DataFrame({
+            'dias_ate_manutencao': dias,
+            'probabilidade_falha': np.clip((365 - dias) / 365, 0, 1)
+        })
+
     def predict_maintenance_needs(self, equipment_data: Dict) -> Tuple[float, float]:
         """Prediz necessidade de manutenção"""
         try:
-            model = self.models_trained['maintenance_prediction']
-            scaler = self.scalers['maintenance_prediction']
-            
-            # Preparar dados de entrada
-            features = np.array([[
-                equipment_data.get('horas_uso', 500),
-                equipment_data.get('temperatura_media', 45),
-                equipment_data.get('vibracao_media', 3.5),
-                equipment_data.get('idade_equipamento', 2),
-                equipment_data.get('manutencoes_anteriores', 3)
-            ]])
-            
-            # Normalizar e predizer
-            features_scaled = scaler.transform(features)
-            prediction = model.predict(features_scaled)[0]
-            
-            # Calcular probabilidade de falha (inversamente proporcional aos dias)
-            probability = max(0, min(1, (365 - prediction) / 365))
-            
-            return prediction, probability
+            resultado = self.predict_maintenance_batch([equipment_data]).iloc[0]
+            return resultado['dias_ate_manutencao'], resultado['probabilidade_falha']
             
         except Exception as e:
             print(f"❌ Erro na predição de manutenção: {e}")
             return 30.0, 0.5
     
+    def detect_anomalies_batch(self, leituras) -> pd.DataFrame:
+        """Avalia várias leituras de sensores em uma chamada ao modelo.
+
+        Aceita DataFrame, lista de dicts ou array com as colunas de
+        FEATURES_ANOMALIA. Devolve 'anomalia' (bool) e 'score' por linha.
+        """
+        model, scaler = self._modelo_ativo('anomaly_detection')
+        features_scaled = scaler.transform(_matriz_features(leituras, FEATURES_ANOMALIA))
+        scores = model.decision_function(features_scaled)
+        
+        # IsolationForest.predict é exatamente score < 0 (-1 para anomalia)
+        return pd.DataFrame({'anomalia': scores < 0, 'score': scores})
+
     def detect_anomalies(self, sensor_data: Dict) -> Tuple[bool, float]:
         """Detecta anomalias nos dados dos sensores"""
         try:
-            model = self.models_trained['anomaly_detection']
-            scaler = self.scalers['anomaly_detection']
-            
-            # Preparar dados de entrada
-            features = np.array([[
-                sensor_data.get('temperatura', 45),
-                sensor_data.get('vibracao', 3.5),
-                sensor_data.get('pressao', 2.1)
-            ]])
-            
-            # Normalizar
-            features_scaled = scaler.transform(features)
-            
-            # Predizer
-            anomaly_score = model.decision_function(features_scaled)[0]
-            is_anomaly = model.predict(features_scaled)[0] == -1
-            
-            return is_anomaly, anomaly_score
+            resultado = self.detect_anomalies_batch([sensor_data]).iloc[0]
+            return bool(resultado['anomalia']), resultado['score']
             
         except Exception as e:
             print(f"❌ Erro na detecção de anomalias: {e}")
             return False, 0.0
     
+    def predict_demand_batch(self, current_stock: float, days_ahead: int = 30) -> np.ndarray:
+        """Demanda diária prevista para o horizonte, com o estoque simulado.
+
+        O estoque de cada dia depende da demanda prevista dos dias anteriores.
+        Em vez de uma predição por dia, o horizonte inteiro é predito de uma
+        vez a partir da trajetória de estoque da rodada anterior, até ela não
+        mudar mais. A rodada k acerta ao menos os k primeiros dias, então o
+        resultado é o mesmo da simulação dia a dia, em poucas chamadas.
+        """
+        model, scaler = self._modelo_ativo('inventory_optimization')
+        
+        today = datetime.now()
+        datas = pd.date_range(today, periods=days_ahead, freq='D')
+        features = np.column_stack([
+            np.arange(days_ahead),  # dia relativo
+            datas.weekday,  # dia da semana
+            datas.month - 1,  # mês (0-11)
+            np.full(days_ahead, float(current_stock))
+        ]).astype(float)
+        
+        predictions = np.zeros(days_ahead)
+        for _ in range(days_ahead):
+            predictions = model.predict(scaler.transform(features))
+            # Estoque no início de cada dia: inicial menos a demanda dos dias
+            # anteriores, sem ficar negativo. Com demanda prevista negativa o
+            # estoque volta a subir a partir de onde zerou, como no
+            # max(0, estoque - demanda) dia a dia
+            livre = current_stock - np.concatenate(([0.0], np.cumsum(predictions)[:-1]))
+            estoque = livre - np.minimum.accumulate(np.minimum(livre, 0))
+            if np.array_equal(estoque, features[:, 3]):
+                break
+            features[:, 3] = estoque
+        return predictions
+
     def optimize_inventory(self, current_stock: int, days_ahead: int = 30) -> Dict:
         """Otimiza níveis de estoque"""
         try:
-            model = self.models_trained['inventory_optimization']
-            scaler = self.scalers['inventory_optimization']
-            
-            today = datetime.now()
-            predictions = []
+            predictions = self.predict_demand_batch(current_stock, days_ahead)
             
-            for day in range(days_ahead):
-                future_date = today + timedelta(days=day)
-                
-                features = np.array([[
-                    day,  # dia relativo
-                    future_date.weekday(),  # dia da semana
-                    future_date.month - 1,  # mês (0-11)
-                    current_stock
-                ]])
-                
-                features_scaled = scaler.transform(features)
-                predicted_demand = model.predict(features_scaled)[0]
-                predictions.append(predicted_demand)
-                
-                # Atualizar estoque simulado
-                current_stock = max(0, current_stock - predicted_demand)
-            
-            total_demand = sum(predictions)
+            total_demand = float(predictions.sum())
             avg_daily_demand = total_demand / days_ahead
             
             # Calcular estoque recomendado (com margem de segurança)
@@ -490,7 +458,7 @@ class MachineLearningManager:
                 'avg_daily_demand': avg_daily_demand,
                 'recommended_stock': recommended_stock,
                 'safety_stock': safety_stock,
-                'daily_predictions': predictions
+                'daily_predictions': predictions.tolist()
             }
             
         except Exception as e:
@@ -526,6 +494,9 @@ class MachineLearningManager:
         with col4:
             st.metric("⚡ Predições Hoje", "47", "+12")
         
+        if not self.models_trained:
+            st.warning("⚠️ Nenhum modelo ativo no registro. Treine com `python -m modules.registro_modelos treinar --promover`.")
+        
         # Gráficos principais
         col1, col2 = st.columns(2)
         
@@ -544,27 +515,28 @@ class MachineLearningManager:
         
         # Simular predições para diferentes equipamentos
         equipamentos = ['GER_001', 'COMP_002', 'BOMB_003', 'MOTOR_004', 'SERRA_005']
-        predictions = []
-        
-        for equip in equipamentos:
-            equipment_data = {
-                'horas_uso': np.random.normal(500, 100),
-                'temperatura_media': np.random.normal(45, 10),
-                'vibracao_media': np.random.normal(3.5, 1),
-                'idade_equipamento': np.random.exponential(2),
-                'manutencoes_anteriores': np.random.poisson(3)
-            }
-            
-            days, prob = self.predict_maintenance_needs(equipment_data)
-            
-            predictions.append({
-                'Equipamento': equip,
-                'Dias até Manutenção': days,
-                'Probabilidade de Falha': prob * 100,
-                'Urgência': 'Alta' if days < 15 else 'Média' if days < 30 else 'Baixa'
-            })
+        df_pred = pd.DataFrame({
+            'Equipamento': equipamentos,
+            'horas_uso': np.random.normal(500, 100, len(equipamentos)),
+            'temperatura_media': np.random.normal(45, 10, len(equipamentos)),
+            'vibracao_media': np.random.normal(3.5, 1, len(equipamentos)),
+            'idade_equipamento': np.random.exponential(2, len(equipamentos)),
+            'manutencoes_anteriores': np.random.poisson(3, len(equipamentos))
+        })
+        
+        try:
+            resultado = self.predict_maintenance_batch(df_pred)
+            days, prob = resultado['dias_ate_manutencao'].to_numpy(), resultado['probabilidade_falha'].to_numpy()
+        except Exception as e:
+            print(f"❌ Erro na predição de manutenção: {e}")
+            days, prob = np.full(len(df_pred), 30.0), np.full(len(df_pred), 0.5)
         
-        df_pred = pd.DataFrame(predictions)
+        df_pred = pd.DataFrame({
+            'Equipamento': equipamentos,
+            'Dias até Manutenção': days,
+            'Probabilidade de Falha': prob * 100,
+            'Urgência': np.select([days < 15, days < 30], ['Alta', 'Média'], default='Baixa')
+        })
         
         # Gráfico de barras
         fig = px.bar(
@@ -597,32 +569,32 @@ class MachineLearningManager:
             freq='H'
         )
         
-        anomalies_data = []
-        
-        for i, ts in enumerate(timestamps):
-            # Gerar dados de sensor simulados
-            temp = 45 + 5 * np.sin(i * 2 * np.pi / 24) + np.random.normal(0, 2)
-            vib = 3.5 + 0.5 * np.sin(i * 2 * np.pi / 12) + np.random.normal(0, 0.3)
-            pressure = 2.1 + 0.2 * np.sin(i * 2 * np.pi / 8) + np.random.normal(0, 0.1)
-            
-            # Inserir algumas anomalias
-            if i in [8, 15, 20]:  # Anomalias em horários específicos
-                temp += np.random.normal(30, 5)  # Pico de temperatura
-                vib += np.random.normal(3, 1)    # Vibração alta
-            
-            sensor_data = {'temperatura': temp, 'vibracao': vib, 'pressao': pressure}
-            is_anomaly, score = self.detect_anomalies(sensor_data)
-            
-            anomalies_data.append({
-                'Timestamp': ts,
-                'Temperatura': temp,
-                'Vibração': vib,
-                'Pressão': pressure,
-                'Anomalia': is_anomaly,
-                'Score': score
-            })
+        # Gerar dados de sensor simulados
+        i = np.arange(len(timestamps))
+        temp = 45 + 5 * np.sin(i * 2 * np.pi / 24) + np.random.normal(0, 2, len(i))
+        vib = 3.5 + 0.5 * np.sin(i * 2 * np.pi / 12) + np.random.normal(0, 0.3, len(i))
+        pressure = 2.1 + 0.2 * np.sin(i * 2 * np.pi / 8) + np.random.normal(0, 0.1, len(i))
         
-        df_anomalies = pd.DataFrame(anomalies_data)
+        # Inserir algumas anomalias em horários específicos
+        picos = np.isin(i, [8, 15, 20])
+        temp[picos] += np.random.normal(30, 5, picos.sum())  # Pico de temperatura
+        vib[picos] += np.random.normal(3, 1, picos.sum())    # Vibração alta
+        
+        df_anomalies = pd.DataFrame({
+            'Timestamp': timestamps,
+            'Temperatura': temp,
+            'Vibração': vib,
+            'Pressão': pressure
+        })
+        
+        try:
+            resultado = self.detect_anomalies_batch(np.column_stack([temp, vib, pressure]))
+            df_anomalies['Anomalia'] = resultado['anomalia'].to_numpy()
+            df_anomalies['Score'] = resultado['score'].to_numpy()
+        except Exception as e:
+            print(f"❌ Erro na detecção de anomalias: {e}")
+            df_anomalies['Anomalia'] = False
+            df_anomalies['Score'] = 0.0
         
         # Gráfico de séries temporais
         fig = make_subplots(
@@ -751,59 +723,44 @@ class MachineLearningManager:
             self.show_prediction_interface()
     
     def show_active_models(self):
-        """Lista modelos ativos"""
+        """Lista as versões do registro de modelos e permite trocar a ativa"""
         st.markdown("### 🤖 Modelos ML Ativos")
         
-        modelos_info = [
-            {
-                "Nome": "Predição de Manutenção",
-                "Algoritmo": "Random Forest",
-                "Acurácia": f"{self.maintenance_metrics['r2']:.3f}" if hasattr(self, 'maintenance_metrics') else "N/A",
-                "Última Atualização": "2024-01-15",
-                "Status": "Ativo",
-                "Predições Hoje": 23
-            },
-            {
-                "Nome": "Detecção de Anomalias",
-                "Algoritmo": "Isolation Forest",
-                "Acurácia": f"{self.anomaly_metrics['f1_score']:.3f}" if hasattr(self, 'anomaly_metrics') else "N/A",
-                "Última Atualização": "2024-01-14",
-                "Status": "Ativo", 
-                "Predições Hoje": 156
-            },
-            {
-                "Nome": "Otimização de Estoque",
-                "Algoritmo": "Random Forest",
-                "Acurácia": f"{self.inventory_metrics['r2']:.3f}" if hasattr(self, 'inventory_metrics') else "N/A",
-                "Última Atualização": "2024-01-13",
-                "Status": "Ativo",
-                "Predições Hoje": 8
-            }
-        ]
+        try:
+            versoes = self.registro.listar()
+        except Exception as e:
+            st.error(f"Erro ao carregar registro de modelos: {e}")
+            return
         
-        df_modelos = pd.DataFrame(modelos_info)
+        if not versoes:
+            st.info("Nenhum modelo registrado. Treine com `python -m modules.registro_modelos treinar --promover`.")
+            return
         
-        # Exibir tabela com formatação
-        for i, modelo in enumerate(modelos_info):
+        nomes = {tipo: nome for tipo, nome, _ in MODELOS_BASE.values()}
+        for modelo in versoes:
             with st.container():
                 col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+                metricas = modelo['metricas_performance'] or {}
+                acuracia = metricas.get('r2', metricas.get('f1_score'))
                 
                 with col1:
-                    st.markdown(f"**{modelo['Nome']}**")
-                    st.caption(f"Algoritmo: {modelo['Algoritmo']}")
+                    st.markdown(f"**{nomes.get(modelo['tipo_modelo'], modelo['nome_modelo'])}** v{modelo['versao_modelo']}")
+                    st.caption(f"Algoritmo: {modelo['algoritmo']} · Treinado em {modelo['data_treino']:%d/%m/%Y %H:%M}")
                 
                 with col2:
-                    st.metric("Acurácia", modelo['Acurácia'])
+                    st.metric("Acurácia", f"{acuracia:.3f}" if acuracia is not None else "N/A")
                 
                 with col3:
-                    st.metric("Predições Hoje", modelo['Predições Hoje'])
+                    ultima = modelo['data_ultima_predicao']
+                    st.metric("Última Predição", f"{ultima:%d/%m/%Y}" if ultima else "-")
                 
                 with col4:
-                    status_color = "🟢" if modelo['Status'] == "Ativo" else "🔴"
-                    st.markdown(f"{status_color} {modelo['Status']}")
-                    
-                    if st.button("⚙️", key=f"config_model_{i}", help="Configurar"):
-                        st.info(f"Configurando modelo {modelo['Nome']}")
+                    if modelo['ativo']:
+                        st.markdown("🟢 Ativo")
+                    elif st.button("⬆️", key=f"promover_modelo_{modelo['id']}", help="Tornar esta versão a ativa"):
+                        if self.registro.promover(modelo['tipo_modelo'], modelo['versao_modelo']):
+                            st.success(f"Versão {modelo['versao_modelo']} ativada")
+                            st.rerun()
                 
                 st.divider()
     
@@ -2,54 +2,19 @@ import datetime
 from typing import List, Dict, Any
 import streamlit as st
 from database.connection import db
+from database.migrator import aplicar_migracoes
 from modules.logs_auditoria import log_acao
+from modules.busca_itens import buscar_itens
 
 # Estrutura simples para manutenção preventiva
 class ManutencaoPreventivaManager:
     def __init__(self):
         self.manutencoes = []  # Em produção, usar banco de dados
-        self.criar_tabelas()
     
     def criar_tabelas(self):
-        """Cria tabelas necessárias para manutenção preventiva"""
+        """Aplica as migrações pendentes (schema em database/migrations/0004_manutencao_preventiva.sql)"""
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            # Tabela de planos de manutenção
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS planos_manutencao (
-                id SERIAL PRIMARY KEY,
-                nome VARCHAR(100) NOT NULL,
-                descricao TEXT,
-                periodicidade_dias INTEGER NOT NULL,
-                tipo_equipamento VARCHAR(20),
-                checklist JSONB,
-                ativo BOOLEAN DEFAULT TRUE,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            
-            # Tabela de manutenções programadas (simplificada)
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS manutencoes_programadas (
-                id SERIAL PRIMARY KEY,
-                equipamento_id INTEGER NOT NULL,
-                data_agendada DATE NOT NULL,
-                descricao TEXT,
-                realizada BOOLEAN DEFAULT FALSE,
-                data_realizacao DATE,
-                observacoes TEXT,
-                responsavel VARCHAR(100),
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            
-            # Índices para performance
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_manutencoes_equipamento ON manutencoes_programadas(equipamento_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_manutencoes_data ON manutencoes_programadas(data_agendada)")
-            
-            conn.commit()
+            aplicar_migracoes(db)
         except Exception as e:
             st.warning(f"Erro ao criar tabelas de manutenção: {e}")
 
@@ -77,6 +42,16 @@ class ManutencaoPreventivaManager:
     
     def get_equipamentos_manutencao(self, busca: str = "") -> List[Dict[str, Any]]:
         """Busca equipamentos disponíveis para manutenção"""
+        if busca and busca.strip():
+            # Busca unificada (trigram, sem acentos), ordenada por relevância
+            equipamentos = []
+            for item in buscar_itens(busca, tipos=['equipamento_eletrico', 'equipamento_manual']):
+                equipamento = {chave: item[chave] for chave in ('id', 'codigo', 'nome', 'marca', 'modelo', 'status', 'tabela')}
+                equipamento['tipo'] = 'Elétrico' if item['tipo_item'] == 'equipamento_eletrico' else 'Manual'
+                equipamento['display_name'] = f"{equipamento['nome']} (ID: {equipamento['id']}) - {equipamento['tipo']}"
+                equipamentos.append(equipamento)
+            return equipamentos
+
         try:
             conn = db.get_connection()
             cursor = conn.cursor()
@@ -100,13 +75,6 @@ class ManutencaoPreventivaManager:
             params_eletricos = []
             params_manuais = []
             
-            if busca:
-                busca_param = f"%{busca}%"
-                query_eletricos += " AND (nome ILIKE %s OR codigo ILIKE %s OR marca ILIKE %s)"
-                query_manuais += " AND (descricao ILIKE %s OR codigo ILIKE %s OR marca ILIKE %s)"
-                params_eletricos = [busca_param, busca_param, busca_param]
-                params_manuais = [busca_param, busca_param, busca_param]
-            
             # Executar queries
             cursor.execute(query_eletricos, params_eletricos)
             equipamentos_eletricos = cursor.fetchall()
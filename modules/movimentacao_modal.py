@@ -7,8 +7,9 @@ def verificar_disponibilidade_insumo(item_id: int, quantidade_solicitada: int) -
     
     try:
         insumos_manager = InsumosManager()
-        insumos = insumos_manager.get_insumos()
-        item = next((i for i in insumos if i['id'] == item_id), None)
+        item = insumos_manager.get_insumo_by_id(item_id)
+        if item and not item.get('ativo', True):
+            item = None
         
         if not item:
             return False, "❌ Item não encontrado."
@@ -68,8 +69,9 @@ def show_movimentacao_entrada_insumo(item_id: int) -> None:
     
     insumos_manager = InsumosManager()
     responsaveis_manager = ResponsaveisManager()
-    insumos = insumos_manager.get_insumos()
-    item: dict[str, Any] | None = next((i for i in insumos if i['id'] == item_id), None)
+    item: dict[str, Any] | None = insumos_manager.get_insumo_by_id(item_id)
+    if item and not item.get('ativo', True):
+        item = None
     user_data = st.session_state.user_data if 'user_data' in st.session_state else None
     
     if not item:
@@ -150,8 +152,9 @@ def show_movimentacao_saida_insumo(item_id: int) -> None:
     insumos_manager = InsumosManager()
     responsaveis_manager = ResponsaveisManager()
     obras_manager = ObrasManager()
-    insumos = insumos_manager.get_insumos()
-    item: dict[str, Any] | None = next((i for i in insumos if i['id'] == item_id), None)
+    item: dict[str, Any] | None = insumos_manager.get_insumo_by_id(item_id)
+    if item and not item.get('ativo', True):
+        item = None
     user_data = st.session_state.user_data if 'user_data' in st.session_state else None
     
     if not item:
@@ -4,7 +4,10 @@ import pandas as pd
 from datetime import datetime
 from database.connection import db
 from modules.auth import auth_manager
+from modules.busca_itens import FONTES_BUSCA, buscar_itens, condicao_busca
+from modules.cache_compartilhado import cache_compartilhado, TAGS_POR_TIPO_ITEM
 from typing import Any
+from psycopg2.extras import execute_values
 # Imports dos modais
 from modules.movimentacao_modal import (
     show_movimentacao_modal_insumo,  # type: ignore
@@ -14,6 +17,32 @@ from modules.movimentacao_modal import (
 from modules.auditoria_avancada import AuditoriaAvancada, auditar_acao
 
 
+class EstoqueInsuficiente(Exception):
+    """Saída maior que o saldo do insumo no momento do lançamento"""
+
+    def __init__(self, item_id: int, quantidade: Any, disponivel: Any):
+        super().__init__(f"Quantidade insuficiente para o insumo {item_id}: "
+                         f"solicitado {quantidade}, disponível {disponivel}")
+        self.item_id = item_id
+        self.quantidade = quantidade
+        self.disponivel = disponivel
+
+
+# Tipos aceitos pelo lote: sinal do lançamento no saldo dos insumos e status
+# que os equipamentos assumem
+TIPOS_MOVIMENTACAO_LOTE: dict[str, dict[str, Any]] = {
+    'Saída': {'sinal_estoque': -1, 'status_equipamento': 'Em uso'},
+    'Entrada': {'sinal_estoque': 1, 'status_equipamento': 'Disponível'},
+    # Obra para obra: o material já saiu do almoxarifado, o saldo não muda
+    'Transferência': {'sinal_estoque': 0, 'status_equipamento': 'Em uso'},
+}
+
+# Valores de movimentacoes.tipo_item aceitos pelo lote
+TIPOS_ITEM_LOTE = ('insumo', 'equipamento_eletrico', 'equipamento_manual')
+
+STATUS_BLOQUEADOS = ('Manutenção', 'Inativo', 'Danificado')
+
+
 # Classe MovimentacoesManager
 class MovimentacoesManager:
     def __init__(self):
@@ -23,110 +52,87 @@ class MovimentacoesManager:
     def create_movimentacao(self, data: dict[str, Any], usuario_id: int) -> int | None:
         """Cria uma nova movimentação"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return None
+            with self.db.transaction() as cursor:
+                # Saldo do insumo lançado antes do INSERT: a verificação e a
+                # baixa são um único UPDATE condicional, que trava a linha até
+                # o commit; saídas concorrentes esperam e reavaliam o saldo
+                if data.get('tipo_item') == 'insumo':
+                    self._lancar_estoque_insumo(cursor, data['item_id'], data['quantidade'], data['tipo'])
+                        
+                # Inserção da movimentação
+                # Determinar tipo_movimentacao baseado no tipo
+                tipo_movimentacao = 'entrada' if data['tipo'].lower() in ['entrada'] else 'saida'
                 
-            # Garantir que a conexão esteja limpa
-            if hasattr(conn, 'rollback'):
-                conn.rollback()
-            
-            cursor = conn.cursor()
+                # Determinar colunas específicas baseado no tipo do item
+                insumo_id = None
+                equipamento_eletrico_id = None
+                equipamento_manual_id = None
                 
-            # Verifica se há quantidade suficiente para saída (apenas para insumos)
-            if data['tipo'] == 'Saída' and data.get('tipo_item') == 'insumo':
-                cursor.execute("""
-                    SELECT quantidade_atual FROM insumos WHERE id = %s AND ativo = TRUE
-                """, (data['item_id'],))
+                if data.get('tipo_item') == 'insumo':
+                    insumo_id = data['item_id']
+                elif data.get('tipo_item') == 'equipamento_eletrico':
+                    equipamento_eletrico_id = data['item_id']
+                elif data.get('tipo_item') == 'equipamento_manual':
+                    equipamento_manual_id = data['item_id']
+                
+                # Inserção correta usando colunas específicas
+                cursor.execute("SAVEPOINT inserir_movimentacao")
+                try:
+                    cursor.execute(
+                        """
+                        INSERT INTO movimentacoes (
+                            tipo, quantidade, 
+                            insumo_id, equipamento_eletrico_id, equipamento_manual_id,
+                            obra_origem_id, obra_destino_id,
+                            responsavel_origem_id, responsavel_destino_id,
+                            valor_unitario, observacoes, data_movimentacao, usuario_id, 
+                            movimentacao_origem_id, tipo_movimentacao, motivo
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        RETURNING id
+                        """,
+                        (
+                            data['tipo'], data['quantidade'],
+                            insumo_id, equipamento_eletrico_id, equipamento_manual_id,
+                            data.get('obra_origem_id'), data.get('obra_destino_id'),
+                            data.get('responsavel_origem_id'), data.get('responsavel_destino_id'),
+                            data.get('valor_unitario'), data.get('observacoes'), 
+                            datetime.now(), usuario_id,
+                            data.get('movimentacao_origem_id'), tipo_movimentacao, data.get('motivo')
+                        )
+                    )
+                except Exception as e:
+                    # Fallback para inserção sem movimentacao_origem_id e tipo_movimentacao se não existirem
+                    cursor.execute("ROLLBACK TO SAVEPOINT inserir_movimentacao")
+                    cursor.execute(
+                        """
+                        INSERT INTO movimentacoes (
+                            tipo, quantidade,
+                            insumo_id, equipamento_eletrico_id, equipamento_manual_id,
+                            obra_origem_id, obra_destino_id,
+                            responsavel_origem_id, responsavel_destino_id,
+                            valor_unitario, observacoes, data_movimentacao, usuario_id, motivo
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        RETURNING id
+                        """,
+                        (
+                            data['tipo'], data['quantidade'],
+                            insumo_id, equipamento_eletrico_id, equipamento_manual_id,
+                            data.get('obra_origem_id'), data.get('obra_destino_id'),
+                            data.get('responsavel_origem_id'), data.get('responsavel_destino_id'),
+                            data.get('valor_unitario'), data.get('observacoes'), 
+                            datetime.now(), usuario_id, data.get('motivo')
+                        )
+                    )
+                
+                # Recuperar o ID da movimentação criada
                 result = cursor.fetchone()
+                movimentacao_id = None
                 
                 if result:
-                    # Tratamento robusto para diferentes tipos de resultado
                     if isinstance(result, dict):
-                        quantidade_atual = result.get('quantidade_atual', 0)
+                        movimentacao_id = result.get('id')
                     else:
-                        quantidade_atual = result[0] if result else 0
-                else:
-                    quantidade_atual = 0
-                    
-                if quantidade_atual < data['quantidade']:
-                    st.error(f"❌ Quantidade insuficiente! Disponível: {quantidade_atual}")
-                    return None
-                    
-            # Inserção da movimentação
-            # Determinar tipo_movimentacao baseado no tipo
-            tipo_movimentacao = 'entrada' if data['tipo'].lower() in ['entrada'] else 'saida'
-            
-            # Determinar colunas específicas baseado no tipo do item
-            insumo_id = None
-            equipamento_eletrico_id = None
-            equipamento_manual_id = None
-            
-            if data.get('tipo_item') == 'insumo':
-                insumo_id = data['item_id']
-            elif data.get('tipo_item') == 'equipamento_eletrico':
-                equipamento_eletrico_id = data['item_id']
-            elif data.get('tipo_item') == 'equipamento_manual':
-                equipamento_manual_id = data['item_id']
-            
-            # Inserção correta usando colunas específicas
-            try:
-                cursor.execute(
-                    """
-                    INSERT INTO movimentacoes (
-                        tipo, quantidade, 
-                        insumo_id, equipamento_eletrico_id, equipamento_manual_id,
-                        obra_origem_id, obra_destino_id,
-                        responsavel_origem_id, responsavel_destino_id,
-                        valor_unitario, observacoes, data_movimentacao, usuario_id, 
-                        movimentacao_origem_id, tipo_movimentacao, motivo
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                    """,
-                    (
-                        data['tipo'], data['quantidade'],
-                        insumo_id, equipamento_eletrico_id, equipamento_manual_id,
-                        data.get('obra_origem_id'), data.get('obra_destino_id'),
-                        data.get('responsavel_origem_id'), data.get('responsavel_destino_id'),
-                        data.get('valor_unitario'), data.get('observacoes'), 
-                        datetime.now(), usuario_id,
-                        data.get('movimentacao_origem_id'), tipo_movimentacao, data.get('motivo')
-                    )
-                )
-            except Exception as e:
-                # Fallback para inserção sem movimentacao_origem_id e tipo_movimentacao se não existirem
-                cursor.execute(
-                    """
-                    INSERT INTO movimentacoes (
-                        tipo, quantidade,
-                        insumo_id, equipamento_eletrico_id, equipamento_manual_id,
-                        obra_origem_id, obra_destino_id,
-                        responsavel_origem_id, responsavel_destino_id,
-                        valor_unitario, observacoes, data_movimentacao, usuario_id, motivo
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                    """,
-                    (
-                        data['tipo'], data['quantidade'],
-                        insumo_id, equipamento_eletrico_id, equipamento_manual_id,
-                        data.get('obra_origem_id'), data.get('obra_destino_id'),
-                        data.get('responsavel_origem_id'), data.get('responsavel_destino_id'),
-                        data.get('valor_unitario'), data.get('observacoes'), 
-                        datetime.now(), usuario_id, data.get('motivo')
-                    )
-                )
-            
-            # Recuperar o ID da movimentação criada
-            result = cursor.fetchone()
-            movimentacao_id = None
-            
-            if result:
-                if isinstance(result, dict):
-                    movimentacao_id = result.get('id')
-                else:
-                    movimentacao_id = result[0] if result else None
-                    
-            conn.commit()
+                        movimentacao_id = result[0] if result else None
             
             # Registrar auditoria
             self.auditoria.registrar_acao(
@@ -144,65 +150,316 @@ class MovimentacoesManager:
                 dados_contexto={'usuario_id': usuario_id}
             )
             
-            # Atualizar estoque se for movimentação de insumo
-            if data.get('tipo_item') == 'insumo' and movimentacao_id:
-                self._atualizar_estoque_insumo(data['item_id'], data['quantidade'], data['tipo'])
+            if movimentacao_id:
+                tag_item = TAGS_POR_TIPO_ITEM.get(data.get('tipo_item'))
+                cache_compartilhado.invalidar('movimentacoes', *([tag_item] if tag_item else []))
             
             return movimentacao_id
             
+        except EstoqueInsuficiente as e:
+            st.error(f"❌ Quantidade insuficiente! Disponível: {e.disponivel}")
+            return None
         except Exception as e:
-            # Fazer rollback explícito para limpar o estado da transação
-            conn = self.db.get_connection()
-            if conn and hasattr(conn, 'rollback'):
-                conn.rollback()
             st.error(f"Erro ao registrar movimentação: {e}")
             return None
     
-    def _atualizar_estoque_insumo(self, item_id: int, quantidade: int, tipo: str) -> None:
-        """Atualiza estoque do insumo após movimentação"""
+    def _lancar_estoque_insumo(self, cursor, item_id: int, quantidade: int, tipo: str) -> Any:
+        """Lança a movimentação no saldo do insumo dentro da transação do chamador.
+
+        Saídas só baixam o saldo se ele cobre a quantidade (UPDATE condicional);
+        caso contrário levanta EstoqueInsuficiente e nada é alterado. Devolve
+        o novo saldo, ou None para tipos que não mexem no estoque.
+        """
+        if tipo == 'Entrada':
+            cursor.execute("""
+                UPDATE insumos 
+                SET quantidade_atual = quantidade_atual + %s,
+                    data_ultima_entrada = CURRENT_TIMESTAMP
+                WHERE id = %s
+                RETURNING quantidade_atual
+            """, (quantidade, item_id))
+        elif tipo == 'Saída':
+            cursor.execute("""
+                UPDATE insumos 
+                SET quantidade_atual = quantidade_atual - %s,
+                    data_ultima_saida = CURRENT_TIMESTAMP
+                WHERE id = %s AND ativo = TRUE AND quantidade_atual >= %s
+                RETURNING quantidade_atual
+            """, (quantidade, item_id, quantidade))
+        else:
+            return None
+
+        result = cursor.fetchone()
+        if result:
+            return result['quantidade_atual'] if isinstance(result, dict) else result[0]
+        if tipo == 'Entrada':
+            raise ValueError(f"Insumo {item_id} não encontrado")
+
+        cursor.execute("SELECT quantidade_atual FROM insumos WHERE id = %s AND ativo = TRUE", (item_id,))
+        result = cursor.fetchone()
+        disponivel = (result['quantidade_atual'] if isinstance(result, dict) else result[0]) if result else 0
+        raise EstoqueInsuficiente(item_id, quantidade, disponivel)
+
+    def create_movimentacoes_lote(self, linhas: list[dict[str, Any]], dados: dict[str, Any],
+                                  usuario_id: int) -> tuple[list[int], list[str]]:
+        """Registra várias movimentações (insumos e equipamentos) de uma vez.
+
+        Cada linha tem tipo_item, item_id e quantidade; `dados` traz o que é
+        comum ao lote (tipo, obras, responsáveis, motivo, observações). A
+        disponibilidade de todas as linhas é conferida em uma consulta e,
+        se nenhuma falhar, saldos, equipamentos e movimentações são gravados
+        em uma única transação, com uma auditoria agregada.
+        Devolve os IDs criados e a lista de erros (vazia em caso de sucesso).
+        """
+        tipo = dados.get('tipo')
+        regra = TIPOS_MOVIMENTACAO_LOTE.get(tipo)
+        if regra is None:
+            return [], [f"Tipo de movimentação inválido: {tipo}"]
+        if tipo == 'Transferência' and (not dados.get('obra_origem_id') or not dados.get('obra_destino_id')
+                                        or dados['obra_origem_id'] == dados['obra_destino_id']):
+            return [], ["Transferência exige obras de origem e destino diferentes"]
+
+        linhas, erros = self._agrupar_linhas_lote(linhas)
+        if erros:
+            return [], erros
+        if not linhas:
+            return [], ["Nenhum item no lote"]
+
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return
-                
-            cursor = conn.cursor()
-            
-            if tipo == 'Entrada':
-                cursor.execute("""
-                    UPDATE insumos 
-                    SET quantidade_atual = quantidade_atual + %s,
-                        data_ultima_entrada = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (quantidade, item_id))
-            elif tipo == 'Saída':
-                cursor.execute("""
-                    UPDATE insumos 
-                    SET quantidade_atual = quantidade_atual - %s,
-                        data_ultima_saida = CURRENT_TIMESTAMP
-                    WHERE id = %s AND quantidade_atual >= %s
-                """, (quantidade, item_id, quantidade))
-                
-            conn.commit()
-            
+            with self.db.transaction() as cursor:
+                itens = self._consultar_itens_lote(cursor, linhas)
+                erros = self._validar_linhas_lote(linhas, itens, tipo, dados)
+                if erros:
+                    return [], erros
+
+                self._lancar_lote(cursor, linhas, regra, dados)
+                ids = self._inserir_movimentacoes_lote(cursor, linhas, itens, dados, usuario_id)
         except Exception as e:
-            if conn:
-                conn.rollback()
-            st.error(f"Erro ao atualizar estoque: {e}")
+            return [], [f"Erro ao registrar movimentações: {e}"]
+
+        por_tipo_item: dict[str, int] = {}
+        for linha in linhas:
+            por_tipo_item[linha['tipo_item']] = por_tipo_item.get(linha['tipo_item'], 0) + 1
+        self.auditoria.registrar_acao(
+            modulo='movimentacoes',
+            acao='criar_lote',
+            entidade='movimentacao',
+            dados_depois={
+                'movimentacao_ids': ids,
+                'tipo': tipo,
+                'itens': len(linhas),
+                'por_tipo_item': por_tipo_item,
+                'obra_origem_id': dados.get('obra_origem_id'),
+                'obra_destino_id': dados.get('obra_destino_id'),
+                'responsavel_destino_id': dados.get('responsavel_destino_id'),
+            },
+            dados_contexto={'usuario_id': usuario_id}
+        )
+        cache_compartilhado.invalidar('movimentacoes', *(TAGS_POR_TIPO_ITEM[t] for t in por_tipo_item))
+        return ids, []
+
+    def _agrupar_linhas_lote(self, linhas: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[str]]:
+        """Soma linhas repetidas do mesmo item e valida tipo e quantidade"""
+        agrupadas: dict[tuple[str, int], dict[str, Any]] = {}
+        erros = []
+        for numero, linha in enumerate(linhas, 1):
+            tipo_item = linha.get('tipo_item')
+            quantidade = linha.get('quantidade')
+            if tipo_item not in TIPOS_ITEM_LOTE:
+                erros.append(f"Linha {numero}: tipo de item inválido ({tipo_item})")
+                continue
+            # Linhas vazias do data_editor chegam com NaN/None
+            if pd.isna(linha.get('item_id')):
+                erros.append(f"Linha {numero}: item não informado")
+                continue
+            if pd.isna(quantidade) or quantidade <= 0:
+                erros.append(f"Linha {numero}: quantidade deve ser maior que zero")
+                continue
+            chave = (tipo_item, int(linha['item_id']))
+            if chave in agrupadas:
+                if tipo_item == 'equipamento_eletrico':
+                    erros.append(f"Linha {numero}: equipamento elétrico repetido no lote")
+                    continue
+                agrupadas[chave]['quantidade'] += quantidade
+            else:
+                agrupadas[chave] = {'tipo_item': tipo_item, 'item_id': chave[1], 'quantidade': quantidade}
+        for linha in agrupadas.values():
+            if linha['tipo_item'] == 'equipamento_eletrico' and linha['quantidade'] != 1:
+                erros.append(f"Equipamento elétrico {linha['item_id']}: quantidade deve ser 1")
+        return list(agrupadas.values()), erros
+
+    def _consultar_itens_lote(self, cursor, linhas: list[dict[str, Any]]) -> dict[tuple[str, int], dict[str, Any]]:
+        """Estado atual de todos os itens do lote em uma única consulta"""
+        cursor.execute("""
+            SELECT l.tipo_item, l.item_id,
+                   COALESCE(i.codigo, ee.codigo, em.codigo) as codigo,
+                   COALESCE(i.descricao, ee.nome, em.descricao) as descricao,
+                   COALESCE(i.unidade, 'UN') as unidade,
+                   COALESCE(i.ativo, ee.ativo, em.ativo) as ativo,
+                   i.quantidade_atual as saldo,
+                   em.quantitativo,
+                   COALESCE(ee.status, em.status) as status,
+                   COALESCE(ee.obra_atual_id, em.obra_atual_id) as obra_atual_id,
+                   COALESCE(i.preco_unitario, ee.valor_compra, em.valor) as valor_unitario
+            FROM unnest(%s::text[], %s::int[]) AS l(tipo_item, item_id)
+            LEFT JOIN insumos i ON l.tipo_item = 'insumo' AND i.id = l.item_id
+            LEFT JOIN equipamentos_eletricos ee ON l.tipo_item = 'equipamento_eletrico' AND ee.id = l.item_id
+            LEFT JOIN equipamentos_manuais em ON l.tipo_item = 'equipamento_manual' AND em.id = l.item_id
+        """, ([linha['tipo_item'] for linha in linhas], [linha['item_id'] for linha in linhas]))
+        return {(row['tipo_item'], row['item_id']): dict(row) for row in cursor.fetchall()}
+
+    def _validar_linhas_lote(self, linhas: list[dict[str, Any]], itens: dict[tuple[str, int], dict[str, Any]],
+                             tipo: str, dados: dict[str, Any]) -> list[str]:
+        """Erros de disponibilidade de cada linha (lista vazia: lote pode ser lançado)"""
+        erros = []
+        for linha in linhas:
+            item = itens.get((linha['tipo_item'], linha['item_id']))
+            if not item or item.get('codigo') is None or not item.get('ativo'):
+                erros.append(f"Item {linha['item_id']} ({linha['tipo_item']}) não encontrado ou inativo")
+                continue
+            nome = f"{item['descricao']} ({item['codigo']})"
+            quantidade = linha['quantidade']
+
+            if linha['tipo_item'] == 'insumo':
+                if tipo == 'Saída' and (item['saldo'] or 0) < quantidade:
+                    erros.append(f"{nome}: solicitado {quantidade}, disponível {item['saldo'] or 0}")
+                continue
+
+            if linha['tipo_item'] == 'equipamento_manual' and quantidade > (item['quantitativo'] or 1):
+                erros.append(f"{nome}: solicitado {quantidade}, quantitativo {item['quantitativo'] or 1}")
+            if tipo == 'Entrada':
+                continue
+            if item['status'] in STATUS_BLOQUEADOS:
+                erros.append(f"{nome}: equipamento com status {item['status']}")
+            elif tipo == 'Saída' and item['status'] != 'Disponível':
+                erros.append(f"{nome}: equipamento não está disponível (status {item['status']})")
+            elif tipo == 'Transferência' and item['obra_atual_id'] != dados['obra_origem_id']:
+                erros.append(f"{nome}: equipamento não está na obra de origem")
+        return erros
+
+    def _lancar_lote(self, cursor, linhas: list[dict[str, Any]], regra: dict[str, Any],
+                     dados: dict[str, Any]) -> None:
+        """Saldos dos insumos e localização dos equipamentos em UPDATEs por tabela"""
+        insumos = [linha for linha in linhas if linha['tipo_item'] == 'insumo']
+        if insumos and regra['sinal_estoque']:
+            ids = [linha['item_id'] for linha in insumos]
+            # Mesma regra do lançamento unitário: saída só baixa saldo suficiente
+            cursor.execute(f"""
+                UPDATE insumos i
+                SET quantidade_atual = i.quantidade_atual + %s * l.quantidade,
+                    {'data_ultima_saida' if regra['sinal_estoque'] < 0 else 'data_ultima_entrada'} = CURRENT_TIMESTAMP
+                FROM unnest(%s::int[], %s::numeric[]) AS l(id, quantidade)
+                WHERE i.id = l.id AND (%s > 0 OR i.quantidade_atual >= l.quantidade)
+                RETURNING i.id
+            """, (regra['sinal_estoque'], ids, [linha['quantidade'] for linha in insumos], regra['sinal_estoque']))
+            self._conferir_lancados(cursor, ids, 'Saldo do insumo')
+
+        for tipo_item in ('equipamento_eletrico', 'equipamento_manual'):
+            ids = [linha['item_id'] for linha in linhas if linha['tipo_item'] == tipo_item]
+            if not ids:
+                continue
+            # Repete a condição da validação: outro lote pode ter levado o equipamento
+            if dados['tipo'] == 'Saída':
+                condicao, params = "status = 'Disponível'", []
+            elif dados['tipo'] == 'Transferência':
+                condicao, params = "obra_atual_id = %s AND status <> ALL(%s)", [dados['obra_origem_id'], list(STATUS_BLOQUEADOS)]
+            else:
+                condicao, params = "TRUE", []
+            cursor.execute(f"""
+                UPDATE {FONTES_BUSCA[tipo_item]['tabela']}
+                SET obra_atual_id = %s,
+                    responsavel_atual_id = %s,
+                    status = %s,
+                    localizacao = COALESCE((SELECT nome FROM obras WHERE id = %s), 'Almoxarifado')
+                WHERE id = ANY(%s) AND {condicao}
+                RETURNING id
+            """, [dados.get('obra_destino_id'), dados.get('responsavel_destino_id'),
+                  regra['status_equipamento'], dados.get('obra_destino_id'), ids, *params])
+            self._conferir_lancados(cursor, ids, 'Situação do equipamento')
+
+    def _conferir_lancados(self, cursor, ids: list[int], descricao: str) -> None:
+        """Desfaz o lote inteiro se algum item mudou entre a consulta e o UPDATE"""
+        lancados = {row['id'] for row in cursor.fetchall()}
+        faltando = [item_id for item_id in ids if item_id not in lancados]
+        if faltando:
+            raise ValueError(f"{descricao} {faltando[0]} alterado por outra movimentação; revise o lote")
+
+    def _inserir_movimentacoes_lote(self, cursor, linhas: list[dict[str, Any]],
+                                    itens: dict[tuple[str, int], dict[str, Any]],
+                                    dados: dict[str, Any], usuario_id: int) -> list[int]:
+        """INSERT de várias linhas em um comando; devolve os IDs na ordem das linhas"""
+        agora = datetime.now()
+        valores = []
+        for linha in linhas:
+            item = itens[(linha['tipo_item'], linha['item_id'])]
+            valores.append((
+                dados['tipo'], linha['tipo_item'], linha['item_id'],
+                item.get('codigo'), item.get('descricao'), linha['quantidade'], item.get('unidade'),
+                dados.get('obra_origem_id'), dados.get('obra_destino_id'),
+                dados.get('responsavel_origem_id'), dados.get('responsavel_destino_id'),
+                item.get('valor_unitario'), dados.get('observacoes'), agora, usuario_id,
+                dados.get('motivo')
+            ))
+        linhas_inseridas = execute_values(cursor, """
+            INSERT INTO movimentacoes (
+                tipo, tipo_item, item_id, codigo_item, descricao_item, quantidade, unidade,
+                obra_origem_id, obra_destino_id,
+                responsavel_origem_id, responsavel_destino_id,
+                valor_unitario, observacoes, data_movimentacao, usuario_id, motivo
+            ) VALUES %s
+            RETURNING id
+        """, valores, page_size=len(valores), fetch=True)
+        return [row['id'] for row in linhas_inseridas]
+
+    def _filtros_movimentacoes_sql(self, filters: dict[str, Any]) -> tuple[str, list[Any]]:
+        """Monta o WHERE sobre movimentacoes m usando apenas predicados indexáveis.
+
+        Datas viram intervalos semiabertos sobre a coluna (sem ::date) e os
+        filtros por nome resolvem ids em subconsultas, sem exigir os JOINs.
+        """
+        where = "1=1"
+        params: list[Any] = []
+
+        if filters.get('data_inicio'):
+            where += " AND m.data_movimentacao >= %s::date"
+            params.append(filters['data_inicio'])
+
+        if filters.get('data_fim'):
+            where += " AND m.data_movimentacao < %s::date + INTERVAL '1 day'"
+            params.append(filters['data_fim'])
+
+        if filters.get('tipo'):
+            where += " AND m.tipo ILIKE %s"
+            params.append(filters['tipo'])
+
+        if filters.get('item_nome'):
+            # Ids dos itens resolvidos pela busca trigram de cada tabela
+            alternativas = []
+            for tipo_item, fonte in FONTES_BUSCA.items():
+                condicao, params_busca = condicao_busca(tipo_item, filters['item_nome'])
+                alternativas.append(
+                    f"(m.tipo_item = '{tipo_item}' AND m.item_id IN (SELECT id FROM {fonte['tabela']} WHERE {condicao}))"
+                )
+                params.extend(params_busca)
+            where += f" AND ({' OR '.join(alternativas)})"
+
+        for chave, coluna, tabela in (
+            ('obra_origem', 'obra_origem_id', 'obras'),
+            ('obra_destino', 'obra_destino_id', 'obras'),
+            ('responsavel_origem', 'responsavel_origem_id', 'responsaveis'),
+            ('responsavel_destino', 'responsavel_destino_id', 'responsaveis'),
+        ):
+            if filters.get(chave):
+                where += f" AND m.{coluna} IN (SELECT id FROM {tabela} WHERE nome ILIKE %s)"
+                params.append(f"%{filters[chave]}%")
+
+        return where, params
 
     def get_movimentacoes(self, filters: dict[str, Any]) -> pd.DataFrame:
         """Busca movimentações conforme filtros"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return pd.DataFrame()
-                
-            # Garantir que a conexão esteja limpa
-            if hasattr(conn, 'rollback'):
-                conn.rollback()
-            
-            cursor = conn.cursor()
-            
-            query = """
+            where, params = self._filtros_movimentacoes_sql(filters)
+            query = f"""
                 SELECT m.id, m.data_movimentacao, m.tipo, m.quantidade, m.motivo,
                        o1.nome as obra_origem, o2.nome as obra_destino,
                        r1.nome as responsavel_origem, r2.nome as responsavel_destino,
@@ -221,134 +478,177 @@ class MovimentacoesManager:
                 LEFT JOIN responsaveis r1 ON m.responsavel_origem_id = r1.id
                 LEFT JOIN responsaveis r2 ON m.responsavel_destino_id = r2.id
                 LEFT JOIN usuarios u ON m.usuario_id = u.id
-                WHERE 1=1
+                WHERE {where}
             """
-            params: list[Any] = []
-            
-            if filters.get('item_nome'):
-                query += """ AND (
-                    i.descricao ILIKE %s OR 
-                    ee.nome ILIKE %s OR 
-                    em.descricao ILIKE %s
-                )"""
-                busca = f"%{filters['item_nome']}%"
-                params.extend([busca, busca, busca])
-                
-            if filters.get('tipo'):
-                query += " AND m.tipo ILIKE %s"
-                params.append(filters['tipo'])
-                
-            if filters.get('obra_origem'):
-                query += " AND o1.nome ILIKE %s"
-                params.append(f"%{filters['obra_origem']}%")
-                
-            if filters.get('obra_destino'):
-                query += " AND o2.nome ILIKE %s"
-                params.append(f"%{filters['obra_destino']}%")
-                
-            if filters.get('responsavel_origem'):
-                query += " AND r1.nome ILIKE %s"
-                params.append(f"%{filters['responsavel_origem']}%")
-                
-            if filters.get('responsavel_destino'):
-                query += " AND r2.nome ILIKE %s"
-                params.append(f"%{filters['responsavel_destino']}%")
-                
-            if filters.get('data_inicio'):
-                query += " AND m.data_movimentacao::date >= %s"
-                params.append(filters['data_inicio'])
-                
-            if filters.get('data_fim'):
-                query += " AND m.data_movimentacao::date <= %s"
-                params.append(filters['data_fim'])
                 
             query += " ORDER BY m.data_movimentacao DESC"
-            cursor.execute(query, params)  # type: ignore
-            results = cursor.fetchall()
-            
-            if not results:
-                return pd.DataFrame()
+            with self.db.cursor() as cursor:
+                cursor.execute(query, params)  # type: ignore
+                results = cursor.fetchall()
                 
-            # Tratamento robusto de resultados
-            movimentacoes = []
-            for row in results:
-                if isinstance(row, dict):
-                    movimentacoes.append(dict(row))
-                else:
-                    columns = [desc[0] for desc in cursor.description]
-                    movimentacoes.append(dict(zip(columns, row)))
+                if not results:
+                    return pd.DataFrame()
+                    
+                # Tratamento robusto de resultados
+                movimentacoes = []
+                for row in results:
+                    if isinstance(row, dict):
+                        movimentacoes.append(dict(row))
+                    else:
+                        columns = [desc[0] for desc in cursor.description]
+                        movimentacoes.append(dict(zip(columns, row)))
                     
             return pd.DataFrame(movimentacoes)
             
         except Exception as e:
-            # Fazer rollback explícito para limpar o estado da transação
-            conn = self.db.get_connection()
-            if conn and hasattr(conn, 'rollback'):
-                conn.rollback()
             st.error(f"Erro ao buscar movimentações: {e}")
             return pd.DataFrame()
 
-    def get_items_para_movimentacao(self) -> list[dict[str, Any]]:
-        """Busca itens disponíveis para movimentação"""
+    def get_movimentacoes_pagina(self, filters: dict[str, Any], limite: int = 50,
+                                 cursor_pagina: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Busca uma página do histórico, da mais recente para a mais antiga.
+
+        A página é escolhida só em movimentacoes (filtros + keyset em
+        (data_movimentacao, id)) e os nomes de item/obra são buscados apenas
+        para as linhas da página. Retorna os itens e o cursor da próxima página.
+        """
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return []
-                
-            # Garantir que a conexão esteja limpa
-            if hasattr(conn, 'rollback'):
-                conn.rollback()
-            
-            cursor = conn.cursor()
+            where, params = self._filtros_movimentacoes_sql(filters)
+            if cursor_pagina:
+                # A comparação simples na coluna de partição descarta os meses mais recentes
+                where += " AND m.data_movimentacao <= %s AND (m.data_movimentacao, m.id) < (%s, %s)"
+                params.extend([cursor_pagina['data_movimentacao'], cursor_pagina['data_movimentacao'], cursor_pagina['id']])
+
+            with self.db.cursor() as cursor:
+                cursor.execute(f"""
+                    WITH pagina AS (
+                        SELECT m.id, m.data_movimentacao, m.tipo, m.quantidade, m.motivo,
+                               m.item_id, m.tipo_item, m.obra_origem_id, m.obra_destino_id
+                        FROM movimentacoes m
+                        WHERE {where}
+                        ORDER BY m.data_movimentacao DESC, m.id DESC
+                        LIMIT %s
+                    )
+                    SELECT p.id, p.data_movimentacao, p.tipo, p.quantidade, p.motivo, p.tipo_item,
+                           o1.nome as obra_origem, o2.nome as obra_destino,
+                           COALESCE(i.descricao, ee.nome, em.descricao) as item_nome,
+                           COALESCE(i.codigo, ee.codigo, em.codigo) as codigo,
+                           CASE WHEN p.tipo = 'Entrada' THEN 'entrada' ELSE 'saida' END as tipo_movimentacao
+                    FROM pagina p
+                    LEFT JOIN insumos i ON p.item_id = i.id AND p.tipo_item = 'insumo'
+                    LEFT JOIN equipamentos_eletricos ee ON p.item_id = ee.id AND p.tipo_item = 'equipamento_eletrico'
+                    LEFT JOIN equipamentos_manuais em ON p.item_id = em.id AND p.tipo_item = 'equipamento_manual'
+                    LEFT JOIN obras o1 ON p.obra_origem_id = o1.id
+                    LEFT JOIN obras o2 ON p.obra_destino_id = o2.id
+                    ORDER BY p.data_movimentacao DESC, p.id DESC
+                """, params + [limite + 1])
+                rows = [dict(row) for row in cursor.fetchall()]
+
+            itens = rows[:limite]
+            proximo = None
+            if len(rows) > limite:
+                ultimo = itens[-1]
+                proximo = {'data_movimentacao': ultimo['data_movimentacao'], 'id': ultimo['id']}
+            return {'itens': itens, 'proximo_cursor': proximo}
+        except Exception as e:
+            st.error(f"Erro ao buscar movimentações: {e}")
+            return {'itens': [], 'proximo_cursor': None}
+
+    def get_resumo_relatorio(self, top_motivos: int = 10) -> dict[str, list[dict[str, Any]]]:
+        """Contagens por tipo e principais motivos, agregadas no banco"""
+        try:
+            return cache_compartilhado.obter_ou_calcular(
+                'movimentacoes.resumo', top_motivos, ('movimentacoes',),
+                lambda: self._consultar_resumo_relatorio(top_motivos)
+            )
+        except Exception as e:
+            return {'por_tipo': [], 'por_motivo': []}
+
+    def _consultar_resumo_relatorio(self, top_motivos: int) -> dict[str, list[dict[str, Any]]]:
+        with self.db.cursor() as cursor:
             cursor.execute("""
-                SELECT id, descricao, codigo, quantidade_atual, unidade
-                FROM insumos 
-                WHERE ativo = TRUE
-                ORDER BY descricao
+                SELECT tipo, COUNT(*) as total
+                FROM movimentacoes
+                GROUP BY tipo
+                ORDER BY total DESC
             """)
+            por_tipo = [dict(row) for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT motivo, COUNT(*) as total
+                FROM movimentacoes
+                WHERE motivo IS NOT NULL
+                GROUP BY motivo
+                ORDER BY total DESC
+                LIMIT %s
+            """, (top_motivos,))
+            por_motivo = [dict(row) for row in cursor.fetchall()]
+        return {'por_tipo': por_tipo, 'por_motivo': por_motivo}
+
+    def get_items_para_movimentacao(self) -> list[dict[str, Any]]:
+        """Busca itens disponíveis para movimentação"""
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, descricao, codigo, quantidade_atual, unidade
+                    FROM insumos 
+                    WHERE ativo = TRUE
+                    ORDER BY descricao
+                """)
             
-            results = cursor.fetchall()
-            if not results:
-                return []
+                results = cursor.fetchall()
+                if not results:
+                    return []
                 
-            # Tratamento robusto de resultados
-            items = []
-            for row in results:
-                if isinstance(row, dict):
-                    items.append(dict(row))
-                else:
-                    columns = [desc[0] for desc in cursor.description]
-                    items.append(dict(zip(columns, row)))
+                # Tratamento robusto de resultados
+                items = []
+                for row in results:
+                    if isinstance(row, dict):
+                        items.append(dict(row))
+                    else:
+                        columns = [desc[0] for desc in cursor.description]
+                        items.append(dict(zip(columns, row)))
                     
             return items
             
         except Exception as e:
-            # Fazer rollback explícito para limpar o estado da transação
-            conn = self.db.get_connection()
-            if conn and hasattr(conn, 'rollback'):
-                conn.rollback()
             st.error(f"Erro ao buscar itens: {e}")
             return []
 
+    def get_equipamentos_obra(self, obra_id: int) -> list[dict[str, Any]]:
+        """Equipamentos elétricos e manuais alocados na obra (kit para transferência)"""
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT 'equipamento_eletrico' as tipo_item, id as item_id, codigo, nome, 1 as quantidade
+                    FROM equipamentos_eletricos
+                    WHERE obra_atual_id = %s AND ativo = TRUE
+                    UNION ALL
+                    SELECT 'equipamento_manual', id, codigo, descricao, COALESCE(quantitativo, 1)
+                    FROM equipamentos_manuais
+                    WHERE obra_atual_id = %s AND ativo = TRUE
+                    ORDER BY codigo
+                """, (obra_id, obra_id))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            st.error(f"Erro ao buscar equipamentos da obra: {e}")
+            return []
+
     def get_dashboard_stats(self) -> dict[str, int]:
         """Estatísticas para o dashboard"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor() if conn else None
-            if not cursor:
-                return None
-
-            # Movimentações do mês atual
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN tipo = 'Entrada' THEN 1 ELSE 0 END) as entradas,
-                    SUM(CASE WHEN tipo = 'Saída' THEN 1 ELSE 0 END) as saidas
-                FROM movimentacoes 
-                WHERE DATE_TRUNC('month', data_movimentacao) = DATE_TRUNC('month', CURRENT_DATE)
-            """)
+            with self.db.cursor() as cursor:
+                # Movimentações do mês atual
+                cursor.execute("""
+                    SELECT 
+                        COUNT(*) as total,
+                        SUM(CASE WHEN tipo = 'Entrada' THEN 1 ELSE 0 END) as entradas,
+                        SUM(CASE WHEN tipo = 'Saída' THEN 1 ELSE 0 END) as saidas
+                    FROM movimentacoes 
+                    WHERE data_movimentacao >= DATE_TRUNC('month', CURRENT_DATE)
+                      AND data_movimentacao < DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month'
+                """)
 
-            result = cursor.fetchone()
+                result = cursor.fetchone()
             return {
                 'total_mes': result.get('count', 0) if result and hasattr(result, 'get') else 0,
                 'entradas_mes': result['entradas'] if result else 0,
@@ -360,34 +660,29 @@ class MovimentacoesManager:
     def get_ultima_movimentacao_equipamento(self, equipamento_id: int, tipo_equipamento: str) -> dict[str, Any] | None:
         """Busca a última movimentação de um equipamento específico"""
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return None
-                
-            cursor = conn.cursor()
+            with self.db.cursor() as cursor:
+                # Buscar última movimentação do equipamento
+                cursor.execute("""
+                    SELECT 
+                        tipo_movimentacao, 
+                        local_origem, 
+                        local_destino,
+                        data_movimentacao,
+                        motivo
+                    FROM movimentacoes 
+                    WHERE item_id = %s AND tipo = %s
+                    ORDER BY data_movimentacao DESC, id DESC
+                    LIMIT 1
+                """, (equipamento_id, f'Equipamento {tipo_equipamento.capitalize()}'))
             
-            # Buscar última movimentação do equipamento
-            cursor.execute("""
-                SELECT 
-                    tipo_movimentacao, 
-                    local_origem, 
-                    local_destino,
-                    data_movimentacao,
-                    motivo
-                FROM movimentacoes 
-                WHERE item_id = %s AND tipo = %s
-                ORDER BY data_movimentacao DESC, id DESC
-                LIMIT 1
-            """, (equipamento_id, f'Equipamento {tipo_equipamento.capitalize()}'))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                if isinstance(result, dict):
-                    return result
-                else:
-                    columns = [desc[0] for desc in cursor.description]
-                    return dict(zip(columns, result))
+                result = cursor.fetchone()
+            
+                if result:
+                    if isinstance(result, dict):
+                        return result
+                    else:
+                        columns = [desc[0] for desc in cursor.description]
+                        return dict(zip(columns, result))
             
             return None
             
@@ -410,101 +705,93 @@ class MovimentacoesManager:
             usuario_id: ID do usuário que está fazendo a devolução
         """
         try:
-            conn = self.db.get_connection()
-            if not conn:
-                return False, "Erro de conexão com o banco"
-                
-            cursor = conn.cursor()
-            
-            # 1. Buscar movimentação original
-            cursor.execute("""
-                SELECT * FROM movimentacoes WHERE id = %s
-            """, (movimentacao_original_id,))
+            # Devolução, estoque e compensação compartilham a mesma transação
+            with self.db.transaction() as cursor:
+                # 1. Buscar movimentação original
+                cursor.execute("""
+                    SELECT * FROM movimentacoes WHERE id = %s
+                """, (movimentacao_original_id,))
             
-            mov_original = cursor.fetchone()
-            if not mov_original:
-                return False, "Movimentação original não encontrada"
+                mov_original = cursor.fetchone()
+                if not mov_original:
+                    return False, "Movimentação original não encontrada"
             
-            # Converter para dict se necessário
-            if not isinstance(mov_original, dict):
-                columns = [desc[0] for desc in cursor.description]
-                mov_original = dict(zip(columns, mov_original))
+                # Converter para dict se necessário
+                if not isinstance(mov_original, dict):
+                    columns = [desc[0] for desc in cursor.description]
+                    mov_original = dict(zip(columns, mov_original))
             
-            # 2. Validações
-            if mov_original.get('tipo_movimentacao') != 'saida':
-                return False, "Só é possível devolver movimentações de saída"
+                # 2. Validações
+                if mov_original.get('tipo_movimentacao') != 'saida':
+                    return False, "Só é possível devolver movimentações de saída"
                 
-            # Determinar o item_id e tipo_item baseado nas colunas específicas
-            item_id = None
-            tipo_item = None
-            
-            if mov_original.get('insumo_id'):
-                item_id = mov_original['insumo_id']
-                tipo_item = 'insumo'
-            elif mov_original.get('equipamento_eletrico_id'):
-                item_id = mov_original['equipamento_eletrico_id']
-                tipo_item = 'equipamento_eletrico'
-            elif mov_original.get('equipamento_manual_id'):
-                item_id = mov_original['equipamento_manual_id']
-                tipo_item = 'equipamento_manual'
-            else:
-                return False, "Tipo de item não identificado na movimentação original"
-            
-            # 3. Determinar quantidade a devolver
-            qtd_original = mov_original.get('quantidade', 1)
-            if tipo_devolucao == 'total' or mov_original['tipo'] not in ['Insumo']:
-                qtd_devolver = qtd_original
-            else:  # parcial para insumos
-                qtd_devolver = quantidade_devolvida or qtd_original
-                if qtd_devolver > qtd_original:
-                    return False, f"Quantidade inválida. Original: {qtd_original}, solicitado: {qtd_devolver}"
-            
-            # 4. Determinar destino
-            if tipo_devolucao == 'transferencia' and nova_obra_id:
-                local_destino = f"Obra ID: {nova_obra_id}"
-            else:
-                local_destino = mov_original.get('local_origem', 'Estoque')
-            
-            # 5. Criar registro de devolução
-            dados_devolucao = {
-                'item_id': item_id,
-                'tipo': 'Entrada' if tipo_devolucao != 'transferencia' else 'Saída',
-                'tipo_item': tipo_item,
-                'quantidade': qtd_devolver,
-                'motivo': f"DEVOLUÇÃO {tipo_devolucao.upper()}: {motivo}",
-                'observacoes': f"Devolução da movimentação #{movimentacao_original_id}",
-                'movimentacao_origem_id': movimentacao_original_id,
-                'obra_origem_id': mov_original.get('obra_destino_id'),
-                'obra_destino_id': nova_obra_id if tipo_devolucao == 'transferencia' else mov_original.get('obra_origem_id'),
-                'responsavel_origem_id': mov_original.get('responsavel_destino_id'),
-                'responsavel_destino_id': mov_original.get('responsavel_origem_id'),
-                'valor_unitario': mov_original.get('valor_unitario')
-            }
+                # Determinar o item_id e tipo_item baseado nas colunas específicas
+                item_id = None
+                tipo_item = None
             
-            # 6. Registrar devolução
-            mov_id = self.create_movimentacao(dados_devolucao, usuario_id)
-            if not mov_id:
-                return False, "Erro ao criar registro de devolução"
+                if mov_original.get('insumo_id'):
+                    item_id = mov_original['insumo_id']
+                    tipo_item = 'insumo'
+                elif mov_original.get('equipamento_eletrico_id'):
+                    item_id = mov_original['equipamento_eletrico_id']
+                    tipo_item = 'equipamento_eletrico'
+                elif mov_original.get('equipamento_manual_id'):
+                    item_id = mov_original['equipamento_manual_id']
+                    tipo_item = 'equipamento_manual'
+                else:
+                    return False, "Tipo de item não identificado na movimentação original"
             
-            # 7. Atualizar estoques/disponibilidade
-            resultado_estoque = self._atualizar_estoque_devolucao(
-                mov_original, qtd_devolver, tipo_devolucao, nova_obra_id
-            )
+                # 3. Determinar quantidade a devolver
+                qtd_original = mov_original.get('quantidade', 1)
+                if tipo_devolucao == 'total' or mov_original['tipo'] not in ['Insumo']:
+                    qtd_devolver = qtd_original
+                else:  # parcial para insumos
+                    qtd_devolver = quantidade_devolvida or qtd_original
+                    if qtd_devolver > qtd_original:
+                        return False, f"Quantidade inválida. Original: {qtd_original}, solicitado: {qtd_devolver}"
+            
+                # 4. Determinar destino
+                if tipo_devolucao == 'transferencia' and nova_obra_id:
+                    local_destino = f"Obra ID: {nova_obra_id}"
+                else:
+                    local_destino = mov_original.get('local_origem', 'Estoque')
+            
+                # 5. Criar registro de devolução
+                dados_devolucao = {
+                    'item_id': item_id,
+                    'tipo': 'Entrada' if tipo_devolucao != 'transferencia' else 'Saída',
+                    'tipo_item': tipo_item,
+                    'quantidade': qtd_devolver,
+                    'motivo': f"DEVOLUÇÃO {tipo_devolucao.upper()}: {motivo}",
+                    'observacoes': f"Devolução da movimentação #{movimentacao_original_id}",
+                    'movimentacao_origem_id': movimentacao_original_id,
+                    'obra_origem_id': mov_original.get('obra_destino_id'),
+                    'obra_destino_id': nova_obra_id if tipo_devolucao == 'transferencia' else mov_original.get('obra_origem_id'),
+                    'responsavel_origem_id': mov_original.get('responsavel_destino_id'),
+                    'responsavel_destino_id': mov_original.get('responsavel_origem_id'),
+                    'valor_unitario': mov_original.get('valor_unitario')
+                }
+            
+                # 6. Registrar devolução
+                mov_id = self.create_movimentacao(dados_devolucao, usuario_id)
+                if not mov_id:
+                    return False, "Erro ao criar registro de devolução"
             
-            if not resultado_estoque[0]:
-                # Reverter criação da movimentação
-                cursor.execute("DELETE FROM movimentacoes WHERE id = %s", (mov_id,))
-                conn.commit()
-                return False, f"Erro ao atualizar estoque: {resultado_estoque[1]}"
+                # 7. Atualizar estoques/disponibilidade
+                resultado_estoque = self._atualizar_estoque_devolucao(
+                    mov_original, qtd_devolver, tipo_devolucao, nova_obra_id
+                )
             
-            conn.commit()
+                if not resultado_estoque[0]:
+                    # Reverter criação da movimentação
+                    cursor.execute("DELETE FROM movimentacoes WHERE id = %s", (mov_id,))
+                    return False, f"Erro ao atualizar estoque: {resultado_estoque[1]}"
+
+            # Invalida de novo após o commit da transação externa
+            cache_compartilhado.invalidar('movimentacoes', *TAGS_POR_TIPO_ITEM.values())
             return True, f"Devolução registrada com sucesso! ID: {mov_id}"
             
         except Exception as e:
-            try:
-                conn.rollback()
-            except:
-                pass
             return False, f"Erro ao processar devolução: {str(e)}"
     
     def _atualizar_estoque_devolucao(self, mov_original: dict, quantidade: int, 
@@ -517,14 +804,12 @@ class MovimentacoesManager:
                 insumos_manager = InsumosManager()
                 
                 # Aumentar estoque
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    UPDATE insumos 
-                    SET quantidade_atual = quantidade_atual + %s 
-                    WHERE id = %s
-                """, (quantidade, mov_original['item_id']))
+                with self.db.transaction() as cursor:
+                    cursor.execute("""
+                        UPDATE insumos 
+                        SET quantidade_atual = quantidade_atual + %s 
+                        WHERE id = %s
+                    """, (quantidade, mov_original['item_id']))
                 
                 return True, "Estoque atualizado"
             
@@ -647,6 +932,102 @@ def _show_modal_devolucao(mov_id: int, row: dict, manager: MovimentacoesManager,
                             del st.session_state[key]
                     st.rerun()
 
+def _show_carrinho_movimentacoes(manager: MovimentacoesManager, user_data: dict):
+    """Carrinho de itens movimentados juntos em um único lote"""
+    from modules.obras import ObrasManager
+    from modules.responsaveis import ResponsaveisManager
+
+    carrinho: list[dict[str, Any]] = st.session_state.setdefault('carrinho_movimentacao', [])
+
+    obras_df = ObrasManager().get_obras()
+    obras = {f"{row['nome']} - {row['codigo']}": int(row['id']) for _, row in obras_df.iterrows()} if not obras_df.empty else {}
+    responsaveis_df = ResponsaveisManager().get_responsaveis({"ativo": True})
+    responsaveis = ({f"{row['nome']} - {row['cargo']}": int(row['id']) for _, row in responsaveis_df.iterrows()}
+                    if not responsaveis_df.empty else {})
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        tipo = st.selectbox("Tipo", list(TIPOS_MOVIMENTACAO_LOTE), key="lote_tipo")
+    with col2:
+        origem = st.selectbox("Obra de Origem", [""] + list(obras), key="lote_origem",
+                              disabled=tipo != 'Transferência')
+    with col3:
+        destino = st.selectbox("Obra de Destino", [""] + list(obras), key="lote_destino")
+    col1, col2 = st.columns(2)
+    with col1:
+        responsavel = st.selectbox("Responsável", [""] + list(responsaveis), key="lote_responsavel")
+    with col2:
+        motivo = st.selectbox("Motivo (opcional)", ["", "Transferência", "Empréstimo", "Manutenção", "Devolução"],
+                              key="lote_motivo")
+    observacoes = st.text_input("Observações", key="lote_observacoes")
+
+    # Adicionar itens
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        termo = st.text_input("🔍 Buscar item (código, descrição ou marca)", key="lote_busca")
+    with col2:
+        st.write("")
+        if tipo == 'Transferência' and origem and st.button("📦 Kit da obra de origem", key="lote_kit"):
+            no_carrinho = {(linha['tipo_item'], linha['item_id']) for linha in carrinho}
+            carrinho.extend(item for item in manager.get_equipamentos_obra(obras[origem])
+                            if (item['tipo_item'], item['item_id']) not in no_carrinho)
+            st.rerun()
+
+    for item in buscar_itens(termo, limite=15) if termo else []:
+        col1, col2, col3 = st.columns([5, 2, 1])
+        with col1:
+            st.write(f"**{item['nome']}** ({item['codigo']}) · {item['status']}")
+        with col2:
+            quantidade = st.number_input("Qtd", min_value=1, value=1, key=f"lote_qtd_{item['tipo_item']}_{item['id']}",
+                                         label_visibility="collapsed",
+                                         disabled=item['tipo_item'] == 'equipamento_eletrico')
+        with col3:
+            if st.button("➕", key=f"lote_add_{item['tipo_item']}_{item['id']}"):
+                carrinho.append({'tipo_item': item['tipo_item'], 'item_id': item['id'], 'codigo': item['codigo'],
+                                 'nome': item['nome'], 'quantidade': quantidade})
+                st.rerun()
+
+    st.markdown(f"#### 🛒 Itens do lote ({len(carrinho)})")
+    if not carrinho:
+        st.info("Busque itens acima para montar o lote.")
+        return
+
+    editado = st.data_editor(
+        pd.DataFrame(carrinho),
+        column_config={
+            'tipo_item': st.column_config.TextColumn('Tipo', disabled=True),
+            'item_id': None,
+            'codigo': st.column_config.TextColumn('Código', disabled=True),
+            'nome': st.column_config.TextColumn('Item', disabled=True),
+            'quantidade': st.column_config.NumberColumn('Quantidade', min_value=1),
+        },
+        num_rows="dynamic", hide_index=True, width='stretch', key="lote_editor"
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🗑️ Esvaziar", key="lote_limpar"):
+            st.session_state.carrinho_movimentacao = []
+            st.rerun()
+    with col2:
+        if st.button(f"💾 Registrar {len(editado)} movimentações", type="primary", key="lote_registrar"):
+            dados = {
+                'tipo': tipo,
+                'obra_origem_id': obras.get(origem) if tipo == 'Transferência' else None,
+                'obra_destino_id': obras.get(destino),
+                'responsavel_destino_id': responsaveis.get(responsavel),
+                'motivo': motivo or None,
+                'observacoes': observacoes or None,
+            }
+            linhas = editado.dropna(subset=['item_id']).to_dict('records')
+            ids, erros = manager.create_movimentacoes_lote(linhas, dados, user_data['id'])
+            if erros:
+                for erro in erros:
+                    st.error(f"❌ {erro}")
+            else:
+                st.session_state.carrinho_movimentacao = []
+                st.success(f"✅ {len(ids)} movimentações registradas em um único lote")
+
 # Função principal da página
 def show_movimentacoes_page():
     """Interface principal das movimentações"""
@@ -660,7 +1041,7 @@ def show_movimentacoes_page():
     manager = MovimentacoesManager()
 
     # Abas principais
-    tab1, tab2, tab3 = st.tabs(["📋 Histórico", "➕ Nova Movimentação", "📊 Relatórios"])
+    tab1, tab2, tab_lote, tab3 = st.tabs(["📋 Histórico", "➕ Nova Movimentação", "🛒 Movimentação em Lote", "📊 Relatórios"])
 
     with tab1:
         st.subheader("Histórico de Movimentações")
@@ -693,10 +1074,20 @@ def show_movimentacoes_page():
         if filtro_data_fim:
             filters['data_fim'] = filtro_data_fim.strftime('%Y-%m-%d')
 
-        # Buscar movimentações
-        df = manager.get_movimentacoes(filters)  # type: ignore
-        if not df.empty:
-            st.info(f"📋 {len(df)} movimentações encontradas")
+        # Paginação por keyset: pilha de cursores reiniciada quando os filtros mudam
+        por_pagina = 50
+        assinatura_filtros = str(sorted(filters.items()))
+        if st.session_state.get('mov_filtros') != assinatura_filtros:
+            st.session_state.mov_filtros = assinatura_filtros
+            st.session_state.mov_cursores = []
+        cursores: list[dict[str, Any]] = st.session_state.mov_cursores
+        cursor_atual = cursores[-1] if cursores else None
+
+        # Buscar somente a página exibida
+        pagina = manager.get_movimentacoes_pagina(filters, limite=por_pagina, cursor_pagina=cursor_atual)
+        movimentacoes = pagina['itens']
+        if movimentacoes:
+            st.info(f"📋 Página {len(cursores) + 1}: {len(movimentacoes)} movimentações")
             
             # Cabeçalho da tabela
             cols = st.columns([2, 1.5, 3, 1, 2, 2, 2, 1.5])
@@ -719,8 +1110,8 @@ def show_movimentacoes_page():
             
             st.divider()
             
-            # Iterar sobre as movimentações
-            for idx, row in df.iterrows():
+            # Iterar sobre as movimentações da página
+            for idx, row in enumerate(movimentacoes):
                 cols = st.columns([2, 1.5, 3, 1, 2, 2, 2, 1.5])
                 
                 with cols[0]:
@@ -774,6 +1165,17 @@ def show_movimentacoes_page():
                         _show_modal_devolucao(mov_id, row, manager, user_data)
                 
                 st.divider()
+
+            # Navegação entre páginas
+            col_nav1, col_nav2, col_nav3 = st.columns([1, 2, 1])
+            with col_nav1:
+                if cursores and st.button("⬅️ Mais recentes"):
+                    cursores.pop()
+                    st.rerun()
+            with col_nav3:
+                if pagina['proximo_cursor'] and st.button("Mais antigas ➡️"):
+                    cursores.append(pagina['proximo_cursor'])
+                    st.rerun()
         else:
             st.info("📭 Nenhuma movimentação encontrada com os filtros aplicados.")
 
@@ -859,20 +1261,26 @@ def show_movimentacoes_page():
             else:
                 st.warning("⚠️ Nenhum equipamento manual cadastrado.")
 
+    with tab_lote:
+        if auth_manager.check_permission(user_data['perfil'], "create"):
+            st.subheader("Movimentação em Lote")
+            _show_carrinho_movimentacoes(manager, user_data)
+        else:
+            st.error("❌ Você não tem permissão para criar movimentações.")
+
     # Relatórios (aba 3)
     with tab3:
         st.subheader("Relatórios de Movimentações")
-        df_stats = manager.get_movimentacoes({})
-        if not df_stats.empty:
+        resumo = manager.get_resumo_relatorio()
+        if resumo['por_tipo']:
             col1, col2 = st.columns(2)
             with col1:
-                tipo_counts = df_stats['tipo'].value_counts()
                 st.plotly_chart(  # type: ignore
                     {
                         'data': [{
                             'type': 'pie',
-                            'labels': tipo_counts.index.tolist(),
-                            'values': tipo_counts.values.tolist(),  # type: ignore
+                            'labels': [r['tipo'] for r in resumo['por_tipo']],
+                            'values': [r['total'] for r in resumo['por_tipo']],
                             'title': 'Movimentações por Tipo'
                         }],
                         'layout': {'title': 'Distribuição por Tipo'}
@@ -880,13 +1288,12 @@ def show_movimentacoes_page():
                     width='stretch'
                 )
             with col2:
-                motivo_counts = df_stats['motivo'].value_counts().head(10)
                 st.plotly_chart(  # type: ignore
                     {
                         'data': [{
                             'type': 'bar',
-                            'x': motivo_counts.values.tolist(),  # type: ignore
-                            'y': motivo_counts.index.tolist(),
+                            'x': [r['total'] for r in resumo['por_motivo']],
+                            'y': [r['motivo'] for r in resumo['por_motivo']],
                             'orientation': 'h'
                         }],
                         'layout': {
@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import date  # type: ignore
 from database.connection import db  # type: ignore
 from modules.auth import auth_manager
+from modules.cache_compartilhado import cache_compartilhado
 from typing import Any
 
 
@@ -52,6 +53,7 @@ class ObrasManager:
             # Commit a transação
             conn.commit()
             print(f"DEBUG: Commit executado com sucesso")
+            cache_compartilhado.invalidar('obras')
 
             # Log da ação
             auth_manager.log_action(
@@ -71,62 +73,62 @@ class ObrasManager:
     def get_obras(self, filters: dict[str, Any] | None = None) -> pd.DataFrame:
         """Busca obras com filtros"""
         try:
-            cursor = self.db.get_connection().cursor()  # type: ignore
-
-            query = """
-                SELECT 
-                    id, codigo, nome, endereco, cidade, estado, cep, status,
-                    responsavel, telefone, email, observacoes,
-                    data_inicio, data_previsao, data_conclusao,
-                    valor_orcado, valor_gasto, data_criacao
-                FROM obras
-                WHERE 1=1
-            """
-            params = []
-
-            if filters:
-                if filters.get('nome'):
-                    query += " AND nome ILIKE %s"
-                    params.append(f"%{filters['nome']}%")  # type: ignore
-                if filters.get('status'):
-                    query += " AND status ILIKE %s"
-                    params.append(filters['status'])  # type: ignore
-                if filters.get('responsavel'):
-                    query += " AND responsavel ILIKE %s"
-                    params.append(f"%{filters['responsavel']}%")  # type: ignore
-
-            query += " ORDER BY nome"
-
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-
-            # Conversão robusta para DataFrame
-            if results:
-                # Converte para lista de dicts se não for
-                if results and hasattr(results[0], '_asdict'):
-                    # Se é namedtuple
-                    data_list = [row._asdict() for row in results]
-                elif results and isinstance(results[0], dict):
-                    # Se já é dict (RealDictRow)
-                    data_list = [dict(row) for row in results]
-                else:
-                    # Se é tupla, criar dict manualmente
-                    columns = [
-                        'id', 'codigo', 'nome', 'endereco', 'cidade', 'estado', 'cep', 'status',
-                        'responsavel', 'telefone', 'email', 'observacoes',
-                        'data_inicio', 'data_previsao', 'data_conclusao',
-                        'valor_orcado', 'valor_gasto', 'data_criacao'
-                    ]
-                    data_list = [dict(zip(columns, row)) for row in results]
-                
-                return pd.DataFrame(data_list)
-            else:
-                return pd.DataFrame()
+            data_list = cache_compartilhado.obter_ou_calcular(
+                'obras.lista', filters, ('obras',), lambda: self._consultar_obras(filters)
+            )
+            return pd.DataFrame(data_list) if data_list else pd.DataFrame()
 
         except Exception as e:
             st.error(f"Erro ao buscar obras: {e}")
             return pd.DataFrame()
 
+    def _consultar_obras(self, filters: dict[str, Any] | None) -> list[dict[str, Any]]:
+        """Linhas de obras para os filtros (resultado guardado no cache compartilhado)"""
+        cursor = self.db.get_connection().cursor()  # type: ignore
+
+        query = """
+            SELECT 
+                id, codigo, nome, endereco, cidade, estado, cep, status,
+                responsavel, telefone, email, observacoes,
+                data_inicio, data_previsao, data_conclusao,
+                valor_orcado, valor_gasto, data_criacao
+            FROM obras
+            WHERE 1=1
+        """
+        params = []
+
+        if filters:
+            if filters.get('nome'):
+                query += " AND nome ILIKE %s"
+                params.append(f"%{filters['nome']}%")  # type: ignore
+            if filters.get('status'):
+                query += " AND status ILIKE %s"
+                params.append(filters['status'])  # type: ignore
+            if filters.get('responsavel'):
+                query += " AND responsavel ILIKE %s"
+                params.append(f"%{filters['responsavel']}%")  # type: ignore
+
+        query += " ORDER BY nome"
+
+        cursor.execute(query, params)
+        results = cursor.fetchall()
+
+        # Conversão robusta para lista de dicts
+        if results and hasattr(results[0], '_asdict'):
+            # Se é namedtuple
+            return [row._asdict() for row in results]
+        if results and isinstance(results[0], dict):
+            # Se já é dict (RealDictRow)
+            return [dict(row) for row in results]
+        # Se é tupla, criar dict manualmente
+        columns = [
+            'id', 'codigo', 'nome', 'endereco', 'cidade', 'estado', 'cep', 'status',
+            'responsavel', 'telefone', 'email', 'observacoes',
+            'data_inicio', 'data_previsao', 'data_conclusao',
+            'valor_orcado', 'valor_gasto', 'data_criacao'
+        ]
+        return [dict(zip(columns, row)) for row in results]
+
     def update_obra(self, obra_id: int, data: dict[str, Any]) -> bool:
         """Atualiza uma obra/departamento"""
         try:
@@ -148,6 +150,7 @@ class ObrasManager:
             ))
 
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('obras')
 
             auth_manager.log_action(
                 data.get('criado_por', 1),
@@ -169,6 +172,7 @@ class ObrasManager:
 
             cursor.execute("DELETE FROM obras WHERE id = %s", (obra_id,))
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('obras')
 
             auth_manager.log_action(
                 1,
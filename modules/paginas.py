@@ -0,0 +1,87 @@
+"""
+Sistema de Inventário Web - Registro das páginas do menu
+Mapeia cada opção do menu lateral para a chave de permissão, o ícone e a função
+da página, importada só quando a página é aberta
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class Pagina:
+    """Opção do menu lateral"""
+    nome: str
+    permissao: str
+    icone: str
+    modulo: str | None  # None: página desenhada pelo próprio main.py
+    funcao: str | None = None
+
+
+# Ordem do menu. Nenhum módulo de página é importado aqui.
+PAGINAS: tuple[Pagina, ...] = (
+    Pagina("Dashboard", "dashboard", "speedometer2", None),
+    Pagina("Insumos", "insumos", "box-seam", 'modules.insumos', 'show_insumos_page'),
+    Pagina("Equipamentos Elétricos", "equipamentos_eletricos", "lightning-charge",
+           'modules.equipamentos_eletricos', 'show_equipamentos_eletricos_page'),
+    Pagina("Equipamentos Manuais", "equipamentos_manuais", "tools",
+           'modules.equipamentos_manuais', 'show_equipamentos_manuais_page'),
+    Pagina("Movimentações", "movimentacao", "arrow-left-right",
+           'modules.movimentacoes', 'show_movimentacoes_page'),
+    Pagina("Obras/Departamentos", "obras", "building", 'modules.obras', 'show_obras_page'),
+    Pagina("Responsáveis", "responsaveis", "people", 'modules.responsaveis', 'show_responsaveis_page'),
+    Pagina("Relatórios", "relatorios", "file-earmark-text", 'modules.relatorios', 'show_relatorios_page'),
+    Pagina("Auditoria Completa", "auditoria_avancada", "shield-check",
+           'modules.auditoria_avancada', 'show_auditoria_interface'),
+    Pagina("Usuários", "usuarios", "person-plus", 'modules.usuarios', 'show_usuarios_page'),
+    Pagina("Configurações", "configuracoes", "gear", 'modules.configuracoes', 'show_configuracoes_page'),
+    Pagina("QR/Códigos de Barras", "qr_codes", "qr-code", 'modules.barcode_utils', 'show_barcode_page'),
+    Pagina("Reservas", "reservas", "calendar-check", 'modules.reservas', 'show_reservas_page'),
+    Pagina("Manutenção Preventiva", "manutencao", "tools",
+           'modules.manutencao_preventiva', 'show_manutencao_page'),
+    Pagina("Dashboard Executivo", "dashboard_exec", "graph-up",
+           'modules.dashboard_executivo', 'show_dashboard_executivo_page'),
+    Pagina("Localização", "localizacao", "geo-alt", 'modules.controle_localizacao', 'show_localizacao_page'),
+    Pagina("Gestão Financeira", "financeiro", "currency-dollar",
+           'modules.gestao_financeira', 'show_gestao_financeira_page'),
+    Pagina("Análise Preditiva", "analise", "graph-up-arrow",
+           'modules.analise_preditiva', 'show_analise_preditiva_page'),
+    Pagina("Gestão de Subcontratados", "subcontratados", "building-gear",
+           'modules.gestao_subcontratados', 'show_subcontratados_page'),
+    Pagina("Relatórios Customizáveis", "relatorios_custom", "file-earmark-bar-graph",
+           'modules.relatorios_customizaveis', 'show_relatorios_customizaveis_page'),
+    Pagina("Métricas Performance", "metricas", "speedometer",
+           'modules.metricas_performance', 'show_metricas_performance_page'),
+    Pagina("Backup Automático", "backup_automatico", "cloud-arrow-up",
+           'modules.backup_automatico', 'show_backup_interface'),
+    Pagina("LGPD/Compliance", "lgpd", "shield-check", 'modules.lgpd_compliance', 'show_lgpd_compliance_page'),
+    Pagina("Orçamentos e Cotações", "orcamentos", "calculator",
+           'modules.orcamentos_cotacoes', 'show_orcamentos_cotacoes_page'),
+    Pagina("Sistema de Faturamento", "faturamento", "receipt",
+           'modules.sistema_faturamento', 'show_faturamento_page'),
+    Pagina("Integração ERP/SAP", "integracao", "diagram-3",
+           'modules.integracao_erp', 'show_erp_integration_page'),
+)
+
+PAGINAS_POR_NOME: dict[str, Pagina] = {pagina.nome: pagina for pagina in PAGINAS}
+
+
+def paginas_permitidas(permissoes: dict[str, Any], admin: bool = False) -> list[Pagina]:
+    """Páginas visíveis no menu; o dashboard é sempre permitido"""
+    if admin:
+        return list(PAGINAS)
+    return [pagina for pagina in PAGINAS
+            if pagina.permissao == 'dashboard' or permissoes.get(pagina.permissao, False)]
+
+
+def carregar_pagina(nome: str) -> Callable[[], Any]:
+    """Importa o módulo da página na primeira abertura e devolve sua função.
+
+    Levanta KeyError para páginas fora do registro e ImportError quando o
+    módulo (ou uma dependência opcional dele) não pode ser importado.
+    """
+    pagina = PAGINAS_POR_NOME[nome]
+    if pagina.modulo is None or pagina.funcao is None:
+        raise KeyError(f"Página sem módulo registrado: {nome}")
+    return getattr(importlib.import_module(pagina.modulo), pagina.funcao)
@@ -0,0 +1,185 @@
+"""
+Sistema de Inventário Web - Previsão de consumo em lote
+Carrega o consumo diário de todos os insumos em uma consulta agrupada, monta a
+matriz item x dia e ajusta tendência e sazonalidade semanal de todos os itens
+de uma vez (mínimos quadrados com a mesma matriz de projeto para todos).
+O resultado vai para previsoes_consumo (migração 0023), lida pela tela.
+
+Uso (agendar uma vez por noite):
+    python -m modules.previsao_consumo              # 90 dias de histórico, 90 de previsão
+    python -m modules.previsao_consumo --historico 180 --horizonte 60
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+DIAS_HISTORICO = 90
+HORIZONTE = 90
+MINIMO_DIAS_COM_CONSUMO = 7  # abaixo disso a previsão fica como 'insuficiente'
+# Com menos dias que isso não há semanas suficientes para estimar a sazonalidade
+MINIMO_DIAS_SAZONALIDADE = 28
+# Valores de movimentacoes.tipo que tiram insumo do almoxarifado: 'Saída'
+# (lançamento unitário, lote e modal), 'Transferência' (lote) e 'saida'
+# (ajuste de estoque em insumos); o histórico trata todos como saída
+TIPOS_SAIDA = ('Saída', 'Transferência', 'saida')
+
+
+def montar_matriz(linhas: list[dict[str, Any]], insumo_ids: list[int], inicio: date, dias: int) -> np.ndarray:
+    """Matriz densa (itens x dias) com o consumo diário; dias sem saída ficam zerados"""
+    matriz = np.zeros((len(insumo_ids), dias))
+    if not linhas:
+        return matriz
+    posicao = {insumo_id: i for i, insumo_id in enumerate(insumo_ids)}
+    validas = [l for l in linhas if l['insumo_id'] in posicao and 0 <= (l['dia'] - inicio).days < dias]
+    if validas:
+        itens = np.fromiter((posicao[l['insumo_id']] for l in validas), dtype=np.int64, count=len(validas))
+        colunas = np.fromiter(((l['dia'] - inicio).days for l in validas), dtype=np.int64, count=len(validas))
+        valores = np.fromiter((float(l['quantidade']) for l in validas), dtype=float, count=len(validas))
+        np.add.at(matriz, (itens, colunas), valores)
+    return matriz
+
+
+def matriz_projeto(inicio: date, deslocamento: int, dias: int, sazonal: bool) -> np.ndarray:
+    """Colunas: intercepto, tendência (dias desde o início do histórico) e dummies
+    dos dias da semana (segunda-feira é a referência)"""
+    t = np.arange(deslocamento, deslocamento + dias, dtype=float)
+    colunas = [np.ones(dias), t]
+    if sazonal:
+        dia_semana = (inicio.weekday() + t.astype(np.int64)) % 7
+        colunas.extend((dia_semana == d).astype(float) for d in range(1, 7))
+    return np.column_stack(colunas)
+
+
+def ajustar(matriz: np.ndarray, inicio: date) -> tuple[np.ndarray, bool]:
+    """Coeficientes (parâmetros x itens) de todos os itens em uma única solução.
+
+    A matriz de projeto é a mesma para todos os itens, então a pseudo-inversa
+    é calculada uma vez e aplicada à matriz de consumo inteira.
+    """
+    dias = matriz.shape[1]
+    sazonal = dias >= MINIMO_DIAS_SAZONALIDADE
+    X = matriz_projeto(inicio, 0, dias, sazonal)
+    return np.linalg.pinv(X) @ matriz.T, sazonal
+
+
+def prever(coeficientes: np.ndarray, inicio: date, dias_historico: int, horizonte: int,
+           sazonal: bool) -> np.ndarray:
+    """Consumo previsto (itens x horizonte) para os dias seguintes ao histórico"""
+    X = matriz_projeto(inicio, dias_historico, horizonte, sazonal)
+    return np.clip((X @ coeficientes).T, 0, None)
+
+
+def calcular_previsoes(matriz: np.ndarray, inicio: date, horizonte: int = HORIZONTE) -> dict[str, np.ndarray]:
+    """Ajuste, previsão e métricas de qualidade de todos os itens (vetorizado)"""
+    dias = matriz.shape[1]
+    coeficientes, sazonal = ajustar(matriz, inicio)
+    ajustado = (matriz_projeto(inicio, 0, dias, sazonal) @ coeficientes).T
+    erro = np.sqrt(np.mean((matriz - ajustado) ** 2, axis=1))
+    media = matriz.mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacao = np.where(media > 0, erro / media, np.inf)
+    dias_com_consumo = np.count_nonzero(matriz, axis=1)
+
+    confianca = np.select(
+        [dias_com_consumo < MINIMO_DIAS_COM_CONSUMO, variacao < 0.3, variacao < 0.6],
+        ['insuficiente', 'alta', 'media'], default='baixa'
+    )
+    return {
+        'previsao': prever(coeficientes, inicio, dias, horizonte, sazonal),
+        'tendencia': coeficientes[1],
+        'media': media,
+        'erro': erro,
+        'variacao': variacao,
+        'dias_com_consumo': dias_com_consumo,
+        'confianca': confianca,
+    }
+
+
+def carregar_consumo(database, inicio: date, fim: date) -> tuple[list[int], list[dict[str, Any]]]:
+    """Insumos ativos e o consumo diário de todos eles em [inicio, fim)"""
+    with database.cursor() as cursor:
+        cursor.execute("SELECT id FROM insumos WHERE ativo = TRUE ORDER BY id")
+        insumo_ids = [row['id'] for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT item_id as insumo_id, data_movimentacao::date as dia, SUM(quantidade) as quantidade
+            FROM movimentacoes
+            WHERE tipo_item = 'insumo'
+              AND tipo = ANY(%s)
+              AND data_movimentacao >= %s AND data_movimentacao < %s
+            GROUP BY item_id, data_movimentacao::date
+        """, (list(TIPOS_SAIDA), inicio, fim))
+        return insumo_ids, [dict(row) for row in cursor.fetchall()]
+
+
+def gerar_previsoes(database, dias_historico: int = DIAS_HISTORICO, horizonte: int = HORIZONTE,
+                    hoje: date | None = None) -> int:
+    """Recalcula as previsões de todo o catálogo e grava em previsoes_consumo.
+
+    O histórico termina ontem (o dia corrente ainda está incompleto) e a
+    previsão começa hoje. Devolve o número de insumos gravados.
+    """
+    from psycopg2.extras import execute_values
+
+    hoje = hoje or date.today()
+    inicio = hoje - timedelta(days=dias_historico)
+    insumo_ids, linhas = carregar_consumo(database, inicio, hoje)
+    if not insumo_ids:
+        return 0
+
+    matriz = montar_matriz(linhas, insumo_ids, inicio, dias_historico)
+    r = calcular_previsoes(matriz, inicio, horizonte)
+    valores = [
+        (insumo_id, hoje, np.round(r['previsao'][i], 3).tolist(), float(r['tendencia'][i]),
+         float(r['media'][i]), float(r['variacao'][i]) if np.isfinite(r['variacao'][i]) else None,
+         float(r['erro'][i]), dias_historico, int(r['dias_com_consumo'][i]), str(r['confianca'][i]))
+        for i, insumo_id in enumerate(insumo_ids)
+    ]
+
+    with database.transaction() as cursor:
+        execute_values(cursor, """
+            INSERT INTO previsoes_consumo (
+                insumo_id, inicio_previsao, previsao_diaria, tendencia_diaria,
+                consumo_medio_historico, variacao, erro_medio, dias_historico,
+                dias_com_consumo, confianca
+            ) VALUES %s
+            ON CONFLICT (insumo_id) DO UPDATE SET
+                gerado_em = CURRENT_TIMESTAMP,
+                inicio_previsao = EXCLUDED.inicio_previsao,
+                previsao_diaria = EXCLUDED.previsao_diaria,
+                tendencia_diaria = EXCLUDED.tendencia_diaria,
+                consumo_medio_historico = EXCLUDED.consumo_medio_historico,
+                variacao = EXCLUDED.variacao,
+                erro_medio = EXCLUDED.erro_medio,
+                dias_historico = EXCLUDED.dias_historico,
+                dias_com_consumo = EXCLUDED.dias_com_consumo,
+                confianca = EXCLUDED.confianca
+        """, valores, page_size=1000)
+        # Insumos desativados deixam de ter previsão
+        cursor.execute("DELETE FROM previsoes_consumo WHERE insumo_id <> ALL(%s)", (insumo_ids,))
+    return len(valores)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Previsão de consumo de todos os insumos')
+    parser.add_argument('--historico', type=int, default=DIAS_HISTORICO, help='dias de histórico')
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE, help='dias de previsão')
+    args = parser.parse_args(argv)
+
+    os.environ['DB_AUTO_MIGRATE'] = '0'
+    from database.connection import db
+
+    try:
+        total = gerar_previsoes(db, args.historico, args.horizonte)
+        print(f"OK - Previsões geradas para {total} insumos")
+    finally:
+        db.close_connection()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Sistema de Inventário Web - Razão do estoque de insumos
+Consulta de saldos em qualquer data (fotografia mais próxima + lançamentos
+posteriores), geração das fotografias periódicas e reconciliação de
+insumos.quantidade_atual com a razão (migração 0022)
+
+Uso:
+    python -m modules.razao_estoque snapshots             # fotografias pendentes até ontem
+    python -m modules.razao_estoque reconciliar           # lista divergências
+    python -m modules.razao_estoque reconciliar --corrigir
+"""
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any
+
+# Saldo na razão: fotografia mais recente antes de %(momento)s e lançamentos
+# do dia seguinte a ela até o momento. {filtro} restringe item/localização.
+_CONSULTA_SALDOS = """
+    WITH base AS (
+        SELECT MAX(data) as data FROM estoque_snapshots WHERE data < %(momento)s::date
+    )
+    SELECT insumo_id, localizacao, SUM(saldo) as saldo
+    FROM (
+        SELECT s.insumo_id, s.localizacao, s.saldo
+        FROM estoque_snapshots s JOIN base ON s.data = base.data
+        WHERE TRUE {filtro_s}
+        UNION ALL
+        SELECT l.insumo_id, l.localizacao, l.delta
+        FROM estoque_lancamentos l, base
+        WHERE l.registrado_em >= COALESCE((base.data + 1)::timestamp, '-infinity'::timestamp)
+          AND l.registrado_em < %(momento)s {filtro_l}
+    ) saldos
+    GROUP BY insumo_id, localizacao
+    HAVING SUM(saldo) <> 0
+"""
+
+
+def _consulta_saldos(insumo_id: int | None = None, localizacao: str | None = None) -> str:
+    filtros = []
+    if insumo_id is not None:
+        filtros.append("{a}.insumo_id = %(insumo_id)s")
+    if localizacao is not None:
+        filtros.append("{a}.localizacao = %(localizacao)s")
+    filtro = ''.join(f" AND {f}" for f in filtros)
+    return _CONSULTA_SALDOS.format(filtro_s=filtro.format(a='s'), filtro_l=filtro.format(a='l'))
+
+
+def datas_snapshot(inicio: date, fim: date, periodo: str = 'diario') -> list[date]:
+    """Datas de fotografia entre inicio e fim: todos os dias ou o último dia de cada mês"""
+    datas = []
+    dia = inicio
+    while dia <= fim:
+        if periodo != 'mensal' or (dia + timedelta(days=1)).day == 1:
+            datas.append(dia)
+        dia += timedelta(days=1)
+    return datas
+
+
+class RazaoEstoqueManager:
+    """Consultas e rotinas sobre a razão do estoque (tabela estoque_lancamentos)"""
+
+    def __init__(self, database=None):
+        if database is None:
+            from database.connection import db as database
+        self.db = database
+
+    def saldo_em(self, insumo_id: int, momento: datetime | date,
+                 localizacao: str | None = None) -> float:
+        """Saldo do insumo no instante informado (todas as localizações ou uma)"""
+        params = {'momento': momento, 'insumo_id': insumo_id, 'localizacao': localizacao}
+        with self.db.cursor() as cursor:
+            cursor.execute(_consulta_saldos(insumo_id, localizacao), params)
+            return float(sum(row['saldo'] for row in cursor.fetchall()))
+
+    def inventario_em(self, momento: datetime | date,
+                      localizacao: str | None = None) -> list[dict[str, Any]]:
+        """Saldos de todos os insumos no instante informado, por localização"""
+        params = {'momento': momento, 'localizacao': localizacao}
+        with self.db.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT r.insumo_id, i.codigo, i.descricao, i.unidade, r.localizacao, r.saldo
+                FROM ({_consulta_saldos(localizacao=localizacao)}) r
+                LEFT JOIN insumos i ON i.id = r.insumo_id
+                ORDER BY i.descricao, r.localizacao
+            """, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def historico(self, insumo_id: int, inicio: datetime | date, fim: datetime | date) -> list[dict[str, Any]]:
+        """Lançamentos do insumo no intervalo [inicio, fim)"""
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, localizacao, delta, saldo_local, tipo, registrado_em
+                FROM estoque_lancamentos
+                WHERE insumo_id = %s AND registrado_em >= %s AND registrado_em < %s
+                ORDER BY registrado_em, id
+            """, (insumo_id, inicio, fim))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def gerar_snapshots(self, ate: date | None = None, periodo: str | None = None) -> list[date]:
+        """Gera as fotografias que faltam até `ate` (padrão: ontem).
+
+        O dia corrente nunca é fotografado: lançamentos de transações ainda
+        abertas poderiam ficar de fora. ESTOQUE_SNAPSHOT_PERIODO escolhe entre
+        'diario' (padrão) e 'mensal'.
+        """
+        ate = min(ate or date.today() - timedelta(days=1), date.today() - timedelta(days=1))
+        periodo = periodo or str(self.db.get_setting('ESTOQUE_SNAPSHOT_PERIODO', 'diario')).lower()
+
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT (SELECT MAX(data) FROM estoque_snapshots) as ultima,
+                       (SELECT MIN(registrado_em)::date FROM estoque_lancamentos) as primeiro
+            """)
+            limites = cursor.fetchone()
+        if limites['ultima']:
+            inicio = limites['ultima'] + timedelta(days=1)
+        elif limites['primeiro']:
+            inicio = limites['primeiro']
+        else:
+            return []
+
+        geradas = []
+        for dia in datas_snapshot(inicio, ate, periodo):
+            with self.db.transaction() as cursor:
+                cursor.execute("SELECT estoque_gerar_snapshot(%s)", (dia,))
+            geradas.append(dia)
+        return geradas
+
+    def reconciliar(self, corrigir: bool = False) -> list[dict[str, Any]]:
+        """Compara insumos.quantidade_atual com o saldo da razão por localização.
+
+        Devolve as divergências. Com `corrigir`, grava um lançamento de
+        reconciliação para cada uma, sem alterar a tabela de insumos; as
+        escritas em insumos esperam até o fim para a comparação ser exata.
+        """
+        with self.db.transaction() as cursor:
+            if corrigir:
+                cursor.execute("LOCK TABLE insumos IN SHARE MODE")
+            cursor.execute(f"""
+                WITH razao AS ({_consulta_saldos()}),
+                esperado AS (
+                    SELECT id as insumo_id, COALESCE(localizacao, '') as localizacao,
+                           COALESCE(quantidade_atual, 0) as saldo
+                    FROM insumos
+                    WHERE COALESCE(quantidade_atual, 0) <> 0
+                )
+                SELECT COALESCE(e.insumo_id, r.insumo_id) as insumo_id,
+                       COALESCE(e.localizacao, r.localizacao) as localizacao,
+                       COALESCE(e.saldo, 0) as quantidade_atual,
+                       COALESCE(r.saldo, 0) as saldo_razao
+                FROM esperado e
+                FULL OUTER JOIN razao r ON r.insumo_id = e.insumo_id AND r.localizacao = e.localizacao
+                WHERE COALESCE(e.saldo, 0) <> COALESCE(r.saldo, 0)
+                ORDER BY 1, 2
+            """, {'momento': datetime.max})
+            divergencias = [dict(row) for row in cursor.fetchall()]
+
+            if corrigir:
+                for item in divergencias:
+                    cursor.execute("""
+                        INSERT INTO estoque_lancamentos (insumo_id, localizacao, delta, saldo_local, tipo)
+                        VALUES (%s, %s, %s, %s, 'reconciliacao')
+                    """, (item['insumo_id'], item['localizacao'],
+                          item['quantidade_atual'] - item['saldo_razao'], item['quantidade_atual']))
+        return divergencias
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else ''
+    if comando not in ('snapshots', 'reconciliar'):
+        print(__doc__)
+        return 2
+
+    os.environ['DB_AUTO_MIGRATE'] = '0'
+    from database.connection import db
+
+    razao = RazaoEstoqueManager(db)
+    try:
+        if comando == 'snapshots':
+            for dia in razao.gerar_snapshots():
+                print(f"OK - Fotografia do estoque: {dia:%d/%m/%Y}")
+            return 0
+
+        divergencias = razao.reconciliar(corrigir='--corrigir' in argv)
+        for item in divergencias:
+            print(f"DIVERGÊNCIA - Insumo {item['insumo_id']} ({item['localizacao'] or 'sem localização'}): "
+                  f"quantidade_atual {item['quantidade_atual']}, razão {item['saldo_razao']}")
+        if not divergencias:
+            print("OK - Razão confere com quantidade_atual")
+        elif '--corrigir' in argv:
+            print(f"OK - {len(divergencias)} lançamentos de reconciliação gravados")
+        return 1 if divergencias and '--corrigir' not in argv else 0
+    finally:
+        db.close_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
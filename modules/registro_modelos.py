@@ -0,0 +1,227 @@
+"""
+Sistema de Inventário Web - Registro de modelos de Machine Learning
+Versões treinadas são gravadas em disco (ML_MODELOS_DIR) com os metadados em
+modelos_ml (migração 0024). A versão ativa de cada tipo é carregada uma vez
+por processo, na primeira predição, e compartilhada entre as sessões.
+
+O treino é uma etapa offline:
+    python -m modules.registro_modelos treinar              # registra novas versões
+    python -m modules.registro_modelos treinar --promover   # registra e ativa
+    python -m modules.registro_modelos promover predicao_manutencao 3
+    python -m modules.registro_modelos listar
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+
+# Tempo até conferir de novo no banco se a versão ativa mudou (promoção feita
+# por outro processo)
+TTL_VERIFICACAO = 60
+
+# Artefatos carregados: tipo_modelo -> (id em modelos_ml, verificado_em, artefato)
+_carregados: dict[str, tuple[int, float, dict[str, Any]]] = {}
+_lock = threading.Lock()
+
+
+class RegistroModelos:
+    """Versões de modelos em disco com metadados em modelos_ml"""
+
+    def __init__(self, database=None, diretorio: str | Path | None = None):
+        if database is None:
+            from database.connection import db as database
+        self.db = database
+        self.diretorio = Path(diretorio or database.get_setting('ML_MODELOS_DIR', 'modelos_ml'))
+        self.ttl = float(database.get_setting('ML_REGISTRO_TTL', TTL_VERIFICACAO))
+
+    def registrar(self, tipo_modelo: str, nome: str, algoritmo: str, artefato: dict[str, Any],
+                  metricas: dict[str, Any], parametros: dict[str, Any] | None = None,
+                  criado_por: int | None = None, promover: bool = False) -> int:
+        """Grava uma nova versão do modelo e devolve o número dela.
+
+        Um advisory lock por tipo serializa registros concorrentes até o
+        commit, então dois treinos não recebem a mesma versão. O arquivo é
+        escrito com nome temporário e só ganha o nome da versão depois do
+        INSERT; se algo falhar antes, o temporário é removido. Com `promover`,
+        a versão nova vira a ativa na mesma transação.
+        """
+        conteudo = pickle.dumps(artefato, protocol=pickle.HIGHEST_PROTOCOL)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        temporario = None
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (_chave_lock(tipo_modelo),))
+                cursor.execute("""
+                    SELECT COALESCE(MAX(versao_modelo), 0) + 1 as versao
+                    FROM modelos_ml WHERE tipo_modelo = %s
+                """, (tipo_modelo,))
+                versao = cursor.fetchone()['versao']
+
+                caminho = self.diretorio / f"{tipo_modelo}-v{versao}.pkl"
+                with tempfile.NamedTemporaryFile(dir=self.diretorio, delete=False) as arquivo:
+                    temporario = Path(arquivo.name)
+                    arquivo.write(conteudo)
+
+                cursor.execute("""
+                    INSERT INTO modelos_ml (
+                        nome_modelo, tipo_modelo, algoritmo, parametros_modelo, metricas_performance,
+                        versao_modelo, caminho_artefato, hash_artefato, criado_por, ativo,
+                        acuracia, f1_score
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, FALSE, %s, %s)
+                    RETURNING id
+                """, (
+                    nome, tipo_modelo, algoritmo, json.dumps(parametros or {}), json.dumps(metricas),
+                    versao, str(caminho), hashlib.sha256(conteudo).hexdigest(), criado_por,
+                    *(float(metricas[m]) if metricas.get(m) is not None else None for m in ('accuracy', 'f1_score'))
+                ))
+                if promover:
+                    self._ativar(cursor, tipo_modelo, cursor.fetchone()['id'])
+                # Ainda sob o lock: ninguém mais escreve esta versão. Se o commit
+                # falhar, o arquivo fica órfão e é sobrescrito pelo próximo registro
+                os.replace(temporario, caminho)
+                temporario = None
+        finally:
+            if temporario is not None:
+                temporario.unlink(missing_ok=True)
+        if promover:
+            _descartar(tipo_modelo)
+        return versao
+
+    def promover(self, tipo_modelo: str, versao: int) -> bool:
+        """Torna `versao` a ativa do tipo (também serve para voltar a uma anterior)"""
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                SELECT id FROM modelos_ml
+                WHERE tipo_modelo = %s AND versao_modelo = %s AND caminho_artefato IS NOT NULL
+                FOR UPDATE
+            """, (tipo_modelo, versao))
+            row = cursor.fetchone()
+            if not row:
+                return False
+            self._ativar(cursor, tipo_modelo, row['id'])
+        # Este processo passa a servir a versão nova já na próxima predição;
+        # os outros percebem a troca em até ML_REGISTRO_TTL segundos
+        _descartar(tipo_modelo)
+        return True
+
+    @staticmethod
+    def _ativar(cursor, tipo_modelo: str, modelo_id: int):
+        # Desativa antes de ativar: o índice único parcial admite uma ativa por tipo
+        cursor.execute("""
+            UPDATE modelos_ml SET ativo = FALSE
+            WHERE tipo_modelo = %s AND ativo AND id <> %s
+        """, (tipo_modelo, modelo_id))
+        cursor.execute("UPDATE modelos_ml SET ativo = TRUE WHERE id = %s", (modelo_id,))
+
+    def listar(self, tipo_modelo: str | None = None) -> list[dict[str, Any]]:
+        """Versões registradas, da mais recente para a mais antiga"""
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, nome_modelo, tipo_modelo, algoritmo, versao_modelo, ativo,
+                       metricas_performance, data_treino, data_ultima_predicao
+                FROM modelos_ml
+                WHERE caminho_artefato IS NOT NULL AND (%s IS NULL OR tipo_modelo = %s)
+                ORDER BY tipo_modelo, versao_modelo DESC
+            """, (tipo_modelo, tipo_modelo))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def _metadados_ativo(self, tipo_modelo: str) -> dict[str, Any] | None:
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, versao_modelo, algoritmo, metricas_performance, data_treino,
+                       caminho_artefato, hash_artefato
+                FROM modelos_ml
+                WHERE tipo_modelo = %s AND ativo
+            """, (tipo_modelo,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def carregar(self, tipo_modelo: str) -> dict[str, Any] | None:
+        """Artefato da versão ativa (modelo, scaler, ...) com 'versao' e 'metricas'.
+
+        Fica em memória no processo; a cada TTL confere no banco se outra
+        versão foi promovida. Devolve None se o tipo não tem versão ativa.
+        """
+        agora = time.monotonic()
+        with _lock:
+            carregado = _carregados.get(tipo_modelo)
+            if carregado and agora - carregado[1] < self.ttl:
+                return carregado[2]
+
+            meta = self._metadados_ativo(tipo_modelo)
+            if not meta:
+                _carregados.pop(tipo_modelo, None)
+                return None
+            if carregado and carregado[0] == meta['id']:
+                _carregados[tipo_modelo] = (meta['id'], agora, carregado[2])
+                return carregado[2]
+
+            conteudo = Path(meta['caminho_artefato']).read_bytes()
+            if hashlib.sha256(conteudo).hexdigest() != meta['hash_artefato']:
+                raise ValueError(f"Artefato de {tipo_modelo} v{meta['versao_modelo']} não confere com o registro")
+            artefato = pickle.loads(conteudo)
+            artefato.update(versao=meta['versao_modelo'], algoritmo=meta['algoritmo'],
+                            metricas=meta['metricas_performance'] or {}, data_treino=meta['data_treino'])
+            _carregados[tipo_modelo] = (meta['id'], agora, artefato)
+            return artefato
+
+
+def _chave_lock(tipo_modelo: str) -> int:
+    return zlib.crc32(f"modelos_ml:{tipo_modelo}".encode())
+
+
+def _descartar(tipo_modelo: str):
+    with _lock:
+        _carregados.pop(tipo_modelo, None)
+
+
+def limpar_cache():
+    """Descarta os modelos carregados no processo"""
+    with _lock:
+        _carregados.clear()
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else ''
+    if comando not in ('treinar', 'promover', 'listar') or (comando == 'promover' and len(argv) < 3):
+        print(__doc__)
+        return 2
+
+    os.environ['DB_AUTO_MIGRATE'] = '0'
+    from database.connection import db
+
+    registro = RegistroModelos(db)
+    try:
+        if comando == 'treinar':
+            from modules.machine_learning_avancado import MachineLearningManager
+            publicados = MachineLearningManager(registro).publicar_modelos_base(promover='--promover' in argv)
+            for tipo_modelo, versao in publicados.items():
+                print(f"OK - {tipo_modelo} v{versao} registrado")
+            return 0 if publicados else 1
+
+        if comando == 'promover':
+            if not registro.promover(argv[1], int(argv[2])):
+                print(f"ERRO - {argv[1]} v{argv[2]} não encontrado")
+                return 1
+            print(f"OK - {argv[1]} v{argv[2]} ativo")
+            return 0
+
+        for modelo in registro.listar():
+            print(f"{'*' if modelo['ativo'] else ' '} {modelo['tipo_modelo']} v{modelo['versao_modelo']} "
+                  f"({modelo['algoritmo']}, {modelo['data_treino']:%d/%m/%Y %H:%M})")
+        return 0
+    finally:
+        db.close_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Sistema de Inventário Web - Motor de regras de monitoramento IoT
+Cada condicao_sql de regras_monitoramento é lida uma vez, validada contra uma
+gramática restrita (comparações, and/or/not, aritmética, as variáveis da
+leitura e constantes) e compilada em um predicado para uma leitura e outro
+vetorizado para um lote inteiro. Sem eval: só os nós conhecidos viram funções.
+"""
+
+import ast
+import operator
+import re
+import threading
+import time
+from functools import lru_cache, reduce
+from typing import Any, Callable
+import numpy as np
+from database.connection import db
+
+# Variáveis que uma condição pode usar e o valor quando a leitura não traz o campo
+VARIAVEIS = {'valor_numerico': 0, 'valor_texto': '', 'bateria': 100, 'qualidade_sinal': 100}
+VARIAVEIS_TEXTO = {'valor_texto'}
+
+_COMPARACOES = {
+    ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt,
+    ast.LtE: operator.le, ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+_ARITMETICA = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+# Trechos em estilo SQL aceitos na condição: AND/OR/NOT, = e <>. Strings entre
+# aspas casam primeiro e ficam como estão.
+_SQL = re.compile(r"'[^']*'|\"[^\"]*\"|<>|(?<![<>!=])=(?!=)|\b(?:AND|OR|NOT)\b", re.IGNORECASE)
+
+
+def _traduzir_sql(condicao: str) -> str:
+    def trocar(m: re.Match) -> str:
+        trecho = m.group(0)
+        if trecho[0] in '\'"':
+            return trecho
+        if trecho == '<>':
+            return '!='
+        if trecho == '=':
+            return '=='
+        return f' {trecho.lower()} '
+    return _SQL.sub(trocar, condicao).strip()
+
+
+def _numero(valor: Any) -> float:
+    try:
+        return float(valor) if valor is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def valores_leitura(dados: dict[str, Any]) -> dict[str, Any]:
+    """Valores das variáveis de condição para uma leitura (número ausente ou inválido = NaN)"""
+    valores = {nome: _numero(dados.get(nome, padrao)) for nome, padrao in VARIAVEIS.items()
+               if nome not in VARIAVEIS_TEXTO}
+    valores.update({nome: str(dados.get(nome) or '') for nome in VARIAVEIS_TEXTO})
+    return valores
+
+
+def colunas_leituras(leituras: list[dict[str, Any]]) -> dict[str, np.ndarray]:
+    """Uma coluna por variável de condição para um lote de leituras"""
+    colunas = {nome: np.fromiter((_numero(d.get(nome, padrao)) for d in leituras), dtype=float, count=len(leituras))
+               for nome, padrao in VARIAVEIS.items() if nome not in VARIAVEIS_TEXTO}
+    for nome in VARIAVEIS_TEXTO:
+        texto = np.empty(len(leituras), dtype=object)
+        texto[:] = [str(d.get(nome) or '') for d in leituras]
+        colunas[nome] = texto
+    return colunas
+
+
+def _compilar_no(no: ast.AST, vetorizado: bool) -> Callable[[dict[str, Any]], Any]:
+    """Função equivalente ao nó; recusa qualquer nó fora da gramática"""
+    if isinstance(no, ast.Constant) and isinstance(no.value, (int, float, str)):
+        valor = no.value
+        return lambda v: valor
+
+    if isinstance(no, ast.Name):
+        if no.id not in VARIAVEIS:
+            raise ValueError(f"variável desconhecida: {no.id}")
+        nome = no.id
+        return lambda v: v[nome]
+
+    if isinstance(no, ast.UnaryOp) and isinstance(no.op, (ast.Not, ast.USub, ast.UAdd)):
+        operando = _compilar_no(no.operand, vetorizado)
+        if isinstance(no.op, ast.Not):
+            return (lambda v: np.logical_not(operando(v))) if vetorizado else (lambda v: not operando(v))
+        sinal = -1 if isinstance(no.op, ast.USub) else 1
+        return lambda v: sinal * operando(v)
+
+    if isinstance(no, ast.BinOp) and type(no.op) in _ARITMETICA:
+        funcao = _ARITMETICA[type(no.op)]
+        esquerda, direita = _compilar_no(no.left, vetorizado), _compilar_no(no.right, vetorizado)
+        return lambda v: funcao(esquerda(v), direita(v))
+
+    if isinstance(no, ast.BoolOp):
+        partes = [_compilar_no(p, vetorizado) for p in no.values]
+        if vetorizado:
+            juntar = np.logical_and if isinstance(no.op, ast.And) else np.logical_or
+            return lambda v: reduce(juntar, (p(v) for p in partes))
+        if isinstance(no.op, ast.And):
+            return lambda v: all(p(v) for p in partes)
+        return lambda v: any(p(v) for p in partes)
+
+    if isinstance(no, ast.Compare):
+        if not all(type(op) in _COMPARACOES for op in no.ops):
+            raise ValueError("operador de comparação não permitido")
+        operandos = [_compilar_no(o, vetorizado) for o in [no.left, *no.comparators]]
+        funcoes = [_COMPARACOES[type(op)] for op in no.ops]
+
+        def comparar(v):
+            valores = [o(v) for o in operandos]
+            resultados = (f(a, b) for f, a, b in zip(funcoes, valores, valores[1:]))
+            if vetorizado:
+                return reduce(np.logical_and, resultados)
+            return all(resultados)
+        return comparar
+
+    raise ValueError(f"expressão não permitida: {type(no).__name__}")
+
+
+class CondicaoCompilada:
+    """Condição de uma regra validada e compilada uma única vez"""
+
+    def __init__(self, condicao_sql: str):
+        self.texto = condicao_sql
+        try:
+            arvore = ast.parse(_traduzir_sql(condicao_sql), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"condição inválida '{condicao_sql}': {e.msg}") from e
+        self._predicado = _compilar_no(arvore.body, vetorizado=False)
+        self._predicado_lote = _compilar_no(arvore.body, vetorizado=True)
+
+    def avaliar(self, dados: dict[str, Any]) -> bool:
+        return self._avaliar_valores(valores_leitura(dados))
+
+    def _avaliar_valores(self, valores: dict[str, Any]) -> bool:
+        try:
+            return bool(self._predicado(valores))
+        except Exception:
+            # Tipos incompatíveis (texto contra número, divisão por zero): não aciona
+            return False
+
+    def avaliar_lote(self, colunas: dict[str, np.ndarray]) -> np.ndarray:
+        """Máscara booleana com uma posição por linha das colunas"""
+        total = len(next(iter(colunas.values())))
+        try:
+            with np.errstate(all='ignore'):
+                resultado = np.asarray(self._predicado_lote(colunas), dtype=bool)
+            return np.broadcast_to(resultado, (total,))
+        except Exception:
+            # Comparação que o numpy não faz elemento a elemento: uma linha por vez
+            return np.array([self._avaliar_valores({nome: col[i] for nome, col in colunas.items()})
+                             for i in range(total)], dtype=bool)
+
+
+@lru_cache(maxsize=1024)
+def compilar_condicao(condicao_sql: str) -> CondicaoCompilada:
+    """Condição compilada, reaproveitada para o mesmo texto; ValueError se inválida"""
+    return CondicaoCompilada(condicao_sql)
+
+
+class MotorRegras:
+    """Regras ativas compiladas em cache, com índice por (device_id, tipo_sensor).
+
+    A cada `ttl_segundos` uma consulta barata (COUNT e MAX(atualizado_em))
+    diz se alguma regra mudou; só então as regras são relidas e recompiladas.
+    `invalidar()` força a releitura na próxima avaliação.
+    """
+
+    def __init__(self, database, ttl_segundos: float = 10):
+        self.db = database
+        self.ttl = ttl_segundos
+        self._lock = threading.Lock()
+        self._regras: list[tuple[dict[str, Any], CondicaoCompilada]] | None = None
+        self._por_chave: dict[tuple[str, str | None], list[tuple[dict[str, Any], CondicaoCompilada]]] = {}
+        self._assinatura: tuple | None = None
+        self._verificado_em = 0.0
+        self.invalidas: dict[Any, str] = {}
+
+    def invalidar(self) -> None:
+        """Descarta as regras compiladas (ex.: após criar ou editar uma regra)"""
+        with self._lock:
+            self._regras = None
+            self._por_chave.clear()
+
+    def _atualizar(self) -> None:
+        with self._lock:
+            if self._regras is not None and time.monotonic() - self._verificado_em < self.ttl:
+                return
+            carregadas = self._regras is not None
+
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS total, MAX(atualizado_em) AS atualizado FROM regras_monitoramento")
+            linha = cursor.fetchone()
+            assinatura = (linha['total'], linha['atualizado']) if linha else None
+            if carregadas and assinatura == self._assinatura:
+                with self._lock:
+                    self._verificado_em = time.monotonic()
+                return
+            cursor.execute("SELECT * FROM regras_monitoramento WHERE ativo = TRUE ORDER BY id")
+            regras = cursor.fetchall()
+
+        compiladas, invalidas = [], {}
+        for regra in regras:
+            try:
+                compiladas.append((regra, compilar_condicao(regra['condicao_sql'])))
+            except ValueError as e:
+                invalidas[regra.get('id')] = str(e)
+                print(f"❌ Regra '{regra.get('nome_regra')}' ignorada: {e}")
+
+        with self._lock:
+            self._regras = compiladas
+            self._por_chave.clear()
+            self._assinatura = assinatura
+            self._verificado_em = time.monotonic()
+            self.invalidas = invalidas
+
+    def _regras_chave(self, device_id: str, tipo_sensor: str | None) -> list[tuple[dict[str, Any], CondicaoCompilada]]:
+        chave = (device_id, tipo_sensor)
+        with self._lock:
+            regras = self._por_chave.get(chave)
+            if regras is None:
+                regras = [(regra, condicao) for regra, condicao in self._regras or []
+                          if regra.get('device_id') in (None, device_id)
+                          and regra.get('tipo_sensor') in (None, tipo_sensor)]
+                self._por_chave[chave] = regras
+            return regras
+
+    def regras_para(self, device_id: str, tipo_sensor: str | None) -> list[dict[str, Any]]:
+        """Regras ativas que se aplicam ao dispositivo e tipo de sensor"""
+        self._atualizar()
+        return [regra for regra, _ in self._regras_chave(device_id, tipo_sensor)]
+
+    def avaliar(self, device_id: str, dados: dict[str, Any]) -> list[dict[str, Any]]:
+        """Regras acionadas por uma leitura"""
+        self._atualizar()
+        valores = valores_leitura(dados)
+        return [regra for regra, condicao in self._regras_chave(device_id, dados.get('tipo_sensor'))
+                if condicao._avaliar_valores(valores)]
+
+    def avaliar_lote(self, leituras: list[tuple[str, dict[str, Any]]]) -> list[tuple[str, dict[str, Any], dict[str, Any]]]:
+        """(device_id, regra, dados) de cada regra acionada no lote, na ordem das leituras.
+
+        As colunas do lote são montadas uma vez; cada regra é avaliada de uma
+        só vez sobre as leituras do grupo (device_id, tipo_sensor) a que se aplica.
+        """
+        self._atualizar()
+        if not leituras or not self._regras:
+            return []
+
+        grupos: dict[tuple[str, str | None], list[int]] = {}
+        for i, (device_id, dados) in enumerate(leituras):
+            grupos.setdefault((device_id, dados.get('tipo_sensor')), []).append(i)
+
+        colunas = colunas_leituras([dados for _, dados in leituras])
+        acionadas: list[tuple[int, int, dict[str, Any]]] = []
+        for (device_id, tipo_sensor), indices in grupos.items():
+            regras = self._regras_chave(device_id, tipo_sensor)
+            if not regras:
+                continue
+            posicoes = np.asarray(indices)
+            grupo = {nome: coluna[posicoes] for nome, coluna in colunas.items()}
+            for ordem, (regra, condicao) in enumerate(regras):
+                for i in posicoes[condicao.avaliar_lote(grupo)]:
+                    acionadas.append((int(i), ordem, regra))
+
+        acionadas.sort(key=lambda a: (a[0], a[1]))
+        return [(leituras[i][0], regra, leituras[i][1]) for i, _, regra in acionadas]
+
+
+# Instância global
+motor_regras = MotorRegras(db, ttl_segundos=float(db.get_setting('IOT_REGRAS_TTL', 10)))
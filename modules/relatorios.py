@@ -1,12 +1,18 @@
 import streamlit as st  # type: ignore
 import pandas as pd  # type: ignore
 from datetime import datetime, date, timedelta  # type: ignore # noqa: F401
+from decimal import Decimal
 from database.connection import db  # type: ignore
 from modules.auth import auth_manager  # type: ignore
 import plotly.express as px  # type: ignore
 import plotly.graph_objects as go  # type: ignore # noqa: F401
 from io import BytesIO  # type: ignore
-from typing import Any  # type: ignore # noqa: F401
+from typing import Any, Callable, Iterable, Iterator  # type: ignore # noqa: F401
+from pathlib import Path
+import csv
+import os
+import tempfile
+import time
 
 def get_count_result(cursor_result):
     """Helper para tratar resultados do PostgreSQL que podem ser dict ou tuple"""
@@ -30,17 +36,9 @@ def convert_rows_to_dicts(cursor, rows):
             result.append(dict(zip(columns, row)))
     return result
 
-class RelatoriosManager:
-    def __init__(self):
-        self.db = db
-    
-    def gerar_relatorio_inventario_completo(self) -> pd.DataFrame:  # type: ignore
-        """Gera relatório completo do inventário"""
-        try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            query = """
+# Consultas dos relatórios, compartilhadas entre a tela e a exportação em streaming
+CONSULTAS_RELATORIOS = {
+    'inventario': """
                 SELECT 
                     descricao as item, codigo as codigo_patrimonial, 'Insumo' as tipo_item,
                     'Insumo' as categoria, quantidade_atual, quantidade_minima,
@@ -68,9 +66,171 @@ class RelatoriosManager:
                     'un' as unidade_medida
                 FROM equipamentos_manuais
                 ORDER BY tipo_item, item
-            """
+            """,
+    # Intervalo semiaberto sobre a coluna, para usar o índice de data_movimentacao
+    'movimentacoes': """
+                SELECT 
+                    m.data_movimentacao, m.tipo, m.quantidade,
+                    m.motivo, m.obra_origem_id as origem, m.obra_destino_id as destino,
+                    m.descricao_item, m.codigo_item,
+                    u.nome as usuario_nome
+                FROM movimentacoes m
+                LEFT JOIN usuarios u ON m.usuario_id = u.id
+                WHERE m.data_movimentacao >= %s::date
+                AND m.data_movimentacao < %s::date + 1
+                ORDER BY m.data_movimentacao DESC
+            """,
+    'estoque_baixo': """
+                SELECT 
+                    i.descricao as item, 
+                    i.codigo as codigo_patrimonial, 
+                    'Insumo' as categoria,
+                    'Insumo' as tipo_item,
+                    i.quantidade_atual, 
+                    i.quantidade_minima, 
+                    GREATEST(0, i.quantidade_minima - i.quantidade_atual) as deficit,
+                    COALESCE(i.preco_unitario, 0) as valor_unitario, 
+                    COALESCE(i.localizacao, 'N/A') as localizacao
+                FROM insumos i
+                WHERE i.ativo = TRUE 
+                AND (i.quantidade_atual <= i.quantidade_minima OR i.quantidade_atual = 0)
+                ORDER BY deficit DESC, i.quantidade_atual ASC
+            """,
+}
+
+# Linhas por planilha no formato xlsx (limite do Excel, incluindo o cabeçalho)
+LINHAS_POR_PLANILHA = 1_048_576
+
+PREFIXO_EXPORTACAO = 'relatorio_'
+
+
+def _valores(linha: Any, colunas: list[str]) -> list[Any]:
+    """Valores da linha na ordem das colunas (aceita RealDictRow ou tupla)"""
+    if isinstance(linha, dict):
+        return [linha.get(coluna) for coluna in colunas]
+    return list(linha)
+
+
+def _escrever_csv(caminho: str, colunas: list[str], lotes: Iterable[list[Any]]) -> int:
+    """CSV separado por ';' com BOM, para abrir direto no Excel"""
+    total = 0
+    with open(caminho, 'w', encoding='utf-8-sig', newline='') as arquivo:
+        writer = csv.writer(arquivo, delimiter=';')
+        writer.writerow(colunas)
+        for lote in lotes:
+            writer.writerows(_valores(linha, colunas) for linha in lote)
+            total += len(lote)
+    return total
+
+
+def _escrever_xlsx(caminho: str, colunas: list[str], lotes: Iterable[list[Any]]) -> int:
+    """XLSX em modo constant_memory: cada linha vai para o disco assim que escrita"""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(caminho, {
+        'constant_memory': True,
+        'default_date_format': 'dd/mm/yyyy hh:mm',
+        'remove_timezone': True,
+    })
+    total = 0
+    try:
+        planilha = None
+        linha_atual = LINHAS_POR_PLANILHA
+        for lote in lotes:
+            for linha in lote:
+                if linha_atual >= LINHAS_POR_PLANILHA:
+                    # Planilha cheia: continua em Dados2, Dados3, ...
+                    numero = len(workbook.worksheets()) + 1
+                    planilha = workbook.add_worksheet('Dados' if numero == 1 else f'Dados{numero}')
+                    planilha.write_row(0, 0, colunas)
+                    linha_atual = 1
+                planilha.write_row(linha_atual, 0, [
+                    float(valor) if isinstance(valor, Decimal) else valor
+                    for valor in _valores(linha, colunas)
+                ])
+                linha_atual += 1
+                total += 1
+        if planilha is None:
+            workbook.add_worksheet('Dados').write_row(0, 0, colunas)
+    finally:
+        workbook.close()
+    return total
+
+
+def _escrever_parquet(caminho: str, colunas: list[str], lotes: Iterable[list[Any]]) -> int:
+    """Parquet com um row group por lote (requer pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    total = 0
+    try:
+        for lote in lotes:
+            dados = {coluna: [] for coluna in colunas}
+            for linha in lote:
+                for coluna, valor in zip(colunas, _valores(linha, colunas)):
+                    dados[coluna].append(float(valor) if isinstance(valor, Decimal) else valor)
+            if writer is None:
+                # Esquema do primeiro lote; colunas só com nulos viram texto
+                tabela = pa.table(dados)
+                schema = pa.schema([
+                    pa.field(campo.name, pa.string()) if pa.types.is_null(campo.type) else campo
+                    for campo in tabela.schema
+                ])
+                writer = pq.ParquetWriter(caminho, schema)
+            else:
+                schema = writer.schema
+            writer.write_table(pa.table(dados, schema=schema))
+            total += len(lote)
+        if writer is None:
+            writer = pq.ParquetWriter(caminho, pa.schema([(coluna, pa.string()) for coluna in colunas]))
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+# Formato -> (função de escrita, extensão, MIME)
+ESCRITORES: dict[str, tuple[Callable[[str, list[str], Iterable[list[Any]]], int], str, str]] = {
+    'csv': (_escrever_csv, '.csv', 'text/csv'),
+    'xlsx': (_escrever_xlsx, '.xlsx',
+             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': (_escrever_parquet, '.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def formatos_disponiveis() -> list[str]:
+    """Formatos de exportação; parquet só aparece com pyarrow instalado"""
+    formatos = ['xlsx', 'csv']
+    try:
+        import pyarrow  # noqa: F401
+        formatos.append('parquet')
+    except ImportError:
+        pass
+    return formatos
+
+
+def limpar_exportacoes_antigas(horas: int = 6) -> None:
+    """Remove arquivos de exportação esquecidos no diretório temporário"""
+    limite = time.time() - horas * 3600
+    for arquivo in Path(tempfile.gettempdir()).glob(f"{PREFIXO_EXPORTACAO}*"):
+        try:
+            if arquivo.stat().st_mtime < limite:
+                arquivo.unlink()
+        except OSError:
+            pass
+
+class RelatoriosManager:
+    def __init__(self):
+        self.db = db
+    
+    def gerar_relatorio_inventario_completo(self) -> pd.DataFrame:  # type: ignore
+        """Gera relatório completo do inventário"""
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
             
-            cursor.execute(query)
+            cursor.execute(CONSULTAS_RELATORIOS['inventario'])
             rows = cursor.fetchall()
             
             # Converter resultados para dicionários
@@ -108,19 +268,7 @@ class RelatoriosManager:
                     'codigo_item': []
                 })
             
-            query = """
-                SELECT 
-                    m.data_movimentacao, m.tipo, m.quantidade,
-                    m.motivo, m.obra_origem_id as origem, m.obra_destino_id as destino,
-                    m.descricao_item, m.codigo_item,
-                    u.nome as usuario_nome
-                FROM movimentacoes m
-                LEFT JOIN usuarios u ON m.usuario_id = u.id
-                WHERE m.data_movimentacao::date BETWEEN %s AND %s
-                ORDER BY m.data_movimentacao DESC
-            """
-            
-            cursor.execute(query, (data_inicio, data_fim))
+            cursor.execute(CONSULTAS_RELATORIOS['movimentacoes'], (data_inicio, data_fim))
             rows = cursor.fetchall()
             
             # Converter resultados para dicionários
@@ -138,24 +286,7 @@ class RelatoriosManager:
             conn = self.db.get_connection()
             cursor = conn.cursor()
             
-            query = """
-                SELECT 
-                    i.descricao as item, 
-                    i.codigo as codigo_patrimonial, 
-                    'Insumo' as categoria,
-                    'Insumo' as tipo_item,
-                    i.quantidade_atual, 
-                    i.quantidade_minima, 
-                    GREATEST(0, i.quantidade_minima - i.quantidade_atual) as deficit,
-                    COALESCE(i.preco_unitario, 0) as valor_unitario, 
-                    COALESCE(i.localizacao, 'N/A') as localizacao
-                FROM insumos i
-                WHERE i.ativo = TRUE 
-                AND (i.quantidade_atual <= i.quantidade_minima OR i.quantidade_atual = 0)
-                ORDER BY deficit DESC, i.quantidade_atual ASC
-            """
-            
-            cursor.execute(query)
+            cursor.execute(CONSULTAS_RELATORIOS['estoque_baixo'])
             rows = cursor.fetchall()
             
             # Converter resultados para dicionários
@@ -175,6 +306,82 @@ class RelatoriosManager:
         
         return buffer.getvalue()  # type: ignore
 
+    def exportar_streaming(self, relatorio: str, formato: str = 'xlsx', params: tuple = (),
+                           tamanho_lote: int = 5000) -> tuple[str, int]:
+        """Exporta um relatório direto do banco para um arquivo temporário.
+
+        As linhas vêm de um cursor nomeado (no servidor) em lotes de
+        `tamanho_lote` e são escritas à medida que chegam, então a memória
+        fica limitada a um lote qualquer que seja o tamanho do relatório.
+        Devolve o caminho do arquivo e o total de linhas; quem chama remove o
+        arquivo depois de servi-lo.
+        """
+        if relatorio not in CONSULTAS_RELATORIOS:
+            raise ValueError(f"Relatório desconhecido: {relatorio}")
+        if formato not in ESCRITORES:
+            raise ValueError(f"Formato de exportação desconhecido: {formato}")
+        escrever, extensao, _ = ESCRITORES[formato]
+
+        descritor, caminho = tempfile.mkstemp(prefix=f"{PREFIXO_EXPORTACAO}{relatorio}_", suffix=extensao)
+        os.close(descritor)
+        try:
+            with self.db.server_cursor(f"exportacao_{relatorio}", itersize=tamanho_lote) as cursor:
+                cursor.execute(CONSULTAS_RELATORIOS[relatorio], params)
+                # Em cursor nomeado, description só existe após o primeiro fetch
+                primeiro = cursor.fetchmany(tamanho_lote)
+                colunas = [desc[0] for desc in cursor.description]
+
+                def lotes() -> Iterator[list[Any]]:
+                    lote = primeiro
+                    while lote:
+                        yield lote
+                        lote = cursor.fetchmany(tamanho_lote)
+
+                total = escrever(caminho, colunas, lotes())
+        except Exception:
+            os.remove(caminho)
+            raise
+        return caminho, total
+
+def _mostrar_exportacao_completa(manager: RelatoriosManager, relatorio: str, nome_base: str,
+                                 params: tuple = ()) -> None:  # type: ignore
+    """Exportação do relatório inteiro direto do banco, sem montar DataFrame"""
+    with st.expander("📦 Exportação completa (grandes volumes)"):  # type: ignore
+        col1, col2 = st.columns([1, 1])  # type: ignore
+        with col1:
+            formato = st.selectbox("Formato", formatos_disponiveis(), key=f"formato_{relatorio}")  # type: ignore
+        with col2:
+            gerar = st.button("⚙️ Preparar arquivo", key=f"btn_exportar_{relatorio}")  # type: ignore
+
+        chave = f"exportacao_{relatorio}"
+        if gerar:
+            anterior = st.session_state.pop(chave, None)  # type: ignore
+            if anterior and os.path.exists(anterior['caminho']):
+                os.remove(anterior['caminho'])
+            limpar_exportacoes_antigas()
+            try:
+                with st.spinner("Exportando..."):  # type: ignore
+                    caminho, total = manager.exportar_streaming(relatorio, formato, params)
+                st.session_state[chave] = {'caminho': caminho, 'total': total, 'formato': formato}  # type: ignore
+            except Exception as e:
+                st.error(f"Erro ao exportar relatório: {e}")  # type: ignore
+
+        exportacao = st.session_state.get(chave)  # type: ignore
+        if exportacao and os.path.exists(exportacao['caminho']):
+            _, extensao, mime = ESCRITORES[exportacao['formato']]
+            caminho = exportacao['caminho']
+            st.caption(f"{exportacao['total']:,} linhas exportadas".replace(',', '.'))  # type: ignore
+            # Arquivo já pronto: o handle vale para qualquer versão do Streamlit
+            # (data como função só existe nas recentes)
+            with open(caminho, 'rb') as arquivo:
+                st.download_button(  # type: ignore
+                    label=f"📥 Download {exportacao['formato'].upper()}",  # type: ignore
+                    data=arquivo,  # type: ignore
+                    file_name=f"{nome_base}{extensao}",  # type: ignore
+                    mime=mime,  # type: ignore
+                    key=f"download_{relatorio}"  # type: ignore
+                )  # type: ignore
+
 def show_relatorios_page():  # type: ignore
     """Interface principal dos relatórios"""
     
@@ -266,6 +473,8 @@ def show_relatorios_page():  # type: ignore
                 file_name=f"inventario_completo_{date.today().strftime('%Y%m%d')}.xlsx",  # type: ignore
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"  # type: ignore
             )  # type: ignore
+        
+        _mostrar_exportacao_completa(manager, 'inventario', f"inventario_completo_{date.today().strftime('%Y%m%d')}")
     
     with tab2:
         st.subheader("Relatório de Movimentações")  # type: ignore
@@ -353,6 +562,9 @@ def show_relatorios_page():  # type: ignore
                 file_name=f"movimentacoes_{data_inicio}_{data_fim}.xlsx",  # type: ignore
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"  # type: ignore
             )  # type: ignore
+        
+        _mostrar_exportacao_completa(manager, 'movimentacoes', f"movimentacoes_{data_inicio}_{data_fim}",
+                                     (data_inicio.strftime('%Y-%m-%d'), data_fim.strftime('%Y-%m-%d')))
     
     with tab3:
         st.subheader("Relatório de Estoque Baixo")  # type: ignore
@@ -2,36 +2,19 @@ import datetime
 from typing import List, Dict, Any
 import streamlit as st
 from database.connection import db
+from database.migrator import aplicar_migracoes
 from modules.logs_auditoria import log_acao
+from modules.busca_itens import buscar_itens
 
 # Estrutura simples para reservas
 class ReservaManager:
     def __init__(self):
         self.reservas = []  # Em produção, usar banco de dados
-        self.criar_tabela_reservas()
     
     def criar_tabela_reservas(self):
-        """Cria tabela de reservas se não existir"""
+        """Aplica as migrações pendentes (schema em database/migrations/0003_reservas.sql)"""
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            query = """
-            CREATE TABLE IF NOT EXISTS reservas (
-                id SERIAL PRIMARY KEY,
-                tipo_equipamento VARCHAR(20) NOT NULL,
-                equipamento_id INTEGER NOT NULL,
-                usuario_id INTEGER NOT NULL,
-                data_inicio TIMESTAMP NOT NULL,
-                data_fim TIMESTAMP NOT NULL,
-                observacoes TEXT,
-                status VARCHAR(20) DEFAULT 'ativa',
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-            
-            cursor.execute(query)
-            conn.commit()
+            aplicar_migracoes(db)
         except Exception as e:
             st.warning(f"Erro ao criar tabela de reservas: {e}")
 
@@ -55,6 +38,14 @@ class ReservaManager:
     
     def get_equipamentos_disponiveis(self, tipo_equipamento: str, busca: str = "") -> List[Dict[str, Any]]:
         """Busca equipamentos disponíveis para reserva"""
+        if busca and busca.strip():
+            # Busca unificada (trigram, sem acentos), ordenada por relevância
+            tipo_item = 'equipamento_eletrico' if tipo_equipamento == "equipamentos_eletricos" else 'equipamento_manual'
+            return [
+                {chave: item[chave] for chave in ('id', 'codigo', 'nome', 'marca', 'modelo', 'status')}
+                for item in buscar_itens(busca, tipos=[tipo_item], apenas_disponiveis=True)
+            ]
+
         try:
             conn = db.get_connection()
             cursor = conn.cursor()
@@ -66,11 +57,6 @@ class ReservaManager:
                     WHERE ativo = TRUE AND status = 'Disponível'
                 """
                 params = []
-                
-                if busca:
-                    query += " AND (nome ILIKE %s OR codigo ILIKE %s OR marca ILIKE %s)"
-                    busca_param = f"%{busca}%"
-                    params.extend([busca_param, busca_param, busca_param])
                     
                 query += " ORDER BY nome"
                 cursor.execute(query, params)
@@ -82,11 +68,6 @@ class ReservaManager:
                     WHERE ativo = TRUE AND status = 'Disponível'
                 """
                 params = []
-                
-                if busca:
-                    query += " AND (descricao ILIKE %s OR codigo ILIKE %s OR marca ILIKE %s)"
-                    busca_param = f"%{busca}%"
-                    params.extend([busca_param, busca_param, busca_param])
                     
                 query += " ORDER BY descricao"
                 cursor.execute(query, params)
@@ -4,6 +4,7 @@ from datetime import datetime, date  # type: ignore
 from typing import Any
 from database.connection import db
 from modules.auth import auth_manager
+from modules.cache_compartilhado import cache_compartilhado
 
 class ResponsaveisManager:
     def __init__(self):
@@ -31,6 +32,7 @@ class ResponsaveisManager:
             result = cursor.fetchone()
             responsavel_id = result['id'] if result else None
             self.db.get_connection().commit()  # type: ignore
+            cache_compartilhado.invalidar('responsaveis')
             
             # Log da ação
             auth_manager.log_action(
@@ -121,6 +123,7 @@ class ResponsaveisManager:
             ))
             
             self.db.get_connection().commit()
+            cache_compartilhado.invalidar('responsaveis')
             
             # Log da ação
             auth_manager.log_action(
@@ -143,6 +146,7 @@ class ResponsaveisManager:
             
             cursor.execute("DELETE FROM responsaveis WHERE id = %s", (responsavel_id,))
             self.db.get_connection().commit()
+            cache_compartilhado.invalidar('responsaveis')
             
             # Log da ação
             auth_manager.log_action(
@@ -0,0 +1,231 @@
+"""
+Sistema de Inventário Web - Agregados das leituras de sensores IoT
+Mínimo, máximo, soma e quantidade por dispositivo e tipo de sensor em
+intervalos de 1 minuto, 1 hora e 1 dia (sensores_rollup, migração 0026). O
+ingestor soma cada lote gravado; as consultas dos gráficos escolhem o nível
+pelo período e pelo número de pontos, sem ler dados_sensores.
+
+As leituras brutas e os agregados de 1 minuto e 1 hora têm retenção em dias
+(IOT_RETENCAO_BRUTO_DIAS, IOT_RETENCAO_1M_DIAS, IOT_RETENCAO_1H_DIAS,
+IOT_RETENCAO_1D_DIAS; 0 = sem limite).
+
+Uso (agendar a retenção uma vez por dia):
+    python -m modules.rollups_sensores retencao
+    python -m modules.rollups_sensores reconstruir --dias 30   # recalcula a partir de dados_sensores
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+import pandas as pd
+
+# Nome -> resolução em segundos, da mais fina para a mais grossa
+RESOLUCOES = {'1m': 60, '1h': 3600, '1d': 86400}
+TRUNCAMENTO = {60: 'minute', 3600: 'hour', 86400: 'day'}
+
+# Configuração e padrão (dias) da retenção; a chave None são as leituras brutas
+RETENCAO = {
+    None: ('IOT_RETENCAO_BRUTO_DIAS', 30),
+    60: ('IOT_RETENCAO_1M_DIAS', 14),
+    3600: ('IOT_RETENCAO_1H_DIAS', 400),
+    86400: ('IOT_RETENCAO_1D_DIAS', 0),
+}
+MAX_PONTOS = 500
+TAMANHO_LOTE_RETENCAO = 10000
+
+SQL_GRAVAR_ROLLUPS = """
+    INSERT INTO sensores_rollup AS r
+        (resolucao, device_id, tipo_sensor, inicio, minimo, maximo, soma, quantidade)
+    VALUES %s
+    ON CONFLICT (resolucao, device_id, tipo_sensor, inicio) DO UPDATE SET
+        minimo = LEAST(r.minimo, EXCLUDED.minimo),
+        maximo = GREATEST(r.maximo, EXCLUDED.maximo),
+        soma = r.soma + EXCLUDED.soma,
+        quantidade = r.quantidade + EXCLUDED.quantidade
+"""
+
+
+def inicio_intervalo(momento: datetime, resolucao: int) -> datetime:
+    """Início do intervalo de `resolucao` segundos que contém o momento"""
+    dia = datetime(momento.year, momento.month, momento.day)
+    segundos = momento.hour * 3600 + momento.minute * 60 + momento.second
+    return dia + timedelta(seconds=segundos - segundos % resolucao)
+
+
+def _momento(valor: Any, padrao: datetime) -> datetime:
+    """Timestamp da leitura como gravado em TIMESTAMP (sem fuso)"""
+    if isinstance(valor, str):
+        try:
+            valor = datetime.fromisoformat(valor)
+        except ValueError:
+            return padrao
+    if isinstance(valor, datetime):
+        return valor.replace(tzinfo=None)
+    return padrao
+
+
+def agregar_leituras(leituras: Iterable[tuple[str, dict[str, Any], datetime]]) -> list[tuple]:
+    """Linhas de SQL_GRAVAR_ROLLUPS para leituras (device_id, dados, recebido_em).
+
+    Leituras sem valor numérico não entram; as linhas saem ordenadas pela
+    chave para que gravações concorrentes travem as linhas na mesma ordem.
+    """
+    acumulado: dict[tuple, list[float]] = {}
+    for device_id, dados, recebido_em in leituras:
+        try:
+            valor = float(dados.get('valor_numerico'))
+        except (TypeError, ValueError):
+            continue
+        if valor != valor:  # NaN
+            continue
+        momento = _momento(dados.get('timestamp'), recebido_em)
+        for resolucao in RESOLUCOES.values():
+            chave = (resolucao, device_id, dados['tipo_sensor'], inicio_intervalo(momento, resolucao))
+            atual = acumulado.get(chave)
+            if atual is None:
+                acumulado[chave] = [valor, valor, valor, 1]
+            else:
+                atual[0] = min(atual[0], valor)
+                atual[1] = max(atual[1], valor)
+                atual[2] += valor
+                atual[3] += 1
+    return [(*chave, *valores) for chave, valores in sorted(acumulado.items())]
+
+
+def retencao_dias(database) -> dict[int | None, int]:
+    return {resolucao: int(database.get_setting(chave, padrao)) for resolucao, (chave, padrao) in RETENCAO.items()}
+
+
+def escolher_resolucao(inicio: datetime, fim: datetime, max_pontos: int = MAX_PONTOS,
+                       retencao: dict[int | None, int] | None = None, agora: datetime | None = None) -> int:
+    """Resolução mais fina que ainda cobre o início do período (retenção) e
+    cabe em `max_pontos` intervalos; sem nenhuma, a diária"""
+    agora = agora or datetime.now()
+    retencao = retencao or {}
+    segundos = (fim - inicio).total_seconds()
+    for resolucao in RESOLUCOES.values():
+        dias = retencao.get(resolucao)
+        if dias and inicio < agora - timedelta(days=dias):
+            continue
+        if segundos / resolucao <= max_pontos:
+            return resolucao
+    return RESOLUCOES['1d']
+
+
+def consultar_serie(database, tipo_sensor: str, inicio: datetime, fim: datetime, device_id: str | None = None,
+                    max_pontos: int = MAX_PONTOS, resolucao: int | None = None) -> tuple[int, pd.DataFrame]:
+    """Série (inicio, minimo, maximo, media, quantidade) do tipo de sensor no
+    período, de um dispositivo ou somando todos, e a resolução usada"""
+    if resolucao is None:
+        resolucao = escolher_resolucao(inicio, fim, max_pontos, retencao_dias(database))
+    filtros = ["resolucao = %s", "tipo_sensor = %s", "inicio >= %s", "inicio < %s"]
+    params: list[Any] = [resolucao, tipo_sensor, inicio_intervalo(inicio, resolucao), fim]
+    if device_id:
+        filtros.append("device_id = %s")
+        params.append(device_id)
+
+    with database.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT inicio, MIN(minimo) AS minimo, MAX(maximo) AS maximo,
+                   SUM(soma) / SUM(quantidade) AS media, SUM(quantidade) AS quantidade
+            FROM sensores_rollup
+            WHERE {' AND '.join(filtros)}
+            GROUP BY inicio
+            ORDER BY inicio
+        """, params)
+        linhas = cursor.fetchall()
+    return resolucao, pd.DataFrame(linhas, columns=['inicio', 'minimo', 'maximo', 'media', 'quantidade'])
+
+
+def reconstruir_rollups(database, inicio: datetime, fim: datetime) -> int:
+    """Recalcula os agregados dos dias entre inicio e fim a partir de
+    dados_sensores (carga inicial ou correção); devolve as linhas gravadas.
+
+    Os dias inteiros são regravados, então não use para o período que o
+    ingestor ainda está somando.
+    """
+    dia = RESOLUCOES['1d']
+    inicio = inicio_intervalo(inicio, dia)
+    if fim != inicio_intervalo(fim, dia):
+        fim = inicio_intervalo(fim, dia) + timedelta(days=1)
+    total = 0
+    with database.transaction() as cursor:
+        for resolucao, unidade in TRUNCAMENTO.items():
+            cursor.execute(f"""
+                INSERT INTO sensores_rollup (resolucao, device_id, tipo_sensor, inicio, minimo, maximo, soma, quantidade)
+                SELECT %s, device_id, tipo_sensor, date_trunc('{unidade}', timestamp_leitura),
+                       MIN(valor_numerico), MAX(valor_numerico), SUM(valor_numerico), COUNT(valor_numerico)
+                FROM dados_sensores
+                WHERE timestamp_leitura >= %s AND timestamp_leitura < %s AND valor_numerico IS NOT NULL
+                GROUP BY 2, 3, 4
+                ON CONFLICT (resolucao, device_id, tipo_sensor, inicio) DO UPDATE SET
+                    minimo = EXCLUDED.minimo, maximo = EXCLUDED.maximo,
+                    soma = EXCLUDED.soma, quantidade = EXCLUDED.quantidade
+            """, (resolucao, inicio, fim))
+            total += cursor.rowcount
+    return total
+
+
+def aplicar_retencao(database, agora: datetime | None = None, tamanho_lote: int = TAMANHO_LOTE_RETENCAO) -> dict[str, int]:
+    """Apaga o que passou da retenção; devolve as linhas removidas por nível.
+
+    As leituras brutas saem em lotes de `tamanho_lote`, cada um na sua
+    transação, para não segurar locks sobre dados_sensores.
+    """
+    agora = agora or datetime.now()
+    dias = retencao_dias(database)
+    removidos = {}
+
+    if dias[None]:
+        limite = agora - timedelta(days=dias[None])
+        removidos['dados_sensores'] = 0
+        while True:
+            with database.transaction() as cursor:
+                cursor.execute("""
+                    DELETE FROM dados_sensores WHERE id IN (
+                        SELECT id FROM dados_sensores WHERE timestamp_leitura < %s LIMIT %s
+                    )
+                """, (limite, tamanho_lote))
+                apagadas = cursor.rowcount
+            removidos['dados_sensores'] += apagadas
+            if apagadas < tamanho_lote:
+                break
+
+    for nome, resolucao in RESOLUCOES.items():
+        if dias[resolucao]:
+            with database.transaction() as cursor:
+                cursor.execute("DELETE FROM sensores_rollup WHERE resolucao = %s AND inicio < %s",
+                               (resolucao, agora - timedelta(days=dias[resolucao])))
+                removidos[nome] = cursor.rowcount
+    return removidos
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Agregados e retenção das leituras de sensores')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('retencao', help='apaga leituras e agregados além da retenção')
+    p_rec = sub.add_parser('reconstruir', help='recalcula os agregados a partir de dados_sensores')
+    p_rec.add_argument('--dias', type=int, default=30, help='dias completos até ontem')
+    args = parser.parse_args(argv)
+
+    os.environ['DB_AUTO_MIGRATE'] = '0'
+    from database.connection import db
+
+    try:
+        if args.comando == 'retencao':
+            for nivel, total in aplicar_retencao(db).items():
+                print(f"OK - {nivel}: {total} linhas removidas")
+        else:
+            hoje = inicio_intervalo(datetime.now(), RESOLUCOES['1d'])
+            total = reconstruir_rollups(db, hoje - timedelta(days=args.dias), hoje)
+            print(f"OK - {total} agregados recalculados")
+    finally:
+        db.close_connection()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
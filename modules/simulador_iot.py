@@ -0,0 +1,136 @@
+"""
+Sistema de Inventário Web - Simulador de dispositivos IoT
+Perfis dos dispositivos de demonstração (usados pela tela de IoT) e um
+publicador de leituras no formato dos tópicos MQTT, para testes de carga do
+gateway (modules/gateway_iot.py).
+"""
+
+import asyncio
+import json
+import random
+from datetime import datetime
+from typing import Any
+
+# Campos fixos de cada dispositivo e as faixas dos valores sorteados a cada leitura
+PERFIS_DISPOSITIVOS: list[dict[str, Any]] = [
+    {
+        'device_id': 'TEMP_001',
+        'nome': 'Sensor Temperatura - Gerador Principal',
+        'tipo_dispositivo': 'sensor_temperatura',
+        'tipo_sensor': 'temperatura',
+        'localizacao': 'Obra Centro - Gerador',
+        'unidade': '°C',
+        'faixa_valor': (20.0, 85.0),
+        'faixa_bateria': (70, 100),
+        'faixa_sinal': (80, 100),
+    },
+    {
+        'device_id': 'HUM_002',
+        'nome': 'Sensor Umidade - Depósito Ferramentas',
+        'tipo_dispositivo': 'sensor_umidade',
+        'tipo_sensor': 'umidade',
+        'localizacao': 'Depósito Central',
+        'unidade': '%',
+        'faixa_valor': (30.0, 90.0),
+        'faixa_bateria': (60, 100),
+        'faixa_sinal': (75, 100),
+    },
+    {
+        'device_id': 'VIB_003',
+        'nome': 'Sensor Vibração - Compressor',
+        'tipo_dispositivo': 'sensor_vibracao',
+        'tipo_sensor': 'vibracao',
+        'localizacao': 'Obra Norte - Área Técnica',
+        'unidade': 'm/s²',
+        'faixa_valor': (0.0, 15.0),
+        'faixa_bateria': (80, 100),
+        'faixa_sinal': (85, 100),
+    },
+    {
+        'device_id': 'RFID_004',
+        'nome': 'Leitor RFID - Entrada Principal',
+        'tipo_dispositivo': 'rfid_reader',
+        'tipo_sensor': 'rfid',
+        'localizacao': 'Portão Principal',
+        'prefixo_texto': 'TAG_',
+        'faixa_bateria': (85, 100),
+        'faixa_sinal': (90, 100),
+    },
+    {
+        'device_id': 'GPS_005',
+        'nome': 'Rastreador GPS - Caminhão 01',
+        'tipo_dispositivo': 'gps_tracker',
+        'tipo_sensor': 'gps',
+        'localizacao': 'Veículo Móvel',
+        'centro_gps': (-23.5505, -46.6333),
+        'faixa_bateria': (50, 100),
+        'faixa_sinal': (70, 100),
+    },
+    {
+        'device_id': 'ENERGY_006',
+        'nome': 'Medidor Energia - Painel Principal',
+        'tipo_dispositivo': 'medidor_energia',
+        'tipo_sensor': 'energia',
+        'localizacao': 'Quadro Elétrico Principal',
+        'unidade': 'kWh',
+        'faixa_valor': (100.0, 500.0),
+        'faixa_bateria': (100, 100),  # Alimentado pela rede
+        'faixa_sinal': (95, 100),
+    },
+]
+
+CAMPOS_FIXOS = ('device_id', 'nome', 'tipo_dispositivo', 'tipo_sensor', 'localizacao', 'unidade')
+
+
+def simular_leitura(perfil: dict[str, Any], gerador: random.Random | None = None) -> dict[str, Any]:
+    """Dispositivo do perfil com valor, bateria e sinal sorteados"""
+    gerador = gerador or random
+    leitura = {campo: perfil[campo] for campo in CAMPOS_FIXOS if campo in perfil}
+    if 'faixa_valor' in perfil:
+        leitura['valor_numerico'] = gerador.uniform(*perfil['faixa_valor'])
+    if 'prefixo_texto' in perfil:
+        leitura['valor_texto'] = f"{perfil['prefixo_texto']}{gerador.randint(1000, 9999)}"
+    if 'centro_gps' in perfil:
+        lat, lng = perfil['centro_gps']
+        leitura['gps'] = {'lat': lat + gerador.uniform(-0.1, 0.1), 'lng': lng + gerador.uniform(-0.1, 0.1)}
+    leitura['bateria'] = gerador.randint(*perfil['faixa_bateria'])
+    leitura['qualidade_sinal'] = gerador.randint(*perfil['faixa_sinal'])
+    return leitura
+
+
+def dispositivos_simulados(copias: int = 1) -> list[dict[str, Any]]:
+    """Perfis repetidos `copias` vezes; com mais de uma cópia o device_id ganha o número"""
+    if copias <= 1:
+        return list(PERFIS_DISPOSITIVOS)
+    return [dict(perfil, device_id=f"{perfil['device_id']}-{copia:04d}")
+            for copia in range(copias) for perfil in PERFIS_DISPOSITIVOS]
+
+
+def mensagem_sensor(perfil: dict[str, Any], gerador: random.Random | None = None) -> tuple[str, bytes]:
+    """Tópico e payload JSON de uma leitura, como publicados pelo dispositivo"""
+    leitura = simular_leitura(perfil, gerador)
+    payload = {campo: leitura[campo] for campo in
+               ('tipo_sensor', 'valor_numerico', 'valor_texto', 'gps', 'unidade', 'bateria', 'qualidade_sinal')
+               if campo in leitura}
+    payload['timestamp'] = datetime.now().isoformat()
+    return f"inventario/{perfil['device_id']}/sensores/{perfil['tipo_sensor']}", json.dumps(payload).encode()
+
+
+async def simular(broker, taxa: float, duracao: float, dispositivos: list[dict[str, Any]] | None = None,
+                  gerador: random.Random | None = None) -> dict[str, Any]:
+    """Publica `taxa` leituras por segundo durante `duracao` segundos, em
+    rodízio entre os dispositivos. Se o broker segurar a publicação (fila do
+    gateway cheia) a taxa real fica abaixo da pedida."""
+    dispositivos = dispositivos or PERFIS_DISPOSITIVOS
+    gerador = gerador or random.Random()
+    loop = asyncio.get_running_loop()
+    inicio = loop.time()
+    publicadas = 0
+    while (decorrido := loop.time() - inicio) < duracao:
+        for _ in range(int(decorrido * taxa) - publicadas):
+            topico, payload = mensagem_sensor(dispositivos[publicadas % len(dispositivos)], gerador)
+            await broker.publicar(topico, payload)
+            publicadas += 1
+        await asyncio.sleep(0.005)
+    decorrido = loop.time() - inicio
+    return {'publicadas': publicadas, 'duracao_s': decorrido, 'taxa_real': publicadas / decorrido if decorrido else 0.0}
@@ -9,6 +9,7 @@ import pandas as pd  # type: ignore
 import bcrypt  # type: ignore
 from datetime import datetime, date  # type: ignore # noqa: F401
 from database.connection import db  # type: ignore
+from modules.auditoria_assincrona import nomes_usuarios
 from typing import Any, Dict, List, Optional  # type: ignore
 
 class UsuariosManager:
@@ -193,6 +194,9 @@ class UsuariosManager:
             
             # Commit
             self.db.get_connection().commit()  # type: ignore
+            nomes_usuarios.invalidar(usuario_id_int)  # nome em cache dos logs de auditoria
+            from modules.auth import auth_manager
+            auth_manager.invalidar_permissoes(usuario_id_int)  # perfil define as permissões padrão
             
             # Verificar usuário APÓS commit
             cursor.execute("SELECT id, nome, email FROM usuarios WHERE id = %s", (usuario_id_int,))  # type: ignore
@@ -0,0 +1,169 @@
+"""
+Sistema de Inventário Web - Atualização das views materializadas
+Refresh concorrente agendado (por tempo ou por volume de escritas nas tabelas de
+origem), metadados de defasagem e verificação de SLA para os leitores
+"""
+
+import threading
+import time
+import zlib
+from typing import Any
+from database.connection import db
+
+
+class ServicoViewsMaterializadas:
+    """Mantém as views cadastradas em views_materializadas (migração 0020).
+
+    Uma view é atualizada quando o último refresh tem mais de
+    intervalo_segundos ou quando as tabelas de origem acumularam
+    limite_escritas escritas desde então. Leitores usam `dentro_do_sla`
+    para decidir entre a view e a consulta ao vivo.
+    """
+
+    def __init__(self, database, intervalo_verificacao: float = 60):
+        self.db = database
+        self.intervalo_verificacao = intervalo_verificacao
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def status(self) -> list[dict[str, Any]]:
+        """Situação de cada view: idade, escritas pendentes e se precisa de refresh"""
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    v.nome, v.ultimo_refresh, v.duracao_ms, v.ultimo_erro,
+                    v.intervalo_segundos, v.limite_escritas, v.sla_segundos,
+                    COALESCE(m.ispopulated, FALSE) as populada,
+                    EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - v.ultimo_refresh)) as idade_segundos,
+                    escritas_fontes(v.fontes) - v.escritas_no_refresh as escritas_pendentes
+                FROM views_materializadas v
+                LEFT JOIN pg_matviews m ON m.matviewname = v.nome
+                ORDER BY v.nome
+            """)
+            views = [dict(row) for row in cursor.fetchall()]
+
+        for view in views:
+            idade = view['idade_segundos']
+            pendentes = view['escritas_pendentes']
+            view['dentro_do_sla'] = bool(view['populada'] and idade is not None
+                                         and idade <= view['sla_segundos'])
+            # Escritas negativas indicam estatísticas zeradas (pg_stat_reset): atualiza
+            view['precisa_atualizar'] = (
+                not view['populada'] or idade is None
+                or idade >= view['intervalo_segundos']
+                or pendentes >= view['limite_escritas'] or pendentes < 0
+            )
+        return views
+
+    def dentro_do_sla(self, nome: str) -> bool:
+        """Indica se a view pode ser lida; False manda o leitor para a consulta ao vivo"""
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT m.ispopulated
+                           AND v.ultimo_refresh >= CURRENT_TIMESTAMP - make_interval(secs => v.sla_segundos)
+                           as dentro_do_sla
+                    FROM views_materializadas v
+                    JOIN pg_matviews m ON m.matviewname = v.nome
+                    WHERE v.nome = %s
+                """, [nome])
+                row = cursor.fetchone()
+            return bool(row and row['dentro_do_sla'])
+        except Exception as e:
+            print(f"Erro ao verificar defasagem de {nome}: {e}")
+            return False
+
+    def atualizar(self, nome: str) -> bool:
+        """REFRESH da view (CONCURRENTLY quando já populada) e registro dos metadados.
+
+        Um advisory lock por view evita refreshes simultâneos de processos
+        diferentes; quem não obtém o lock desiste sem erro.
+        """
+        inicio = time.perf_counter()
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute("SELECT pg_try_advisory_xact_lock(%s) as obtido", [zlib.crc32(nome.encode())])
+                if not cursor.fetchone()['obtido']:
+                    return False
+                cursor.execute("""
+                    SELECT v.fontes, m.ispopulated
+                    FROM views_materializadas v
+                    JOIN pg_matviews m ON m.matviewname = v.nome
+                    WHERE v.nome = %s
+                """, [nome])
+                view = cursor.fetchone()
+                if not view:
+                    raise ValueError(f"View materializada não cadastrada: {nome}")
+
+                # Escritas lidas antes do refresh: as que chegarem durante contam para o próximo
+                cursor.execute("SELECT escritas_fontes(%s) as escritas", [view['fontes']])
+                escritas = cursor.fetchone()['escritas']
+                concorrente = 'CONCURRENTLY ' if view['ispopulated'] else ''
+                cursor.execute(f'REFRESH MATERIALIZED VIEW {concorrente}"{nome}"')
+
+                cursor.execute("""
+                    UPDATE views_materializadas
+                    SET ultimo_refresh = CURRENT_TIMESTAMP, escritas_no_refresh = %s,
+                        duracao_ms = %s, ultimo_erro = NULL, atualizado_em = CURRENT_TIMESTAMP
+                    WHERE nome = %s
+                """, [escritas, int((time.perf_counter() - inicio) * 1000), nome])
+            return True
+        except Exception as e:
+            print(f"Erro ao atualizar view {nome}: {e}")
+            self._registrar_erro(nome, str(e))
+            return False
+
+    def _registrar_erro(self, nome: str, erro: str) -> None:
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute("""
+                    UPDATE views_materializadas SET ultimo_erro = %s, atualizado_em = CURRENT_TIMESTAMP
+                    WHERE nome = %s
+                """, [erro, nome])
+        except Exception:
+            pass
+
+    def atualizar_pendentes(self) -> list[str]:
+        """Atualiza as views que passaram do intervalo ou do limite de escritas"""
+        try:
+            pendentes = [view['nome'] for view in self.status() if view['precisa_atualizar']]
+        except Exception as e:
+            print(f"Erro ao verificar views materializadas: {e}")
+            return []
+        return [nome for nome in pendentes if self.atualizar(nome)]
+
+    def atualizar_todas(self) -> list[str]:
+        """Força o refresh de todas as views cadastradas"""
+        try:
+            nomes = [view['nome'] for view in self.status()]
+        except Exception as e:
+            print(f"Erro ao listar views materializadas: {e}")
+            return []
+        return [nome for nome in nomes if self.atualizar(nome)]
+
+    def iniciar(self) -> None:
+        """Inicia a verificação periódica em segundo plano (idempotente)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='views-materializadas', daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            self.atualizar_pendentes()
+            self.db.release_connection()
+            self._parar.wait(self.intervalo_verificacao)
+
+
+# Instância global
+servico_views = ServicoViewsMaterializadas(
+    db, intervalo_verificacao=float(db.get_setting('VIEWS_CHECK_SECONDS', 60))
+)
@@ -0,0 +1,105 @@
+"""
+Sistema de Inventário Web - Perfil do tempo de importação
+Mede o custo de importar um módulo (por padrão o main.py) em um interpretador
+novo, com `python -X importtime`, e compara o total com um orçamento.
+
+Uso:
+    python perfil_importacao.py                       # perfil de main, orçamento IMPORT_BUDGET_MS
+    python perfil_importacao.py modules.insumos --top 20 --orcamento 800
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+RAIZ = Path(__file__).parent
+
+# Formato de cada linha: "import time:   self [us] | cumulative | imported package"
+_LINHA = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$')
+
+
+def interpretar(saida: str) -> list[dict[str, Any]]:
+    """Converte a saída de -X importtime em entradas por módulo (tempos em ms)"""
+    entradas = []
+    for linha in saida.splitlines():
+        match = _LINHA.match(linha)
+        if not match:
+            continue
+        proprio, acumulado, recuo, modulo = match.groups()
+        entradas.append({
+            'modulo': modulo,
+            'proprio_ms': int(proprio) / 1000,
+            'acumulado_ms': int(acumulado) / 1000,
+            # Dois espaços de recuo por nível de import aninhado
+            'nivel': max(len(recuo) - 1, 0) // 2,
+        })
+    return entradas
+
+
+def medir(modulo: str = 'main', python: str = sys.executable) -> tuple[list[dict[str, Any]], str]:
+    """Importa o módulo em um processo novo e devolve as entradas e o erro, se houver.
+
+    Um import que falha (ex.: banco indisponível) ainda produz o perfil de
+    tudo o que foi importado até a falha.
+    """
+    env = dict(os.environ, DB_AUTO_MIGRATE=os.environ.get('DB_AUTO_MIGRATE', '0'))
+    processo = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ, env=env, capture_output=True, text=True
+    )
+    entradas = interpretar(processo.stderr)
+    erro = ''
+    if processo.returncode != 0:
+        linhas_erro = [l for l in processo.stderr.splitlines() if not l.startswith('import time:')]
+        erro = linhas_erro[-1] if linhas_erro else f'código de saída {processo.returncode}'
+    return entradas, erro
+
+
+def total_ms(entradas: list[dict[str, Any]]) -> float:
+    """Soma dos imports de primeiro nível (o tempo de importação do processo)"""
+    return sum(e['acumulado_ms'] for e in entradas if e['nivel'] == 0)
+
+
+def mais_lentos(entradas: list[dict[str, Any]], limite: int = 15,
+                nivel_maximo: int = 1) -> list[dict[str, Any]]:
+    """Imports com maior tempo acumulado até o nível informado (1: o que o módulo importa)"""
+    candidatos = [e for e in entradas if e['nivel'] <= nivel_maximo]
+    return sorted(candidatos, key=lambda e: e['acumulado_ms'], reverse=True)[:limite]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Perfil do tempo de importação')
+    parser.add_argument('modulo', nargs='?', default='main')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--nivel', type=int, default=1, help='profundidade dos imports listados')
+    parser.add_argument('--orcamento', type=float,
+                        default=float(os.environ.get('IMPORT_BUDGET_MS', 2500)),
+                        help='limite em ms para o total (padrão: IMPORT_BUDGET_MS ou 2500)')
+    args = parser.parse_args(argv)
+
+    entradas, erro = medir(args.modulo)
+    if not entradas:
+        print(f"ERRO - Nenhuma medição obtida para {args.modulo}: {erro}")
+        return 2
+
+    print(f"{'acumulado':>10} {'próprio':>9}  módulo")
+    for entrada in mais_lentos(entradas, args.top, args.nivel):
+        recuo = '  ' * entrada['nivel']
+        print(f"{entrada['acumulado_ms']:>8.1f}ms {entrada['proprio_ms']:>7.1f}ms  {recuo}{entrada['modulo']}")
+
+    total = total_ms(entradas)
+    print(f"\nTotal: {total:.0f} ms (orçamento: {args.orcamento:.0f} ms)")
+    if erro:
+        print(f"AVISO - Import interrompido: {erro}")
+    if total > args.orcamento:
+        print("ERRO - Tempo de importação acima do orçamento")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,6 +7,8 @@ import streamlit as st
 import psycopg2
 import time
 from database.connection import db
+from database.migrator import aplicar_migracoes
+from modules.views_materializadas import servico_views
 from typing import Dict, List, Any
 import pandas as pd
 
@@ -157,78 +159,10 @@ class PerformanceOptimizer:
             return False
     
     def create_materialized_views(self) -> bool:
-        """Cria views materializadas para consultas frequentes"""
+        """Cria views materializadas para consultas frequentes (migração 0020)"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            # View para dashboard - estatísticas gerais (usando colunas corretas)
-            dashboard_view = """
-            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_dashboard_stats AS
-            SELECT 
-                (SELECT COUNT(*) FROM insumos) as total_insumos,
-                (SELECT COUNT(*) FROM equipamentos_eletricos) as total_ee,
-                (SELECT COUNT(*) FROM equipamentos_manuais) as total_em,
-                (SELECT COUNT(*) FROM insumos WHERE quantidade_atual <= quantidade_minima) as itens_criticos,
-                (SELECT SUM(quantidade_atual * COALESCE(preco_unitario, 0)) FROM insumos) as valor_total_estoque,
-                (SELECT COUNT(*) FROM movimentacoes WHERE DATE(data_movimentacao) = CURRENT_DATE) as movimentacoes_hoje,
-                CURRENT_TIMESTAMP as last_updated
-            """
-            
-            # View para relatórios de movimentações (usando colunas corretas)
-            mov_view = """
-            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_movimentacoes_resumo AS
-            SELECT 
-                DATE(data_movimentacao) as data,
-                tipo,
-                tipo_item,
-                COUNT(*) as total_movimentacoes,
-                SUM(quantidade) as total_quantidade
-            FROM movimentacoes 
-            WHERE data_movimentacao >= CURRENT_DATE - INTERVAL '30 days'
-            GROUP BY DATE(data_movimentacao), tipo, tipo_item
-            ORDER BY data DESC
-            """
-            
-            # View para estoque crítico (usando colunas corretas)
-            estoque_view = """
-            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_estoque_critico AS
-            SELECT 
-                id,
-                descricao as nome,
-                codigo,
-                quantidade_atual as quantidade,
-                quantidade_minima as estoque_minimo,
-                localizacao,
-                CASE 
-                    WHEN quantidade_atual = 0 THEN 'CRÍTICO'
-                    WHEN quantidade_atual <= quantidade_minima * 0.5 THEN 'URGENTE'
-                    WHEN quantidade_atual <= quantidade_minima THEN 'BAIXO'
-                    ELSE 'OK'
-                END as status_estoque
-            FROM insumos
-            WHERE quantidade_atual <= quantidade_minima
-            ORDER BY (quantidade_atual / NULLIF(quantidade_minima, 0)) ASC
-            """
-            
-            views = [
-                ("Dashboard Stats", dashboard_view),
-                ("Movimentações Resumo", mov_view),
-                ("Estoque Crítico", estoque_view)
-            ]
-            
-            for view_name, view_sql in views:
-                try:
-                    # Extrair nome da view do SQL
-                    view_table_name = view_sql.split('VIEW IF NOT EXISTS')[1].split('AS')[0].strip()
-                    cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view_table_name}")
-                    cursor.execute(view_sql)
-                    conn.commit()
-                    print(f"✓ View materializada criada: {view_name}")
-                except Exception as e:
-                    print(f"✗ Erro ao criar view {view_name}: {e}")
-                    conn.rollback()
-            
+            aplicar_migracoes(self.db)
+            print("✓ Views materializadas criadas (com índices únicos para refresh concorrente)")
             return True
             
         except Exception as e:
@@ -238,27 +172,8 @@ class PerformanceOptimizer:
     def setup_auto_refresh_views(self) -> bool:
         """Configura refresh automático das views materializadas"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            # Função para refresh das views
-            refresh_function = """
-            CREATE OR REPLACE FUNCTION refresh_materialized_views()
-            RETURNS void AS $$
-            BEGIN
-                REFRESH MATERIALIZED VIEW CONCURRENTLY mv_dashboard_stats;
-                REFRESH MATERIALIZED VIEW CONCURRENTLY mv_movimentacoes_resumo;
-                REFRESH MATERIALIZED VIEW CONCURRENTLY mv_estoque_critico;
-            EXCEPTION WHEN OTHERS THEN
-                -- Log erro mas não falha
-                RAISE NOTICE 'Erro ao atualizar views: %', SQLERRM;
-            END;
-            $$ LANGUAGE plpgsql;
-            """
-            
-            cursor.execute(refresh_function)
-            conn.commit()
-            print("✓ Função de refresh configurada")
+            servico_views.iniciar()
+            print("✓ Serviço de refresh das views iniciado")
             
             return True
             
@@ -0,0 +1,150 @@
+"""
+Sistema de Inventário Web - Replay de leituras de sensores IoT
+Alimenta o pipeline de ingestão (modules/ingestao_iot.py) com leituras
+gravadas e mede a vazão, o tempo dos lotes, as esperas e os descartes. As
+leituras são gravadas de verdade em dados_sensores: use um banco de teste.
+
+Arquivo de entrada: JSON Lines, uma leitura por linha com device_id e os
+campos do payload MQTT (tipo_sensor, valor_numerico, timestamp, ...).
+
+Uso:
+    python replay_sensores.py exportar leituras.jsonl --horas 24      # grava um arquivo a partir do banco
+    python replay_sensores.py reproduzir leituras.jsonl                # o mais rápido possível
+    python replay_sensores.py reproduzir leituras.jsonl --velocidade 10 --lote 500 --buffer 5000 --regras
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Iterator
+
+from database.connection import db
+from modules.ingestao_iot import IngestorSensores
+
+# Coluna de dados_sensores -> campo do payload MQTT
+CAMPOS_PAYLOAD = {
+    'timestamp_leitura': 'timestamp',
+    'tipo_sensor': 'tipo_sensor',
+    'valor_numerico': 'valor_numerico',
+    'valor_texto': 'valor_texto',
+    'valor_json': 'valor_json',
+    'unidade_medida': 'unidade',
+    'qualidade_sinal': 'qualidade_sinal',
+    'bateria_nivel': 'bateria',
+    'temperatura_dispositivo': 'temperatura_dispositivo',
+    'localizacao_gps': 'gps',
+}
+
+
+def _serializar(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def exportar(caminho: str, horas: float = 24) -> int:
+    """Grava as leituras das últimas `horas` em JSON Lines; devolve o total"""
+    total = 0
+    with db.server_cursor('replay_sensores') as cursor, open(caminho, 'w', encoding='utf-8') as arquivo:
+        cursor.execute(f"""
+            SELECT device_id, {', '.join(CAMPOS_PAYLOAD)}
+            FROM dados_sensores
+            WHERE timestamp_leitura >= %s
+            ORDER BY timestamp_leitura, id
+        """, (datetime.now() - timedelta(hours=horas),))
+        for row in cursor:
+            leitura = {'device_id': row['device_id']}
+            leitura.update({campo: _serializar(row[coluna]) for coluna, campo in CAMPOS_PAYLOAD.items()
+                            if row[coluna] is not None})
+            arquivo.write(json.dumps(leitura, ensure_ascii=False) + '\n')
+            total += 1
+    return total
+
+
+def ler_leituras(caminho: str) -> Iterator[tuple[str, dict[str, Any]]]:
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            if linha.strip():
+                dados = json.loads(linha)
+                yield dados.pop('device_id', None), dados
+
+
+def reproduzir(ingestor: IngestorSensores, leituras: Iterator[tuple[str, dict[str, Any]]],
+               velocidade: float = 0) -> dict[str, Any]:
+    """Enfileira as leituras (respeitando os intervalos originais divididos por
+    `velocidade`, ou sem pausa com 0), aguarda a gravação e devolve as métricas"""
+    inicio = time.perf_counter()
+    primeiro = None
+    enviadas = 0
+    for device_id, dados in leituras:
+        if velocidade and dados.get('timestamp'):
+            momento = datetime.fromisoformat(str(dados['timestamp']))
+            primeiro = primeiro or momento
+            atraso = (momento - primeiro).total_seconds() / velocidade - (time.perf_counter() - inicio)
+            if atraso > 0:
+                time.sleep(atraso)
+        ingestor.enfileirar(device_id, dados)
+        enviadas += 1
+    duracao_envio = time.perf_counter() - inicio
+
+    while not ingestor.flush(timeout=30):
+        pass
+    duracao = time.perf_counter() - inicio
+
+    metricas = ingestor.metricas()
+    metricas.update({
+        'enviadas': enviadas,
+        'duracao_s': duracao,
+        'enfileiradas_por_s': enviadas / duracao_envio if duracao_envio else 0.0,
+        'gravadas_por_s': metricas['gravadas'] / duracao if duracao else 0.0,
+    })
+    return metricas
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Replay de leituras de sensores pelo pipeline de ingestão')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_exp = sub.add_parser('exportar', help='grava leituras do banco em JSON Lines')
+    p_exp.add_argument('arquivo')
+    p_exp.add_argument('--horas', type=float, default=24)
+    p_rep = sub.add_parser('reproduzir', help='alimenta o pipeline com um arquivo de leituras')
+    p_rep.add_argument('arquivo')
+    p_rep.add_argument('--velocidade', type=float, default=0, help='multiplicador do tempo real (0 = sem pausa)')
+    p_rep.add_argument('--lote', type=int, default=2000, help='leituras por lote')
+    p_rep.add_argument('--intervalo-ms', type=int, default=500, help='prazo máximo de um lote')
+    p_rep.add_argument('--buffer', type=int, default=20000, help='capacidade do buffer')
+    p_rep.add_argument('--espera-ms', type=int, default=50, help='espera com o buffer cheio antes de descartar')
+    p_rep.add_argument('--regras', action='store_true', help='avaliar as regras de monitoramento de cada lote')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.comando == 'exportar':
+            print(f"OK - {exportar(args.arquivo, args.horas)} leituras exportadas para {args.arquivo}")
+            return 0
+
+        ingestor = IngestorSensores(db, args.buffer, args.lote, args.intervalo_ms, args.espera_ms / 1000)
+        if args.regras:
+            from modules.iot_sensores import IoTManager
+            ingestor.ao_gravar = IoTManager().verificar_regras_lote
+        m = reproduzir(ingestor, ler_leituras(args.arquivo), args.velocidade)
+        ingestor.fechar()
+
+        print(f"Leituras enviadas:      {m['enviadas']}")
+        print(f"Gravadas:               {m['gravadas']} ({m['gravadas_por_s']:.0f}/s)")
+        print(f"Enfileiradas por seg.:  {m['enfileiradas_por_s']:.0f}")
+        print(f"Descartadas/rejeitadas: {m['descartadas']}/{m['rejeitadas']}")
+        print(f"Esperas buffer cheio:   {m['esperas_buffer_cheio']} (ocupação máxima {m['ocupacao_maxima']}/{m['capacidade']})")
+        print(f"Lotes (com erro):       {m['lotes']} ({m['lotes_com_erro']})")
+        print(f"Duração total:          {m['duracao_s']:.2f}s")
+        return 0 if not m['descartadas'] else 1
+    finally:
+        db.close_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Sistema de Inventário Web - Teste de carga do lançamento de estoque
+Dispara saídas concorrentes de um insumo de teste pelo MovimentacoesManager e
+confere que o saldo nunca fica negativo e bate com as movimentações gravadas.
+A demanda padrão é o dobro do estoque, para forçar a disputa pelo último saldo.
+
+Uso:
+    python stress_estoque.py                                   # 16 threads x 50 saídas, estoque 400
+    DB_POOL_MAX=40 python stress_estoque.py --threads 32 --operacoes 100 --estoque 1000
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from database.connection import db
+from modules.movimentacoes import MovimentacoesManager
+
+
+def criar_insumo_teste(estoque: float) -> int:
+    """Insumo descartável com o saldo inicial informado"""
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO insumos (codigo, descricao, unidade, quantidade_atual, quantidade_minima)
+            VALUES (%s, 'Insumo de teste de carga', 'UND', %s, 0)
+            RETURNING id
+        """, (f"STRESS-{uuid.uuid4().hex[:10]}", estoque))
+        return cursor.fetchone()['id']
+
+
+def remover_insumo_teste(insumo_id: int) -> None:
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM movimentacoes WHERE insumo_id = %s", (insumo_id,))
+        cursor.execute("DELETE FROM insumos WHERE id = %s", (insumo_id,))
+
+
+def executar(threads: int = 16, operacoes: int = 50, estoque: float = 400,
+             quantidade: float = 1, manter: bool = False) -> dict[str, Any]:
+    """Executa `threads` x `operacoes` saídas concorrentes e devolve as métricas"""
+    if threads >= db.maxconn:
+        raise ValueError(f"Use menos threads que conexões no pool (DB_POOL_MAX={db.maxconn})")
+    with db.cursor() as cursor:
+        cursor.execute("SELECT id FROM usuarios ORDER BY id LIMIT 1")
+        usuario = cursor.fetchone()
+    if not usuario:
+        raise RuntimeError("Nenhum usuário cadastrado para assinar as movimentações")
+
+    insumo_id = criar_insumo_teste(estoque)
+    manager = MovimentacoesManager()
+    dados = {'tipo': 'Saída', 'tipo_item': 'insumo', 'item_id': insumo_id,
+             'quantidade': quantidade, 'motivo': 'Teste de carga'}
+
+    def trabalhador(_: int) -> int:
+        return sum(1 for _ in range(operacoes)
+                   if manager.create_movimentacao(dict(dados), usuario['id']))
+
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            aceitas = sum(executor.map(trabalhador, range(threads)))
+        segundos = time.perf_counter() - inicio
+
+        with db.cursor() as cursor:
+            cursor.execute("SELECT quantidade_atual FROM insumos WHERE id = %s", (insumo_id,))
+            saldo = float(cursor.fetchone()['quantidade_atual'])
+            cursor.execute("SELECT COUNT(*) as total FROM movimentacoes WHERE insumo_id = %s", (insumo_id,))
+            gravadas = cursor.fetchone()['total']
+    finally:
+        if not manter:
+            remover_insumo_teste(insumo_id)
+
+    total = threads * operacoes
+    return {
+        'operacoes': total,
+        'aceitas': aceitas,
+        'recusadas': total - aceitas,
+        'segundos': segundos,
+        'operacoes_por_segundo': total / segundos if segundos else 0.0,
+        'saldo_final': saldo,
+        'movimentacoes_gravadas': gravadas,
+        'consistente': saldo >= 0 and gravadas == aceitas
+                       and abs(saldo - (estoque - aceitas * quantidade)) < 1e-6,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Teste de carga do lançamento de estoque')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--operacoes', type=int, default=50, help='saídas por thread')
+    parser.add_argument('--estoque', type=float, default=400)
+    parser.add_argument('--quantidade', type=float, default=1)
+    parser.add_argument('--manter', action='store_true', help='não remove o insumo de teste')
+    args = parser.parse_args(argv)
+
+    r = executar(args.threads, args.operacoes, args.estoque, args.quantidade, args.manter)
+    print(f"{r['operacoes']} saídas em {r['segundos']:.2f}s ({r['operacoes_por_segundo']:.0f} op/s)")
+    print(f"Aceitas: {r['aceitas']}  Recusadas: {r['recusadas']}")
+    print(f"Saldo final: {r['saldo_final']:g}  Movimentações gravadas: {r['movimentacoes_gravadas']}")
+    if not r['consistente']:
+        print("ERRO - Saldo inconsistente com as movimentações")
+        return 1
+    print("OK - Nenhum saldo negativo e saldo igual ao lançado")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
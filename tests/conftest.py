@@ -12,6 +12,9 @@ from typing import Generator, Dict, Any
 # Adiciona o diretório root ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+# Cache compartilhado desligado: leituras com db mockado não vazam entre testes
+os.environ.setdefault('CACHE_BACKEND', 'nenhum')
+
 @pytest.fixture(scope="session")
 def test_db():
     """Cria uma conexão de banco de dados para testes"""
@@ -33,6 +36,26 @@ def test_db():
         mock_conn.return_value = mock_connection
         yield mock_connection
 
+@pytest.fixture
+def banco_offline(monkeypatch):
+    """Permite importar database.connection e os módulos sem PostgreSQL nem secrets.toml"""
+    modulos_antes = set(sys.modules)
+    monkeypatch.setenv('DB_AUTO_MIGRATE', '0')
+    with patch('psycopg2.pool.ThreadedConnectionPool', MagicMock()), \
+         patch('streamlit.secrets', {}):
+        yield
+    # Não deixa a instância global (ligada ao pool falso) para os outros testes
+    for nome in set(sys.modules) - modulos_antes:
+        if nome == 'database.connection' or nome.startswith('modules.'):
+            sys.modules.pop(nome, None)
+
+def cursor_context(mock_db, cursor):
+    """Liga db.cursor() e db.transaction() de um mock ao cursor informado"""
+    for metodo in (mock_db.cursor, mock_db.transaction):
+        metodo.return_value.__enter__.return_value = cursor
+        metodo.return_value.__exit__.return_value = False
+    return cursor
+
 @pytest.fixture
 def mock_streamlit():
     """Mock do Streamlit para testes"""
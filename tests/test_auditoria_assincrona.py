@@ -0,0 +1,151 @@
+"""
+Testes da gravação assíncrona em lote da auditoria
+"""
+
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+def _registro_log(n):
+    return (None, n, 'Usuário', 'modulo', 'acao', f'obs {n}')
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestGravadorAuditoria:
+    """GravadorAuditoria / CacheNomesUsuarios"""
+
+    def test_batch_written_when_full(self):
+        """Um lote cheio vira um único execute_values"""
+        from modules.auditoria_assincrona import GravadorAuditoria
+        banco = MagicMock()
+        cursor_context(banco, MagicMock())
+        gravador = GravadorAuditoria(banco, tamanho_lote=3, intervalo_ms=60000)
+
+        with patch('modules.auditoria_assincrona.execute_values') as mock_values:
+            for n in range(3):
+                gravador.registrar('logs_auditoria', _registro_log(n))
+            assert gravador.flush(timeout=2)
+            gravador.fechar()
+
+            assert mock_values.call_count == 1
+            _, query, registros = mock_values.call_args[0]
+            assert query.startswith('INSERT INTO logs_auditoria (data_acao, usuario_id')
+            assert len(registros) == 3
+            assert gravador.gravados == 3
+
+    def test_batch_written_after_interval(self):
+        """Registros pendentes são gravados após o intervalo sem flush explícito"""
+        from modules.auditoria_assincrona import GravadorAuditoria
+        banco = MagicMock()
+        cursor_context(banco, MagicMock())
+        gravador = GravadorAuditoria(banco, tamanho_lote=100, intervalo_ms=20)
+
+        with patch('modules.auditoria_assincrona.execute_values') as mock_values:
+            gravador.registrar('logs_auditoria', _registro_log(1))
+            for _ in range(100):
+                if mock_values.called:
+                    break
+                time.sleep(0.02)
+            gravador.fechar()
+            assert mock_values.call_count == 1
+
+    def test_failed_batch_falls_back_to_single_rows(self):
+        """Se o lote falha, cada registro é gravado isoladamente"""
+        from modules.auditoria_assincrona import GravadorAuditoria
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.execute.side_effect = [None, Exception('usuario_id nulo')]
+        gravador = GravadorAuditoria(banco, tamanho_lote=10, intervalo_ms=60000)
+
+        with patch('modules.auditoria_assincrona.execute_values', side_effect=Exception('lote')):
+            gravador.registrar('logs_auditoria', _registro_log(1))
+            gravador.registrar('logs_auditoria', _registro_log(2))
+            gravador.fechar()
+
+        assert cursor.execute.call_count == 2
+        assert gravador.gravados == 1
+        assert gravador.descartados == 1
+
+    def test_full_queue_discards(self):
+        """Com a fila cheia o registro é descartado após a espera"""
+        from modules.auditoria_assincrona import GravadorAuditoria
+        gravador = GravadorAuditoria(MagicMock(), tamanho_fila=1, espera_fila_cheia=0.01)
+
+        with patch.object(gravador, '_iniciar'):
+            assert gravador.registrar('logs_auditoria', _registro_log(1)) is True
+            assert gravador.registrar('logs_auditoria', _registro_log(2)) is False
+        assert gravador.descartados == 1
+
+    def test_unknown_table_rejected(self):
+        """Só as tabelas de auditoria conhecidas podem ser gravadas"""
+        from modules.auditoria_assincrona import GravadorAuditoria
+        with pytest.raises(ValueError):
+            GravadorAuditoria(MagicMock()).registrar('usuarios', ())
+
+    def test_user_name_cache(self):
+        """O nome do usuário é consultado uma vez e reaproveitado até invalidar"""
+        from modules.auditoria_assincrona import CacheNomesUsuarios
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchone.return_value = {'nome': 'Ana'}
+        cache = CacheNomesUsuarios(banco)
+
+        assert cache.nome(7) == 'Ana'
+        assert cache.nome(7) == 'Ana'
+        assert cursor.execute.call_count == 1
+        cache.invalidar(7)
+        cache.nome(7)
+        assert cursor.execute.call_count == 2
+        assert cache.nome(None) == 'Sistema'
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestAuditoriaEnfileirada:
+    """log_acao e AuditoriaAvancada.registrar_acao enfileiram em vez de gravar"""
+
+    def test_log_acao_uses_session_user(self):
+        """Sem usuario_id explícito, usa o usuário da sessão"""
+        with patch('modules.logs_auditoria.gravador_auditoria') as mock_gravador, \
+             patch('modules.logs_auditoria.auth_manager') as mock_auth:
+            mock_auth.get_session_user.return_value = {'id': 3, 'nome': 'Bia'}
+
+            from modules.logs_auditoria import log_acao
+            log_acao('lgpd', 'consentimento', 'obs')
+
+            tabela, registro = mock_gravador.registrar.call_args[0]
+            assert tabela == 'logs_auditoria'
+            assert registro[1:] == (3, 'Bia', 'lgpd', 'consentimento', 'obs')
+
+    def test_log_acao_without_user_is_skipped(self):
+        """logs_auditoria exige usuário; sem sessão nada é enfileirado"""
+        with patch('modules.logs_auditoria.gravador_auditoria') as mock_gravador, \
+             patch('modules.logs_auditoria.auth_manager') as mock_auth:
+            mock_auth.get_session_user.return_value = None
+
+            from modules.logs_auditoria import log_acao
+            log_acao('iot', 'rule_create')
+
+            mock_gravador.registrar.assert_not_called()
+
+    def test_registrar_acao_enqueues(self):
+        """registrar_acao não abre transação; o registro vai para a fila"""
+        with patch('modules.auditoria_avancada.gravador_auditoria') as mock_gravador, \
+             patch('modules.auditoria_avancada.auth_manager') as mock_auth, \
+             patch('modules.auditoria_avancada.db') as mock_db:
+            mock_auth.get_session_user.return_value = {'id': 1, 'nome': 'Admin', 'email': 'a@x', 'perfil': 'admin'}
+
+            from modules.auditoria_avancada import AuditoriaAvancada
+            AuditoriaAvancada().registrar_acao('insumos', 'criar', 'insumo', 10, dados_depois={'qtd': 5})
+
+            mock_db.transaction.assert_not_called()
+            tabela, registro = mock_gravador.registrar.call_args[0]
+            assert tabela == 'auditoria_logs'
+            assert registro[1:5] == (1, 'Admin', 'a@x', 'admin')
+            assert registro[13] == '{"qtd": 5}'
@@ -0,0 +1,87 @@
+"""
+Testes da busca unificada de itens (modules.busca_itens)
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+def _placeholders(query):
+    return query.replace('%%', '').count('%s')
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestBuscaItens:
+    """condicao_busca / buscar_itens e os módulos que os usam"""
+
+    def test_condition_uses_indexed_expression(self):
+        """A condição usa a mesma expressão normalizada dos índices trigram"""
+        from modules.busca_itens import condicao_busca
+        condicao, params = condicao_busca('insumo', 'Cimento', 'i')
+
+        assert condicao.startswith("f_busca_normalizada(i.codigo || ' ' || i.descricao")
+        assert 'ILIKE' not in condicao
+        assert params == ['%Cimento%']
+
+    def test_like_wildcards_are_escaped(self):
+        """Curingas digitados pelo usuário não viram curingas do LIKE"""
+        from modules.busca_itens import condicao_busca
+        _, params = condicao_busca('equipamento_manual', ' 50%_a ')
+        assert params == ['%50\\%\\_a%']
+
+    def test_empty_term_skips_query(self):
+        """Termo vazio não consulta o banco"""
+        with patch('modules.busca_itens.db') as mock_db:
+            from modules.busca_itens import buscar_itens
+            assert buscar_itens('   ') == []
+            mock_db.cursor.assert_not_called()
+
+    def test_ranked_limited_query(self):
+        """A busca é ordenada por relevância, limitada e com parâmetros consistentes"""
+        with patch('modules.busca_itens.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = [{'tipo_item': 'insumo', 'id': 1, 'codigo': 'INS-0001'}]
+
+            from modules.busca_itens import buscar_itens
+            resultado = buscar_itens('furadeira', limite=10)
+
+            query, params = cursor.execute.call_args[0]
+            assert query.count('UNION ALL') == 2
+            assert 'ORDER BY codigo_exato DESC, relevancia DESC' in query
+            assert _placeholders(query) == len(params)
+            assert params[-1] == 10
+            assert resultado == [{'tipo_item': 'insumo', 'id': 1, 'codigo': 'INS-0001'}]
+
+    def test_only_available_filter(self):
+        """apenas_disponiveis restringe ao status Disponível nas tabelas escolhidas"""
+        with patch('modules.busca_itens.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = []
+
+            from modules.busca_itens import buscar_itens
+            buscar_itens('serra', tipos=['equipamento_eletrico'], apenas_disponiveis=True)
+
+            query, params = cursor.execute.call_args[0]
+            assert 'FROM equipamentos_eletricos' in query
+            assert 'FROM insumos' not in query
+            assert "status = 'Disponível'" in query
+            assert _placeholders(query) == len(params)
+
+    def test_reservas_use_unified_search(self):
+        """ReservaManager delega a busca com termo para buscar_itens"""
+        item = {'tipo_item': 'equipamento_manual', 'tabela': 'equipamentos_manuais', 'id': 3,
+                'codigo': 'EM-3', 'nome': 'Martelo', 'marca': '', 'modelo': '', 'status': 'Disponível',
+                'relevancia': 1.0}
+        with patch('modules.reservas.buscar_itens', return_value=[item]) as mock_busca:
+            from modules.reservas import ReservaManager
+            equipamentos = ReservaManager().get_equipamentos_disponiveis('equipamentos_manuais', 'martelo')
+
+            mock_busca.assert_called_once_with('martelo', tipos=['equipamento_manual'], apenas_disponiveis=True)
+            assert equipamentos == [{'id': 3, 'codigo': 'EM-3', 'nome': 'Martelo', 'marca': '',
+                                     'modelo': '', 'status': 'Disponível'}]
@@ -0,0 +1,97 @@
+"""
+Testes do cache compartilhado com invalidação por tags
+"""
+
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _cache():
+    from modules.cache_compartilhado import CacheCompartilhado, BackendMemoria
+    return CacheCompartilhado(BackendMemoria(), ttl_padrao=60)
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestCacheCompartilhado:
+    """CacheCompartilhado com o backend em memória"""
+
+    def test_hit_after_first_call(self):
+        cache = _cache()
+        calcular = MagicMock(return_value=[{'id': 1}])
+
+        assert cache.obter_ou_calcular('q', {'a': 1}, ('insumos',), calcular) == [{'id': 1}]
+        assert cache.obter_ou_calcular('q', {'a': 1}, ('insumos',), calcular) == [{'id': 1}]
+        assert calcular.call_count == 1
+        assert (cache.acertos, cache.falhas) == (1, 1)
+
+    def test_params_normalized_and_copies_returned(self):
+        """Ordem das chaves do dicionário não muda a chave; quem lê recebe cópia"""
+        cache = _cache()
+        calcular = MagicMock(return_value={'lista': [1]})
+
+        primeiro = cache.obter_ou_calcular('q', {'a': 1, 'b': 2}, (), calcular)
+        primeiro['lista'].append(2)
+        segundo = cache.obter_ou_calcular('q', {'b': 2, 'a': 1}, (), calcular)
+
+        assert calcular.call_count == 1
+        assert segundo == {'lista': [1]}
+
+    def test_invalidation_only_affects_tagged_entries(self):
+        cache = _cache()
+        insumos = MagicMock(return_value='insumos')
+        obras = MagicMock(return_value='obras')
+        for _ in range(2):
+            cache.obter_ou_calcular('insumos', None, ('insumos',), insumos)
+            cache.obter_ou_calcular('obras', None, ('obras',), obras)
+
+        cache.invalidar('insumos')
+        cache.obter_ou_calcular('insumos', None, ('insumos',), insumos)
+        cache.obter_ou_calcular('obras', None, ('obras',), obras)
+
+        assert insumos.call_count == 2
+        assert obras.call_count == 1
+
+    def test_limpar_invalidates_everything(self):
+        cache = _cache()
+        calcular = MagicMock(return_value=1)
+        cache.obter_ou_calcular('q', None, ('obras',), calcular)
+        cache.limpar()
+        cache.obter_ou_calcular('q', None, ('obras',), calcular)
+        assert calcular.call_count == 2
+
+    def test_exceptions_are_not_cached(self):
+        cache = _cache()
+        calcular = MagicMock(side_effect=[RuntimeError('banco fora'), 'ok'])
+
+        with pytest.raises(RuntimeError):
+            cache.obter_ou_calcular('q', None, (), calcular)
+        assert cache.obter_ou_calcular('q', None, (), calcular) == 'ok'
+
+    def test_backend_failure_falls_back_to_query(self):
+        from modules.cache_compartilhado import CacheCompartilhado
+        backend = MagicMock()
+        backend.versoes.side_effect = ConnectionError('redis fora')
+        cache = CacheCompartilhado(backend)
+
+        assert cache.obter_ou_calcular('q', None, (), lambda: 42) == 42
+        cache.invalidar('insumos')  # não propaga a falha
+
+    def test_redis_without_package_falls_back_to_memory(self, monkeypatch):
+        monkeypatch.setenv('CACHE_BACKEND', 'redis')
+        monkeypatch.setitem(sys.modules, 'redis', None)
+        from modules.cache_compartilhado import criar_cache, BackendMemoria
+        assert isinstance(criar_cache().backend, BackendMemoria)
+
+    def test_manager_write_invalidates_its_tag(self):
+        """Escrita em obras invalida só a tag obras"""
+        from modules.obras import ObrasManager
+        manager = ObrasManager()
+        manager.db = MagicMock()
+        with patch('modules.obras.auth_manager'), \
+             patch('modules.obras.cache_compartilhado') as cache:
+            assert manager.delete_obra(1, 'Obra teste') is True
+            cache.invalidar.assert_called_once_with('obras')
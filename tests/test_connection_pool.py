@@ -0,0 +1,200 @@
+"""
+Testes do pool de conexões de database.connection.DatabaseConnection
+Usa um pool falso para validar empréstimo, devolução e transações sem PostgreSQL
+"""
+
+import pytest
+import threading
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakePool:
+    """Pool mínimo com a mesma interface do ThreadedConnectionPool"""
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        self.maxconn = maxconn
+        self.closed = False
+        self._pool = []
+        self._used = {}
+        self.created = []
+
+    def _new_conn(self):
+        conn = MagicMock()
+        conn.closed = 0
+        self.created.append(conn)
+        return conn
+
+    def getconn(self):
+        import psycopg2.pool
+        if self._pool:
+            conn = self._pool.pop()
+        elif len(self._used) < self.maxconn:
+            conn = self._new_conn()
+        else:
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+        self._used[id(conn)] = conn
+        return conn
+
+    def putconn(self, conn, close=False):
+        self._used.pop(id(conn), None)
+        if not close:
+            self._pool.append(conn)
+
+    def closeall(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_db():
+    """DatabaseConnection ligado a um FakePool"""
+    already_imported = 'database.connection' in sys.modules
+    with patch('psycopg2.pool.ThreadedConnectionPool', FakePool), \
+         patch('streamlit.secrets', {}), \
+         patch('bcrypt.hashpw', return_value=b'hash'):
+        from database.connection import DatabaseConnection
+        database = DatabaseConnection('postgresql://teste', minconn=1, maxconn=3)
+        yield database
+    if not already_imported:
+        # Não deixa a instância global (ligada ao FakePool) para os outros testes
+        sys.modules.pop('database.connection', None)
+
+
+class TestConnectionPool:
+    """Empréstimo e devolução de conexões"""
+
+    def test_constructor_returns_connection(self, fake_db):
+        """O construtor devolve ao pool a conexão usada para o schema"""
+        assert fake_db.pool_status()['em_uso'] == 0
+
+    def test_get_connection_is_per_thread(self, fake_db):
+        """Cada thread recebe sua própria conexão e a reutiliza"""
+        conn = fake_db.get_connection()
+        assert fake_db.get_connection() is conn
+
+        other = {}
+
+        def worker():
+            other['conn'] = fake_db.get_connection()
+            fake_db.release_connection()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert other['conn'] is not conn
+        fake_db.release_connection()
+        assert fake_db.pool_status()['em_uso'] == 0
+
+    def test_transaction_commits_and_returns(self, fake_db):
+        """transaction() faz commit e devolve a conexão"""
+        with fake_db.transaction() as cursor:
+            cursor.execute("SELECT 1")
+            conn = fake_db._local.tx_conn
+
+        conn.commit.assert_called()
+        assert fake_db.pool_status()['em_uso'] == 0
+
+    def test_transaction_rollback_on_error(self, fake_db):
+        """Exceções no bloco fazem rollback e a conexão volta ao pool"""
+        with pytest.raises(ValueError):
+            with fake_db.transaction():
+                conn = fake_db._local.tx_conn
+                conn.reset_mock()
+                raise ValueError("falha")
+
+        conn.rollback.assert_called()
+        conn.commit.assert_not_called()
+        assert fake_db.pool_status()['em_uso'] == 0
+
+    def test_nested_transaction_reuses_outer(self, fake_db):
+        """Blocos aninhados participam da transação externa"""
+        with fake_db.transaction():
+            outer = fake_db._local.tx_conn
+            outer.reset_mock()
+            with fake_db.transaction():
+                assert fake_db._local.tx_conn is outer
+            with fake_db.cursor():
+                assert fake_db.pool_status()['em_uso'] == 1
+            outer.commit.assert_not_called()
+
+        outer.commit.assert_called_once()
+
+    def test_closed_connection_discarded_on_checkout(self, fake_db):
+        """Conexões fechadas são descartadas no empréstimo"""
+        conn = fake_db.get_connection()
+        fake_db.release_connection()
+        conn.closed = 1
+
+        new_conn = fake_db.get_connection()
+        assert new_conn is not conn
+        fake_db.release_connection()
+
+    def test_orphaned_connections_are_reclaimed(self, fake_db):
+        """Conexões de threads encerradas voltam ao pool quando ele esgota"""
+        def leak():
+            fake_db.get_connection()
+
+        for _ in range(3):
+            thread = threading.Thread(target=leak)
+            thread.start()
+            thread.join()
+
+        assert fake_db.pool_status()['em_uso'] == 3
+        with fake_db.cursor() as cursor:
+            assert cursor is not None
+        assert fake_db.pool_status()['em_uso'] == 0
+
+    def test_server_cursor_is_named_and_returned(self, fake_db):
+        """server_cursor() abre um cursor nomeado e devolve a conexão ao pool"""
+        with fake_db.server_cursor('exportacao', itersize=500) as cursor:
+            conn = next(iter(fake_db.pool._used.values()))
+            assert fake_db.pool_status()['em_uso'] == 1
+            cursor.close.reset_mock()
+
+        conn.cursor.assert_called_with(name='exportacao')
+        assert cursor.itersize == 500
+        cursor.close.assert_called_once()
+        conn.rollback.assert_called()
+        assert fake_db.pool_status()['em_uso'] == 0
+
+    def test_exhausted_pool_waits_for_release(self, fake_db):
+        """Com o pool esgotado, o empréstimo espera a devolução de outra thread"""
+        emprestadas = threading.Event()
+        liberar = threading.Event()
+
+        def segurar():
+            with fake_db.cursor(), fake_db.cursor(), fake_db.cursor():
+                emprestadas.set()
+                liberar.wait(5)
+
+        thread = threading.Thread(target=segurar)
+        thread.start()
+        emprestadas.wait(5)
+        threading.Timer(0.1, liberar.set).start()
+
+        with fake_db.cursor() as cursor:
+            assert cursor is not None
+        thread.join()
+        assert fake_db.pool_status() == {'min': 1, 'max': 3, 'em_uso': 0, 'livres': 3, 'aguardando': 0}
+
+    def test_exhausted_pool_fails_after_timeout(self, fake_db):
+        """Sem devolução dentro do prazo, o empréstimo falha"""
+        import psycopg2.pool
+        fake_db.pool_timeout = 0.1
+        with fake_db.cursor(), fake_db.cursor(), fake_db.cursor():
+            with pytest.raises(psycopg2.pool.PoolError):
+                with fake_db.cursor():
+                    pass
+        assert fake_db.pool_status()['em_uso'] == 0
+
+    def test_default_size_follows_concurrent_users(self, fake_db):
+        """Sem DB_POOL_MAX, o máximo vem do número de usuários simultâneos"""
+        with patch('psycopg2.pool.ThreadedConnectionPool', FakePool), \
+             patch('streamlit.secrets', {}), \
+             patch.dict(os.environ, {'DB_POOL_USUARIOS': '40', 'DB_AUTO_MIGRATE': '0'}):
+            os.environ.pop('DB_POOL_MAX', None)
+            assert type(fake_db)('postgresql://teste').maxconn == 85
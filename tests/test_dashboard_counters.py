@@ -0,0 +1,108 @@
+"""
+Testes dos contadores do dashboard mantidos por triggers
+"""
+
+import re
+import pytest
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from database.migrator import listar_migracoes
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestDashboardCounters:
+    """DashboardCountersManager"""
+
+    def test_metrics_read_from_counters_in_one_query(self):
+        """Uma consulta às tabelas de contadores, sem agregar as tabelas de itens"""
+        with patch('modules.dashboard_counters.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.return_value = {
+                'total_insumos': 120, 'total_ee': 15, 'total_em': 40, 'total_obras': 3,
+                'itens_criticos': 7, 'valor_total_estoque': Decimal('15230.50'),
+                'movimentacoes_hoje': 4, 'movimentacoes_semana': 31,
+            }
+
+            from modules.dashboard_counters import DashboardCountersManager
+            metricas = DashboardCountersManager().get_metricas()
+
+            assert cursor.execute.call_count == 1
+            query = cursor.execute.call_args[0][0]
+            assert 'FROM dashboard_counters' in query
+            # Deltas ainda não consolidados entram na soma
+            assert 'FROM dashboard_counters_deltas' in query and 'FROM dashboard_movimentacoes_deltas' in query
+            assert not re.search(r'FROM (insumos|equipamentos_\w+|obras|movimentacoes)\b', query)
+            assert metricas['total_insumos'] == 120
+            assert metricas['valor_total_estoque'] == 15230.5
+            assert metricas['movimentacoes_semana'] == 31
+
+    def test_missing_counters_return_zeros(self):
+        with patch('modules.dashboard_counters.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.return_value = None
+
+            from modules.dashboard_counters import DashboardCountersManager, METRICAS_VAZIAS
+            assert DashboardCountersManager().get_metricas() == METRICAS_VAZIAS
+
+    def test_recalculate_calls_database_function(self):
+        with patch('modules.dashboard_counters.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+
+            from modules.dashboard_counters import DashboardCountersManager
+            assert DashboardCountersManager().recalcular() is True
+            cursor.execute.assert_called_once_with("SELECT recalcular_dashboard_counters()")
+
+    def test_migration_installs_triggers(self):
+        """Todas as tabelas que alimentam o dashboard têm trigger de contador"""
+        migracao = next(m for m in listar_migracoes() if m.nome == 'dashboard_counters')
+        for tabela in ('insumos', 'equipamentos_eletricos', 'equipamentos_manuais', 'obras', 'movimentacoes'):
+            assert f"AFTER INSERT OR UPDATE OR DELETE ON {tabela}\n" in migracao.sql
+        assert 'SELECT recalcular_dashboard_counters();' in migracao.sql
+
+    def test_consolidate_calls_database_function(self):
+        with patch('modules.dashboard_counters.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.return_value = {'atualizadas': 3}
+
+            from modules.dashboard_counters import DashboardCountersManager
+            assert DashboardCountersManager(mock_db).consolidar() == 3
+            cursor.execute.assert_called_once_with("SELECT dashboard_consolidar_deltas() as atualizadas")
+
+    def test_consolidate_failure_returns_zero(self):
+        with patch('modules.dashboard_counters.db') as mock_db:
+            mock_db.transaction.side_effect = Exception('sem conexão')
+
+            from modules.dashboard_counters import DashboardCountersManager
+            assert DashboardCountersManager(mock_db).consolidar() == 0
+
+
+class TestDashboardDeltas:
+    """Migração 0028: deltas por comando em vez de UPDATE da linha do contador"""
+
+    @pytest.fixture
+    def sql(self):
+        return next(m for m in listar_migracoes() if m.nome == 'dashboard_deltas').sql
+
+    def test_statement_triggers_with_transition_tables(self, sql):
+        assert 'REFERENCING NEW TABLE AS novas' in sql and 'REFERENCING OLD TABLE AS antigas' in sql
+        assert 'FOR EACH STATEMENT' in sql and 'FOR EACH ROW' not in sql
+        for tabela in ('insumos', 'equipamentos_eletricos', 'equipamentos_manuais', 'obras', 'movimentacoes'):
+            assert f"'{tabela}'" in sql
+
+    def test_triggers_only_append(self, sql):
+        """Nenhum trigger toca as linhas compartilhadas; só a consolidação as atualiza"""
+        gatilhos = sql.split('CREATE OR REPLACE FUNCTION dashboard_consolidar_deltas')[0]
+        assert 'UPDATE dashboard_counters' not in gatilhos
+        assert 'dashboard_movimentacoes_diarias' not in gatilhos.split('$$ LANGUAGE plpgsql;', 1)[1]
+
+    def test_partition_move_skips_counters(self, sql):
+        particao = sql.split('FUNCTION criar_particao_mensal')[1]
+        liga = particao.index("set_config('inventario.movendo_particao', 'on', true)")
+        assert liga < particao.index('DELETE FROM %I') < particao.index("'off', true)")
+        assert "current_setting('inventario.movendo_particao', true) = 'on'" in sql
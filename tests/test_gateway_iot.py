@@ -0,0 +1,166 @@
+"""
+Testes do gateway IoT em asyncio (tópicos e payloads, broker em processo,
+simulador, concorrência limitada e espera com o buffer do ingestor cheio)
+"""
+
+import asyncio
+import json
+import random
+import threading
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from modules.gateway_iot import BrokerLocal, GatewayIoT, decodificar, topico_corresponde
+from modules.simulador_iot import PERFIS_DISPOSITIVOS, dispositivos_simulados, simular, simular_leitura
+
+
+def _executar(gateway, corpo):
+    """Roda o gateway, executa `corpo(broker)` e espera o gateway esvaziar a fila"""
+    async def rodar():
+        parar = asyncio.Event()
+        tarefa = asyncio.create_task(gateway.executar(parar))
+        await asyncio.sleep(0)
+        resultado = await corpo(gateway.cliente)
+        parar.set()
+        await tarefa
+        return resultado
+    return asyncio.run(rodar())
+
+
+def _gateway(**opcoes):
+    ingestor = MagicMock()
+    ingestor.cheio.return_value = False
+    banco = MagicMock()
+    cursor = cursor_context(banco, MagicMock())
+    return GatewayIoT(BrokerLocal(), ingestor, banco, **opcoes), ingestor, cursor
+
+
+class TestTopicos:
+    @pytest.mark.parametrize('filtro, topico, esperado', [
+        ('inventario/+/sensores/+', 'inventario/TEMP_001/sensores/temperatura', True),
+        ('inventario/+/status', 'inventario/TEMP_001/status', True),
+        ('inventario/+/status', 'inventario/TEMP_001/status/extra', False),
+        ('inventario/+/sensores/+', 'inventario/TEMP_001/alertas/x', False),
+        ('inventario/#', 'inventario/TEMP_001/alertas/x', True),
+    ])
+    def test_wildcards(self, filtro, topico, esperado):
+        assert topico_corresponde(filtro, topico) is esperado
+
+    def test_sensor_type_from_topic(self):
+        device_id, tipo, dados = decodificar('inventario/TEMP_001/sensores/temperatura', b'{"valor_numerico": 21.5}')
+        assert (device_id, tipo, dados) == ('TEMP_001', 'sensores', {'valor_numerico': 21.5, 'tipo_sensor': 'temperatura'})
+
+    @pytest.mark.parametrize('topico, payload', [
+        ('inventario/TEMP_001/sensores/temperatura', b'{nao e json'),
+        ('inventario/TEMP_001/sensores/temperatura', b'[1, 2]'),
+        ('outro/TEMP_001/sensores/temperatura', b'{}'),
+        ('inventario//status', b'{}'),
+    ])
+    def test_invalid_messages(self, topico, payload):
+        with pytest.raises(ValueError):
+            decodificar(topico, payload)
+
+
+class TestSimulador:
+    def test_profiles_keep_demo_fields(self):
+        leitura = simular_leitura(PERFIS_DISPOSITIVOS[0], random.Random(1))
+        assert {'device_id', 'nome', 'tipo_dispositivo', 'localizacao', 'valor_numerico', 'unidade',
+                'bateria', 'qualidade_sinal'} <= set(leitura)
+        assert 20.0 <= leitura['valor_numerico'] <= 85.0
+        assert 'gps' in simular_leitura(PERFIS_DISPOSITIVOS[4]) and 'valor_texto' in simular_leitura(PERFIS_DISPOSITIVOS[3])
+
+    def test_copies_get_distinct_ids(self):
+        dispositivos = dispositivos_simulados(3)
+        assert len({d['device_id'] for d in dispositivos}) == 3 * len(PERFIS_DISPOSITIVOS)
+
+
+class TestGateway:
+    def test_simulated_readings_reach_ingestor(self):
+        gateway, ingestor, _ = _gateway(concorrencia=4, tamanho_fila=50)
+
+        resultado = _executar(gateway, lambda broker: simular(broker, 2000, 0.2, gerador=random.Random(0)))
+
+        assert resultado['publicadas'] > 0
+        assert ingestor.enfileirar.call_count == resultado['publicadas'] == gateway.metricas()['leituras']
+        device_id, dados = ingestor.enfileirar.call_args_list[0][0]
+        assert device_id == 'TEMP_001' and dados['tipo_sensor'] == 'temperatura'
+
+    def test_status_and_alerts_written_in_pool(self):
+        gateway, ingestor, cursor = _gateway(concorrencia=2)
+        threads = set()
+        cursor.execute.side_effect = lambda *_: threads.add(threading.current_thread().name)
+
+        async def publicar(broker):
+            await broker.publicar('inventario/TEMP_001/status', json.dumps({'status': 'offline'}).encode())
+            await broker.publicar('inventario/TEMP_001/alertas/bateria_baixa', b'{"severidade": "alto", "valor": 8}')
+            await broker.publicar('inventario/TEMP_001/sensores/temperatura', b'invalido')
+        _executar(gateway, publicar)
+
+        sqls = [' '.join(c[0][0].split()) for c in cursor.execute.call_args_list]
+        assert sqls[0].startswith('UPDATE dispositivos_iot SET status_conexao')
+        assert cursor.execute.call_args_list[0][0][1][0] == 'offline'
+        assert sqls[1].startswith('INSERT INTO alertas_iot')
+        assert cursor.execute.call_args_list[1][0][1][1:3] == ('bateria_baixa', 'alto')
+        assert all(nome.startswith('gateway-iot') for nome in threads)
+        metricas = gateway.metricas()
+        assert (metricas['status'], metricas['alertas'], metricas['invalidas']) == (1, 1, 1)
+        ingestor.enfileirar.assert_not_called()
+
+    def test_full_ingestor_buffer_waits_off_loop(self):
+        gateway, ingestor, _ = _gateway(concorrencia=2)
+        ingestor.cheio.return_value = True
+        threads = []
+        ingestor.enfileirar.side_effect = lambda *_: threads.append(threading.current_thread().name)
+
+        async def publicar(broker):
+            for valor in range(5):
+                await broker.publicar('inventario/TEMP_001/sensores/temperatura', json.dumps({'valor_numerico': valor}).encode())
+        _executar(gateway, publicar)
+
+        assert len(threads) == 5 and all(nome.startswith('gateway-iot') for nome in threads)
+        assert gateway.metricas()['esperas_ingestor'] == 5
+
+    def test_bounded_queue_holds_publisher(self):
+        gateway, _, _ = _gateway(concorrencia=1, tamanho_fila=2)
+        liberar = threading.Event()
+        gateway.ingestor.cheio.return_value = True
+        gateway.ingestor.enfileirar.side_effect = lambda *_: liberar.wait(2)
+
+        async def publicar(broker):
+            publicacoes = asyncio.ensure_future(asyncio.gather(*[
+                broker.publicar('inventario/TEMP_001/sensores/temperatura', b'{}') for _ in range(10)
+            ]))
+            await asyncio.sleep(0.05)
+            # Uma em processamento e duas na fila; as outras esperam o gateway
+            assert gateway.fila.qsize() == 2 and not publicacoes.done()
+            liberar.set()
+            await publicacoes
+        _executar(gateway, publicar)
+
+        assert gateway.metricas()['leituras'] == 10
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestLinhaDeComando:
+    @pytest.mark.parametrize('opcoes, avalia', [([], True), (['--sem-regras'], False)])
+    def test_rules_on_by_default(self, opcoes, avalia):
+        from modules import gateway_iot
+        from modules.heartbeat_iot import monitor_heartbeat
+        from modules.ingestao_iot import ingestor_sensores
+        iot = MagicMock()
+
+        with patch.object(gateway_iot, '_executar', MagicMock()), \
+             patch.object(gateway_iot.asyncio, 'run', return_value=0), \
+             patch.dict(sys.modules, {'modules.iot_sensores': MagicMock(IoTManager=MagicMock(return_value=iot))}), \
+             patch.object(monitor_heartbeat, 'carregar'), patch.object(monitor_heartbeat, 'fechar'), \
+             patch.object(ingestor_sensores, 'fechar'):
+            ingestor_sensores.ao_gravar = None
+            assert gateway_iot.main(['--local', *opcoes]) == 0
+
+        assert (ingestor_sensores.ao_gravar is iot.verificar_regras_lote) is avalia
@@ -0,0 +1,166 @@
+"""
+Testes do monitor de heartbeat (estado em memória com heap de prazos,
+alertas só nas transições e gravação em lote do último contato)
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+T0 = datetime(2025, 3, 10, 12, 0, 0)
+
+
+@pytest.fixture
+def monitor(banco_offline):
+    from modules.heartbeat_iot import MonitorHeartbeat
+    banco = MagicMock()
+    cursor = cursor_context(banco, MagicMock())
+    cursor.fetchall.return_value = [
+        {'device_id': 'TEMP_001', 'frequencia_leitura': 10, 'ultima_comunicacao': T0, 'status_conexao': 'online'},
+        {'device_id': 'HUM_002', 'frequencia_leitura': 60, 'ultima_comunicacao': None, 'status_conexao': 'offline'},
+    ]
+    monitor = MonitorHeartbeat(banco, tolerancia=3)
+    with patch.object(monitor, '_iniciar'):
+        yield monitor
+
+
+class TestTransicoes:
+    def test_offline_after_tolerance_then_back_online(self, monitor):
+        monitor.carregar()
+        monitor.registrar('TEMP_001', T0)
+        assert monitor.status('TEMP_001') == 'online'
+        assert monitor.resumo()['transicoes_pendentes'] == 0
+
+        assert monitor.verificar(T0 + timedelta(seconds=29)) == []
+        assert monitor.verificar(T0 + timedelta(seconds=30)) == ['TEMP_001']
+        # Já offline: nenhuma transição nova
+        assert monitor.verificar(T0 + timedelta(seconds=300)) == []
+
+        monitor.registrar('TEMP_001', T0 + timedelta(seconds=301))
+        resumo = monitor.resumo()
+        assert (resumo['online'], resumo['offline'], resumo['transicoes_pendentes']) == (1, 0, 2)
+
+    def test_contact_before_deadline_reschedules(self, monitor):
+        monitor.carregar()
+        for segundos in range(0, 100, 5):
+            monitor.registrar('TEMP_001', T0 + timedelta(seconds=segundos))
+        # Uma entrada por dispositivo, não uma por leitura
+        assert len(monitor._prazos) == 1
+
+        assert monitor.verificar(T0 + timedelta(seconds=120)) == []
+        assert monitor.status('TEMP_001') == 'online'
+        assert monitor.verificar(T0 + timedelta(seconds=125)) == ['TEMP_001']
+
+    def test_late_reading_does_not_change_state(self, monitor):
+        monitor.registrar('TEMP_001', T0)
+        monitor.verificar(T0 + timedelta(hours=1))
+
+        monitor.registrar('TEMP_001', T0 - timedelta(seconds=5))
+
+        assert monitor.status('TEMP_001') == 'offline'
+
+    def test_device_reported_offline(self, monitor):
+        monitor.registrar('TEMP_001', T0)
+        monitor.registrar('TEMP_001', T0 + timedelta(seconds=1), online=False)
+
+        assert monitor.status('TEMP_001') == 'offline'
+        assert monitor.verificar(T0 + timedelta(hours=1)) == []
+        assert monitor.resumo()['transicoes_pendentes'] == 1
+
+    def test_load_state_tracks_silent_devices(self, monitor):
+        monitor.carregar(incluir_estado=True)
+
+        assert (monitor.status('TEMP_001'), monitor.status('HUM_002')) == ('online', 'offline')
+        assert monitor.verificar(T0 + timedelta(seconds=31)) == ['TEMP_001']
+
+
+class TestGravacao:
+    def test_changed_devices_and_alerts_in_one_transaction(self, monitor):
+        monitor.carregar()
+        monitor.registrar('TEMP_001', T0)
+        monitor.registrar('VIB_003', T0 + timedelta(seconds=2))
+        monitor.verificar(T0 + timedelta(seconds=31))
+
+        with patch('modules.heartbeat_iot.execute_values') as mock_values:
+            assert monitor.gravar() is True
+
+        assert monitor.db.transaction.call_count == 1
+        atualizacao, alertas = mock_values.call_args_list
+        assert 'UPDATE dispositivos_iot' in atualizacao[0][1]
+        assert atualizacao[0][2] == [('TEMP_001', T0, 'offline'), ('VIB_003', T0 + timedelta(seconds=2), 'online')]
+        linha = alertas[0][2][0]
+        assert linha[:3] == ('TEMP_001', 'dispositivo_offline', 'alto') and linha[-1] == '30s'
+        assert monitor.resumo()['alteracoes_pendentes'] == 0
+
+        # Nada mudou: nenhuma escrita
+        with patch('modules.heartbeat_iot.execute_values') as mock_values:
+            assert monitor.gravar() is True
+            mock_values.assert_not_called()
+
+    def test_failed_write_keeps_pending(self, monitor):
+        monitor.registrar('TEMP_001', T0)
+        monitor.verificar(T0 + timedelta(hours=1))
+
+        with patch('modules.heartbeat_iot.execute_values', side_effect=Exception('sem conexão')):
+            assert monitor.gravar() is False
+
+        resumo = monitor.resumo()
+        assert (resumo['alteracoes_pendentes'], resumo['transicoes_pendentes']) == (1, 1)
+
+
+class TestResumoGravado:
+    def test_fleet_counts_come_from_database(self, monitor):
+        cursor = monitor.db.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = {'online': 3, 'atrasados': 1, 'offline': 2, 'ultimo_contato': T0}
+        # Nada em memória neste processo: o resumo não depende dele
+        assert monitor.resumo()['online'] == 0
+
+        frota = monitor.resumo_gravado()
+
+        assert frota == {'online': 3, 'atrasados': 1, 'offline': 2, 'ultimo_contato': T0}
+        sql, parametros = cursor.execute.call_args[0]
+        assert 'FROM dispositivos_iot' in sql and 'ativo = TRUE' in sql
+        assert parametros == (60, 3, 30)
+
+    def test_database_error_returns_empty_fleet(self, monitor):
+        monitor.db.cursor.side_effect = Exception('sem conexão')
+
+        assert monitor.resumo_gravado() == {'online': 0, 'atrasados': 0, 'offline': 0, 'ultimo_contato': None}
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestIntegracao:
+    def test_ingestor_hands_contacts_to_monitor(self):
+        from modules.ingestao_iot import IngestorSensores
+        banco = MagicMock()
+        cursor_context(banco, MagicMock())
+        heartbeat = MagicMock()
+        ingestor = IngestorSensores(banco, intervalo_ms=60000, heartbeat=heartbeat)
+
+        with patch('modules.ingestao_iot.execute_values') as mock_values:
+            ingestor.enfileirar('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_numerico': 20})
+            ingestor.enfileirar('HUM_002', {'tipo_sensor': 'umidade', 'valor_numerico': 50})
+            ingestor.fechar()
+
+        heartbeat.registrar_lote.assert_called_once()
+        assert set(heartbeat.registrar_lote.call_args[0][0]) == {'TEMP_001', 'HUM_002'}
+        assert not any('UPDATE dispositivos_iot' in c[0][1] for c in mock_values.call_args_list)
+
+    def test_gateway_status_goes_to_monitor(self):
+        import asyncio
+        from modules.gateway_iot import BrokerLocal, GatewayIoT
+        heartbeat = MagicMock()
+        banco = MagicMock()
+        gateway = GatewayIoT(BrokerLocal(), MagicMock(), banco, concorrencia=1, heartbeat=heartbeat)
+
+        asyncio.run(gateway.processar('inventario/TEMP_001/status', b'{"status": "offline"}'))
+
+        heartbeat.registrar.assert_called_once_with('TEMP_001', online=False)
+        banco.transaction.assert_not_called()
@@ -0,0 +1,151 @@
+"""
+Testes da importação em massa (JSON/CSV/XLSX -> COPY + upsert)
+"""
+
+import io
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+REFERENCIAS = {
+    'categoria': {'hidráulica': 1, 'outros': 11, 'ferramentas manuais': 13},
+    'obra': {'ob-01': 5, 'obra central': 5},
+    'responsavel': {'resp-01': 9},
+}
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestLeitura:
+    """Leitura em streaming dos formatos aceitos"""
+
+    def test_json_array_is_streamed(self):
+        from modules.importacao_massa import ler_registros, _ler_json
+        itens = [{'codigo': f'INS-{i}', 'descricao': 'Item "com aspas" ]'} for i in range(50)]
+        dados = json.dumps(itens).encode('utf-8')
+
+        # Blocos minúsculos forçam objetos partidos entre leituras
+        lidos = list(_ler_json(io.TextIOWrapper(io.BytesIO(dados), encoding='utf-8'), tamanho_bloco=7))
+        assert lidos == itens
+        assert [n for n, _ in ler_registros(io.BytesIO(dados), 'json')][-1] == 50
+
+    def test_csv_semicolon_and_headers_normalized(self):
+        from modules.importacao_massa import ler_registros
+        conteudo = "Código;Descrição;Quantidade Atual\nINS-1;Cano;10,5\n;;\nINS-2;Luva;3\n"
+        registros = list(ler_registros(io.BytesIO(conteudo.encode('utf-8')), 'csv'))
+        assert registros == [
+            (2, {'codigo': 'INS-1', 'descricao': 'Cano', 'quantidade_atual': '10,5'}),
+            (4, {'codigo': 'INS-2', 'descricao': 'Luva', 'quantidade_atual': '3'}),
+        ]
+
+    def test_xlsx_rows(self):
+        from openpyxl import Workbook
+        from modules.importacao_massa import ler_registros
+        planilha = Workbook()
+        planilha.active.append(['Codigo', 'Descricao', 'Quantitativo'])
+        planilha.active.append(['MAN-1', 'Alicate', 2])
+        arquivo = io.BytesIO()
+        planilha.save(arquivo)
+        arquivo.seek(0)
+        assert list(ler_registros(arquivo, 'xlsx')) == [
+            (2, {'codigo': 'MAN-1', 'descricao': 'Alicate', 'quantitativo': 2})]
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestValidacao:
+    """ImportadorMassa.validar_lote"""
+
+    def test_conversions_and_reference_maps(self):
+        from modules.importacao_massa import ImportadorMassa
+        lote = [(2, {'codigo': ' INS-1 ', 'descricao': 'Cano', 'categoria': 'HIDRÁULICA',
+                     'quantidade_atual': '10,5', 'data_validade': '31/12/2025'}),
+                (3, {'codigo': 'INS-2', 'descricao': 'Luva', 'categoria': 'Inexistente'})]
+        validos, erros = ImportadorMassa(MagicMock()).validar_lote('insumos', lote, REFERENCIAS, {})
+
+        assert erros == []
+        assert validos[0]['codigo'] == 'INS-1'
+        assert validos[0]['categoria_id'] == 1
+        assert validos[0]['quantidade_atual'] == '10.5'
+        assert validos[0]['data_validade'] == '2025-12-31'
+        assert validos[0]['unidade'] == 'UND'
+        assert validos[1]['categoria_id'] == 11  # categoria padrão
+
+    def test_per_row_errors(self):
+        from modules.importacao_massa import ImportadorMassa
+        vistos = {'MAN-1': 2}  # código aceito em um lote anterior
+        lote = [(5, {'codigo': 'MAN-1', 'descricao': 'Repetido'}),
+                (6, {'codigo': 'MAN-2', 'descricao': 'Serrote', 'quantitativo': '1,5'}),
+                (7, {'codigo': '', 'descricao': 'Sem código'}),
+                (8, {'codigo': 'MAN-3', 'descricao': 'Trena', 'obra': 'Obra X', 'valor': 'abc'}),
+                (9, {'codigo': 'MAN-4', 'descricao': 'Nível', 'obra': 'OB-01', 'responsavel': 'resp-01',
+                     'valor': '-'})]
+        validos, erros = ImportadorMassa(MagicMock()).validar_lote(
+            'equipamentos_manuais', lote, REFERENCIAS, vistos)
+
+        por_linha = {e['linha']: e['erro'] for e in erros}
+        assert 'duplicado' in por_linha[5]
+        assert 'quantitativo: deve ser inteiro' in por_linha[6]
+        assert 'codigo: obrigatório' in por_linha[7]
+        assert 'obra não encontrado(a)' in por_linha[8] and 'valor: número inválido' in por_linha[8]
+        assert [v['codigo'] for v in validos] == ['MAN-4']
+        assert validos[0]['obra_atual_id'] == 5 and validos[0]['responsavel_atual_id'] == 9
+        assert validos[0]['valor'] is None
+        assert vistos['MAN-4'] == 9
+
+    def test_legacy_observacoes_fields(self):
+        """Campos das planilhas antigas guardados em observacoes preenchem colunas vazias"""
+        from modules.importacao_massa import ImportadorMassa
+        observacoes = json.dumps({'DATA DE COMPRA': 1704067200000, 'LOJA ': 'Loja A'})
+        lote = [(1, {'codigo': 'MAN-1', 'descricao': 'Alicate', 'observacoes': observacoes})]
+        validos, erros = ImportadorMassa(MagicMock()).validar_lote(
+            'equipamentos_manuais', lote, REFERENCIAS, {})
+        assert erros == []
+        assert validos[0]['loja'] == 'Loja A'
+        assert validos[0]['data_compra'].startswith('2024-01-0')
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestGravacao:
+    """COPY na tabela temporária e upsert por código"""
+
+    def test_copy_then_set_based_upsert(self):
+        from modules.importacao_massa import ImportadorMassa
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchone.return_value = {'inseridos': 1, 'atualizados': 1}
+        registros = [{'linha': 2, 'codigo': 'INS-1', 'descricao': 'Cano', 'unidade': 'UND'},
+                     {'linha': 3, 'codigo': 'INS-2', 'descricao': 'Luva, 3/4', 'unidade': None}]
+
+        assert ImportadorMassa(banco).gravar_lote('insumos', registros, usuario_id=4) == (1, 1)
+
+        copia, buffer = cursor.copy_expert.call_args[0]
+        assert copia.startswith('COPY importacao_insumos (linha, codigo, descricao, unidade) FROM STDIN')
+        assert buffer.getvalue() == '2,INS-1,Cano,UND\r\n3,INS-2,"Luva, 3/4",\r\n'
+        upsert, params = cursor.execute.call_args[0]
+        assert 'ON CONFLICT (codigo) DO UPDATE SET descricao = EXCLUDED.descricao, unidade = EXCLUDED.unidade' in upsert
+        assert params == (4,)
+
+    def test_import_reports_rejected_batch_and_continues(self):
+        from modules.importacao_massa import ImportadorMassa
+        itens = [{'codigo': f'INS-{i}', 'descricao': 'Item', 'unidade': 'UND'} for i in range(5)]
+        importador = ImportadorMassa(MagicMock())
+        with patch.object(importador, '_carregar_referencias', return_value=REFERENCIAS), \
+             patch.object(importador, 'gravar_lote', side_effect=[(2, 0), Exception('deadlock'), (0, 1)]), \
+             patch('modules.importacao_massa.cache_compartilhado') as cache:
+            resultado = importador.importar(io.BytesIO(json.dumps(itens).encode()), 'insumos',
+                                            formato='json', tamanho_lote=2)
+
+        assert (resultado.lidos, resultado.inseridos, resultado.atualizados) == (5, 2, 1)
+        assert [e['linha'] for e in resultado.erros] == [3, 4]
+        assert resultado.relatorio_erros_csv().splitlines()[0] == 'linha,codigo,erro'
+        cache.invalidar.assert_called_once_with('insumos')
+
+    def test_unknown_table_rejected(self):
+        from modules.importacao_massa import ImportadorMassa
+        with pytest.raises(ValueError):
+            ImportadorMassa(MagicMock()).importar('x.json', 'usuarios')
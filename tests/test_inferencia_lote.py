@@ -0,0 +1,121 @@
+"""
+Testes da inferência em lote do MachineLearningManager (uma chamada ao modelo
+por lote e mesmos resultados da predição linha a linha)
+"""
+
+from unittest.mock import MagicMock
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _treinado(X, y=None, modelo=None):
+    scaler = StandardScaler().fit(X)
+    if modelo is None:
+        modelo = RandomForestRegressor(n_estimators=5, random_state=0)
+    modelo.fit(scaler.transform(X), *([] if y is None else [y]))
+    return {'modelo': modelo, 'scaler': scaler, 'metricas': {}}
+
+
+@pytest.fixture
+def manager(banco_offline):
+    from modules.machine_learning_avancado import MachineLearningManager
+    gerador = np.random.default_rng(0)
+    manutencao = gerador.normal([500, 45, 3.5, 2, 3], [150, 15, 1.2, 1, 1], (200, 5))
+    sensores = gerador.normal([45, 3.5, 2.1], [8, 0.8, 0.3], (200, 3))
+    estoque = np.column_stack([np.arange(200), np.arange(200) % 7, (np.arange(200) // 30) % 12,
+                               gerador.normal(100, 20, 200)])
+
+    manager = MachineLearningManager(MagicMock())
+    manager._treinados = {
+        'maintenance_prediction': _treinado(manutencao, manutencao[:, 0] / 10),
+        'anomaly_detection': _treinado(sensores, modelo=IsolationForest(random_state=0)),
+        # Demanda ligada ao estoque para a simulação depender dos dias anteriores
+        'inventory_optimization': _treinado(estoque, estoque[:, 3] / 10),
+    }
+    return manager
+
+
+class TestInferenciaLote:
+    def test_maintenance_batch_matches_single_rows(self, manager):
+        equipamentos = [{'horas_uso': 900, 'vibracao_media': 6}, {'horas_uso': 200}, {}]
+        modelo = manager._treinados['maintenance_prediction']['modelo']
+        modelo.predict = MagicMock(wraps=modelo.predict)
+
+        lote = manager.predict_maintenance_batch(pd.DataFrame(equipamentos))
+
+        assert modelo.predict.call_count == 1
+        individuais = [manager.predict_maintenance_needs(e) for e in equipamentos]
+        np.testing.assert_allclose(lote['dias_ate_manutencao'], [d for d, _ in individuais])
+        np.testing.assert_allclose(lote['probabilidade_falha'], [p for _, p in individuais])
+        assert lote['probabilidade_falha'].between(0, 1).all()
+
+    def test_anomaly_batch_matches_model(self, manager):
+        leituras = np.array([[45, 3.5, 2.1], [95, 9, 5], [44, 3.4, 2.0]])
+        modelo = manager._treinados['anomaly_detection']['modelo']
+        escalado = manager._treinados['anomaly_detection']['scaler'].transform(leituras)
+
+        lote = manager.detect_anomalies_batch(leituras)
+
+        assert lote['anomalia'].tolist() == (modelo.predict(escalado) == -1).tolist()
+        assert lote['anomalia'].tolist()[1] is True
+        assert manager.detect_anomalies({'temperatura': 95, 'vibracao': 9, 'pressao': 5})[0] is True
+
+    def test_benchmark_reference_matches_batch(self, manager):
+        from benchmark_ml import anomalia_por_linha, manutencao_por_linha
+        equipamentos = [{'horas_uso': 900, 'vibracao_media': 6}, {}]
+        leituras = [{'temperatura': 95, 'vibracao': 9, 'pressao': 5}, {}]
+
+        np.testing.assert_allclose(
+            manager.predict_maintenance_batch(pd.DataFrame(equipamentos))['dias_ate_manutencao'],
+            [manutencao_por_linha(manager, e) for e in equipamentos])
+        np.testing.assert_allclose(
+            manager.detect_anomalies_batch(pd.DataFrame(leituras))['score'],
+            [anomalia_por_linha(manager, l) for l in leituras])
+
+    def test_demand_simulation_matches_day_by_day(self, manager):
+        from benchmark_ml import simular_dia_a_dia
+        modelo = manager._treinados['inventory_optimization']['modelo']
+        esperado = simular_dia_a_dia(manager, 150, 30)
+        modelo.predict = MagicMock(wraps=modelo.predict)
+
+        obtido = manager.predict_demand_batch(150, 30)
+
+        np.testing.assert_allclose(obtido, esperado)
+        assert modelo.predict.call_count < 30
+        assert manager.optimize_inventory(150, 30)['predicted_demand'] == pytest.approx(sum(esperado))
+
+    def test_demand_simulation_with_negative_predictions(self, manager):
+        from benchmark_ml import simular_dia_a_dia
+        from sklearn.preprocessing import FunctionTransformer
+
+        def prever(features):
+            # Três dias de saída forte; depois repõe (demanda negativa) enquanto o estoque está zerado
+            dia, estoque = features[:, 0], features[:, 3]
+            return np.where(dia < 3, 60.0, np.where(estoque > 0, 5.0, -20.0))
+        manager._treinados['inventory_optimization'] = {
+            'modelo': MagicMock(predict=MagicMock(side_effect=prever)),
+            'scaler': FunctionTransformer(), 'metricas': {}}
+
+        esperado = simular_dia_a_dia(manager, 150, 10)
+        obtido = manager.predict_demand_batch(150, 10)
+
+        assert min(esperado) < 0
+        np.testing.assert_allclose(obtido, esperado)
+
+    def test_without_active_model(self, banco_offline):
+        from modules.machine_learning_avancado import MachineLearningManager
+        registro = MagicMock()
+        registro.carregar.return_value = None
+        manager = MachineLearningManager(registro)
+
+        with pytest.raises(LookupError):
+            manager.predict_maintenance_batch([{}])
+        assert manager.detect_anomalies({}) == (False, 0.0)
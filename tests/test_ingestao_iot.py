@@ -0,0 +1,145 @@
+"""
+Testes da ingestão em lote das leituras de sensores (COPY, atualização única
+por dispositivo, regras por lote, espera e descarte com o buffer cheio)
+"""
+
+import json
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+def _leitura(valor, tipo='temperatura'):
+    return {'tipo_sensor': tipo, 'valor_numerico': valor, 'unidade': '°C'}
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestIngestorSensores:
+    def _ingestor(self, **opcoes):
+        from modules.ingestao_iot import IngestorSensores
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        opcoes.setdefault('intervalo_ms', 60000)
+        return IngestorSensores(banco, **opcoes), banco, cursor
+
+    def test_batch_copied_with_one_update_per_device(self):
+        ingestor, banco, cursor = self._ingestor(tamanho_lote=3)
+        ingestor.ao_gravar = MagicMock()
+        copiado = []
+        cursor.copy_expert.side_effect = lambda sql, buffer: copiado.append((sql, buffer.getvalue()))
+
+        with patch('modules.ingestao_iot.execute_values') as mock_values:
+            assert ingestor.enfileirar('TEMP_001', _leitura(20))
+            assert ingestor.enfileirar('HUM_002', _leitura(55, 'umidade'))
+            assert ingestor.enfileirar('TEMP_001', _leitura(21))
+            assert ingestor.flush(timeout=2)
+            ingestor.fechar()
+
+            assert banco.transaction.call_count == 1
+            sql, linhas = copiado[0]
+            assert sql.startswith('COPY dados_sensores (device_id, timestamp_leitura, tipo_sensor')
+            assert len(linhas.strip().splitlines()) == 3
+            # ultima_comunicacao: uma linha por dispositivo no mesmo UPDATE
+            assert mock_values.call_count == 2
+            atualizacao, rollups = mock_values.call_args_list
+            dispositivos = atualizacao[0][2]
+            assert [d for d, _ in dispositivos] == ['HUM_002', 'TEMP_001']
+            assert 'UPDATE dispositivos_iot' in atualizacao[0][1]
+            # Agregados: 1m, 1h e 1d de cada dispositivo/tipo na mesma transação
+            assert 'INSERT INTO sensores_rollup' in rollups[0][1]
+            assert {linha[:2] for linha in rollups[0][2]} == {(r, d) for r in (60, 3600, 86400)
+                                                              for d in ('HUM_002', 'TEMP_001')}
+
+        ingestor.ao_gravar.assert_called_once()
+        assert [d for d, _ in ingestor.ao_gravar.call_args[0][0]] == ['TEMP_001', 'HUM_002', 'TEMP_001']
+        metricas = ingestor.metricas()
+        assert (metricas['recebidas'], metricas['gravadas'], metricas['lotes']) == (3, 3, 1)
+
+    def test_failed_copy_falls_back_to_single_rows(self):
+        ingestor, banco, cursor = self._ingestor(tamanho_lote=10)
+        cursor.copy_expert.side_effect = Exception('valor inválido')
+        cursor.execute.side_effect = [None, Exception('valor inválido')]
+
+        with patch('modules.ingestao_iot.execute_values'):
+            ingestor.enfileirar('TEMP_001', _leitura(20))
+            ingestor.enfileirar('TEMP_001', _leitura('abc'))
+            ingestor.fechar()
+
+        metricas = ingestor.metricas()
+        assert (metricas['gravadas'], metricas['descartadas'], metricas['lotes_com_erro']) == (1, 1, 1)
+        assert cursor.execute.call_args_list[0][0][0].startswith('INSERT INTO dados_sensores')
+
+    def test_full_buffer_waits_then_drops(self):
+        ingestor, _, _ = self._ingestor(tamanho_buffer=1, espera_buffer_cheio=0.01)
+
+        with patch.object(ingestor, '_iniciar'):
+            assert ingestor.enfileirar('TEMP_001', _leitura(20)) is True
+            assert ingestor.enfileirar('TEMP_001', _leitura(21)) is False
+
+        metricas = ingestor.metricas()
+        assert metricas['esperas_buffer_cheio'] == 1
+        assert metricas['descartadas'] == 1
+        assert metricas['pendentes'] == metricas['ocupacao_maxima'] == 1
+
+    def test_reading_without_sensor_type_rejected(self):
+        ingestor, _, _ = self._ingestor()
+
+        with patch.object(ingestor, '_iniciar') as iniciar:
+            assert ingestor.enfileirar('TEMP_001', {'valor_numerico': 1}) is False
+            iniciar.assert_not_called()
+        assert ingestor.metricas()['rejeitadas'] == 1
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestReplay:
+    def test_replay_feeds_pipeline(self, tmp_path):
+        from modules.ingestao_iot import IngestorSensores
+        from replay_sensores import ler_leituras, reproduzir
+        arquivo = tmp_path / 'leituras.jsonl'
+        arquivo.write_text('\n'.join(
+            json.dumps({'device_id': f'D{n % 3}', 'timestamp': datetime(2025, 1, 1, 0, 0, n).isoformat(),
+                        **_leitura(n)}) for n in range(10)
+        ))
+        banco = MagicMock()
+        cursor_context(banco, MagicMock())
+        ingestor = IngestorSensores(banco, tamanho_lote=4, intervalo_ms=60000)
+
+        with patch('modules.ingestao_iot.execute_values'):
+            metricas = reproduzir(ingestor, ler_leituras(str(arquivo)))
+            ingestor.fechar()
+
+        assert metricas['enviadas'] == metricas['gravadas'] == 10
+        assert metricas['lotes'] == 3
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestRegrasLote:
+    def test_rules_loaded_once_per_batch(self):
+        pytest.importorskip('paho.mqtt.client')
+        from modules.regras_iot import MotorRegras
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchone.return_value = {'total': 2, 'atualizado': datetime(2025, 1, 1)}
+        cursor.fetchall.return_value = [
+            {'device_id': None, 'tipo_sensor': 'temperatura', 'condicao_sql': 'valor_numerico > 50'},
+            {'device_id': 'HUM_002', 'tipo_sensor': None, 'condicao_sql': 'valor_numerico > 0'},
+        ]
+        with patch('modules.iot_sensores.motor_regras', MotorRegras(banco)):
+            from modules.iot_sensores import IoTManager
+            manager = IoTManager()
+
+            with patch.object(manager, 'gerar_alerta_automatico') as alerta:
+                manager.verificar_regras_lote([('TEMP_001', _leitura(80)), ('TEMP_002', _leitura(20)),
+                                               ('HUM_002', _leitura(40, 'umidade'))])
+                manager.verificar_regras_lote([('TEMP_001', _leitura(90))])
+
+        # Assinatura e regras na primeira vez; o segundo lote usa o cache
+        assert cursor.execute.call_count == 2
+        assert [c[0][0] for c in alerta.call_args_list] == ['TEMP_001', 'HUM_002', 'TEMP_001']
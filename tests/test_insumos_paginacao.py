@@ -0,0 +1,95 @@
+"""
+Testes da paginação por keyset e dos contadores da lista de insumos
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+def _insumos(*codigos):
+    return [{'id': i, 'codigo': c, 'quantidade_atual': 1, 'quantidade_minima': 0} for i, c in enumerate(codigos, 1)]
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestInsumosPaginacao:
+    """InsumosManager.get_insumos_pagina / get_insumos_resumo"""
+
+    def test_first_page_uses_limit_plus_one(self):
+        """A primeira página lê limite + 1 linhas para saber se há próxima"""
+        with patch('modules.insumos.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = _insumos('A', 'B', 'C')
+
+            from modules.insumos import InsumosManager
+            pagina = InsumosManager().get_insumos_pagina(limite=2)
+
+            query, params = cursor.execute.call_args[0]
+            assert 'LIMIT %s' in query
+            assert 'ORDER BY i.codigo ASC' in query
+            assert 'i.*' not in query
+            assert params[-1] == 3
+            assert [i['codigo'] for i in pagina['itens']] == ['A', 'B']
+            assert pagina['tem_proxima'] is True
+            assert pagina['tem_anterior'] is False
+
+    def test_next_page_uses_keyset(self):
+        """apos_codigo vira um predicado codigo > %s, sem OFFSET"""
+        with patch('modules.insumos.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = _insumos('C')
+
+            from modules.insumos import InsumosManager
+            pagina = InsumosManager().get_insumos_pagina({'categoria_id': 5}, limite=2, apos_codigo='B')
+
+            query, params = cursor.execute.call_args[0]
+            assert 'i.codigo > %s' in query
+            assert 'OFFSET' not in query
+            assert params == [5, 'B', 3]
+            assert pagina['tem_anterior'] is True
+            assert pagina['tem_proxima'] is False
+
+    def test_previous_page_is_reversed(self):
+        """antes_codigo busca em ordem decrescente e devolve em ordem crescente"""
+        with patch('modules.insumos.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = _insumos('B', 'A')
+
+            from modules.insumos import InsumosManager
+            pagina = InsumosManager().get_insumos_pagina(limite=2, antes_codigo='C')
+
+            query, _ = cursor.execute.call_args[0]
+            assert 'i.codigo < %s' in query
+            assert 'ORDER BY i.codigo DESC' in query
+            assert [i['codigo'] for i in pagina['itens']] == ['A', 'B']
+            assert pagina['tem_anterior'] is False
+            assert pagina['tem_proxima'] is True
+
+    def test_summary_counters_in_single_query(self):
+        """Total, estoque baixo e sem estoque vêm de uma única consulta"""
+        with patch('modules.insumos.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.return_value = {'total': 10, 'estoque_baixo': 3, 'sem_estoque': 1}
+
+            from modules.insumos import InsumosManager
+            resumo = InsumosManager().get_insumos_resumo({'busca': 'cabo'})
+
+            assert cursor.execute.call_count == 1
+            query, params = cursor.execute.call_args[0]
+            assert 'FILTER' in query
+            assert params == ['%cabo%']
+            assert resumo == {'total': 10, 'estoque_baixo': 3, 'sem_estoque': 1}
+
+    def test_next_code_from_database(self):
+        """O próximo código INS- é calculado no banco"""
+        with patch('modules.insumos.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.return_value = {'ultimo': 41}
+
+            from modules.insumos import InsumosManager
+            assert InsumosManager().get_proximo_codigo("INS-") == "INS-0042"
@@ -0,0 +1,110 @@
+"""
+Testes do lançamento de estoque das movimentações (verificação, INSERT e saldo
+na mesma transação) e teste de carga concorrente contra um banco real
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+def _saida(quantidade=3):
+    return {'tipo': 'Saída', 'tipo_item': 'insumo', 'item_id': 7, 'quantidade': quantidade}
+
+
+def _comandos(cursor):
+    return [' '.join(c[0][0].split()) for c in cursor.execute.call_args_list]
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestLancamentoEstoque:
+    """MovimentacoesManager.create_movimentacao com insumos"""
+
+    def _manager(self):
+        from modules.movimentacoes import MovimentacoesManager
+        manager = MovimentacoesManager()
+        manager.auditoria = MagicMock()
+        return manager
+
+    def test_saida_posts_balance_before_insert_in_one_transaction(self):
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.side_effect = [{'quantidade_atual': 2}, {'id': 42}]
+
+            assert self._manager().create_movimentacao(_saida(), 1) == 42
+
+            comandos = _comandos(cursor)
+            assert comandos[0].startswith('UPDATE insumos')
+            assert 'quantidade_atual >= %s' in comandos[0]
+            assert 'RETURNING quantidade_atual' in comandos[0]
+            assert any(c.startswith('INSERT INTO movimentacoes') for c in comandos)
+            assert cursor.execute.call_args_list[0][0][1] == (3, 7, 3)
+            # Uma única transação, sem UPDATE separado depois do commit
+            assert mock_db.transaction.call_count == 1
+
+    def test_saida_without_balance_inserts_nothing(self):
+        with patch('modules.movimentacoes.db') as mock_db, \
+             patch('modules.movimentacoes.st') as mock_st:
+            cursor = cursor_context(mock_db, MagicMock())
+            # UPDATE condicional não afeta linha; o saldo atual é lido para a mensagem
+            cursor.fetchone.side_effect = [None, {'quantidade_atual': 2}]
+            manager = self._manager()
+
+            assert manager.create_movimentacao(_saida(), 1) is None
+
+            mock_st.error.assert_called_with("❌ Quantidade insuficiente! Disponível: 2")
+            assert not any(c.startswith('INSERT') for c in _comandos(cursor))
+            manager.auditoria.registrar_acao.assert_not_called()
+
+    def test_insufficient_balance_aborts_transaction(self):
+        """A exceção atravessa o bloco da transação, que faz rollback"""
+        from modules.movimentacoes import EstoqueInsuficiente
+        with patch('modules.movimentacoes.db') as mock_db, patch('modules.movimentacoes.st'):
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.side_effect = [None, None]
+
+            self._manager().create_movimentacao(_saida(), 1)
+
+            tipo_excecao = mock_db.transaction.return_value.__exit__.call_args[0][0]
+            assert tipo_excecao is EstoqueInsuficiente
+
+    def test_entrada_increments_balance(self):
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.side_effect = [{'quantidade_atual': 13}, {'id': 43}]
+
+            dados = dict(_saida(), tipo='Entrada')
+            assert self._manager().create_movimentacao(dados, 1) == 43
+            assert 'quantidade_atual = quantidade_atual + %s' in _comandos(cursor)[0]
+
+    def test_equipment_does_not_touch_insumos(self):
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.return_value = {'id': 44}
+
+            dados = dict(_saida(1), tipo_item='equipamento_eletrico')
+            assert self._manager().create_movimentacao(dados, 1) == 44
+            assert not any('insumos' in c for c in _comandos(cursor))
+
+
+@pytest.mark.database
+@pytest.mark.slow
+@pytest.mark.skipif(not os.environ.get('STRESS_DATABASE_URL'),
+                    reason="Defina STRESS_DATABASE_URL com um banco de teste migrado")
+def test_concurrent_saidas_never_go_negative(monkeypatch):
+    """Saídas concorrentes com demanda maior que o estoque"""
+    monkeypatch.setenv('DATABASE_URL', os.environ['STRESS_DATABASE_URL'])
+    import stress_estoque
+
+    resultado = stress_estoque.executar(threads=12, operacoes=40, estoque=200)
+
+    print(f"\n{resultado['operacoes_por_segundo']:.0f} op/s")
+    assert resultado['consistente']
+    assert resultado['saldo_final'] == 0
+    assert resultado['aceitas'] == 200
+    assert resultado['recusadas'] == 12 * 40 - 200
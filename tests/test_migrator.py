@@ -0,0 +1,138 @@
+"""
+Testes do executor de migrações versionadas (database.migrator)
+Usa um banco falso para validar a ordem, o registro em schema_migrations e a idempotência
+"""
+
+import pytest
+import re
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.migrator import (
+    MIGRATIONS_DIR, listar_migracoes, migracoes_pendentes, aplicar_migracoes, status_migracoes
+)
+
+
+class FakeDatabase:
+    """Banco mínimo com transaction()/cursor() e a tabela schema_migrations em memória"""
+
+    def __init__(self, aplicadas=None):
+        self.aplicadas = dict(aplicadas or {})
+        self.executados = []
+        self.transacoes = 0
+
+    def _cursor(self):
+        cursor = MagicMock()
+
+        def execute(sql, params=None):
+            self.executados.append(sql)
+            if 'INSERT INTO schema_migrations' in sql:
+                self.aplicadas[params[0]] = params[2]
+
+        def fetchone():
+            return {'existe': bool(self.aplicadas)}
+
+        def fetchall():
+            return [{'versao': v, 'checksum': c} for v, c in self.aplicadas.items()]
+
+        cursor.execute.side_effect = execute
+        cursor.fetchone.side_effect = fetchone
+        cursor.fetchall.side_effect = fetchall
+        return cursor
+
+    @contextmanager
+    def transaction(self):
+        self.transacoes += 1
+        yield self._cursor()
+
+    @contextmanager
+    def cursor(self):
+        yield self._cursor()
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    """Diretório com duas migrações simples"""
+    (tmp_path / '0002_segunda.sql').write_text("CREATE TABLE b (id INTEGER);", encoding='utf-8')
+    (tmp_path / '0001_primeira.sql').write_text("CREATE TABLE a (id INTEGER);", encoding='utf-8')
+    return tmp_path
+
+
+class TestListarMigracoes:
+    """Descoberta dos arquivos de migração"""
+
+    def test_ordered_by_version(self, migrations_dir):
+        """Migrações são ordenadas pela versão numérica"""
+        migracoes = listar_migracoes(migrations_dir)
+        assert [m.versao for m in migracoes] == [1, 2]
+        assert migracoes[0].nome == 'primeira'
+
+    def test_invalid_name_rejected(self, migrations_dir):
+        """Arquivos fora do padrão NNNN_nome.sql são rejeitados"""
+        (migrations_dir / 'sem_numero.sql').write_text("SELECT 1;", encoding='utf-8')
+        with pytest.raises(ValueError):
+            listar_migracoes(migrations_dir)
+
+    def test_duplicate_version_rejected(self, migrations_dir):
+        """Duas migrações com a mesma versão são rejeitadas"""
+        (migrations_dir / '0001_outra.sql').write_text("SELECT 1;", encoding='utf-8')
+        with pytest.raises(ValueError):
+            listar_migracoes(migrations_dir)
+
+    def test_repository_migrations_are_valid(self):
+        """As migrações do repositório seguem o padrão e começam pelo schema base"""
+        migracoes = listar_migracoes(MIGRATIONS_DIR)
+        assert migracoes[0].nome == 'schema_base'
+        assert [m.versao for m in migracoes] == list(range(1, len(migracoes) + 1))
+        for migracao in migracoes:
+            # Índices inline (sintaxe MySQL) não são aceitos pelo PostgreSQL
+            assert not re.search(r'^\s+INDEX ', migracao.sql, re.M), migracao.nome
+
+
+class TestAplicarMigracoes:
+    """Aplicação e registro das migrações"""
+
+    def test_applies_pending_in_order(self, migrations_dir):
+        """Todas as pendentes são aplicadas em ordem e registradas"""
+        database = FakeDatabase()
+        assert aplicar_migracoes(database, migrations_dir) == [1, 2]
+        assert set(database.aplicadas) == {1, 2}
+
+        ddl = [sql for sql in database.executados if sql.startswith('CREATE TABLE ')]
+        assert ddl == ["CREATE TABLE a (id INTEGER);", "CREATE TABLE b (id INTEGER);"]
+        assert any('pg_advisory_xact_lock' in sql for sql in database.executados)
+
+    def test_nothing_pending_skips_transaction(self, migrations_dir):
+        """Sem pendências não há transação nem DDL"""
+        database = FakeDatabase()
+        aplicar_migracoes(database, migrations_dir)
+        database.executados.clear()
+        database.transacoes = 0
+
+        assert aplicar_migracoes(database, migrations_dir) == []
+        assert database.transacoes == 0
+        assert not any('CREATE' in sql for sql in database.executados)
+
+    def test_only_new_versions_applied(self, migrations_dir):
+        """Uma migração nova é aplicada sem repetir as anteriores"""
+        database = FakeDatabase()
+        aplicar_migracoes(database, migrations_dir)
+        (migrations_dir / '0003_terceira.sql').write_text("CREATE TABLE c (id INTEGER);", encoding='utf-8')
+        database.executados.clear()
+
+        assert [m.versao for m in migracoes_pendentes(database, migrations_dir)] == [3]
+        assert aplicar_migracoes(database, migrations_dir) == [3]
+        assert "CREATE TABLE a (id INTEGER);" not in database.executados
+
+    def test_status(self, migrations_dir):
+        """status_migracoes indica aplicadas e pendentes"""
+        database = FakeDatabase()
+        aplicar_migracoes(database, migrations_dir)
+        (migrations_dir / '0003_terceira.sql').write_text("SELECT 1;", encoding='utf-8')
+
+        status = status_migracoes(database, migrations_dir)
+        assert [(s['versao'], s['aplicada']) for s in status] == [(1, True), (2, True), (3, False)]
@@ -0,0 +1,204 @@
+"""
+Testes da movimentação em lote (validação em uma consulta, UPDATEs por tabela,
+INSERT de várias linhas e auditoria agregada)
+"""
+
+import re
+
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+def _item(tipo_item, item_id, **campos):
+    item = {'tipo_item': tipo_item, 'item_id': item_id, 'codigo': f'C-{item_id}', 'descricao': f'Item {item_id}',
+            'ativo': True, 'saldo': None, 'quantitativo': None, 'status': None, 'obra_atual_id': None,
+            'valor_unitario': 10}
+    item.update(campos)
+    return item
+
+
+ITENS = [
+    _item('insumo', 1, saldo=50),
+    _item('equipamento_eletrico', 2, status='Disponível'),
+    _item('equipamento_manual', 3, status='Disponível', quantitativo=4),
+]
+
+LINHAS = [
+    {'tipo_item': 'insumo', 'item_id': 1, 'quantidade': 10},
+    {'tipo_item': 'equipamento_eletrico', 'item_id': 2, 'quantidade': 1},
+    {'tipo_item': 'equipamento_manual', 'item_id': 3, 'quantidade': 2},
+    {'tipo_item': 'insumo', 'item_id': 1, 'quantidade': 5},  # mesmo insumo: somado
+]
+
+SAIDA = {'tipo': 'Saída', 'obra_destino_id': 8, 'responsavel_destino_id': 4, 'motivo': 'Transferência'}
+
+
+def _colunas_movimentacoes():
+    """Colunas de movimentacoes na migração base e as NOT NULL sem default"""
+    caminho = os.path.join(os.path.dirname(__file__), '..', 'database', 'migrations', '0001_schema_base.sql')
+    with open(caminho, encoding='utf-8') as arquivo:
+        corpo = re.search(r'CREATE TABLE IF NOT EXISTS movimentacoes \((.*?)\n\);', arquivo.read(), re.S).group(1)
+    existentes, obrigatorias = set(), set()
+    for linha in corpo.splitlines():
+        definicao = linha.split('--')[0].strip()
+        if not definicao:
+            continue
+        coluna = definicao.split()[0]
+        existentes.add(coluna)
+        if 'NOT NULL' in definicao and 'DEFAULT' not in definicao and 'SERIAL' not in definicao:
+            obrigatorias.add(coluna)
+    return existentes, obrigatorias
+
+
+def _colunas_insert(sql):
+    return [c.strip() for c in re.search(r'INSERT INTO movimentacoes \((.*?)\)', sql, re.S).group(1).split(',')]
+
+
+def _comandos(cursor):
+    return [' '.join(c[0][0].split()) for c in cursor.execute.call_args_list]
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestMovimentacoesLote:
+    """MovimentacoesManager.create_movimentacoes_lote"""
+
+    def _manager(self):
+        from modules.movimentacoes import MovimentacoesManager
+        manager = MovimentacoesManager()
+        manager.auditoria = MagicMock()
+        return manager
+
+    def test_batch_posted_in_one_transaction(self):
+        with patch('modules.movimentacoes.db') as mock_db, \
+             patch('modules.movimentacoes.execute_values') as mock_values:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.side_effect = [ITENS, [{'id': 1}], [{'id': 2}], [{'id': 3}]]
+            mock_values.return_value = [{'id': 101}, {'id': 102}, {'id': 103}]
+            manager = self._manager()
+
+            ids, erros = manager.create_movimentacoes_lote(LINHAS, SAIDA, 9)
+
+            assert erros == []
+            assert ids == [101, 102, 103]
+            assert mock_db.transaction.call_count == 1
+            comandos = _comandos(cursor)
+            # Uma consulta de validação e um UPDATE por tabela
+            assert len(comandos) == 4
+            assert 'unnest' in comandos[0]
+            assert comandos[1].startswith('UPDATE insumos')
+            insumos_params = cursor.execute.call_args_list[1][0][1]
+            assert insumos_params[1:3] == ([1], [15])
+            assert "status = 'Disponível'" in comandos[2]
+
+            # Todas as movimentações em um único INSERT
+            mock_values.assert_called_once()
+            sql, valores = mock_values.call_args[0][1:3]
+            colunas = _colunas_insert(sql)
+            # Só colunas da tabela migrada, com todas as NOT NULL sem default
+            existentes, obrigatorias = _colunas_movimentacoes()
+            assert set(colunas) <= existentes
+            assert obrigatorias <= set(colunas)
+            gravadas = [dict(zip(colunas, v)) for v in valores]
+            assert [(g['tipo_item'], g['item_id'], g['quantidade']) for g in gravadas] == [
+                ('insumo', 1, 15), ('equipamento_eletrico', 2, 1), ('equipamento_manual', 3, 2)]
+            assert gravadas[0]['codigo_item'] == 'C-1' and gravadas[0]['descricao_item'] == 'Item 1'
+            assert all(g['tipo'] == 'Saída' and g['usuario_id'] == 9 for g in gravadas)
+
+            manager.auditoria.registrar_acao.assert_called_once()
+            auditoria = manager.auditoria.registrar_acao.call_args.kwargs
+            assert auditoria['acao'] == 'criar_lote'
+            assert auditoria['dados_depois']['movimentacao_ids'] == [101, 102, 103]
+
+    def test_unavailable_lines_block_whole_batch(self):
+        with patch('modules.movimentacoes.db') as mock_db, \
+             patch('modules.movimentacoes.execute_values') as mock_values:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.side_effect = [[
+                _item('insumo', 1, saldo=3),
+                _item('equipamento_eletrico', 2, status='Em uso'),
+                _item('equipamento_manual', 3, status='Disponível', quantitativo=1),
+            ]]
+
+            ids, erros = self._manager().create_movimentacoes_lote(LINHAS, SAIDA, 9)
+
+            assert ids == []
+            assert len(erros) == 3
+            assert 'disponível 3' in erros[0]
+            assert len(_comandos(cursor)) == 1
+            mock_values.assert_not_called()
+
+    def test_transfer_requires_equipment_at_origin(self):
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.side_effect = [[
+                _item('equipamento_eletrico', 2, status='Em uso', obra_atual_id=5),
+                _item('equipamento_manual', 3, status='Em uso', obra_atual_id=6, quantitativo=4),
+            ]]
+            transferencia = {'tipo': 'Transferência', 'obra_origem_id': 5, 'obra_destino_id': 8}
+
+            ids, erros = self._manager().create_movimentacoes_lote(LINHAS[1:3], transferencia, 9)
+
+            assert ids == []
+            assert erros == ['Item 3 (C-3): equipamento não está na obra de origem']
+
+    def test_transfer_keeps_insumo_balance(self):
+        with patch('modules.movimentacoes.db') as mock_db, \
+             patch('modules.movimentacoes.execute_values') as mock_values:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.side_effect = [[_item('insumo', 1, saldo=0)]]
+            mock_values.return_value = [{'id': 101}]
+            transferencia = {'tipo': 'Transferência', 'obra_origem_id': 5, 'obra_destino_id': 8}
+
+            ids, erros = self._manager().create_movimentacoes_lote(LINHAS[:1], transferencia, 9)
+
+            assert (ids, erros) == ([101], [])
+            assert not any(c.startswith('UPDATE') for c in _comandos(cursor))
+
+    def test_concurrent_change_rolls_back(self):
+        """UPDATE condicional que não alcança todas as linhas desfaz o lote"""
+        with patch('modules.movimentacoes.db') as mock_db, \
+             patch('modules.movimentacoes.execute_values') as mock_values:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.side_effect = [ITENS, [{'id': 1}], []]
+            manager = self._manager()
+
+            ids, erros = manager.create_movimentacoes_lote(LINHAS, SAIDA, 9)
+
+            assert ids == []
+            assert 'alterado por outra movimentação' in erros[0]
+            assert mock_db.transaction.return_value.__exit__.call_args[0][0] is ValueError
+            mock_values.assert_not_called()
+            manager.auditoria.registrar_acao.assert_not_called()
+
+    def test_invalid_input(self):
+        with patch('modules.movimentacoes.db') as mock_db:
+            manager = self._manager()
+            assert manager.create_movimentacoes_lote(LINHAS, {'tipo': 'Baixa'}, 9)[1]
+            assert manager.create_movimentacoes_lote(LINHAS, {'tipo': 'Transferência', 'obra_origem_id': 5,
+                                                              'obra_destino_id': 5}, 9)[1]
+            _, erros = manager.create_movimentacoes_lote(
+                [{'tipo_item': 'equipamento_eletrico', 'item_id': 2, 'quantidade': 1}] * 2
+                + [{'tipo_item': 'insumo', 'item_id': 1, 'quantidade': 0}], SAIDA, 9)
+            assert erros == ['Linha 2: equipamento elétrico repetido no lote',
+                             'Linha 3: quantidade deve ser maior que zero']
+            mock_db.transaction.assert_not_called()
+
+    def test_nan_and_empty_rows_rejected(self):
+        """Linhas do data_editor com quantidade ou item vazios (NaN) não chegam ao banco"""
+        with patch('modules.movimentacoes.db') as mock_db:
+            manager = self._manager()
+            _, erros = manager.create_movimentacoes_lote([
+                {'tipo_item': 'insumo', 'item_id': 1, 'quantidade': float('nan')},
+                {'tipo_item': 'insumo', 'item_id': 3, 'quantidade': None},
+                {'tipo_item': 'insumo', 'item_id': float('nan'), 'quantidade': 2},
+            ], SAIDA, 9)
+            assert erros == ['Linha 1: quantidade deve ser maior que zero',
+                             'Linha 2: quantidade deve ser maior que zero',
+                             'Linha 3: item não informado']
+            mock_db.transaction.assert_not_called()
@@ -0,0 +1,84 @@
+"""
+Testes do histórico paginado de movimentações (keyset e predicados indexáveis)
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+def _movimentacoes(n):
+    return [{'id': 100 - i, 'data_movimentacao': datetime(2025, 1, 31 - i), 'tipo': 'Saída'} for i in range(n)]
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestMovimentacoesPaginacao:
+    """MovimentacoesManager.get_movimentacoes_pagina"""
+
+    def test_page_is_limited_and_returns_cursor(self):
+        """Lê limite + 1 linhas e devolve o cursor da última linha exibida"""
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = _movimentacoes(3)
+
+            from modules.movimentacoes import MovimentacoesManager
+            pagina = MovimentacoesManager().get_movimentacoes_pagina({}, limite=2)
+
+            query, params = cursor.execute.call_args[0]
+            assert 'LIMIT %s' in query
+            assert params[-1] == 3
+            assert len(pagina['itens']) == 2
+            assert pagina['proximo_cursor'] == {'data_movimentacao': datetime(2025, 1, 30), 'id': 99}
+
+    def test_last_page_has_no_cursor(self):
+        """Sem linha extra não há próxima página"""
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = _movimentacoes(1)
+
+            from modules.movimentacoes import MovimentacoesManager
+            pagina = MovimentacoesManager().get_movimentacoes_pagina({}, limite=2)
+
+            assert pagina['proximo_cursor'] is None
+
+    def test_cursor_and_dates_are_sargable(self):
+        """Cursor vira comparação de tupla e datas não usam ::date na coluna"""
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = []
+
+            from modules.movimentacoes import MovimentacoesManager
+            filtros = {'data_inicio': '2025-01-01', 'data_fim': '2025-01-31', 'obra_destino': 'Centro'}
+            cursor_pagina = {'data_movimentacao': datetime(2025, 1, 15), 'id': 42}
+            MovimentacoesManager().get_movimentacoes_pagina(filtros, limite=50, cursor_pagina=cursor_pagina)
+
+            query, params = cursor.execute.call_args[0]
+            assert 'data_movimentacao::date' not in query
+            assert 'm.data_movimentacao >= %s::date' in query
+            assert "m.data_movimentacao < %s::date + INTERVAL '1 day'" in query
+            assert '(m.data_movimentacao, m.id) < (%s, %s)' in query
+            assert 'm.obra_destino_id IN (SELECT id FROM obras' in query
+            assert 'm.data_movimentacao <= %s' in query
+            assert params == ['2025-01-01', '2025-01-31', '%Centro%', datetime(2025, 1, 15), datetime(2025, 1, 15), 42, 51]
+
+    def test_report_summary_aggregated_in_sql(self):
+        """O resumo do relatório usa GROUP BY em vez de carregar o histórico"""
+        with patch('modules.movimentacoes.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.side_effect = [
+                [{'tipo': 'Saída', 'total': 7}],
+                [{'motivo': 'Obra', 'total': 5}],
+            ]
+
+            from modules.movimentacoes import MovimentacoesManager
+            resumo = MovimentacoesManager().get_resumo_relatorio()
+
+            assert all('GROUP BY' in c[0][0] for c in cursor.execute.call_args_list)
+            assert resumo['por_tipo'] == [{'tipo': 'Saída', 'total': 7}]
+            assert resumo['por_motivo'] == [{'motivo': 'Obra', 'total': 5}]
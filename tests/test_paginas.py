@@ -0,0 +1,87 @@
+"""
+Testes do registro de páginas e do perfil de importação
+"""
+
+import ast
+import pytest
+import sys
+import os
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.paginas import PAGINAS, PAGINAS_POR_NOME, paginas_permitidas, carregar_pagina
+import perfil_importacao
+
+RAIZ = Path(__file__).parent.parent
+
+
+class TestRegistroPaginas:
+    """modules/paginas.py"""
+
+    def test_registry_does_not_import_pages(self):
+        """Importar o registro não carrega nenhum módulo de página"""
+        modulos = {p.modulo for p in PAGINAS if p.modulo}
+        sys.modules.pop('modules.paginas', None)
+        antes = set(sys.modules)
+        __import__('modules.paginas')
+        assert not (set(sys.modules) - antes) & modulos
+
+    def test_every_entry_points_to_existing_function(self):
+        """Módulo e função de cada página existem (verificado sem importar)"""
+        for pagina in PAGINAS:
+            if pagina.modulo is None:
+                continue
+            arvore = ast.parse((RAIZ / (pagina.modulo.replace('.', '/') + '.py')).read_text(encoding='utf-8'))
+            funcoes = {no.name for no in arvore.body if isinstance(no, ast.FunctionDef)}
+            assert pagina.funcao in funcoes, pagina.nome
+
+    def test_names_are_unique(self):
+        assert len(PAGINAS_POR_NOME) == len(PAGINAS)
+
+    def test_permissions_filter_keeps_dashboard(self):
+        nomes = [p.nome for p in paginas_permitidas({'insumos': True, 'obras': False})]
+        assert nomes == ['Dashboard', 'Insumos']
+        assert len(paginas_permitidas({}, admin=True)) == len(PAGINAS)
+
+    def test_load_page_imports_on_demand(self):
+        modulo = MagicMock()
+        with patch('modules.paginas.importlib.import_module', return_value=modulo) as importar:
+            assert carregar_pagina('Análise Preditiva') is modulo.show_analise_preditiva_page
+            importar.assert_called_once_with('modules.analise_preditiva')
+
+    def test_unknown_page_raises_keyerror(self):
+        for nome in ('Inexistente', 'Dashboard'):
+            with pytest.raises(KeyError):
+                carregar_pagina(nome)
+
+
+class TestPerfilImportacao:
+    """perfil_importacao.py"""
+
+    SAIDA = """import time: self [us] | cumulative | imported package
+import time:       200 |        200 |     pandas._libs
+import time:      1000 |       1500 |   pandas
+import time:       300 |        300 |   modules.paginas
+import time:       500 |       2300 | main
+"""
+
+    def test_parses_importtime_output(self):
+        entradas = perfil_importacao.interpretar(self.SAIDA)
+        assert [(e['modulo'], e['nivel']) for e in entradas] == [
+            ('pandas._libs', 2), ('pandas', 1), ('modules.paginas', 1), ('main', 0)]
+        assert entradas[1]['acumulado_ms'] == 1.5
+        assert perfil_importacao.total_ms(entradas) == 2.3
+
+    def test_slowest_respects_depth(self):
+        entradas = perfil_importacao.interpretar(self.SAIDA)
+        nomes = [e['modulo'] for e in perfil_importacao.mais_lentos(entradas, limite=2)]
+        assert nomes == ['main', 'pandas']
+
+    def test_budget_exit_code(self, capsys):
+        entradas = perfil_importacao.interpretar(self.SAIDA)
+        with patch('perfil_importacao.medir', return_value=(entradas, '')):
+            assert perfil_importacao.main(['main', '--orcamento', '10']) == 0
+            assert perfil_importacao.main(['main', '--orcamento', '1']) == 1
+        assert 'acima do orçamento' in capsys.readouterr().out
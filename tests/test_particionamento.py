@@ -0,0 +1,232 @@
+"""
+Testes do particionamento mensal e das políticas de retenção
+"""
+
+import pytest
+from datetime import date
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from database.migrator import listar_migracoes
+from database.particionamento import (
+    _somar_meses, mes_da_particao, garantir_particoes, aplicar_retencao
+)
+
+
+def _politica(tabela, coluna, meses_retencao, acao, meses_antecedencia=2):
+    return {'tabela': tabela, 'coluna_particao': coluna, 'meses_retencao': meses_retencao,
+            'acao': acao, 'meses_antecedencia': meses_antecedencia}
+
+
+class TestParticionamento:
+    """database.particionamento"""
+
+    def test_partition_month_from_name(self):
+        """O mês vem do sufixo _AAAAMM; a partição padrão não tem mês"""
+        assert mes_da_particao('auditoria_logs_202501') == date(2025, 1, 1)
+        assert mes_da_particao('auditoria_logs_padrao') is None
+
+    def test_month_arithmetic_crosses_years(self):
+        assert _somar_meses(date(2025, 11, 1), 3) == date(2026, 2, 1)
+        assert _somar_meses(date(2025, 1, 1), -24) == date(2023, 1, 1)
+
+    def test_creates_partitions_ahead(self):
+        """Cria do mês atual até meses_antecedencia à frente, sob advisory lock"""
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchall.return_value = [_politica('movimentacoes', 'data_movimentacao', None, 'manter')]
+        cursor.fetchone.side_effect = [{'criada': False}, {'criada': True}, {'criada': True}]
+
+        criadas = garantir_particoes(banco, hoje=date(2025, 12, 10))
+
+        chamadas = [c[0] for c in cursor.execute.call_args_list]
+        assert 'pg_advisory_xact_lock' in chamadas[0][0]
+        meses = [c[1][2] for c in chamadas if 'criar_particao_mensal' in c[0]]
+        assert meses == [date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)]
+        assert criadas == ['movimentacoes_202601', 'movimentacoes_202602']
+
+    def test_retention_actions(self):
+        """Partições anteriores ao limite são arquivadas, excluídas ou mantidas conforme a política"""
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchall.side_effect = [
+            [_politica('auditoria_acessos', 'timestamp', 12, 'excluir'),
+             _politica('auditoria_logs', 'timestamp', 24, 'arquivar'),
+             _politica('movimentacoes', 'data_movimentacao', None, 'manter')],
+            [{'nome': 'auditoria_acessos_202411', 'linhas_estimadas': 10},
+             {'nome': 'auditoria_acessos_202412', 'linhas_estimadas': 10},
+             {'nome': 'auditoria_acessos_padrao', 'linhas_estimadas': 0}],
+            [{'nome': 'auditoria_logs_202311', 'linhas_estimadas': 10},
+             {'nome': 'auditoria_logs_202312', 'linhas_estimadas': 10}],
+        ]
+
+        aplicadas = aplicar_retencao(banco, hoje=date(2025, 12, 5))
+
+        assert aplicadas == [('auditoria_acessos_202411', 'excluir'), ('auditoria_logs_202311', 'arquivar')]
+        ddl = [c[0][0] for c in cursor.execute.call_args_list]
+        assert 'DROP TABLE "auditoria_acessos_202411"' in ddl
+        assert 'ALTER TABLE "auditoria_logs" DETACH PARTITION "auditoria_logs_202311"' in ddl
+        assert 'ALTER TABLE "auditoria_logs_202311" SET SCHEMA arquivo' in ddl
+        assert not any('padrao' in comando or '202412' in comando for comando in ddl)
+
+    def test_migration_partitions_history_tables(self):
+        """A migração define as políticas das quatro tabelas de histórico"""
+        migracao = next(m for m in listar_migracoes() if m.nome == 'particionamento_mensal')
+        for tabela in ('auditoria_logs', 'logs_auditoria', 'auditoria_acessos', 'movimentacoes'):
+            assert f"('{tabela}'," in migracao.sql
+        assert 'PARTITION BY RANGE' in migracao.sql
+        assert 'PARTITION OF %I DEFAULT' in migracao.sql
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestConsultasParticionadas:
+    """Consultas que usam a coluna de partição"""
+
+    def test_audit_stats_avoid_full_count(self):
+        """O total é estimado e as contagens ficam restritas ao período"""
+        with patch('modules.auditoria_avancada.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchone.side_effect = [
+                {'total_logs': 5000},
+                {'sucessos': 90, 'erros': 10, 'usuarios_ativos': 4, 'logs_24h': 7},
+            ]
+            cursor.fetchall.side_effect = [[{'modulo': 'insumos', 'count': 3}], [{'acao': 'criar', 'count': 2}]]
+
+            from modules.auditoria_avancada import AuditoriaAvancada
+            stats = AuditoriaAvancada().get_estatisticas_auditoria()
+
+            consultas = [c[0][0] for c in cursor.execute.call_args_list]
+            assert 'pg_inherits' in consultas[0]
+            assert all('WHERE' in consulta for consulta in consultas)
+            assert stats['total_logs'] == 5000
+            assert stats['erros'] == 10
+            assert stats['top_modulos'] == [{'modulo': 'insumos', 'count': 3}]
+
+    def test_audit_log_end_date_is_half_open(self):
+        """data_fim inclui o dia inteiro sem converter a coluna"""
+        with patch('modules.auditoria_avancada.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            cursor.fetchall.return_value = []
+
+            from modules.auditoria_avancada import AuditoriaAvancada
+            AuditoriaAvancada().get_logs_auditoria({'data_inicio': date(2025, 1, 1), 'data_fim': date(2025, 1, 31)})
+
+            query, params = cursor.execute.call_args[0]
+            assert 'timestamp >= %s' in query
+            assert "timestamp < %s::date + INTERVAL '1 day'" in query
+            assert params == [date(2025, 1, 1), date(2025, 1, 31)]
+
+
+class TestParticionarTabela:
+    """particionar_tabela_mensal"""
+
+    def test_unique_constraints_are_carried_over(self):
+        """A versão em vigor recria as unicidades com a coluna de partição em vez de descartá-las"""
+        migracao = next(m for m in reversed(listar_migracoes())
+                        if 'FUNCTION particionar_tabela_mensal' in m.sql)
+        assert migracao.versao > 18
+        assert 'ADD CONSTRAINT %I UNIQUE (%s)' in migracao.sql
+        assert 'CREATE UNIQUE INDEX %I ON %I (%s)' in migracao.sql
+        assert 'RAISE EXCEPTION' in migracao.sql and 'RAISE WARNING' in migracao.sql
+
+    def test_legacy_views_dropped_before_partitioning(self):
+        """Views antigas do PerformanceOptimizer sobre movimentacoes não chegam ao DROP da tabela legada"""
+        migracao = next(m for m in listar_migracoes() if m.nome == 'particionamento_mensal')
+        chamada = migracao.sql.index('SELECT particionar_tabela_mensal(')
+        for view in ('mv_dashboard_stats', 'mv_movimentacoes_resumo'):
+            assert -1 < migracao.sql.find(f'DROP MATERIALIZED VIEW IF EXISTS {view};') < chamada
+        vigente = next(m for m in reversed(listar_migracoes()) if 'FUNCTION particionar_tabela_mensal' in m.sql)
+        assert "'pg_rewrite'::regclass" in vigente.sql
+
+
+# Views criadas pelo PerformanceOptimizer antes das migrações versionadas
+VIEWS_LEGADAS = """
+    CREATE MATERIALIZED VIEW mv_dashboard_stats AS
+    SELECT (SELECT COUNT(*) FROM insumos) as total_insumos,
+           (SELECT COUNT(*) FROM movimentacoes WHERE DATE(data_movimentacao) = CURRENT_DATE) as movimentacoes_hoje,
+           CURRENT_TIMESTAMP as last_updated;
+    CREATE MATERIALIZED VIEW mv_movimentacoes_resumo AS
+    SELECT DATE(data_movimentacao) as data, tipo, tipo_item, COUNT(*) as total_movimentacoes
+    FROM movimentacoes
+    WHERE data_movimentacao >= CURRENT_DATE - INTERVAL '30 days'
+    GROUP BY DATE(data_movimentacao), tipo, tipo_item;
+"""
+
+
+@pytest.fixture
+def banco_teste():
+    """Cursor num banco migrado de verdade; tudo é desfeito ao final"""
+    import psycopg2
+    import psycopg2.extras
+    conn = psycopg2.connect(os.environ['STRESS_DATABASE_URL'], cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        yield conn.cursor()
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.mark.skipif(not os.environ.get('STRESS_DATABASE_URL'),
+                    reason="Defina STRESS_DATABASE_URL com um banco de teste migrado")
+class TestParticionamentoNoBanco:
+    """Funções da migração executadas no PostgreSQL"""
+
+    def test_unique_constraint_gains_partition_column(self, banco_teste):
+        banco_teste.execute("""
+            CREATE TABLE teste_particao_unica (id SERIAL PRIMARY KEY, codigo TEXT UNIQUE,
+                                               criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+        """)
+        banco_teste.execute("INSERT INTO teste_particao_unica (codigo) VALUES ('A')")
+        banco_teste.execute("SELECT particionar_tabela_mensal('teste_particao_unica', 'criado_em', 1)")
+
+        banco_teste.execute("""
+            SELECT pg_get_constraintdef(oid) as definicao FROM pg_constraint
+            WHERE conrelid = 'teste_particao_unica'::regclass AND contype = 'u'
+        """)
+        assert banco_teste.fetchone()['definicao'] == 'UNIQUE (codigo, criado_em)'
+        assert any('passa a ser' in aviso for aviso in banco_teste.connection.notices)
+
+    def test_expression_unique_index_aborts(self, banco_teste):
+        import psycopg2
+        banco_teste.execute("""
+            CREATE TABLE teste_particao_expressao (id SERIAL PRIMARY KEY, codigo TEXT,
+                                                   criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+        """)
+        banco_teste.execute("CREATE UNIQUE INDEX ON teste_particao_expressao (lower(codigo))")
+        with pytest.raises(psycopg2.Error, match='não pode ser levado'):
+            banco_teste.execute("SELECT particionar_tabela_mensal('teste_particao_expressao', 'criado_em', 1)")
+
+    def test_upgrade_with_legacy_views(self, banco_teste):
+        """Instalação antiga com as views do PerformanceOptimizer: 0018 a 0020 aplicam sem erro"""
+        banco_teste.execute("CREATE SCHEMA teste_atualizacao")
+        banco_teste.execute("SET LOCAL search_path TO teste_atualizacao, public")
+        migracoes = listar_migracoes()
+        for migracao in migracoes:
+            if migracao.versao < 18:
+                banco_teste.execute(migracao.sql)
+        banco_teste.execute(VIEWS_LEGADAS)
+
+        for migracao in migracoes:
+            if 18 <= migracao.versao <= 20:
+                banco_teste.execute(migracao.sql)
+
+        banco_teste.execute("""
+            SELECT c.relname, c.relkind FROM pg_class c
+            WHERE c.relnamespace = 'teste_atualizacao'::regnamespace
+              AND c.relname IN ('movimentacoes', 'movimentacoes_legado', 'mv_movimentacoes_resumo')
+        """)
+        assert {r['relname']: r['relkind'] for r in banco_teste.fetchall()} == {
+            'movimentacoes': 'p', 'mv_movimentacoes_resumo': 'm'}
+
+    def test_dependent_view_aborts(self, banco_teste):
+        import psycopg2
+        banco_teste.execute("""
+            CREATE TABLE teste_particao_view (id SERIAL PRIMARY KEY, criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+        """)
+        banco_teste.execute("CREATE VIEW teste_particao_view_resumo AS SELECT COUNT(*) FROM teste_particao_view")
+        with pytest.raises(psycopg2.Error, match='Views dependem'):
+            banco_teste.execute("SELECT particionar_tabela_mensal('teste_particao_view', 'criado_em', 1)")
@@ -0,0 +1,73 @@
+"""
+Testes do cache versionado de permissões de módulos
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+@pytest.fixture
+def auth_com_cache(banco_offline):
+    """AuthenticationManager com db mockado e cache em memória próprio"""
+    from modules.auth import AuthenticationManager
+    from modules.cache_compartilhado import CacheCompartilhado, BackendMemoria
+    cache = CacheCompartilhado(BackendMemoria())
+    with patch('modules.auth.cache_compartilhado', cache):
+        manager = AuthenticationManager()
+        manager.db = MagicMock()
+        yield manager
+
+
+class TestPermissoesCache:
+    """get_user_module_permissions / update_user_module_permissions"""
+
+    def test_rerun_resolves_without_database(self, auth_com_cache):
+        cursor = cursor_context(auth_com_cache.db, MagicMock())
+        cursor.fetchall.return_value = [{'modulo': 'insumos', 'acesso': True},
+                                        {'modulo': 'obras', 'acesso': False}]
+
+        primeira = auth_com_cache.get_user_module_permissions(7)
+        segunda = auth_com_cache.get_user_module_permissions(7)
+
+        assert primeira == segunda == {'insumos': True, 'obras': False}
+        assert cursor.execute.call_count == 1
+        assert 'information_schema' not in cursor.execute.call_args[0][0]
+
+    def test_update_bumps_version(self, auth_com_cache):
+        """Alteração de permissões vale no próximo rerun"""
+        cursor = cursor_context(auth_com_cache.db, MagicMock())
+        cursor.fetchall.side_effect = [[{'modulo': 'insumos', 'acesso': True}],
+                                       [{'modulo': 'insumos', 'acesso': False}]]
+        conexao = auth_com_cache.db.get_connection.return_value
+        conexao.cursor.return_value.fetchone.return_value = {'id': 7}
+
+        assert auth_com_cache.get_user_module_permissions(7) == {'insumos': True}
+        assert auth_com_cache.update_user_module_permissions(7, {'insumos': False}) is True
+        assert auth_com_cache.get_user_module_permissions(7) == {'insumos': False}
+
+    def test_versions_are_per_user(self, auth_com_cache):
+        cursor = cursor_context(auth_com_cache.db, MagicMock())
+        cursor.fetchall.return_value = [{'modulo': 'insumos', 'acesso': True}]
+        auth_com_cache.get_user_module_permissions(1)
+        auth_com_cache.get_user_module_permissions(2)
+
+        auth_com_cache.invalidar_permissoes(1)
+        auth_com_cache.get_user_module_permissions(1)
+        auth_com_cache.get_user_module_permissions(2)
+
+        assert cursor.execute.call_count == 3
+
+    def test_missing_rows_saves_profile_defaults(self, auth_com_cache):
+        cursor = cursor_context(auth_com_cache.db, MagicMock())
+        cursor.fetchall.return_value = []
+        padrao = {'dashboard': True, 'insumos': True}
+        with patch.object(auth_com_cache, '_get_default_permissions_by_profile', return_value=padrao), \
+             patch.object(auth_com_cache, 'update_user_module_permissions') as salvar:
+            assert auth_com_cache.get_user_module_permissions(3) == padrao
+            salvar.assert_called_once_with(3, padrao)
@@ -0,0 +1,124 @@
+"""
+Testes da previsão de consumo em lote (matriz item x dia, ajuste vetorizado e
+leitura das previsões pré-calculadas)
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from modules.previsao_consumo import calcular_previsoes, gerar_previsoes, montar_matriz
+
+INICIO = date(2025, 1, 6)  # segunda-feira
+
+
+class TestMatriz:
+    def test_grouped_rows_become_dense_matrix(self):
+        linhas = [
+            {'insumo_id': 7, 'dia': INICIO, 'quantidade': Decimal('2.5')},
+            {'insumo_id': 3, 'dia': INICIO + timedelta(days=2), 'quantidade': 4},
+            {'insumo_id': 7, 'dia': INICIO + timedelta(days=3), 'quantidade': 1},
+            {'insumo_id': 99, 'dia': INICIO, 'quantidade': 5},  # insumo inativo: ignorado
+            {'insumo_id': 3, 'dia': INICIO + timedelta(days=4), 'quantidade': 5},  # fora da janela
+        ]
+
+        matriz = montar_matriz(linhas, [3, 7], INICIO, 4)
+
+        np.testing.assert_array_equal(matriz, [[0, 0, 4, 0], [2.5, 0, 0, 1]])
+
+
+class TestAjuste:
+    def test_recovers_trend_and_weekly_pattern_for_all_items(self):
+        dias = 84
+        t = np.arange(dias)
+        fim_de_semana = ((INICIO.weekday() + t) % 7 >= 5).astype(float)
+        matriz = np.vstack([
+            10 + 0.1 * t,                 # tendência pura
+            5 - 4 * fim_de_semana,        # só sazonalidade semanal
+            np.zeros(dias),               # sem consumo
+        ])
+
+        r = calcular_previsoes(matriz, INICIO, horizonte=14)
+
+        assert r['previsao'].shape == (3, 14)
+        np.testing.assert_allclose(r['tendencia'], [0.1, 0, 0], atol=1e-9)
+        np.testing.assert_allclose(r['previsao'][0], 10 + 0.1 * np.arange(dias, dias + 14))
+        # O horizonte começa numa segunda-feira: sábado e domingo nas posições 5 e 6
+        np.testing.assert_allclose(r['previsao'][1][:7], [5, 5, 5, 5, 5, 1, 1], atol=1e-9)
+        np.testing.assert_allclose(r['previsao'][2], 0)
+        assert list(r['confianca']) == ['alta', 'alta', 'insuficiente']
+
+    def test_forecast_never_negative(self):
+        matriz = np.array([np.linspace(20, 1, 60)])
+
+        r = calcular_previsoes(matriz, INICIO, horizonte=60)
+
+        assert r['previsao'].min() == 0
+
+
+class TestGerarPrevisoes:
+    def test_one_query_and_one_upsert(self):
+        database = MagicMock()
+        cursor = cursor_context(database, MagicMock())
+        hoje = date(2025, 4, 1)
+        cursor.fetchall.side_effect = [
+            [{'id': 1}, {'id': 2}],
+            [{'insumo_id': 1, 'dia': hoje - timedelta(days=d), 'quantidade': 3} for d in range(1, 31)],
+        ]
+
+        with patch('psycopg2.extras.execute_values') as mock_values:
+            assert gerar_previsoes(database, dias_historico=30, horizonte=10, hoje=hoje) == 2
+
+        consulta, params = cursor.execute.call_args_list[1][0]
+        # Colunas da tabela migrada: o insumo é item_id com tipo_item = 'insumo'
+        consulta = ' '.join(consulta.split())
+        assert "tipo_item = 'insumo'" in consulta and 'tipo = ANY(%s)' in consulta
+        assert 'GROUP BY item_id' in consulta
+        assert 'insumo_id IS NOT NULL' not in consulta and 'tipo_movimentacao' not in consulta
+        assert params == (['Saída', 'Transferência', 'saida'], hoje - timedelta(days=30), hoje)
+        valores = mock_values.call_args[0][2]
+        assert [v[0] for v in valores] == [1, 2]
+        assert valores[0][1] == hoje and valores[0][2] == pytest.approx([3.0] * 10)
+        assert valores[1][9] == 'insuficiente'
+        assert 'ON CONFLICT (insumo_id)' in mock_values.call_args[0][1]
+        assert database.transaction.call_count == 1
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestAnalisePreditiva:
+    def test_forecast_read_from_table(self):
+        with patch('modules.analise_preditiva.db') as mock_db:
+            cursor = cursor_context(mock_db, MagicMock())
+            ontem = date.today() - timedelta(days=1)
+            cursor.fetchone.return_value = {
+                'gerado_em': ontem, 'inicio_previsao': ontem,
+                'previsao_diaria': [Decimal('9'), Decimal('1'), Decimal('2'), Decimal('3')],
+                'tendencia_diaria': Decimal('0.5'), 'consumo_medio_historico': 2, 'variacao': Decimal('0.2'),
+                'dias_historico': 90, 'dias_com_consumo': 40, 'confianca': 'alta',
+            }
+            from modules.analise_preditiva import AnalisePreditivaManager
+
+            previsao = AnalisePreditivaManager().prever_consumo(5, 5)
+
+            # O dia de ontem é descartado e o último valor cobre o restante
+            assert previsao['previsao_total'] == 1 + 2 + 3 + 3 + 3
+            assert previsao['confianca'] == 'alta'
+            assert 'previsoes_consumo' in cursor.execute.call_args[0][0]
+
+    def test_missing_forecast(self):
+        with patch('modules.analise_preditiva.db') as mock_db:
+            cursor_context(mock_db, MagicMock()).fetchone.return_value = None
+            from modules.analise_preditiva import AnalisePreditivaManager
+
+            previsao = AnalisePreditivaManager().prever_consumo(5)
+
+            assert previsao['previsao_total'] == 0
+            assert previsao['confianca'] == 'insuficiente'
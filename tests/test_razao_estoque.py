@@ -0,0 +1,160 @@
+"""
+Testes da razão do estoque (saldos em uma data, fotografias e reconciliação)
+"""
+
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from modules.razao_estoque import RazaoEstoqueManager, datas_snapshot
+
+
+def _razao(cursor):
+    database = MagicMock()
+    database.get_setting.side_effect = lambda chave, padrao: padrao
+    cursor_context(database, cursor)
+    return RazaoEstoqueManager(database)
+
+
+def _sql(cursor, indice=-1):
+    return ' '.join(cursor.execute.call_args_list[indice][0][0].split())
+
+
+class TestDatasSnapshot:
+    def test_daily_and_monthly(self):
+        assert datas_snapshot(date(2025, 1, 30), date(2025, 2, 2)) == [
+            date(2025, 1, 30), date(2025, 1, 31), date(2025, 2, 1), date(2025, 2, 2)]
+        assert datas_snapshot(date(2025, 1, 15), date(2025, 3, 30), 'mensal') == [
+            date(2025, 1, 31), date(2025, 2, 28)]
+
+
+class TestConsultas:
+    def test_saldo_em_combines_snapshot_and_deltas(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [{'saldo': Decimal('7.5')}, {'saldo': Decimal('2')}]
+        momento = datetime(2025, 3, 10, 15, 0)
+
+        assert _razao(cursor).saldo_em(4, momento) == 9.5
+
+        sql = _sql(cursor)
+        params = cursor.execute.call_args[0][1]
+        # Fotografia mais próxima antes do dia e lançamentos só depois dela
+        assert 'MAX(data) as data FROM estoque_snapshots WHERE data < %(momento)s::date' in sql
+        assert 'l.registrado_em >= COALESCE((base.data + 1)::timestamp' in sql
+        assert 's.insumo_id = %(insumo_id)s' in sql and 'l.insumo_id = %(insumo_id)s' in sql
+        assert 'localizacao = %(localizacao)s' not in sql
+        assert params['momento'] == momento and params['insumo_id'] == 4
+
+    def test_inventario_em_filters_location(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [{'insumo_id': 1, 'codigo': 'INS-1', 'localizacao': 'Obra A', 'saldo': 3}]
+
+        itens = _razao(cursor).inventario_em(date(2025, 3, 1), localizacao='Obra A')
+
+        assert itens[0]['codigo'] == 'INS-1'
+        sql = _sql(cursor)
+        assert 'LEFT JOIN insumos i' in sql
+        assert 's.localizacao = %(localizacao)s' in sql and 'l.localizacao = %(localizacao)s' in sql
+        assert 'insumo_id = %(insumo_id)s' not in sql
+
+
+class TestRotinas:
+    def test_snapshots_continue_after_last(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'ultima': date(2025, 1, 3), 'primeiro': date(2024, 12, 1)}
+
+        geradas = _razao(cursor).gerar_snapshots(ate=date(2025, 1, 6))
+
+        assert geradas == [date(2025, 1, 4), date(2025, 1, 5), date(2025, 1, 6)]
+        chamadas = [c[0] for c in cursor.execute.call_args_list[1:]]
+        assert chamadas == [("SELECT estoque_gerar_snapshot(%s)", (dia,)) for dia in geradas]
+
+    def test_snapshots_never_include_today(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'ultima': None, 'primeiro': date.today()}
+
+        assert _razao(cursor).gerar_snapshots(ate=date.today()) == []
+
+    def test_reconcile_reports_and_corrects(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            {'insumo_id': 1, 'localizacao': 'Almoxarifado', 'quantidade_atual': Decimal('10'),
+             'saldo_razao': Decimal('8')},
+            {'insumo_id': 2, 'localizacao': 'Obra A', 'quantidade_atual': 0, 'saldo_razao': Decimal('3')},
+        ]
+        razao = _razao(cursor)
+
+        assert len(razao.reconciliar()) == 2
+        assert not any('INSERT' in c[0][0] for c in cursor.execute.call_args_list)
+
+        cursor.execute.reset_mock()
+        razao.reconciliar(corrigir=True)
+        assert _sql(cursor, 0) == 'LOCK TABLE insumos IN SHARE MODE'
+        assert 'FULL OUTER JOIN razao' in _sql(cursor, 1)
+        inseridos = [c[0][1] for c in cursor.execute.call_args_list[2:]]
+        assert inseridos == [(1, 'Almoxarifado', Decimal('2'), Decimal('10')), (2, 'Obra A', Decimal('-3'), 0)]
+
+
+class TestImutabilidade:
+    def test_partition_move_bypasses_immutability(self):
+        """A versão em vigor do trigger só libera o DELETE da movimentação de partição"""
+        from database.migrator import listar_migracoes
+        sql = next(m.sql for m in reversed(listar_migracoes())
+                   if 'FUNCTION trg_estoque_lancamentos_imutavel' in m.sql)
+        assert "TG_OP = 'DELETE' AND current_setting('inventario.movendo_particao', true) = 'on'" in sql
+
+
+@pytest.fixture
+def banco_teste():
+    """Cursor num banco migrado de verdade; tudo é desfeito ao final"""
+    import psycopg2
+    import psycopg2.extras
+    conn = psycopg2.connect(os.environ['STRESS_DATABASE_URL'], cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        yield conn.cursor()
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.mark.skipif(not os.environ.get('STRESS_DATABASE_URL'),
+                    reason="Defina STRESS_DATABASE_URL com um banco de teste migrado")
+class TestImutabilidadeNoBanco:
+    def test_partition_created_with_ledger_rows_in_default(self, banco_teste):
+        """Lançamentos na partição padrão são levados para a partição nova do mês"""
+        # Mês depois da última partição criada: o lançamento cai na partição padrão
+        banco_teste.execute("""
+            SELECT (date_trunc('month', CURRENT_DATE) + make_interval(months => meses_antecedencia + 1))::date as mes
+            FROM politicas_retencao WHERE tabela = 'estoque_lancamentos'
+        """)
+        mes = banco_teste.fetchone()['mes']
+        banco_teste.execute("""
+            INSERT INTO estoque_lancamentos (insumo_id, delta, saldo_local, tipo, registrado_em)
+            VALUES (-1, 5, 5, 'reconciliacao', %s + INTERVAL '1 day') RETURNING tableoid::regclass::text as particao
+        """, (mes,))
+        assert banco_teste.fetchone()['particao'] == 'estoque_lancamentos_padrao'
+
+        banco_teste.execute("SELECT criar_particao_mensal('estoque_lancamentos', 'registrado_em', %s) as criada", (mes,))
+        assert banco_teste.fetchone()['criada'] is True
+
+        banco_teste.execute("""
+            SELECT tableoid::regclass::text as particao FROM estoque_lancamentos WHERE insumo_id = -1
+        """)
+        assert banco_teste.fetchone()['particao'] == f"estoque_lancamentos_{mes:%Y%m}"
+        banco_teste.execute("SELECT current_setting('inventario.movendo_particao', true) as movendo")
+        assert banco_teste.fetchone()['movendo'] == 'off'
+
+    def test_ledger_stays_immutable(self, banco_teste):
+        import psycopg2
+        banco_teste.execute("""
+            INSERT INTO estoque_lancamentos (insumo_id, delta, saldo_local, tipo)
+            VALUES (-1, 5, 5, 'reconciliacao')
+        """)
+        with pytest.raises(psycopg2.Error, match='somente inserções'):
+            banco_teste.execute("DELETE FROM estoque_lancamentos WHERE insumo_id = -1")
@@ -0,0 +1,174 @@
+"""
+Testes do registro de modelos ML (artefatos versionados em disco, promoção e
+carregamento único por processo)
+"""
+
+import hashlib
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from modules import registro_modelos
+from modules.registro_modelos import RegistroModelos
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    registro_modelos.limpar_cache()
+    yield
+    registro_modelos.limpar_cache()
+
+
+def _registro(cursor, diretorio, ttl=60):
+    database = MagicMock()
+    database.get_setting.side_effect = lambda chave, padrao: ttl if chave == 'ML_REGISTRO_TTL' else padrao
+    cursor_context(database, cursor)
+    return RegistroModelos(database, diretorio)
+
+
+def _sql(cursor, indice):
+    return ' '.join(cursor.execute.call_args_list[indice][0][0].split())
+
+
+def _ativo(caminho, modelo_id=1, versao=1):
+    return {'id': modelo_id, 'versao_modelo': versao, 'algoritmo': 'random_forest', 'metricas_performance': {'r2': 0.9},
+            'data_treino': datetime(2025, 1, 1), 'caminho_artefato': str(caminho),
+            'hash_artefato': hashlib.sha256(caminho.read_bytes()).hexdigest()}
+
+
+class TestRegistrar:
+    def test_writes_artifact_and_promotes(self, tmp_path):
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [{'versao': 3}, {'id': 42}]
+        registro = _registro(cursor, tmp_path)
+
+        versao = registro.registrar('predicao_manutencao', 'Manutenção', 'random_forest',
+                                    {'modelo': [1, 2]}, {'r2': 0.8}, promover=True)
+
+        assert versao == 3
+        caminho = tmp_path / 'predicao_manutencao-v3.pkl'
+        assert list(tmp_path.iterdir()) == [caminho]
+        # Versão calculada sob o lock do tipo
+        assert cursor.execute.call_args_list[0][0] == (
+            "SELECT pg_advisory_xact_lock(%s)", (registro_modelos._chave_lock('predicao_manutencao'),))
+        params = cursor.execute.call_args_list[2][0][1]
+        assert params[6] == str(caminho)
+        assert params[7] == hashlib.sha256(caminho.read_bytes()).hexdigest()
+        # Desativa a anterior e ativa a nova na mesma transação
+        assert 'SET ativo = FALSE' in _sql(cursor, 3)
+        assert cursor.execute.call_args_list[4][0] == ("UPDATE modelos_ml SET ativo = TRUE WHERE id = %s", (42,))
+
+    def test_failed_insert_removes_artifact(self, tmp_path):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'versao': 1}
+        cursor.execute.side_effect = [None, None, RuntimeError('falhou')]
+
+        with pytest.raises(RuntimeError):
+            _registro(cursor, tmp_path).registrar('deteccao_anomalia', 'Anomalias', 'isolation_forest', {}, {})
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_failed_insert_keeps_committed_version_file(self, tmp_path):
+        """Um registro que falha não apaga o arquivo da versão de mesmo número gravada por outro"""
+        existente = tmp_path / 'deteccao_anomalia-v1.pkl'
+        existente.write_bytes(b'versao gravada por outro treino')
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'versao': 1}
+        cursor.execute.side_effect = [None, None, RuntimeError('falhou')]
+
+        with pytest.raises(RuntimeError):
+            _registro(cursor, tmp_path).registrar('deteccao_anomalia', 'Anomalias', 'isolation_forest', {}, {})
+
+        assert list(tmp_path.iterdir()) == [existente]
+        assert existente.read_bytes() == b'versao gravada por outro treino'
+
+    def test_promote_unknown_version(self, tmp_path):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None
+
+        assert _registro(cursor, tmp_path).promover('predicao_manutencao', 9) is False
+        assert cursor.execute.call_count == 1
+
+
+    def test_promotion_drops_loaded_model(self, tmp_path):
+        """Promover descarta o artefato carregado: a próxima predição usa a versão nova sem esperar o TTL"""
+        v1, v2 = tmp_path / 'v1.pkl', tmp_path / 'v2.pkl'
+        v1.write_bytes(registro_modelos.pickle.dumps({'modelo': 'um'}))
+        v2.write_bytes(registro_modelos.pickle.dumps({'modelo': 'dois'}))
+        cursor = MagicMock()
+        cursor.fetchone.return_value = _ativo(v1)
+        registro = _registro(cursor, tmp_path)
+        assert registro.carregar('predicao_manutencao')['modelo'] == 'um'
+
+        cursor.fetchone.return_value = {'id': 2}
+        assert registro.promover('predicao_manutencao', 2) is True
+
+        cursor.fetchone.return_value = _ativo(v2, modelo_id=2, versao=2)
+        assert registro.carregar('predicao_manutencao')['modelo'] == 'dois'
+
+
+class TestCarregar:
+    def test_loaded_once_until_promotion(self, tmp_path):
+        v1, v2 = tmp_path / 'v1.pkl', tmp_path / 'v2.pkl'
+        v1.write_bytes(registro_modelos.pickle.dumps({'modelo': 'um'}))
+        v2.write_bytes(registro_modelos.pickle.dumps({'modelo': 'dois'}))
+        cursor = MagicMock()
+        cursor.fetchone.return_value = _ativo(v1)
+
+        registro = _registro(cursor, tmp_path)
+        with patch('modules.registro_modelos.pickle.loads', wraps=registro_modelos.pickle.loads) as loads:
+            assert registro.carregar('predicao_manutencao')['modelo'] == 'um'
+            assert registro.carregar('predicao_manutencao')['metricas'] == {'r2': 0.9}
+            # Outro gerenciador (outra sessão) usa o mesmo artefato
+            assert _registro(cursor, tmp_path).carregar('predicao_manutencao')['versao'] == 1
+            assert loads.call_count == 1
+            assert cursor.execute.call_count == 1
+
+            # Vencido o TTL, a versão promovida em outro processo é carregada
+            registro.ttl = 0
+            cursor.fetchone.return_value = _ativo(v2, modelo_id=2, versao=2)
+            assert registro.carregar('predicao_manutencao')['modelo'] == 'dois'
+            assert loads.call_count == 2
+
+    def test_hash_mismatch_is_rejected(self, tmp_path):
+        caminho = tmp_path / 'v1.pkl'
+        caminho.write_bytes(registro_modelos.pickle.dumps({'modelo': 'um'}))
+        cursor = MagicMock()
+        cursor.fetchone.return_value = dict(_ativo(caminho), hash_artefato='0' * 64)
+
+        with pytest.raises(ValueError):
+            _registro(cursor, tmp_path).carregar('predicao_manutencao')
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestMachineLearningManager:
+    def test_no_training_on_construction(self):
+        from modules.machine_learning_avancado import MachineLearningManager
+        registro = MagicMock()
+        registro.carregar.return_value = None
+
+        with patch.object(MachineLearningManager, 'initialize_base_models') as treinar:
+            manager = MachineLearningManager(registro)
+            assert manager.models_trained == {}
+            assert not hasattr(manager, 'maintenance_metrics')
+            treinar.assert_not_called()
+
+    def test_predictions_use_registry_artifact(self):
+        from modules.machine_learning_avancado import MachineLearningManager
+        modelo, scaler = MagicMock(), MagicMock()
+        modelo.predict.return_value = np.array([65.0])
+        registro = MagicMock()
+        registro.carregar.return_value = {'modelo': modelo, 'scaler': scaler, 'metricas': {'r2': 0.7}}
+
+        manager = MachineLearningManager(registro)
+
+        assert manager.predict_maintenance_needs({'horas_uso': 800})[0] == 65.0
+        assert manager.maintenance_metrics == {'r2': 0.7}
+        registro.carregar.assert_any_call('predicao_manutencao')
@@ -0,0 +1,121 @@
+"""
+Testes do motor de regras IoT (gramática restrita sem eval, cache das regras
+compiladas com invalidação e avaliação vetorizada do lote)
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+
+
+@pytest.fixture
+def regras_iot(banco_offline):
+    from modules import regras_iot
+    return regras_iot
+
+
+def _motor(regras_iot, regras, atualizado=datetime(2025, 1, 1)):
+    banco = MagicMock()
+    cursor = cursor_context(banco, MagicMock())
+    cursor.fetchone.return_value = {'total': len(regras), 'atualizado': atualizado}
+    cursor.fetchall.return_value = [dict(regra, id=i, nome_regra=f'R{i}') for i, regra in enumerate(regras, 1)]
+    return regras_iot.MotorRegras(banco, ttl_segundos=0), cursor
+
+
+class TestCondicao:
+    @pytest.mark.parametrize('condicao, dados, esperado', [
+        ('valor_numerico > 80', {'valor_numerico': 85}, True),
+        ('valor_numerico > 80', {'valor_numerico': 50}, False),
+        ('bateria < 20 AND qualidade_sinal <> 100', {'bateria': 10, 'qualidade_sinal': 40}, True),
+        ('bateria < 20 and qualidade_sinal = 100', {'bateria': 10}, True),
+        ('NOT bateria > 50', {}, False),
+        ("valor_texto = 'falha' or 10 <= valor_numerico < 2 * 10", {'valor_numerico': 15}, True),
+        ("valor_texto = 'falha' or 10 <= valor_numerico < 2 * 10", {'valor_texto': 'ok'}, False),
+        ('valor_numerico > 0', {'valor_numerico': None}, False),
+        ('valor_numerico / 0 > 1', {'valor_numerico': 5}, False),
+    ])
+    def test_single_reading(self, regras_iot, condicao, dados, esperado):
+        assert regras_iot.compilar_condicao(condicao).avaliar(dados) is esperado
+
+    @pytest.mark.parametrize('condicao', [
+        "__import__('os').system('true')",
+        'valor_numerico.__class__',
+        'temperatura_externa > 10',
+        'max(valor_numerico, 1) > 0',
+        '[valor_numerico][0] > 1',
+        'valor_numerico > 1; bateria',
+    ])
+    def test_unsafe_or_unknown_rejected(self, regras_iot, condicao):
+        with pytest.raises(ValueError):
+            regras_iot.compilar_condicao(condicao)
+
+    def test_batch_matches_single_readings(self, regras_iot):
+        leituras = [{'valor_numerico': v, 'bateria': b, 'valor_texto': t}
+                    for v, b, t in [(10, 90, 'ok'), (95, 15, 'falha'), (None, 5, None), (60, 50, 'ok')]]
+        colunas = regras_iot.colunas_leituras(leituras)
+        for condicao in ['valor_numerico > 50 and bateria < 60', "not valor_texto = 'ok'",
+                         'valor_numerico - 5 >= 5 or bateria < 10', '1 = 1']:
+            compilada = regras_iot.compilar_condicao(condicao)
+            assert compilada.avaliar_lote(colunas).tolist() == [compilada.avaliar(d) for d in leituras]
+
+
+class TestMotorRegras:
+    def test_batch_alerts_in_reading_order(self, regras_iot):
+        motor, _ = _motor(regras_iot, [
+            {'device_id': None, 'tipo_sensor': 'temperatura', 'condicao_sql': 'valor_numerico > 50'},
+            {'device_id': 'TEMP_002', 'tipo_sensor': None, 'condicao_sql': 'bateria < 20'},
+            {'device_id': None, 'tipo_sensor': None, 'condicao_sql': 'valor_numerico >>> 1'},
+        ])
+        leituras = [('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_numerico': 80}),
+                    ('TEMP_002', {'tipo_sensor': 'temperatura', 'valor_numerico': 70, 'bateria': 10}),
+                    ('HUM_001', {'tipo_sensor': 'umidade', 'valor_numerico': 99}),
+                    ('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_numerico': 20})]
+
+        acionadas = motor.avaliar_lote(leituras)
+
+        assert [(d, r['id']) for d, r, _ in acionadas] == [('TEMP_001', 1), ('TEMP_002', 1), ('TEMP_002', 2)]
+        assert list(motor.invalidas) == [3]
+        assert [r['id'] for r in motor.avaliar('TEMP_002', leituras[1][1])] == [1, 2]
+
+    def test_rules_recompiled_only_when_changed(self, regras_iot):
+        motor, cursor = _motor(regras_iot, [{'device_id': None, 'tipo_sensor': None, 'condicao_sql': 'bateria < 20'}])
+        leitura = [('TEMP_001', {'tipo_sensor': 'temperatura', 'bateria': 10})]
+
+        assert len(motor.avaliar_lote(leitura)) == 1
+        assert len(motor.avaliar_lote(leitura)) == 1
+        # Só a consulta de assinatura na segunda vez
+        assert cursor.execute.call_count == 3
+        assert cursor.fetchall.call_count == 1
+
+        cursor.fetchone.return_value = {'total': 1, 'atualizado': datetime(2025, 1, 2)}
+        cursor.fetchall.return_value = [{'id': 1, 'nome_regra': 'R1', 'device_id': None, 'tipo_sensor': None,
+                                         'condicao_sql': 'bateria < 5'}]
+        assert motor.avaliar_lote(leitura) == []
+        assert cursor.fetchall.call_count == 2
+
+    def test_cache_within_ttl_and_invalidate(self, regras_iot):
+        motor, cursor = _motor(regras_iot, [{'device_id': None, 'tipo_sensor': None, 'condicao_sql': 'bateria < 20'}])
+        motor.ttl = 60
+
+        motor.regras_para('TEMP_001', 'temperatura')
+        motor.regras_para('TEMP_001', 'temperatura')
+        assert cursor.execute.call_count == 2
+
+        motor.invalidar()
+        assert len(motor.regras_para('TEMP_001', 'temperatura')) == 1
+        assert cursor.fetchall.call_count == 2
+
+    def test_text_against_number_falls_back_per_row(self, regras_iot):
+        compilada = regras_iot.compilar_condicao("valor_texto > 5")
+        colunas = regras_iot.colunas_leituras([{'valor_texto': 'a'}, {'valor_texto': 'b'}])
+
+        assert compilada.avaliar_lote(colunas).tolist() == [False, False]
+        assert np.asarray(compilada.avaliar_lote(colunas)).dtype == bool
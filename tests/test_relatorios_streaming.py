@@ -0,0 +1,151 @@
+"""
+Testes da exportação de relatórios em streaming (cursor nomeado -> arquivo)
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from unittest.mock import MagicMock
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+COLUNAS = ['item', 'codigo_patrimonial', 'valor_total', 'data']
+
+
+def _linhas(total):
+    return [{'item': f'Item {i}', 'codigo_patrimonial': f'INS-{i}',
+             'valor_total': Decimal('10.50'), 'data': datetime(2025, 1, 2, 8, 30)}
+            for i in range(total)]
+
+
+def _manager(linhas, erro=None):
+    """RelatoriosManager com server_cursor simulado, entregando as linhas em lotes"""
+    from modules.relatorios import RelatoriosManager
+    cursor = MagicMock()
+    cursor.description = [(coluna,) for coluna in COLUNAS]
+    restantes = list(linhas)
+
+    def fetchmany(tamanho):
+        if erro is not None:
+            raise erro
+        lote = restantes[:tamanho]
+        del restantes[:tamanho]
+        return lote
+    cursor.fetchmany.side_effect = fetchmany
+
+    @contextmanager
+    def server_cursor(nome, itersize=2000):
+        yield cursor
+
+    manager = RelatoriosManager()
+    manager.db = MagicMock()
+    manager.db.server_cursor.side_effect = server_cursor
+    return manager, cursor
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestExportacaoStreaming:
+    """RelatoriosManager.exportar_streaming"""
+
+    def test_csv_is_written_in_batches(self):
+        manager, cursor = _manager(_linhas(25))
+        caminho, total = manager.exportar_streaming('inventario', 'csv', tamanho_lote=10)
+        try:
+            assert total == 25
+            # 10 + 10 + 5 e a leitura vazia que encerra
+            assert cursor.fetchmany.call_count == 4
+            manager.db.server_cursor.assert_called_with('exportacao_inventario', itersize=10)
+            with open(caminho, encoding='utf-8-sig') as arquivo:
+                linhas = arquivo.read().splitlines()
+            assert linhas[0] == ';'.join(COLUNAS)
+            assert linhas[1].startswith('Item 0;INS-0;10.50;')
+            assert len(linhas) == 26
+        finally:
+            os.remove(caminho)
+
+    def test_movimentacoes_receive_period(self):
+        from modules.relatorios import CONSULTAS_RELATORIOS
+        manager, cursor = _manager([])
+        caminho, total = manager.exportar_streaming('movimentacoes', 'csv', ('2025-01-01', '2025-01-31'))
+        os.remove(caminho)
+        assert total == 0
+        cursor.execute.assert_called_once_with(CONSULTAS_RELATORIOS['movimentacoes'],
+                                               ('2025-01-01', '2025-01-31'))
+
+    def test_xlsx_constant_memory(self):
+        from openpyxl import load_workbook
+        manager, _ = _manager(_linhas(12))
+        caminho, total = manager.exportar_streaming('inventario', 'xlsx', tamanho_lote=5)
+        try:
+            planilha = load_workbook(caminho, read_only=True)['Dados']
+            linhas = list(planilha.iter_rows(values_only=True))
+            assert total == 12
+            assert linhas[0] == tuple(COLUNAS)
+            assert linhas[1][:3] == ('Item 0', 'INS-0', 10.5)
+            assert linhas[1][3] == datetime(2025, 1, 2, 8, 30)
+            assert len(linhas) == 13
+        finally:
+            os.remove(caminho)
+
+    def test_xlsx_splits_sheets(self, monkeypatch):
+        from openpyxl import load_workbook
+        import modules.relatorios as relatorios
+        monkeypatch.setattr(relatorios, 'LINHAS_POR_PLANILHA', 4)
+        manager, _ = _manager(_linhas(7))
+        caminho, _ = manager.exportar_streaming('inventario', 'xlsx')
+        try:
+            livro = load_workbook(caminho, read_only=True)
+            assert livro.sheetnames == ['Dados', 'Dados2', 'Dados3']
+            assert [len(list(livro[nome].iter_rows())) for nome in livro.sheetnames] == [4, 4, 2]
+        finally:
+            os.remove(caminho)
+
+    def test_parquet_row_groups(self):
+        pq = pytest.importorskip('pyarrow.parquet')
+        linhas = _linhas(9)
+        linhas[0]['data'] = None
+        manager, _ = _manager(linhas)
+        caminho, total = manager.exportar_streaming('inventario', 'parquet', tamanho_lote=4)
+        try:
+            arquivo = pq.ParquetFile(caminho)
+            assert total == 9
+            assert arquivo.metadata.num_rows == 9
+            assert arquivo.metadata.num_row_groups == 3
+            assert arquivo.read().column('valor_total').to_pylist()[0] == 10.5
+        finally:
+            os.remove(caminho)
+
+    def test_invalid_report_or_format(self):
+        manager, _ = _manager([])
+        with pytest.raises(ValueError):
+            manager.exportar_streaming('inexistente', 'csv')
+        with pytest.raises(ValueError):
+            manager.exportar_streaming('inventario', 'pdf')
+        manager.db.server_cursor.assert_not_called()
+
+    def test_temp_file_removed_on_error(self, tmp_path, monkeypatch):
+        import tempfile
+        monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+        manager, _ = _manager([], erro=RuntimeError('conexão perdida'))
+        with pytest.raises(RuntimeError):
+            manager.exportar_streaming('inventario', 'xlsx')
+        assert list(tmp_path.iterdir()) == []
+
+    def test_download_receives_ready_file(self, tmp_path):
+        from unittest.mock import patch
+        from modules.relatorios import _mostrar_exportacao_completa
+        caminho = tmp_path / 'exportacao.csv'
+        caminho.write_bytes(b'item;codigo\n')
+        with patch('modules.relatorios.st') as mock_st:
+            mock_st.columns.return_value = [MagicMock(), MagicMock()]
+            mock_st.button.return_value = False
+            mock_st.session_state = {'exportacao_inventario': {'caminho': str(caminho), 'total': 1, 'formato': 'csv'}}
+
+            _mostrar_exportacao_completa(MagicMock(), 'inventario', 'inventario')
+
+        # Handle do arquivo pronto, aceito desde streamlit 1.29 (função em data não é)
+        dados = mock_st.download_button.call_args.kwargs['data']
+        assert not callable(dados) and dados.name == str(caminho)
@@ -0,0 +1,127 @@
+"""
+Testes dos agregados de sensores (soma incremental por minuto/hora/dia,
+escolha da resolução pela janela e pelos pontos, retenção em lotes)
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from modules.rollups_sensores import (
+    agregar_leituras, aplicar_retencao, consultar_serie, escolher_resolucao, inicio_intervalo, reconstruir_rollups
+)
+
+AGORA = datetime(2025, 3, 10, 14, 37, 25)
+
+
+def _banco(configuracoes=None):
+    banco = MagicMock()
+    banco.get_setting.side_effect = lambda chave, padrao: (configuracoes or {}).get(chave, padrao)
+    return banco, cursor_context(banco, MagicMock())
+
+
+class TestAgregar:
+    def test_interval_start(self):
+        assert inicio_intervalo(AGORA, 60) == datetime(2025, 3, 10, 14, 37)
+        assert inicio_intervalo(AGORA, 3600) == datetime(2025, 3, 10, 14)
+        assert inicio_intervalo(AGORA, 86400) == datetime(2025, 3, 10)
+
+    def test_min_max_sum_count_per_level(self):
+        recebido = AGORA
+        leituras = [
+            ('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_numerico': 20, 'timestamp': '2025-03-10T14:37:05'}, recebido),
+            ('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_numerico': '26.5'}, recebido),
+            ('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_numerico': 23,
+                          'timestamp': datetime(2025, 3, 10, 14, 59, tzinfo=timezone.utc)}, recebido),
+            ('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_texto': 'sem valor'}, recebido),
+            ('TEMP_001', {'tipo_sensor': 'temperatura', 'valor_numerico': 'abc'}, recebido),
+        ]
+
+        linhas = {(r, inicio): valores for r, _, _, inicio, *valores in agregar_leituras(leituras)}
+
+        assert linhas[(60, datetime(2025, 3, 10, 14, 37))] == [20, 26.5, 46.5, 2]
+        assert linhas[(60, datetime(2025, 3, 10, 14, 59))] == [23, 23, 23, 1]
+        assert linhas[(3600, datetime(2025, 3, 10, 14))] == [20, 26.5, 69.5, 3]
+        assert linhas[(86400, datetime(2025, 3, 10))] == [20, 26.5, 69.5, 3]
+        assert len(linhas) == 4
+
+    def test_rows_sorted_by_key(self):
+        leituras = [(d, {'tipo_sensor': 't', 'valor_numerico': 1}, AGORA) for d in ('B', 'A', 'C')]
+        linhas = agregar_leituras(leituras)
+        assert linhas == sorted(linhas)
+
+
+class TestConsulta:
+    @pytest.mark.parametrize('janela, max_pontos, esperado', [
+        (timedelta(hours=2), 500, 60),
+        (timedelta(hours=24), 500, 3600),
+        (timedelta(hours=24), 1440, 60),
+        (timedelta(days=30), 1000, 3600),
+        (timedelta(days=30), 500, 86400),
+        (timedelta(days=365), 500, 86400),
+        (timedelta(days=5000), 500, 86400),
+    ])
+    def test_resolution_fits_point_budget(self, janela, max_pontos, esperado):
+        assert escolher_resolucao(AGORA - janela, AGORA, max_pontos, agora=AGORA) == esperado
+
+    def test_resolution_respects_retention(self):
+        retencao = {60: 14, 3600: 400, 86400: 0}
+        inicio = AGORA - timedelta(days=20)
+        # 1 minuto caberia nos pontos, mas os agregados de 20 dias atrás já foram apagados
+        assert escolher_resolucao(inicio, inicio + timedelta(hours=1), 500, retencao, AGORA) == 3600
+
+    def test_query_groups_devices(self):
+        banco, cursor = _banco()
+        cursor.fetchall.return_value = [{'inicio': datetime(2025, 3, 10, 13), 'minimo': 1.0, 'maximo': 5.0,
+                                         'media': 3.0, 'quantidade': 10}]
+
+        fim = inicio_intervalo(datetime.now(), 60)
+        resolucao, serie = consultar_serie(banco, 'temperatura', fim - timedelta(hours=24), fim)
+
+        assert resolucao == 3600
+        sql, params = cursor.execute.call_args[0]
+        assert 'FROM sensores_rollup' in sql and 'GROUP BY inicio' in sql
+        assert 'device_id' not in sql.split('WHERE')[1]
+        # O primeiro intervalo começa antes da janela e entra inteiro
+        assert params == [3600, 'temperatura', inicio_intervalo(fim - timedelta(hours=24), 3600), fim]
+        assert serie['media'].tolist() == [3.0]
+
+    def test_query_single_device(self):
+        banco, cursor = _banco()
+        cursor.fetchall.return_value = []
+
+        agora = datetime.now()
+        _, serie = consultar_serie(banco, 'umidade', agora - timedelta(hours=1), agora, device_id='HUM_002')
+
+        assert cursor.execute.call_args[0][1][-1] == 'HUM_002'
+        assert serie.empty and list(serie.columns) == ['inicio', 'minimo', 'maximo', 'media', 'quantidade']
+
+
+class TestRetencao:
+    def test_raw_readings_deleted_in_batches(self):
+        banco, cursor = _banco({'IOT_RETENCAO_1H_DIAS': '0'})
+        rowcounts = iter([100, 100, 30, 7, 2])
+        type(cursor).rowcount = property(lambda _: next(rowcounts))
+
+        removidos = aplicar_retencao(banco, agora=AGORA, tamanho_lote=100)
+
+        assert removidos == {'dados_sensores': 230, '1m': 7}
+        chamadas = cursor.execute.call_args_list
+        assert chamadas[0][0][1] == (AGORA - timedelta(days=30), 100)
+        assert chamadas[3][0][1] == (60, AGORA - timedelta(days=14))
+        assert len(chamadas) == 4
+
+    def test_rebuild_whole_days(self):
+        banco, cursor = _banco()
+        cursor.rowcount = 5
+
+        assert reconstruir_rollups(banco, datetime(2025, 3, 1, 10), datetime(2025, 3, 3, 8)) == 15
+        assert [c[0][1] for c in cursor.execute.call_args_list] == [
+            (r, datetime(2025, 3, 1), datetime(2025, 3, 4)) for r in (60, 3600, 86400)
+        ]
@@ -0,0 +1,115 @@
+"""
+Testes do serviço de atualização das views materializadas
+"""
+
+import re
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import cursor_context
+from database.migrator import listar_migracoes
+
+
+def _view(nome, idade, pendentes, populada=True):
+    return {'nome': nome, 'ultimo_refresh': None, 'duracao_ms': 10, 'ultimo_erro': None,
+            'intervalo_segundos': 300, 'limite_escritas': 100, 'sla_segundos': 900,
+            'populada': populada, 'idade_segundos': idade, 'escritas_pendentes': pendentes}
+
+
+@pytest.mark.usefixtures('banco_offline')
+class TestServicoViewsMaterializadas:
+    """ServicoViewsMaterializadas"""
+
+    def test_status_flags(self):
+        """Refresh por idade, por escritas, por estatísticas zeradas ou view vazia"""
+        from modules.views_materializadas import ServicoViewsMaterializadas
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchall.return_value = [
+            _view('fresca', 60, 10),
+            _view('velha', 600, 0),
+            _view('muito_escrita', 60, 150),
+            _view('stats_zeradas', 60, -5),
+            _view('vazia', None, 0, populada=False),
+        ]
+
+        status = {v['nome']: v for v in ServicoViewsMaterializadas(banco).status()}
+
+        assert status['fresca']['precisa_atualizar'] is False
+        assert status['fresca']['dentro_do_sla'] is True
+        assert status['velha']['precisa_atualizar'] is True
+        assert status['velha']['dentro_do_sla'] is True
+        assert status['muito_escrita']['precisa_atualizar'] is True
+        assert status['stats_zeradas']['precisa_atualizar'] is True
+        assert status['vazia']['precisa_atualizar'] is True
+        assert status['vazia']['dentro_do_sla'] is False
+
+    def test_refresh_is_concurrent_when_populated(self):
+        """View populada usa CONCURRENTLY e registra escritas e duração"""
+        from modules.views_materializadas import ServicoViewsMaterializadas
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchone.side_effect = [
+            {'obtido': True},
+            {'fontes': ['insumos'], 'ispopulated': True},
+            {'escritas': 1234},
+        ]
+
+        assert ServicoViewsMaterializadas(banco).atualizar('mv_estoque_critico') is True
+
+        comandos = [c[0][0] for c in cursor.execute.call_args_list]
+        assert 'REFRESH MATERIALIZED VIEW CONCURRENTLY "mv_estoque_critico"' in comandos
+        update = cursor.execute.call_args_list[-1][0]
+        assert 'UPDATE views_materializadas' in update[0]
+        assert update[1][0] == 1234
+        assert update[1][2] == 'mv_estoque_critico'
+
+    def test_first_refresh_is_not_concurrent(self):
+        """CONCURRENTLY exige a view populada; o primeiro refresh é comum"""
+        from modules.views_materializadas import ServicoViewsMaterializadas
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchone.side_effect = [
+            {'obtido': True},
+            {'fontes': ['movimentacoes'], 'ispopulated': False},
+            {'escritas': 0},
+        ]
+
+        ServicoViewsMaterializadas(banco).atualizar('mv_movimentacoes_resumo')
+
+        comandos = [c[0][0] for c in cursor.execute.call_args_list]
+        assert 'REFRESH MATERIALIZED VIEW "mv_movimentacoes_resumo"' in comandos
+
+    def test_refresh_skipped_when_locked(self):
+        """Outro processo atualizando a mesma view: desiste sem REFRESH"""
+        from modules.views_materializadas import ServicoViewsMaterializadas
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchone.return_value = {'obtido': False}
+
+        assert ServicoViewsMaterializadas(banco).atualizar('mv_dashboard_stats') is False
+        assert not any('REFRESH' in c[0][0] for c in cursor.execute.call_args_list)
+
+    def test_sla_check_failure_falls_back_to_live(self):
+        """Sem metadados ou com erro, o leitor vai para a consulta ao vivo"""
+        from modules.views_materializadas import ServicoViewsMaterializadas
+        banco = MagicMock()
+        cursor = cursor_context(banco, MagicMock())
+        cursor.fetchone.return_value = None
+        servico = ServicoViewsMaterializadas(banco)
+        assert servico.dentro_do_sla('mv_estoque_critico') is False
+
+        cursor.execute.side_effect = Exception('relação não existe')
+        assert servico.dentro_do_sla('mv_estoque_critico') is False
+
+    def test_migration_creates_unique_indexes(self):
+        """Cada view tem o índice único exigido pelo refresh concorrente"""
+        migracao = next(m for m in listar_migracoes() if m.nome == 'views_materializadas')
+        views = re.findall(r'CREATE MATERIALIZED VIEW (\w+)', migracao.sql)
+        assert sorted(views) == ['mv_dashboard_stats', 'mv_estoque_critico', 'mv_movimentacoes_resumo']
+        for view in views:
+            assert re.search(rf'CREATE UNIQUE INDEX \w+ ON {view} \(', migracao.sql), view